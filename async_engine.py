@@ -0,0 +1,266 @@
+"""
+异步监控引擎模块
+作者：ChiangShenhung
+开发工具：腾讯 Code Buddy CN
+版本：2.0
+设计思路和调试：ChiangShenhung
+
+功能说明：
+- 用 asyncio 替代"检查一次、休眠一段时间"的轮询循环
+- 发现新视频、启动任务、监督翻译进程、检测完成、收集清理结果分别由独立的协程负责，通过队列和事件衔接
+- 翻译进程通过 asyncio.create_subprocess_exec 启动，进程一退出立即检查字幕，空出的槽位立即用于启动新任务
+- FileMonitor 的业务逻辑全部在单个状态线程中串行执行，与旧版单线程语义一致，事件循环只负责等待
+"""
+
+import asyncio
+import concurrent.futures
+import logging
+import os
+import subprocess
+
+CREATE_NEW_CONSOLE = getattr(subprocess, "CREATE_NEW_CONSOLE", 0)
+
+
+class AsyncProcessHandle:
+    """
+    异步子进程句柄
+
+    为 asyncio 子进程提供与 subprocess.Popen 相同的 pid、poll()、kill()、wait() 接口，
+    供 FileMonitor 在状态线程中使用
+    """
+
+    def __init__(self, process, loop):
+        self.process = process
+        self.loop = loop
+        self.pid = process.pid
+
+    def poll(self):
+        """进程已退出时返回退出码，否则返回None"""
+        return self.process.returncode
+
+    def kill(self):
+        """在事件循环线程中终止进程"""
+        def _kill():
+            try:
+                self.process.kill()
+            except ProcessLookupError:
+                pass
+        self.loop.call_soon_threadsafe(_kill)
+
+    def wait(self, timeout=None):
+        """
+        等待进程退出（在状态线程中调用）
+
+        返回:
+            int: 进程退出码
+
+        异常:
+            subprocess.TimeoutExpired: 超时仍未退出
+        """
+        future = asyncio.run_coroutine_threadsafe(self.process.wait(), self.loop)
+        try:
+            return future.result(timeout)
+        except concurrent.futures.TimeoutError:
+            future.cancel()
+            raise subprocess.TimeoutExpired(str(self.pid), timeout)
+
+
+class AsyncMonitorEngine:
+    """
+    异步监控引擎
+
+    协程分工：
+    - discovery：每隔 discovery_interval 秒扫描下载目录，把新视频列表放入发现队列
+    - admission：收到新视频或有槽位空出时启动新任务；准入暂缓时每隔 check_interval 秒重试
+    - supervise：每个翻译进程一个，进程退出时把进程号放入退出队列
+    - completion：进程退出时立即检查字幕，没有退出事件时每隔 check_interval 秒兜底检查
+    - cleanup：后台清理线程完成一个任务时立即收集结果
+    """
+
+    def __init__(self, monitor, discovery_interval=10, check_interval=10):
+        """
+        初始化异步监控引擎
+
+        参数:
+            monitor: FileMonitor 实例
+            discovery_interval: 扫描下载目录的间隔（秒）
+            check_interval: 兜底检查完成状态和重试准入的间隔（秒）
+        """
+        self.monitor = monitor
+        self.discovery_interval = discovery_interval
+        self.check_interval = check_interval
+        self.logger = logging.getLogger(__name__)
+
+        # FileMonitor 的方法都在这一个线程中执行，避免与事件循环并发修改状态
+        self._state_executor = concurrent.futures.ThreadPoolExecutor(max_workers=1,
+                                                                     thread_name_prefix="monitor-state")
+        self._loop = None
+        self._stop_event = None
+        # run() 开始前调用 stop() 时记录下来，启动后立即退出
+        self._stop_requested = False
+        self._discovered = None
+        self._exits = None
+        self._slot_freed = None
+        self._cleanup_done = None
+        self._supervisors = set()
+
+    async def _call(self, func, *args):
+        """在状态线程中执行 FileMonitor 的方法"""
+        return await self._loop.run_in_executor(self._state_executor, func, *args)
+
+    def _launch_process(self, args, shell, cwd, env):
+        """
+        启动翻译进程（FileMonitor.process_launcher，在状态线程中调用）
+
+        返回:
+            AsyncProcessHandle: 进程句柄
+        """
+        future = asyncio.run_coroutine_threadsafe(self._spawn(args, shell, cwd, env), self._loop)
+        return future.result()
+
+    async def _spawn(self, args, shell, cwd, env):
+        """在事件循环中创建子进程并启动监督协程"""
+        if shell:
+            process = await asyncio.create_subprocess_shell(subprocess.list2cmdline(args), cwd=cwd, env=env,
+                                                            creationflags=CREATE_NEW_CONSOLE,
+                                                            start_new_session=os.name != "nt")
+        else:
+            process = await asyncio.create_subprocess_exec(*args, cwd=cwd, env=env,
+                                                           creationflags=CREATE_NEW_CONSOLE,
+                                                           start_new_session=os.name != "nt")
+        task = asyncio.ensure_future(self._supervise(process))
+        self._supervisors.add(task)
+        task.add_done_callback(self._supervisors.discard)
+        return AsyncProcessHandle(process, self._loop)
+
+    async def _supervise(self, process):
+        """等待翻译进程退出，通知完成检测协程"""
+        returncode = await process.wait()
+        self.logger.debug(f"翻译进程已退出（PID {process.pid}，退出码 {returncode}）")
+        await self._exits.put(process.pid)
+
+    def _on_cleanup_result(self):
+        """后台清理线程完成一个任务时调用（在清理线程中）"""
+        if self._loop is not None:
+            self._loop.call_soon_threadsafe(self._cleanup_done.set)
+
+    async def _wait_or_stop(self, awaitable, timeout):
+        """等待事件或队列，超时或引擎停止时返回None"""
+        try:
+            return await asyncio.wait_for(awaitable, timeout)
+        except asyncio.TimeoutError:
+            return None
+
+    async def _discovery_task(self):
+        """定期扫描下载目录"""
+        while not self._stop_event.is_set():
+            try:
+                new_video_files = await self._call(self.monitor.check_new_video_files)
+                if new_video_files:
+                    await self._discovered.put(new_video_files)
+            except Exception as e:
+                self.logger.error(f"扫描新视频出错: {e}")
+            await self._wait_or_stop(self._stop_event.wait(), self.discovery_interval)
+
+    async def _admission_task(self):
+        """收到新视频或有槽位空出时启动新任务"""
+        while not self._stop_event.is_set():
+            discovered = asyncio.ensure_future(self._discovered.get())
+            freed = asyncio.ensure_future(self._slot_freed.wait())
+            stopping = asyncio.ensure_future(self._stop_event.wait())
+            done, pending = await asyncio.wait({discovered, freed, stopping}, timeout=self.check_interval,
+                                               return_when=asyncio.FIRST_COMPLETED)
+            for task in pending:
+                task.cancel()
+            if self._stop_event.is_set():
+                return
+
+            new_video_files = None
+            if discovered in done:
+                new_video_files = discovered.result()
+                # 只使用最新一次扫描结果
+                while not self._discovered.empty():
+                    new_video_files = self._discovered.get_nowait()
+            if freed in done or new_video_files is None:
+                # 槽位空出或定时重试：重新扫描，确保看到最新的视频列表
+                new_video_files = None
+            self._slot_freed.clear()
+
+            try:
+                await self._call(self.monitor._admit_new_jobs, new_video_files)
+            except Exception as e:
+                self.logger.error(f"启动新任务出错: {e}")
+
+    async def _completion_task(self):
+        """进程退出时立即检查完成状态，否则定期兜底检查"""
+        while not self._stop_event.is_set():
+            pid = await self._wait_or_stop(self._exits.get(), self.check_interval)
+            if self._stop_event.is_set():
+                return
+            # 合并同一时刻退出的多个进程
+            while not self._exits.empty():
+                self._exits.get_nowait()
+            try:
+                completed_files = await self._call(self.monitor._check_completions)
+            except Exception as e:
+                self.logger.error(f"检查任务完成状态出错: {e}")
+                continue
+            if pid is not None or completed_files:
+                self._slot_freed.set()
+
+    async def _cleanup_task(self):
+        """后台清理完成时立即收集结果"""
+        while not self._stop_event.is_set():
+            await self._wait_or_stop(self._cleanup_done.wait(), self.check_interval)
+            if self._stop_event.is_set():
+                return
+            self._cleanup_done.clear()
+            try:
+                completed_files = await self._call(self.monitor._collect_cleanup_results)
+            except Exception as e:
+                self.logger.error(f"收集清理结果出错: {e}")
+                continue
+            if completed_files:
+                self.logger.info(f"完成了 {len(completed_files)} 个文件: {completed_files}")
+                # 清理完成后释放了磁盘预留，可能可以启动被暂缓的任务
+                self._slot_freed.set()
+
+    async def run(self):
+        """运行引擎直到 stop() 被调用"""
+        self._stop_event = asyncio.Event()
+        self._loop = asyncio.get_running_loop()
+        if self._stop_requested:
+            self._stop_event.set()
+        self._discovered = asyncio.Queue()
+        self._exits = asyncio.Queue()
+        self._slot_freed = asyncio.Event()
+        self._cleanup_done = asyncio.Event()
+
+        self.monitor.process_launcher = self._launch_process
+        self.monitor.cleanup_worker.on_result = self._on_cleanup_result
+        self.logger.info("异步监控引擎已启动")
+        tasks = [asyncio.ensure_future(coro) for coro in (
+            self._discovery_task(), self._admission_task(),
+            self._completion_task(), self._cleanup_task())]
+        try:
+            await self._stop_event.wait()
+        finally:
+            for task in tasks + list(self._supervisors):
+                task.cancel()
+            await asyncio.gather(*tasks, *self._supervisors, return_exceptions=True)
+            self.monitor.process_launcher = None
+            self.monitor.cleanup_worker.on_result = None
+            self._state_executor.shutdown(wait=True)
+            self._loop = None
+            self.logger.info("异步监控引擎已停止")
+
+    def run_forever(self):
+        """在当前线程中运行引擎（阻塞）"""
+        asyncio.run(self.run())
+
+    def stop(self):
+        """停止引擎（可在任意线程中调用，run() 开始前调用时引擎启动后立即停止）"""
+        self._stop_requested = True
+        loop = self._loop
+        if loop is not None:
+            loop.call_soon_threadsafe(self._stop_event.set)
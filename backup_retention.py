@@ -0,0 +1,209 @@
+"""
+备份目录保留策略模块
+作者：ChiangShenhung
+开发工具：腾讯 Code Buddy CN
+版本：2.0
+设计思路和调试：ChiangShenhung
+
+功能说明：
+- 维护备份文件索引（文件名、大小、修改时间），保存在备份目录的 .backup_index.json 中
+- 每次备份后更新索引，执行配额检查时不需要遍历整个目录
+- 按总大小上限和最长保留天数两种配额，从最旧的文件开始删除
+- 后台线程定期检查，每轮最多删除固定数量的文件，避免一次性大量删除
+"""
+
+import json
+import logging
+import os
+import threading
+import time
+
+# 索引文件名（位于备份目录中）
+INDEX_FILENAME = ".backup_index.json"
+
+
+class BackupRetention:
+    """
+    备份目录保留管理器
+
+    主要功能：
+    - record() 在备份完成后登记文件并唤醒后台线程
+    - enforce() 按配额从最旧的文件开始删除，返回本轮删除的文件列表
+    - start()/stop() 启动/停止后台检查线程
+
+    说明:
+        max_bytes 和 max_age_seconds 为0时表示不限制；
+        索引文件不存在时启动时遍历一次目录重建索引
+    """
+
+    def __init__(self, backup_dir, max_bytes=0, max_age_seconds=0,
+                 max_evictions_per_pass=20, check_interval=300, clock=time.time):
+        """
+        初始化保留管理器
+
+        参数:
+            backup_dir: 备份目录
+            max_bytes: 备份目录总大小上限（字节）
+            max_age_seconds: 备份文件最长保留时间（秒）
+            max_evictions_per_pass: 每轮最多删除的文件数
+            check_interval: 后台检查间隔（秒）
+            clock: 时间函数（便于测试）
+        """
+        self.backup_dir = backup_dir
+        self.index_path = os.path.join(backup_dir, INDEX_FILENAME)
+        self.max_bytes = max_bytes
+        self.max_age_seconds = max_age_seconds
+        self.max_evictions_per_pass = max_evictions_per_pass
+        self.check_interval = check_interval
+        self.clock = clock
+        self.logger = logging.getLogger(__name__)
+
+        self._lock = threading.Lock()
+        self._wakeup = threading.Event()
+        self._stopping = threading.Event()
+        self._thread = None
+        self._index = self._load_index()
+
+    def is_enabled(self):
+        """是否设置了任一配额"""
+        return bool(self.max_bytes or self.max_age_seconds)
+
+    def _load_index(self):
+        """加载索引文件，不存在或损坏时遍历备份目录重建"""
+        try:
+            with open(self.index_path, 'r', encoding='utf-8') as f:
+                return json.load(f)
+        except FileNotFoundError:
+            pass
+        except (OSError, ValueError) as e:
+            self.logger.warning(f"备份索引文件损坏，重新建立: {e}")
+        return self._scan_directory()
+
+    def _scan_directory(self):
+        """遍历备份目录建立索引"""
+        index = {}
+        try:
+            entries = list(os.scandir(self.backup_dir))
+        except OSError:
+            return index
+        for entry in entries:
+            if entry.name.startswith(".") or entry.name.endswith(".part") or not entry.is_file():
+                continue
+            try:
+                stat = entry.stat()
+            except OSError:
+                continue
+            # 移动后的文件保留原视频的修改时间，取修改时间和ctime中较晚者近似备份时间
+            index[entry.name] = {"size": stat.st_size, "mtime": max(stat.st_mtime, stat.st_ctime)}
+        if index:
+            self.logger.info(f"已建立备份索引: {len(index)} 个文件")
+        return index
+
+    def _save_index(self):
+        """保存索引文件（先写临时文件再替换）"""
+        try:
+            os.makedirs(self.backup_dir, exist_ok=True)
+            temp_path = self.index_path + ".tmp"
+            with open(temp_path, 'w', encoding='utf-8') as f:
+                json.dump(self._index, f, ensure_ascii=False)
+            os.replace(temp_path, self.index_path)
+        except OSError as e:
+            self.logger.error(f"保存备份索引失败: {e}")
+
+    def record(self, backup_path):
+        """
+        登记一个新的备份文件
+
+        参数:
+            backup_path: 备份文件路径
+        """
+        try:
+            stat = os.stat(backup_path)
+        except OSError:
+            return
+        with self._lock:
+            # 使用登记时间作为保留期起点（移动后的文件保留原视频的修改时间）
+            self._index[os.path.basename(backup_path)] = {"size": stat.st_size, "mtime": self.clock()}
+            self._save_index()
+        self._wakeup.set()
+
+    def total_bytes(self):
+        """获取索引中备份文件总大小（字节）"""
+        with self._lock:
+            return sum(item["size"] for item in self._index.values())
+
+    def enforce(self):
+        """
+        执行一轮配额检查
+
+        返回:
+            list: 本轮删除的文件名列表
+
+        说明:
+            先删除超过保留期的文件，再从最旧的文件开始删除直到总大小不超过上限；
+            每轮最多删除 max_evictions_per_pass 个文件，剩余的留到下一轮
+        """
+        if not self.is_enabled():
+            return []
+
+        with self._lock:
+            now = self.clock()
+            oldest_first = sorted(self._index.items(), key=lambda item: item[1]["mtime"])
+            total = sum(item["size"] for _, item in oldest_first)
+            attempts = 0
+            evicted = []
+            for name, item in oldest_first:
+                if attempts >= self.max_evictions_per_pass:
+                    break
+                expired = self.max_age_seconds and now - item["mtime"] > self.max_age_seconds
+                over_quota = self.max_bytes and total > self.max_bytes
+                if not (expired or over_quota):
+                    break
+                attempts += 1
+                try:
+                    os.remove(os.path.join(self.backup_dir, name))
+                except FileNotFoundError:
+                    # 已被手动删除，只需移出索引
+                    pass
+                except OSError as e:
+                    # 删除失败的文件仍占用空间，不计入已释放的大小，继续尝试下一个
+                    self.logger.warning(f"删除过期备份失败: {name}, 错误: {e}")
+                    continue
+                self._index.pop(name, None)
+                evicted.append(name)
+                total -= item["size"]
+
+            if evicted:
+                self._save_index()
+                self.logger.info(f"备份目录超出保留配额，已删除 {len(evicted)} 个最旧的备份，"
+                                 f"剩余 {total / 1024 / 1024 / 1024:.2f}GB")
+        return evicted
+
+    def start(self):
+        """启动后台检查线程"""
+        if not self.is_enabled() or self._thread is not None:
+            return
+        self._stopping.clear()
+        self._thread = threading.Thread(target=self._run, name="backup-retention", daemon=True)
+        self._thread.start()
+
+    def stop(self, timeout=None):
+        """停止后台检查线程"""
+        self._stopping.set()
+        self._wakeup.set()
+        if self._thread is not None:
+            self._thread.join(timeout)
+            self._thread = None
+
+    def _run(self):
+        """后台线程：定期或有新备份时执行配额检查，每轮未删完则立即继续"""
+        while not self._stopping.is_set():
+            try:
+                evicted = self.enforce()
+            except Exception as e:
+                self.logger.error(f"备份保留检查出错: {e}")
+                evicted = []
+            if len(evicted) >= self.max_evictions_per_pass:
+                continue
+            self._wakeup.wait(self.check_interval)
+            self._wakeup.clear()
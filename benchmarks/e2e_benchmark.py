@@ -0,0 +1,317 @@
+#!/usr/bin/env python3
+"""
+端到端基准测试
+作者：ChiangShenhung
+开发工具：腾讯 Code Buddy CN
+版本：2.0
+设计思路和调试：ChiangShenhung
+
+功能说明：
+- 在临时目录中按设定的到达方式（一次性/均匀/泊松）生成模拟下载的视频文件
+- 用 fake_translator.py 模拟翻译工具（可设定耗时、波动和失败率），无界面驱动 FileMonitor 处理全部文件
+- 统计发现延迟、槽位利用率、吞吐量、到达到字幕完成的 p50/p95 耗时以及监控程序自身的CPU时间
+- 结果输出为JSON，便于跟踪性能回归
+
+使用方法：
+    python benchmarks/e2e_benchmark.py --files 50 --slots 4 --delay 2 --fail-rate 0.1 --output result.json
+"""
+
+import argparse
+import copy
+import json
+import os
+import platform
+import random
+import shutil
+import sys
+import tempfile
+import threading
+import time
+
+REPO_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, REPO_DIR)
+
+from config import CONFIG  # noqa: E402
+from job_state import DONE, QUARANTINED  # noqa: E402
+from job_trace import SPAN_NAMES, PHASE_DISCOVERED, PHASE_SUBTITLE_COMPLETE  # noqa: E402
+from log_pipeline import setup_logging, shutdown_logging  # noqa: E402
+
+FAKE_TRANSLATOR = os.path.join(REPO_DIR, "fake_translator.py")
+
+
+def percentile(values, pct):
+    """
+    计算百分位数（最近秩法）
+
+    参数:
+        values: 数值列表
+        pct: 百分位（0~100）
+
+    返回:
+        float: 百分位数，列表为空时返回None
+    """
+    if not values:
+        return None
+    ordered = sorted(values)
+    rank = max(int(round(pct / 100 * len(ordered) + 0.5)) - 1, 0)
+    return ordered[min(rank, len(ordered) - 1)]
+
+
+def arrival_offsets(count, process, rate, seed):
+    """
+    生成每个文件的到达时间（相对开始时刻的秒数）
+
+    参数:
+        count: 文件数
+        process: 到达方式，burst（一次性全部到达）、uniform（均匀到达）、poisson（泊松到达）
+        rate: 每秒到达的文件数（uniform/poisson）
+        seed: 随机种子
+
+    返回:
+        list: 到达时间列表
+    """
+    if process == "burst" or rate <= 0:
+        return [0.0] * count
+    if process == "uniform":
+        return [i / rate for i in range(count)]
+    rng = random.Random(seed)
+    offsets, now = [], 0.0
+    for _ in range(count):
+        offsets.append(now)
+        now += rng.expovariate(rate)
+    return offsets
+
+
+class SyntheticDownloads:
+    """按到达时间在下载目录中生成模拟视频文件（先写临时文件再改名，模拟下载完成）"""
+
+    def __init__(self, download_dir, offsets, size_mb, size_jitter, seed):
+        self.download_dir = download_dir
+        self.offsets = offsets
+        self.size_mb = size_mb
+        self.size_jitter = size_jitter
+        self.rng = random.Random(seed)
+        self.arrivals = {}
+        self._thread = None
+        self._stop = threading.Event()
+
+    def _create(self, index):
+        filename = f"bench_{index:05d}.mp4"
+        size = int(self.size_mb * 1024 * 1024 * (1 + self.rng.uniform(-self.size_jitter, self.size_jitter)))
+        temp_path = os.path.join(self.download_dir, filename + ".part")
+        with open(temp_path, 'wb') as f:
+            # 稀疏文件：大小真实但不占用磁盘写入时间
+            f.truncate(max(size, 1))
+        os.replace(temp_path, os.path.join(self.download_dir, filename))
+        self.arrivals[filename] = time.time()
+
+    def _run(self, start):
+        for index, offset in enumerate(self.offsets):
+            delay = start + offset - time.time()
+            if delay > 0 and self._stop.wait(delay):
+                return
+            self._create(index)
+
+    def start(self, start):
+        self._thread = threading.Thread(target=self._run, args=(start,), name="synthetic-downloads", daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+        if self._thread:
+            self._thread.join()
+
+
+def job_timeline(trace):
+    """
+    从任务时间线中取出每个任务的发现时间、字幕完成时间和槽位占用时长
+
+    返回:
+        tuple: (发现时间字典, 字幕完成时间字典, 槽位占用总秒数)
+    """
+    discovered, subtitle_done = {}, {}
+    busy_seconds = 0.0
+    for event in trace["traceEvents"]:
+        job = event.get("args", {}).get("job")
+        if event["ph"] == "X":
+            busy_seconds += event["dur"] / 1e6
+        if event["ph"] in ("b", "X") and job:
+            ts = event["ts"] / 1e6
+            if event["name"] == SPAN_NAMES[PHASE_DISCOVERED]:
+                discovered.setdefault(job, ts)
+            elif event["name"] == SPAN_NAMES[PHASE_SUBTITLE_COMPLETE]:
+                subtitle_done[job] = ts
+    return discovered, subtitle_done, busy_seconds
+
+
+def build_config(workdir, args):
+    """生成基准测试使用的监控配置"""
+    config = copy.deepcopy(CONFIG)
+    tool_dir = os.path.join(workdir, "tool")
+    os.makedirs(tool_dir)
+    open(os.path.join(tool_dir, "run.bat"), 'w').close()
+    config.update(
+        DOWNLOAD_DIR=os.path.join(workdir, "downloads"),
+        SUBTITLE_DIR=os.path.join(workdir, "subtitles"),
+        TRANSLATE_BAT=os.path.join(tool_dir, "run.bat"),
+        TRANSLATOR_EXE=FAKE_TRANSLATOR,
+        LOG_FILE=os.path.join(workdir, "subtitle_monitor.log"),
+        CHECK_INTERVAL=args.check_interval,
+        DELETE_MODE="delete",
+        GPU_TYPE="基准测试",
+    )
+    config["GPU_DETECTION"] = dict(config["GPU_DETECTION"], ENABLED=False,
+                                   MAX_TASKS_BY_GPU_TYPE={"基准测试": args.slots})
+    config["GPU_ADMISSION"] = dict(config.get("GPU_ADMISSION", {}), ENABLED=False)
+    config["AUTO_TUNE"] = dict(config.get("AUTO_TUNE", {}), ENABLED=False)
+    config["RETRY"] = dict(config["RETRY"], BASE_DELAY_SECONDS=args.retry_delay, MAX_DELAY_SECONDS=args.retry_delay)
+    config["ASYNC_ENGINE"] = dict(config["ASYNC_ENGINE"], ENABLED=args.engine == "async",
+                                  DISCOVERY_INTERVAL_SECONDS=args.discovery_interval)
+    config["ORPHAN_SCAN"] = dict(config.get("ORPHAN_SCAN", {}), ENABLED=False)
+    # 结束时终止仍在运行的模拟翻译进程
+    config["RECOVERY"] = dict(config.get("RECOVERY", {}), KEEP_CHILDREN_ON_EXIT=False)
+    config["TRACE"] = dict(config.get("TRACE", {}), ENABLED=True, MAX_EVENTS=max(args.files * 40, 1000))
+    os.makedirs(config["DOWNLOAD_DIR"])
+    os.makedirs(config["SUBTITLE_DIR"])
+    return config
+
+
+def run_benchmark(args):
+    """
+    运行一次端到端基准测试
+
+    返回:
+        dict: 参数和结果
+    """
+    workdir = tempfile.mkdtemp(prefix="subtitle_bench_")
+    original_cwd = os.getcwd()
+    os.environ.update(FAKE_TRANSLATOR_DELAY=str(args.delay),
+                      FAKE_TRANSLATOR_DELAY_JITTER=str(args.delay_jitter),
+                      FAKE_TRANSLATOR_FAIL_RATE=str(args.fail_rate),
+                      FAKE_TRANSLATOR_CUES=str(args.cues),
+                      FAKE_TRANSLATOR_SEED=str(args.seed),
+                      FAKE_TRANSLATOR_RECORD=os.path.join(workdir, "fake_translator_record.jsonl"))
+    try:
+        # 状态文件使用相对路径，切换到临时目录避免影响正式数据
+        os.chdir(workdir)
+        config = build_config(workdir, args)
+        setup_logging(config["LOG_FILE"], console=args.verbose)
+        from file_monitor import FileMonitor
+        monitor = FileMonitor(config)
+
+        offsets = arrival_offsets(args.files, args.arrival, args.rate, args.seed)
+        downloads = SyntheticDownloads(config["DOWNLOAD_DIR"], offsets, args.size_mb, args.size_jitter, args.seed)
+        engine = None
+        engine_thread = None
+        cpu_start = time.process_time()
+        start = time.time()
+        downloads.start(start)
+        if args.engine == "async":
+            engine = monitor.create_async_engine()
+            engine_thread = threading.Thread(target=engine.run_forever, name="bench-engine", daemon=True)
+            engine_thread.start()
+
+        deadline = start + args.timeout
+        finished = {}
+        while time.time() < deadline:
+            if engine is None:
+                monitor.monitor_once()
+            for filename in list(downloads.arrivals):
+                if filename not in finished:
+                    state = monitor.status_manager.get_job_state(filename)
+                    if state in (DONE, QUARANTINED):
+                        finished[filename] = state
+            if len(finished) == args.files:
+                break
+            time.sleep(args.check_interval if engine is None else 0.2)
+        wall_seconds = time.time() - start
+
+        if engine is not None:
+            engine.stop()
+            engine_thread.join(timeout=30)
+        downloads.stop()
+        monitor.cleanup_worker.stop(timeout=30)
+        monitor._cleanup_processing_on_exit()
+        cpu_seconds = time.process_time() - cpu_start
+
+        trace = monitor.tracer.export()
+        discovered, subtitle_done, busy_seconds = job_timeline(trace)
+        arrivals = downloads.arrivals
+        discovery_latency = [discovered[f] - arrivals[f] for f in arrivals if f in discovered]
+        time_to_subtitle = [subtitle_done[f] - arrivals[f] for f in arrivals if f in subtitle_done]
+        completed = sum(1 for state in finished.values() if state == DONE)
+
+        def summary(values):
+            return {"p50": percentile(values, 50), "p95": percentile(values, 95),
+                    "max": max(values) if values else None, "count": len(values)}
+
+        results = {
+            "files": args.files,
+            "completed": completed,
+            "quarantined": sum(1 for state in finished.values() if state == QUARANTINED),
+            "unfinished": args.files - len(finished),
+            "failed_attempts": monitor.metrics.jobs_failed.value(),
+            "wall_seconds": wall_seconds,
+            "throughput_files_per_minute": completed / wall_seconds * 60 if wall_seconds else 0,
+            "discovery_latency_seconds": summary(discovery_latency),
+            "time_to_subtitle_seconds": summary(time_to_subtitle),
+            "slot_utilisation": busy_seconds / (monitor.max_concurrent_tasks * wall_seconds) if wall_seconds else 0,
+            "monitor_cpu_seconds": cpu_seconds,
+            "monitor_cpu_seconds_per_file": cpu_seconds / args.files if args.files else 0,
+        }
+        return {
+            "benchmark": "e2e",
+            "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S"),
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "params": vars(args),
+            "results": results,
+        }
+    finally:
+        shutdown_logging()
+        os.chdir(original_cwd)
+        if not args.keep:
+            shutil.rmtree(workdir, ignore_errors=True)
+        else:
+            print(f"工作目录已保留: {workdir}", file=sys.stderr)
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="端到端基准测试：模拟下载目录 + 模拟翻译工具")
+    parser.add_argument("--files", type=int, default=20, help="视频文件数")
+    parser.add_argument("--size-mb", type=float, default=100, help="视频文件平均大小（MB，稀疏文件）")
+    parser.add_argument("--size-jitter", type=float, default=0.5, help="文件大小的随机波动比例")
+    parser.add_argument("--arrival", choices=("burst", "uniform", "poisson"), default="poisson", help="文件到达方式")
+    parser.add_argument("--rate", type=float, default=2.0, help="每秒到达的文件数（uniform/poisson）")
+    parser.add_argument("--delay", type=float, default=2.0, help="模拟翻译耗时（秒）")
+    parser.add_argument("--delay-jitter", type=float, default=0.3, help="翻译耗时的随机波动比例")
+    parser.add_argument("--fail-rate", type=float, default=0.0, help="模拟翻译失败的概率")
+    parser.add_argument("--cues", type=int, default=40, help="每个字幕文件的条数")
+    parser.add_argument("--slots", type=int, default=4, help="并发任务数")
+    parser.add_argument("--engine", choices=("async", "poll"), default="async", help="驱动方式：异步引擎或轮询")
+    parser.add_argument("--check-interval", type=float, default=1.0, help="检查间隔（秒）")
+    parser.add_argument("--discovery-interval", type=float, default=1.0, help="扫描下载目录的间隔（秒，异步引擎）")
+    parser.add_argument("--retry-delay", type=float, default=1.0, help="失败后重试的等待时间（秒）")
+    parser.add_argument("--timeout", type=float, default=600, help="最长运行时间（秒）")
+    parser.add_argument("--seed", type=int, default=1, help="随机种子")
+    parser.add_argument("--output", help="结果JSON文件路径（默认输出到标准输出）")
+    parser.add_argument("--keep", action="store_true", help="保留临时工作目录")
+    parser.add_argument("--verbose", action="store_true", help="在控制台输出监控日志")
+    return parser.parse_args(argv)
+
+
+def main(argv=None):
+    args = parse_args(argv)
+    result = run_benchmark(args)
+    text = json.dumps(result, ensure_ascii=False, indent=2)
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as f:
+            f.write(text + "\n")
+        print(f"结果已写入: {args.output}", file=sys.stderr)
+    else:
+        print(text)
+    return 0 if result["results"]["unfinished"] == 0 else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
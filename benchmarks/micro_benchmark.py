@@ -0,0 +1,277 @@
+#!/usr/bin/env python3
+"""
+微基准测试
+作者：ChiangShenhung
+开发工具：腾讯 Code Buddy CN
+版本：2.0
+设计思路和调试：ChiangShenhung
+
+功能说明：
+- 测量 StatusManager 的 is_file_processed、mark_as_completed、_save_status、_load_status、
+  cleanup_stale_processing 在 1千/1万/10万条已处理记录下的单次耗时
+- 测量 FileMonitor 的 get_video_files、check_new_video_files 在 1万/10万个文件的下载目录中的单次耗时
+- 保存基线，compare 命令与基线比较，任一项变慢超过容差时以非零退出码退出
+
+使用方法：
+    python benchmarks/micro_benchmark.py run --output result.json
+    python benchmarks/micro_benchmark.py baseline            # 保存为基线
+    python benchmarks/micro_benchmark.py compare --tolerance 0.5
+"""
+
+import argparse
+import copy
+import json
+import os
+import platform
+import shutil
+import statistics
+import sys
+import tempfile
+import time
+import timeit
+
+REPO_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, REPO_DIR)
+
+from config import CONFIG  # noqa: E402
+from job_state import DONE, STABLE  # noqa: E402
+from log_pipeline import setup_logging, shutdown_logging  # noqa: E402
+
+DEFAULT_BASELINE = os.path.join(os.path.dirname(os.path.abspath(__file__)), "baselines", "micro_baseline.json")
+STATUS_SIZES = (1000, 10000, 100000)
+DIRECTORY_SIZES = (10000, 100000)
+QUICK_STATUS_SIZES = (1000, 10000)
+QUICK_DIRECTORY_SIZES = (10000,)
+
+
+def measure(func, repeat=7, min_time=0.2):
+    """
+    测量函数单次调用耗时（只用于不修改数据的函数）
+
+    参数:
+        func: 无参数函数
+        repeat: 重复测量次数，取中位数
+        min_time: 每次测量至少运行的秒数
+
+    返回:
+        float: 单次调用耗时（秒）
+    """
+    timer = timeit.Timer(func)
+    number, elapsed = timer.autorange()
+    if elapsed < min_time:
+        number = max(int(number * min_time / max(elapsed, 1e-9)), 1)
+    return statistics.median(timer.repeat(repeat=repeat, number=number)) / number
+
+
+def measure_calls(func, setup, calls=5, repeat=7):
+    """
+    测量会修改数据的函数的单次调用耗时
+
+    参数:
+        func: 接收调用序号的函数
+        setup: 每次测量前调用，把数据恢复为原始状态（保证每次测量的数据规模相同）
+        calls: 每次测量调用的次数（固定次数，数据不会随测量时长增长）
+        repeat: 重复测量次数，取中位数
+
+    返回:
+        float: 单次调用耗时（秒）
+    """
+    timings = []
+    for _ in range(repeat):
+        setup()
+        start = time.perf_counter()
+        for i in range(calls):
+            func(i)
+        timings.append((time.perf_counter() - start) / calls)
+    return statistics.median(timings)
+
+
+def build_status(size, processing=8):
+    """
+    生成包含 size 条已处理记录的状态数据
+
+    参数:
+        size: 已处理文件数
+        processing: 处理中的任务数（供 cleanup_stale_processing 遍历）
+    """
+    now = time.strftime("%Y-%m-%d %H:%M:%S")
+    names = [f"video_{i:06d}.mp4" for i in range(size)]
+    return {
+        "processed": names,
+        "processing": {f"running_{i}.mp4": {"start_time": now, "file_path": ""} for i in range(processing)},
+        "jobs": {name: {"state": DONE, "updated_at": now, "history": [{"state": DONE, "time": now, "reason": ""}]}
+                 for name in names},
+    }
+
+
+def bench_status_manager(workdir, sizes, results):
+    """StatusManager 各方法在不同记录数下的耗时"""
+    from status_manager import StatusManager
+    for size in sizes:
+        status_file = os.path.join(workdir, f"status_{size}.json")
+        fixture = json.dumps(build_status(size), ensure_ascii=False, indent=2)
+        manager = StatusManager()
+        manager.status_file = status_file
+
+        def reset():
+            # mark_as_completed 会增加记录并保存，每次测量前恢复原始状态文件
+            with open(status_file, 'w', encoding='utf-8') as f:
+                f.write(fixture)
+            manager._load_status()
+
+        reset()
+        missing = os.path.join(workdir, "not_processed.mp4")
+        results[f"status.is_file_processed[{size}]"] = measure(lambda: manager.is_file_processed(missing))
+        results[f"status._save_status[{size}]"] = measure(manager._save_status, min_time=0.1)
+        results[f"status._load_status[{size}]"] = measure(manager._load_status, min_time=0.1)
+        results[f"status.cleanup_stale_processing[{size}]"] = measure(manager.cleanup_stale_processing,
+                                                                       min_time=0.1)
+        results[f"status.mark_as_completed[{size}]"] = measure_calls(
+            lambda i: manager.mark_as_completed(os.path.join(workdir, f"new_{i}.mp4")), reset)
+        print(f"  StatusManager {size} 条记录完成", file=sys.stderr)
+
+
+def bench_directory_scan(workdir, sizes, results):
+    """下载目录扫描在不同文件数下的耗时（稳定状态：所有文件都已确认可读，等待调度）"""
+    from file_monitor import FileMonitor
+    for size in sizes:
+        download_dir = os.path.join(workdir, f"downloads_{size}")
+        os.makedirs(download_dir)
+        now = time.strftime("%Y-%m-%d %H:%M:%S")
+        jobs = {}
+        for i in range(size):
+            name = f"video_{i:06d}.mp4"
+            open(os.path.join(download_dir, name), 'wb').close()
+            jobs[name] = {"state": STABLE, "updated_at": now, "history": []}
+        status_file = os.path.join(workdir, f"scan_status_{size}.json")
+        with open(status_file, 'w', encoding='utf-8') as f:
+            json.dump({"processed": [], "processing": {}, "jobs": jobs}, f, ensure_ascii=False)
+
+        config = copy.deepcopy(CONFIG)
+        config.update(DOWNLOAD_DIR=download_dir, SUBTITLE_DIR=os.path.join(workdir, "subtitles"),
+                      TRANSLATE_BAT=os.path.join(workdir, "run.bat"), LOG_FILE=os.path.join(workdir, "bench.log"))
+        config["GPU_DETECTION"] = dict(config["GPU_DETECTION"], ENABLED=False)
+        config["ORPHAN_SCAN"] = dict(config.get("ORPHAN_SCAN", {}), ENABLED=False)
+        monitor = FileMonitor(config)
+        monitor.status_manager.status_file = status_file
+        monitor.status_manager._load_status()
+
+        results[f"scan.get_video_files[{size}]"] = measure(monitor.get_video_files, min_time=0.1)
+        results[f"scan.check_new_video_files[{size}]"] = measure(monitor.check_new_video_files, min_time=0.1)
+        monitor.cleanup_worker.stop(timeout=5)
+        shutil.rmtree(download_dir, ignore_errors=True)
+        print(f"  目录扫描 {size} 个文件完成", file=sys.stderr)
+
+
+def run_benchmarks(status_sizes, directory_sizes):
+    """
+    运行全部微基准测试
+
+    返回:
+        dict: 结果（results 中为每项的单次耗时，单位秒）
+    """
+    workdir = tempfile.mkdtemp(prefix="subtitle_micro_")
+    original_cwd = os.getcwd()
+    results = {}
+    try:
+        # 状态文件使用相对路径，切换到临时目录避免影响正式数据
+        os.chdir(workdir)
+        setup_logging(os.path.join(workdir, "bench.log"), console=False)
+        bench_status_manager(workdir, status_sizes, results)
+        bench_directory_scan(workdir, directory_sizes, results)
+    finally:
+        shutdown_logging()
+        os.chdir(original_cwd)
+        shutil.rmtree(workdir, ignore_errors=True)
+    return {
+        "benchmark": "micro",
+        "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "unit": "seconds_per_call",
+        "results": results,
+    }
+
+
+def compare(current, baseline, tolerance):
+    """
+    与基线比较
+
+    参数:
+        current: 本次结果
+        baseline: 基线结果
+        tolerance: 允许变慢的比例（0.5 表示慢50%以内不算回归）
+
+    返回:
+        list: 回归的项目名称列表
+    """
+    regressions = []
+    print(f"{'项目':<45}{'基线':>12}{'本次':>12}{'变化':>10}")
+    for name, base in sorted(baseline["results"].items()):
+        value = current["results"].get(name)
+        if value is None:
+            print(f"{name:<45}{base * 1000:>10.3f}ms{'(未测量)':>12}")
+            continue
+        change = value / base - 1 if base else 0
+        flag = ""
+        if change > tolerance:
+            flag = "  <- 回归"
+            regressions.append(name)
+        print(f"{name:<45}{base * 1000:>10.3f}ms{value * 1000:>10.3f}ms{change:>+10.1%}{flag}")
+    return regressions
+
+
+def write_json(path, data):
+    os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+    with open(path, 'w', encoding='utf-8') as f:
+        json.dump(data, f, ensure_ascii=False, indent=2)
+        f.write("\n")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="StatusManager 和目录扫描的微基准测试")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+    for name, help_text in (("run", "运行并输出结果"), ("baseline", "运行并保存为基线"),
+                            ("compare", "运行（或读取结果）并与基线比较，回归时返回非零退出码")):
+        sub = subparsers.add_parser(name, help=help_text)
+        sub.add_argument("--quick", action="store_true", help="只测量较小的规模（1千/1万条记录，1万个文件）")
+        sub.add_argument("--baseline", default=DEFAULT_BASELINE, help="基线文件路径")
+        if name == "run":
+            sub.add_argument("--output", help="结果JSON文件路径（默认输出到标准输出）")
+        if name == "compare":
+            sub.add_argument("--input", help="已有的结果JSON文件（不指定时重新运行）")
+            sub.add_argument("--tolerance", type=float, default=0.5, help="允许变慢的比例（单次运行的波动较大，默认0.5）")
+    args = parser.parse_args(argv)
+
+    if args.command == "compare" and args.input:
+        with open(args.input, 'r', encoding='utf-8') as f:
+            current = json.load(f)
+    else:
+        status_sizes = QUICK_STATUS_SIZES if args.quick else STATUS_SIZES
+        directory_sizes = QUICK_DIRECTORY_SIZES if args.quick else DIRECTORY_SIZES
+        current = run_benchmarks(status_sizes, directory_sizes)
+
+    if args.command == "run":
+        if args.output:
+            write_json(args.output, current)
+            print(f"结果已写入: {args.output}", file=sys.stderr)
+        else:
+            print(json.dumps(current, ensure_ascii=False, indent=2))
+        return 0
+    if args.command == "baseline":
+        write_json(args.baseline, current)
+        print(f"基线已保存: {args.baseline}", file=sys.stderr)
+        return 0
+
+    with open(args.baseline, 'r', encoding='utf-8') as f:
+        baseline = json.load(f)
+    regressions = compare(current, baseline, args.tolerance)
+    if regressions:
+        print(f"\n{len(regressions)} 项变慢超过 {args.tolerance:.0%}: {', '.join(regressions)}")
+        return 1
+    print(f"\n没有超过 {args.tolerance:.0%} 的回归")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
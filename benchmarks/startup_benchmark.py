@@ -0,0 +1,204 @@
+#!/usr/bin/env python3
+"""
+启动耗时基准测试
+作者：ChiangShenhung
+开发工具：腾讯 Code Buddy CN
+版本：2.0
+设计思路和调试：ChiangShenhung
+
+功能说明：
+- 导入耗时：用 python -X importtime 分别测量命令行入口（main）和图形界面入口（video_monitor_gui）的导入耗时，
+  列出自身耗时最多的模块
+- 命令行启动耗时：新进程中从导入 main 到 FileMonitor 创建完成的耗时，分别测量显卡检测缓存为空（冷启动）和已有缓存（热启动）
+- 图形界面启动耗时：新进程中从导入到窗口第一次绘制完成、以及显卡检测结果显示出来的耗时（需要图形显示环境，没有时跳过）
+- 每项运行多次取中位数，结果输出为JSON
+
+使用方法：
+    python benchmarks/startup_benchmark.py --runs 5 --output startup.json
+"""
+
+import argparse
+import json
+import os
+import platform
+import shutil
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+
+REPO_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# 命令行启动：与 main.py 相同的导入，再创建 FileMonitor
+CLI_SCRIPT = r'''
+import time
+start = time.perf_counter()
+import copy, json, os, sys
+import main
+import config
+from file_monitor import FileMonitor
+imported = time.perf_counter()
+cfg = copy.deepcopy(config.CONFIG)
+workdir = os.getcwd()
+cfg.update(DOWNLOAD_DIR=workdir, SUBTITLE_DIR=workdir, TRANSLATE_BAT=os.path.join(workdir, "run.bat"),
+           LOG_FILE=os.path.join(workdir, "startup.log"))
+cfg["GPU_DETECTION"] = dict(cfg["GPU_DETECTION"], ENABLED=sys.argv[1] == "1",
+                            CACHE_FILE=os.path.join(workdir, "gpu_inventory_cache.json"))
+cfg["ORPHAN_SCAN"] = dict(cfg.get("ORPHAN_SCAN", {}), ENABLED=False)
+monitor = FileMonitor(cfg)
+ready = time.perf_counter()
+monitor.cleanup_worker.stop(timeout=5)
+print(json.dumps({"import": imported - start, "ready": ready - start}))
+'''
+
+# 图形界面启动：创建窗口，等待第一次绘制和显卡检测结果
+GUI_SCRIPT = r'''
+import time
+start = time.perf_counter()
+import json
+import video_monitor_gui
+imported = time.perf_counter()
+try:
+    app = video_monitor_gui.VideoMonitorGUI()
+except Exception as e:
+    print(json.dumps({"skipped": f"无法创建窗口: {e}"}))
+    raise SystemExit(0)
+app.root.update()
+shown = time.perf_counter()
+deadline = shown + 60
+while app._gpu_detection_result is None and time.perf_counter() < deadline:
+    app.root.update()
+    time.sleep(0.01)
+detected = time.perf_counter()
+app.root.destroy()
+print(json.dumps({"import": imported - start, "window_shown": shown - start, "gpu_detected": detected - start}))
+'''
+
+
+def parse_importtime(stderr, top=10):
+    """
+    解析 -X importtime 的输出
+
+    参数:
+        stderr: python -X importtime 的标准错误输出
+        top: 列出自身耗时最多的模块数
+
+    返回:
+        dict: total（所有模块自身耗时之和，秒）和 top（[(模块, 自身耗时秒, 累计耗时秒), ...]）
+    """
+    modules = []
+    for line in stderr.splitlines():
+        if not line.startswith("import time:") or "self [us]" in line:
+            continue
+        self_us, cumulative_us, name = line[len("import time:"):].split("|", 2)
+        modules.append((name.strip(), int(self_us) / 1e6, int(cumulative_us) / 1e6))
+    modules.sort(key=lambda item: item[1], reverse=True)
+    return {"total": sum(item[1] for item in modules), "top": modules[:top]}
+
+
+def run_python(args, cwd):
+    """在新的解释器进程中运行，返回 (墙钟耗时, 标准输出, 标准错误)"""
+    env = dict(os.environ, PYTHONPATH=REPO_DIR + os.pathsep + os.environ.get("PYTHONPATH", ""))
+    start = time.perf_counter()
+    result = subprocess.run([sys.executable] + args, cwd=cwd, env=env, stdin=subprocess.DEVNULL,
+                            capture_output=True, text=True,
+                            encoding="utf-8", errors="replace", timeout=300)
+    elapsed = time.perf_counter() - start
+    if result.returncode != 0:
+        raise RuntimeError(f"子进程失败（退出码 {result.returncode}）: {result.stderr.strip()[-2000:]}")
+    return elapsed, result.stdout, result.stderr
+
+
+def measure_import(module, runs, workdir, top):
+    """测量导入耗时，取总耗时中位数的那次运行列出明细"""
+    samples = []
+    for _ in range(runs):
+        _, _, stderr = run_python(["-X", "importtime", "-c", f"import {module}"], workdir)
+        samples.append(parse_importtime(stderr, top))
+    samples.sort(key=lambda sample: sample["total"])
+    median = samples[len(samples) // 2]
+    return {"total_seconds": median["total"],
+            "top_self_seconds": [{"module": name, "self": own, "cumulative": cumulative}
+                                 for name, own, cumulative in median["top"]]}
+
+
+def summarize(samples):
+    """各项取中位数"""
+    return {key: statistics.median(sample[key] for sample in samples) for key in samples[0]}
+
+
+def measure_cli(runs, workdir, gpu_detection):
+    """命令行启动耗时：冷启动每次删除显卡检测缓存，热启动保留缓存"""
+    cache_file = os.path.join(workdir, "gpu_inventory_cache.json")
+    results = {}
+    for mode in ("cold", "warm"):
+        samples = []
+        for _ in range(runs):
+            if mode == "cold" and os.path.exists(cache_file):
+                os.remove(cache_file)
+            wall, stdout, _ = run_python(["-c", CLI_SCRIPT, "1" if gpu_detection else "0"], workdir)
+            sample = json.loads(stdout.strip().splitlines()[-1])
+            sample["process"] = wall
+            samples.append(sample)
+        results[mode] = summarize(samples)
+        if not gpu_detection:
+            # 不检测显卡时冷热启动相同，只测一次
+            break
+    return results
+
+
+def measure_gui(runs, workdir):
+    """图形界面启动耗时（没有图形显示环境时返回跳过原因）"""
+    samples = []
+    for _ in range(runs):
+        _, stdout, _ = run_python(["-c", GUI_SCRIPT], workdir)
+        sample = json.loads(stdout.strip().splitlines()[-1])
+        if "skipped" in sample:
+            return sample
+        samples.append(sample)
+    return summarize(samples)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="命令行和图形界面入口的导入及启动耗时基准测试")
+    parser.add_argument("--runs", type=int, default=5, help="每项运行次数（取中位数）")
+    parser.add_argument("--top", type=int, default=10, help="列出导入自身耗时最多的模块数")
+    parser.add_argument("--gpu-detection", choices=("on", "off"), default="on", help="命令行启动时是否检测显卡")
+    parser.add_argument("--skip-gui", action="store_true", help="不测量图形界面启动")
+    parser.add_argument("--output", help="结果JSON文件路径（默认输出到标准输出）")
+    args = parser.parse_args(argv)
+
+    gpu_detection = args.gpu_detection == "on"
+    workdir = tempfile.mkdtemp(prefix="subtitle_startup_")
+    try:
+        report = {
+            "benchmark": "startup",
+            "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S"),
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "runs": args.runs,
+            "gpu_detection": gpu_detection,
+            "import": {
+                "cli": measure_import("main", args.runs, workdir, args.top),
+                "gui": measure_import("video_monitor_gui", args.runs, workdir, args.top),
+            },
+            "startup": {"cli": measure_cli(args.runs, workdir, gpu_detection)},
+        }
+        if not args.skip_gui:
+            report["startup"]["gui"] = measure_gui(args.runs, workdir)
+    finally:
+        shutil.rmtree(workdir, ignore_errors=True)
+
+    text = json.dumps(report, ensure_ascii=False, indent=2)
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as f:
+            f.write(text + "\n")
+        print(f"结果已写入: {args.output}", file=sys.stderr)
+    else:
+        print(text)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
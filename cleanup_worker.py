@@ -0,0 +1,170 @@
+"""
+后台清理工作线程模块
+作者：ChiangShenhung
+开发工具：腾讯 Code Buddy CN
+版本：2.0
+设计思路和调试：ChiangShenhung
+
+功能说明：
+- 将原视频清理（移动到备份目录/回收站/删除）放到后台线程执行
+- 使用有界队列，队列已满时由调用方稍后重新提交
+- 清理结果通过结果队列返回，由监控线程统一处理（日志、统计）
+"""
+
+import logging
+import queue
+import threading
+import time
+
+
+class CleanupWorker:
+    """
+    后台清理工作线程池
+
+    主要功能：
+    - submit() 非阻塞提交清理任务，同一任务不会重复排队
+    - 工作线程调用清理函数，返回值连同任务键放入结果队列
+    - drain_results() 由监控线程调用，取出已完成的清理结果
+
+    说明:
+        workers 为0时不启动线程，submit() 直接同步执行清理函数（与旧版行为一致）
+    """
+
+    def __init__(self, cleanup_func, max_pending=32, workers=1):
+        """
+        初始化清理工作线程池
+
+        参数:
+            cleanup_func: 清理函数，接收任务键，返回值原样放入结果队列
+            max_pending: 最多排队的清理任务数
+            workers: 工作线程数量
+        """
+        self.cleanup_func = cleanup_func
+        self.workers = workers
+        # 每完成一个任务调用一次（在工作线程中，不带参数），用于唤醒等待结果的一方
+        self.on_result = None
+        self.logger = logging.getLogger(__name__)
+
+        self._queue = queue.Queue(maxsize=max_pending)
+        self._results = queue.Queue()
+        self._pending = set()
+        self._pending_lock = threading.Lock()
+        self._stopping = threading.Event()
+        self._threads = []
+
+    def start(self):
+        """启动工作线程（守护线程，不阻止程序退出）"""
+        self._stopping.clear()
+        for i in range(self.workers):
+            thread = threading.Thread(target=self._run, name=f"cleanup-worker-{i}", daemon=True)
+            thread.start()
+            self._threads.append(thread)
+
+    def submit(self, key):
+        """
+        提交清理任务
+
+        参数:
+            key: 任务键（视频文件名）
+
+        返回:
+            bool: 已提交或已在队列中返回True，队列已满返回False
+        """
+        with self._pending_lock:
+            if key in self._pending:
+                return True
+            self._pending.add(key)
+
+        if self.workers == 0:
+            self._execute(key)
+            return True
+
+        try:
+            self._queue.put_nowait(key)
+            return True
+        except queue.Full:
+            with self._pending_lock:
+                self._pending.discard(key)
+            return False
+
+    def is_pending(self, key):
+        """检查任务是否已在队列中或正在执行"""
+        with self._pending_lock:
+            return key in self._pending
+
+    def pending_count(self):
+        """获取排队和执行中的任务数"""
+        with self._pending_lock:
+            return len(self._pending)
+
+    def drain_results(self):
+        """
+        取出所有已完成的清理结果
+
+        返回:
+            list: [(任务键, 清理函数返回值)]
+        """
+        results = []
+        while True:
+            try:
+                results.append(self._results.get_nowait())
+            except queue.Empty:
+                return results
+
+    def wait(self, timeout=None):
+        """
+        等待所有已提交的清理任务完成
+
+        参数:
+            timeout: 最长等待秒数，为None时一直等待
+
+        返回:
+            bool: 全部完成返回True，超时返回False
+        """
+        deadline = None if timeout is None else time.time() + timeout
+        while self.pending_count():
+            if deadline is not None and time.time() >= deadline:
+                return False
+            time.sleep(0.1)
+        return True
+
+    def stop(self, timeout=None):
+        """
+        停止工作线程
+
+        参数:
+            timeout: 等待正在执行的清理完成的最长秒数
+
+        说明:
+            正在执行的清理会完成，队列中尚未开始的任务保留在状态文件中，下次启动时继续
+        """
+        self._stopping.set()
+        for thread in self._threads:
+            thread.join(timeout)
+        self._threads = []
+
+    def _run(self):
+        """工作线程主循环"""
+        while not self._stopping.is_set():
+            try:
+                key = self._queue.get(timeout=0.5)
+            except queue.Empty:
+                continue
+            try:
+                self._execute(key)
+            finally:
+                self._queue.task_done()
+
+    def _execute(self, key):
+        """执行一个清理任务并记录结果"""
+        try:
+            result = self.cleanup_func(key)
+        except Exception as e:
+            self.logger.error(f"后台清理任务出错: {key}, 错误: {e}")
+            result = None
+        # 先放入结果再移出待处理集合，保证 wait() 返回后能取到结果
+        self._results.put((key, result))
+        with self._pending_lock:
+            self._pending.discard(key)
+        if self.on_result:
+            self.on_result()
@@ -0,0 +1,195 @@
+"""
+并发数自动调优模块
+作者：ChiangShenhung
+开发工具：腾讯 Code Buddy CN
+版本：2.0
+设计思路和调试：ChiangShenhung
+
+功能说明：
+- 在滑动窗口内统计吞吐量（每秒墙钟时间完成的媒体秒数）
+- 以爬山法在上下限之间逐步调整最大并发任务数
+- 吞吐量变化未超过滞回阈值时保持不变，避免来回抖动
+- 每次调整决策都记录到日志
+"""
+
+import logging
+import time
+
+
+class ConcurrencyTuner:
+    """
+    吞吐量爬山调优器
+
+    工作方式：
+    1. 每个并发设置至少观察一个完整窗口（WINDOW_SECONDS）
+    2. 统计窗口内的空闲时间（槽位未占满、没有排队任务），吞吐量只按非空闲时间计算；
+       窗口大部分时间空闲时作废重新计时，因为此时吞吐量受视频到达速度限制，与并发数无关
+    3. 与上一个设置的吞吐量比较：
+       - 提升超过滞回阈值：沿当前方向继续调整
+       - 下降超过滞回阈值：回退到上一个设置并反向
+       - 变化在阈值内：保持，连续保持若干窗口后再次试探
+    """
+
+    def __init__(self, initial, min_tasks=1, max_tasks=8, window_seconds=1800,
+                 hysteresis=0.05, hold_windows=3, clock=time.time):
+        """
+        初始化调优器
+
+        参数:
+            initial: 初始并发数
+            min_tasks: 并发数下限
+            max_tasks: 并发数上限
+            window_seconds: 每个设置的观察窗口（秒）
+            hysteresis: 滞回阈值（相对变化比例）
+            hold_windows: 吞吐量持平时，连续保持多少个窗口后再次试探
+            clock: 时间函数（便于测试）
+        """
+        self.min_tasks = min_tasks
+        self.max_tasks = max(min_tasks, max_tasks)
+        self.current = min(max(initial, self.min_tasks), self.max_tasks)
+        self.window_seconds = window_seconds
+        self.hysteresis = hysteresis
+        self.hold_windows = hold_windows
+        self.clock = clock
+        self.logger = logging.getLogger(__name__)
+
+        self.direction = 1
+        self._completions = []       # [(完成时间, 媒体秒数)]
+        self._window_start = clock()
+        self._idle_seconds = 0.0      # 当前窗口内的空闲时间
+        self._last_tick = self._window_start
+        self._previous = None         # (并发数, 吞吐量)
+        self._held = 0
+
+    def record_completion(self, media_seconds):
+        """
+        记录一个完成的任务
+
+        参数:
+            media_seconds: 该任务的媒体时长（秒）
+        """
+        if media_seconds > 0:
+            self._completions.append((self.clock(), media_seconds))
+
+    def note_idle(self):
+        """记录本轮检查时槽位未占满：距上一轮检查的时间计为空闲时间"""
+        self._idle_seconds += self._since_last_tick()
+
+    def _since_last_tick(self):
+        """距上一轮检查（或窗口开始）的秒数"""
+        now = self.clock()
+        elapsed = max(now - self._last_tick, 0.0)
+        self._last_tick = now
+        return elapsed
+
+    def _restart_window(self):
+        """重新开始观察窗口"""
+        self._window_start = self._last_tick = self.clock()
+        self._idle_seconds = 0.0
+        self._completions = []
+
+    def throughput(self):
+        """
+        计算当前窗口的吞吐量
+
+        返回:
+            float: 每秒非空闲墙钟时间完成的媒体秒数
+        """
+        elapsed = self.clock() - self._window_start - self._idle_seconds
+        if elapsed <= 0:
+            return 0.0
+        media = sum(seconds for finished, seconds in self._completions
+                    if finished >= self._window_start)
+        return media / elapsed
+
+    def _move(self, target, reason):
+        """调整并发数并记录决策"""
+        target = min(max(target, self.min_tasks), self.max_tasks)
+        old = self.current
+        self.current = target
+        self._held = 0
+        self._restart_window()
+        self.logger.info(f"并发调优: {old} -> {target}（{reason}）")
+        return target
+
+    def reconfigure(self, min_tasks, max_tasks, current=None):
+        """
+        修改调优范围（配置热更新时使用），之前的吞吐量比较结果作废，重新开始观察
+
+        参数:
+            min_tasks: 最小并发数
+            max_tasks: 最大并发数
+            current: 新的并发数，为None时保持当前值（超出范围时调整到范围内）
+
+        返回:
+            int: 调整后的并发数
+        """
+        self.min_tasks = min_tasks
+        self.max_tasks = max(min_tasks, max_tasks)
+        self._previous = None
+        return self._move(self.current if current is None else current, "配置已修改")
+
+    def maybe_adjust(self):
+        """
+        观察窗口结束时做出一次调优决策
+
+        返回:
+            int: 调整后的并发数；窗口未结束或保持不变时返回None
+
+        说明:
+            每轮槽位占满的检查调用一次，距上一轮检查的时间计为非空闲时间
+        """
+        self._since_last_tick()
+        elapsed = self.clock() - self._window_start
+        if elapsed < self.window_seconds:
+            return None
+        if self._idle_seconds > elapsed / 2:
+            self.logger.info(f"并发调优: 保持 {self.current}（窗口内空闲 {self._idle_seconds:.0f}/{elapsed:.0f} 秒，"
+                             f"吞吐量受视频到达速度限制）")
+            self._restart_window()
+            return None
+        if not self._completions:
+            self.logger.info(f"并发调优: 保持 {self.current}（窗口内无完成任务）")
+            self._restart_window()
+            return None
+
+        measured = self.throughput()
+        previous = self._previous
+        self._previous = (self.current, measured)
+
+        if previous is None or previous[0] == self.current:
+            # 第一个窗口，或持平保持后：沿当前方向试探
+            if previous is not None and self._held < self.hold_windows:
+                self._held += 1
+                self.logger.info(f"并发调优: 保持 {self.current}，吞吐量 {measured:.2f}"
+                                 f"（持平 {self._held}/{self.hold_windows}）")
+                self._restart_window()
+                return None
+            return self._probe(measured)
+
+        prev_tasks, prev_throughput = previous
+        if measured > prev_throughput * (1 + self.hysteresis):
+            return self._probe(measured, f"吞吐量 {prev_throughput:.2f} -> {measured:.2f}，继续")
+        if measured < prev_throughput * (1 - self.hysteresis):
+            # 变差：回退并反向
+            self.direction = -self.direction
+            self._previous = previous
+            return self._move(prev_tasks, f"吞吐量 {prev_throughput:.2f} -> {measured:.2f}，回退")
+
+        self._held = 1
+        self.logger.info(f"并发调优: 保持 {self.current}，吞吐量 {prev_throughput:.2f} -> "
+                         f"{measured:.2f}，变化在滞回阈值 {self.hysteresis:.0%} 内")
+        self._restart_window()
+        return None
+
+    def _probe(self, measured, reason=None):
+        """沿当前方向试探一步，到达边界时反向"""
+        target = self.current + self.direction
+        if target < self.min_tasks or target > self.max_tasks:
+            self.direction = -self.direction
+            target = self.current + self.direction
+        if target < self.min_tasks or target > self.max_tasks or target == self.current:
+            self.logger.info(f"并发调优: 保持 {self.current}（已在上下限边界）")
+            self._restart_window()
+            return None
+        return self._move(target, reason or f"吞吐量 {measured:.2f}，试探")
@@ -15,11 +15,27 @@ CONFIG = {
         ".webm"
     ],
     "STATUS_FILE": "processing_status.json",
+    "JOBS": {
+        "MAX_DONE_JOBS": 1000,
+        "MAX_HISTORY": 20
+    },
     "LOG_FILE": "subtitle_monitor.log",
+    "LOGGING": {
+        "MAX_MB": 10,
+        "BACKUP_COUNT": 5,
+        "COMPRESS": True,
+        "REPEAT_WINDOW_SECONDS": 300
+    },
     "DELETE_MODE": "backup",
     "MAX_CONCURRENT_TASKS": 3,
     "GPU_DETECTION": {
         "ENABLED": True,
+        "SOURCES": ["nvidia-smi", "proc", "wmi"],
+        "FIXTURE_FILE": "",
+        "PLAN_BY_VRAM": True,
+        "CACHE_FILE": "gpu_inventory_cache.json",
+        "CACHE_TTL_HOURS": 24,
+        "NVIDIA_SMI": "nvidia-smi",
         "MAX_TASKS_BY_GPU_TYPE": {
             "集成显卡": 1,
             "入门独显": 2,
@@ -28,5 +44,129 @@ CONFIG = {
             "专业级显卡": 8
         }
     },
-    "GPU_TYPE": "入门独显"
-}
\ No newline at end of file
+    "GPU_TYPE": "入门独显",
+    "GPU_ADMISSION": {
+        "ENABLED": True,
+        "TELEMETRY_SOURCE": "nvidia-smi",
+        "TELEMETRY_FILE": "",
+        "NVIDIA_SMI": "nvidia-smi",
+        "MAX_TASKS": 16,
+        "JOB_MEMORY_MB": 3000,
+        "MEMORY_HEADROOM_MB": 512,
+        "MAX_UTILIZATION": 98,
+        "RAMP_SECONDS": 60,
+        "OOM_EXIT_CODES": [],
+        "OOM_BACKOFF_SECONDS": 300,
+        "MAX_JOB_MEMORY_MB": 0,
+        "ESTIMATE_DECAY": 0.8,
+        "IDLE_RETRY_SECONDS": 30
+    },
+    "AUTO_TUNE": {
+        "ENABLED": True,
+        "MIN_TASKS": 1,
+        "MAX_TASKS": 8,
+        "WINDOW_SECONDS": 1800,
+        "HYSTERESIS": 0.05,
+        "HOLD_WINDOWS": 3
+    },
+    "GPU_DEVICES": {
+        "DEVICES": [],
+        "MAX_TASKS_PER_DEVICE": {},
+        "DEVICE_ARG_MODE": "env"
+    },
+    "CPU_LANE": {
+        "ENABLED": False,
+        "MAX_TASKS": 2,
+        "MAX_DURATION_SECONDS": 600,
+        "INITIAL_GPU_SPEED": 10.0,
+        "INITIAL_CPU_SPEED": 1.0,
+        "ASSUMED_BITRATE_KBPS": 2000,
+        "EXTRA_ARGS": []
+    },
+    "TWO_PASS": {
+        "ENABLED": False,
+        "PREVIEW_ARGS": [],
+        "REFINE_ARGS": [],
+        "STAGING_DIR": ""
+    },
+    "RETRY": {
+        "BASE_DELAY_SECONDS": 60,
+        "MAX_DELAY_SECONDS": 3600,
+        "MAX_FAILURES": 5,
+        "QUARANTINE_DIR": ""
+    },
+    "BACKUP": {
+        "DIR": "",
+        "CHUNK_MB": 64,
+        "PROGRESS_INTERVAL_SECONDS": 5
+    },
+    "BACKUP_THROTTLE": {
+        "MB_PER_SEC": 0,
+        "SCHEDULE": [],
+        "ADAPTIVE": True,
+        "PROBE_INTERVAL_SECONDS": 1.0,
+        "LATENCY_FACTOR": 2.0,
+        "MIN_FACTOR": 0.1,
+        "BUFFER_MB": 4
+    },
+    "BACKUP_RETENTION": {
+        "MAX_GB": 0,
+        "MAX_AGE_DAYS": 0,
+        "MAX_EVICTIONS_PER_PASS": 20,
+        "CHECK_INTERVAL_SECONDS": 300
+    },
+    "DISK_SPACE": {
+        "ENABLED": True,
+        "MIN_FREE_MB": 1024,
+        "SUBTITLE_RESERVE_MB": 5,
+        "STAGING_DIRS": [],
+        "STAGING_RESERVE_MB": 500
+    },
+    "CLEANUP_WORKER": {
+        "ENABLED": True,
+        "MAX_PENDING": 32,
+        "WORKERS": 1,
+        "RETRY_DELAY_SECONDS": 60
+    },
+    "RECOVERY": {
+        "KEEP_CHILDREN_ON_EXIT": True
+    },
+    "ORPHAN_SCAN": {
+        "ENABLED": True,
+        "INTERVAL_SECONDS": 30
+    },
+    "HANG_WATCHDOG": {
+        "ENABLED": True,
+        "WINDOW_SECONDS": 600
+    },
+    "METRICS": {
+        "ENABLED": False,
+        "HOST": "127.0.0.1",
+        "PORT": 9108
+    },
+    "TRACE": {
+        "ENABLED": False,
+        "MAX_EVENTS": 20000
+    },
+    "PROFILING": {
+        "OUTPUT_DIR": "profile",
+        "EVERY_TICKS": 10,
+        "SLOW_TICK_SECONDS": 5,
+        "TOP": 30
+    },
+    "RUNTIME_CONFIG": {
+        "WATCH": True,
+        "INTERVAL_SECONDS": 2
+    },
+    "ASYNC_ENGINE": {
+        "ENABLED": True,
+        "DISCOVERY_INTERVAL_SECONDS": 0
+    },
+    "TRANSLATOR_EXE": ""
+}
+
+# 默认配置；用户修改的配置项保存在 config.json 中，启动时覆盖默认值，运行中修改会自动应用
+DEFAULT_CONFIG = CONFIG
+
+from runtime_config import load_runtime_config, RUNTIME_CONFIG_FILE  # noqa: E402
+CONFIG = load_runtime_config(DEFAULT_CONFIG, RUNTIME_CONFIG_FILE)
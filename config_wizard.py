@@ -10,7 +10,8 @@
 import os
 import sys
 import json
-from config import CONFIG
+from config import CONFIG, DEFAULT_CONFIG
+from runtime_config import update_runtime_config, ConfigError
 
 class ConfigWizard:
     """
@@ -255,26 +256,22 @@ class ConfigWizard:
             return False
     
     def update_config(self, download_dir, translate_bat, subtitle_dir):
-        """更新配置文件"""
-        # 更新默认配置
+        """更新配置文件（写入 config.json，config.py 中的默认配置保持不变）"""
+        # 更新内存中的配置
         self.default_config["DOWNLOAD_DIR"] = download_dir
         self.default_config["TRANSLATE_BAT"] = translate_bat
         self.default_config["SUBTITLE_DIR"] = subtitle_dir
         
-        # 保存到config.py文件
-        config_content = f'''# 配置文件
-CONFIG = {json.dumps(self.default_config, indent=4, ensure_ascii=False)}
-'''
-        
         try:
-            with open("config.py", "w", encoding="utf-8") as f:
-                f.write(config_content)
-            print("配置文件已更新")
-        except Exception as e:
+            update_runtime_config({
+                "DOWNLOAD_DIR": download_dir,
+                "TRANSLATE_BAT": translate_bat,
+                "SUBTITLE_DIR": subtitle_dir
+            }, DEFAULT_CONFIG, self.config_file)
+            print(f"配置文件已更新: {self.config_file}")
+        except (ConfigError, OSError) as e:
+            # 保存失败时本次运行仍使用内存中的配置
             print(f"保存配置文件时出错: {e}")
-            # 如果保存失败，至少更新内存中的配置
-            import config
-            config.CONFIG = self.default_config
     
     def create_sample_config(self):
         """创建示例配置文件"""
@@ -300,15 +297,12 @@ CONFIG = {json.dumps(self.default_config, indent=4, ensure_ascii=False)}
             }
         }
         
-        config_content = f'''# 配置文件 - 请根据实际情况修改路径
-CONFIG = {json.dumps(sample_config, indent=4, ensure_ascii=False)}
-'''
-        
         try:
-            with open("config_sample.py", "w", encoding="utf-8") as f:
-                f.write(config_content)
-            print("示例配置文件已创建: config_sample.py")
-            print("请复制此文件为 config.py 并根据实际情况修改路径")
+            with open("config_sample.json", "w", encoding="utf-8") as f:
+                json.dump(sample_config, f, indent=4, ensure_ascii=False)
+                f.write("\n")
+            print("示例配置文件已创建: config_sample.json")
+            print(f"请复制此文件为 {self.config_file} 并根据实际情况修改路径")
         except Exception as e:
             print(f"创建示例配置文件时出错: {e}")
 
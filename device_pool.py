@@ -0,0 +1,98 @@
+"""
+多显卡设备分配模块
+作者：ChiangShenhung
+开发工具：腾讯 Code Buddy CN
+版本：2.0
+设计思路和调试：ChiangShenhung
+
+功能说明：
+- 按显卡统计任务槽位占用，支持每块显卡单独设置并发上限
+- 新任务分配到负载最低的显卡
+- 槽位占用由状态文件中处理中任务的设备字段推算，无需单独维护释放逻辑
+"""
+
+
+class DevicePool:
+    """
+    显卡槽位池
+
+    主要功能：
+    - 记录可用显卡编号及每块显卡的最大并发任务数
+    - 根据当前任务分配情况选出负载最低且仍有空闲槽位的显卡
+
+    负载计算：
+        设置了上限的显卡按 占用数/上限 比较，未设置上限的显卡按占用数比较；
+        负载相同时优先选择编号较小的显卡
+    """
+
+    def __init__(self, devices, max_tasks_per_device=None):
+        """
+        初始化显卡槽位池
+
+        参数:
+            devices: 显卡编号列表（如 [0, 1]）
+            max_tasks_per_device: 每块显卡的并发上限字典（键为编号字符串或整数），
+                                  未列出的显卡不单独限制
+        """
+        limits = max_tasks_per_device or {}
+        self.devices = [int(device) for device in devices]
+        self.limits = {}
+        for device in self.devices:
+            limit = limits.get(str(device), limits.get(device))
+            self.limits[device] = int(limit) if limit else None
+
+    def loads(self, assignments):
+        """
+        统计每块显卡的任务数
+
+        参数:
+            assignments: 处理中任务的设备编号列表（可包含None或其他设备）
+
+        返回:
+            dict: 显卡编号 -> 任务数
+        """
+        loads = {device: 0 for device in self.devices}
+        for device in assignments:
+            if device in loads:
+                loads[device] += 1
+        return loads
+
+    def choose(self, assignments):
+        """
+        为新任务选择显卡
+
+        参数:
+            assignments: 处理中任务的设备编号列表
+
+        返回:
+            int: 选中的显卡编号；所有显卡槽位已满时返回None
+        """
+        loads = self.loads(assignments)
+        candidates = [device for device in self.devices
+                      if self.limits[device] is None or loads[device] < self.limits[device]]
+        if not candidates:
+            return None
+
+        def load_key(device):
+            limit = self.limits[device]
+            ratio = loads[device] / limit if limit else loads[device]
+            return (ratio, loads[device], self.devices.index(device))
+
+        return min(candidates, key=load_key)
+
+    def describe(self, assignments):
+        """
+        生成槽位占用描述（用于日志）
+
+        参数:
+            assignments: 处理中任务的设备编号列表
+
+        返回:
+            str: 如 "GPU0 1/2, GPU1 2/2"
+        """
+        loads = self.loads(assignments)
+        parts = []
+        for device in self.devices:
+            limit = self.limits[device]
+            parts.append(f"GPU{device} {loads[device]}/{limit if limit else '-'}")
+        return ", ".join(parts)
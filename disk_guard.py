@@ -0,0 +1,150 @@
+"""
+磁盘空间准入控制模块
+作者：ChiangShenhung
+开发工具：腾讯 Code Buddy CN
+版本：2.0
+设计思路和调试：ChiangShenhung
+
+功能说明：
+- 启动新任务前检查字幕目录、备份目录、暂存目录所在磁盘的剩余空间
+- 为每个进行中的任务按预估预留空间（字幕、暂存文件、跨分区备份的视频大小）
+- 剩余空间扣除预留后低于安全余量时暂停启动新任务，避免磁盘写满后静默失败
+"""
+
+import logging
+import os
+import shutil
+
+
+def _existing_ancestor(path):
+    """获取路径本身或最近的已存在上级目录（目录尚未创建时用于查询所在磁盘）"""
+    path = os.path.abspath(path)
+    while not os.path.exists(path):
+        parent = os.path.dirname(path)
+        if parent == path:
+            break
+        path = parent
+    return path
+
+
+def same_disk(path_a, path_b):
+    """
+    判断两个路径是否位于同一磁盘
+
+    返回:
+        bool: 同一磁盘返回True，无法判断时返回False
+    """
+    try:
+        return os.stat(_existing_ancestor(path_a)).st_dev == os.stat(_existing_ancestor(path_b)).st_dev
+    except OSError:
+        return False
+
+
+class DiskSpaceGuard:
+    """
+    磁盘空间守卫
+
+    主要功能：
+    - add_volume() 登记需要检查的目录及每个任务需要预留的空间
+    - check() 判断再启动一个任务后各磁盘是否仍高于安全余量
+    - has_room() 判断目录所在磁盘能否写入指定大小的文件（用于跨分区备份前检查）
+
+    说明:
+        位于同一磁盘的多个目录合并计算预留空间；查询失败的磁盘不做限制
+    """
+
+    def __init__(self, min_free_mb=1024, usage_func=shutil.disk_usage):
+        """
+        初始化磁盘空间守卫
+
+        参数:
+            min_free_mb: 每块磁盘至少保留的剩余空间（MB）
+            usage_func: 磁盘用量查询函数（便于测试）
+        """
+        self.min_free_bytes = min_free_mb * 1024 * 1024
+        self.usage_func = usage_func
+        self.volumes = []
+        self.logger = logging.getLogger(__name__)
+
+    def add_volume(self, label, path, per_job_bytes=0, reserve_video_size=False):
+        """
+        登记需要检查的目录
+
+        参数:
+            label: 日志中显示的名称（如 "字幕目录"）
+            path: 目录路径
+            per_job_bytes: 每个进行中的任务需要预留的字节数
+            reserve_video_size: 是否为每个任务额外预留视频文件大小（跨分区备份）
+        """
+        if path:
+            self.volumes.append((label, path, per_job_bytes, reserve_video_size))
+
+    def _device_of(self, path):
+        """获取目录所在磁盘的设备号，无法查询时返回路径本身"""
+        try:
+            return os.stat(_existing_ancestor(path)).st_dev
+        except OSError:
+            return path
+
+    def _free_bytes(self, path):
+        """查询目录所在磁盘的剩余空间，失败时返回None"""
+        try:
+            return self.usage_func(_existing_ancestor(path)).free
+        except OSError as e:
+            self.logger.debug(f"查询磁盘空间失败: {path}, 错误: {e}")
+            return None
+
+    @staticmethod
+    def _video_size(video_path):
+        """获取视频文件大小，文件不存在时返回0"""
+        try:
+            return os.path.getsize(video_path)
+        except OSError:
+            return 0
+
+    def check(self, running_videos, candidate=None):
+        """
+        检查启动新任务后各磁盘空间是否充足
+
+        参数:
+            running_videos: 进行中任务（含等待清理）的视频路径列表
+            candidate: 准备启动的视频路径，为None时只检查进行中的任务
+
+        返回:
+            tuple: (是否充足, 原因说明)
+        """
+        jobs = list(running_videos) + ([candidate] if candidate else [])
+        video_bytes = sum(self._video_size(video_path) for video_path in jobs)
+
+        # 同一磁盘上的多个目录合并计算预留空间
+        disks = {}
+        for label, path, per_job_bytes, reserve_video_size in self.volumes:
+            reserve = per_job_bytes * len(jobs) + (video_bytes if reserve_video_size else 0)
+            disk = disks.setdefault(self._device_of(path), {"labels": [], "path": path, "reserve": 0})
+            disk["labels"].append(label)
+            disk["reserve"] += reserve
+
+        for disk in disks.values():
+            free = self._free_bytes(disk["path"])
+            if free is None:
+                continue
+            headroom = free - disk["reserve"]
+            if headroom < self.min_free_bytes:
+                return False, (f"{'/'.join(disk['labels'])}所在磁盘空间不足: 剩余 {free / 1024 / 1024:.0f}MB, "
+                               f"进行中任务预留 {disk['reserve'] / 1024 / 1024:.0f}MB, "
+                               f"安全余量 {self.min_free_bytes / 1024 / 1024:.0f}MB")
+        return True, "磁盘空间充足"
+
+    def has_room(self, path, nbytes):
+        """
+        判断目录所在磁盘能否写入指定大小的文件并保留安全余量
+
+        参数:
+            path: 目标目录
+            nbytes: 要写入的字节数
+
+        返回:
+            bool: 空间足够或无法查询时返回True
+        """
+        free = self._free_bytes(path)
+        return free is None or free - nbytes >= self.min_free_bytes
@@ -0,0 +1,148 @@
+#!/usr/bin/env python3
+"""
+模拟字幕翻译工具
+作者：ChiangShenhung
+开发工具：腾讯 Code Buddy CN
+版本：2.0
+设计思路和调试：ChiangShenhung
+
+功能说明：
+- 接受与 infer.exe 相同的命令行参数，用于在无显卡环境下测试监控程序
+- 将收到的设备参数、CUDA_VISIBLE_DEVICES 和 CUDA_DEVICE_ORDER 记录到JSON Lines文件
+- 延迟一段时间后在输出目录写入SRT字幕文件，可按比例模拟失败（不写字幕、非零退出码）
+
+使用方法：
+    在配置中设置 "TRANSLATOR_EXE": "fake_translator.py"
+    环境变量 FAKE_TRANSLATOR_DELAY 控制处理耗时（秒，默认1）
+    环境变量 FAKE_TRANSLATOR_DELAY_JITTER 处理耗时的随机波动比例（0~1，默认0）
+    环境变量 FAKE_TRANSLATOR_FAIL_RATE 失败概率（0~1，默认0）
+    环境变量 FAKE_TRANSLATOR_CUES 字幕条数（默认5）
+    环境变量 FAKE_TRANSLATOR_SEED 随机种子，与视频文件名、第几次处理一起决定耗时和是否失败（便于复现）
+    环境变量 FAKE_TRANSLATOR_RECORD 指定记录文件（默认为输出目录下的 fake_translator_record.jsonl）
+"""
+
+import json
+import os
+import random
+import sys
+import time
+
+# 模拟字幕使用的台词
+SAMPLE_LINES = [
+    "欢迎回来，今天我们继续上次的话题。",
+    "这个问题其实比看上去要复杂一些。",
+    "我们先来看一下具体的数据。",
+    "如果你有不同的看法，欢迎在评论区留言。",
+    "好的，那我们开始吧。",
+    "接下来这一部分非常重要。",
+]
+
+
+def parse_args(argv):
+    """
+    解析 infer.exe 风格的命令行参数
+
+    参数:
+        argv: 命令行参数列表（不含程序名）
+
+    返回:
+        tuple: (选项字典, 输入文件列表)
+    """
+    options = {}
+    inputs = []
+    for arg in argv:
+        if arg.startswith("--") and "=" in arg:
+            key, value = arg[2:].split("=", 1)
+            options[key] = value
+        else:
+            inputs.append(arg)
+    return options, inputs
+
+
+def _srt_time(seconds):
+    """把秒数格式化为SRT时间戳"""
+    millis = int(round(seconds * 1000))
+    hours, millis = divmod(millis, 3600 * 1000)
+    minutes, millis = divmod(millis, 60 * 1000)
+    secs, millis = divmod(millis, 1000)
+    return f"{hours:02d}:{minutes:02d}:{secs:02d},{millis:03d}"
+
+
+def write_subtitle(subtitle_path, cues=5, rng=None):
+    """
+    写入一个SRT字幕文件
+
+    参数:
+        subtitle_path: 字幕文件路径
+        cues: 字幕条数
+        rng: 随机数生成器，为None时每条字幕间隔固定、使用固定台词
+    """
+    lines = []
+    position = 0.0
+    for i in range(cues):
+        if rng is None:
+            start, end = i * 3, i * 3 + 2.5
+            text = f"模拟字幕第 {i + 1} 条"
+        else:
+            # 随机的停顿和时长，接近真实对白的节奏
+            start = position + rng.uniform(0.2, 2.0)
+            end = start + rng.uniform(1.0, 4.5)
+            position = end
+            text = rng.choice(SAMPLE_LINES)
+        lines.append(str(i + 1))
+        lines.append(f"{_srt_time(start)} --> {_srt_time(end)}")
+        lines.append(text)
+        lines.append("")
+    with open(subtitle_path, 'w', encoding='utf-8') as f:
+        f.write("\n".join(lines))
+
+
+def count_attempts(record_file, video_path):
+    """统计记录文件中该视频已被处理的次数（重试时换一组随机数）"""
+    try:
+        with open(record_file, 'r', encoding='utf-8') as f:
+            return sum(1 for line in f if json.loads(line).get("video") == video_path)
+    except (OSError, ValueError):
+        return 0
+
+
+def main():
+    """模拟翻译流程：记录参数、等待、写出字幕"""
+    options, inputs = parse_args(sys.argv[1:])
+    output_dir = options.get("output_dir", ".")
+    record_file = os.environ.get("FAKE_TRANSLATOR_RECORD",
+                                 os.path.join(output_dir, "fake_translator_record.jsonl"))
+    delay = float(os.environ.get("FAKE_TRANSLATOR_DELAY", "1"))
+    jitter = float(os.environ.get("FAKE_TRANSLATOR_DELAY_JITTER", "0"))
+    fail_rate = float(os.environ.get("FAKE_TRANSLATOR_FAIL_RATE", "0"))
+    cues = int(os.environ.get("FAKE_TRANSLATOR_CUES", "5"))
+    seed = os.environ.get("FAKE_TRANSLATOR_SEED")
+
+    exit_code = 0
+    for video_path in inputs:
+        rng = random.Random()
+        if seed is not None:
+            attempt = count_attempts(record_file, video_path)
+            rng.seed(f"{seed}:{os.path.basename(video_path)}:{attempt}")
+        record = {
+            "video": video_path,
+            "device": options.get("device"),
+            "cuda_visible_devices": os.environ.get("CUDA_VISIBLE_DEVICES"),
+            "cuda_device_order": os.environ.get("CUDA_DEVICE_ORDER"),
+            "pid": os.getpid(),
+            "start_time": time.time(),
+        }
+        with open(record_file, 'a', encoding='utf-8') as f:
+            f.write(json.dumps(record, ensure_ascii=False) + "\n")
+
+        time.sleep(max(delay * (1 + rng.uniform(-jitter, jitter)), 0))
+        if rng.random() < fail_rate:
+            exit_code = 1
+            continue
+        video_name = os.path.splitext(os.path.basename(video_path))[0]
+        write_subtitle(os.path.join(output_dir, f"{video_name}.srt"), cues, rng)
+    return exit_code
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -14,15 +14,36 @@
 """
 
 import os
+import sys
 import time
 import subprocess
 import logging
 import shutil
 import threading
+import signal
 import ctypes
-from ctypes import wintypes
-from config import CONFIG
+from config import CONFIG, DEFAULT_CONFIG
 from status_manager import StatusManager
+from gpu_telemetry import AdmissionController, create_telemetry_source
+from concurrency_tuner import ConcurrencyTuner
+from device_pool import DevicePool
+from cleanup_worker import CleanupWorker
+from file_mover import move_file
+from backup_retention import BackupRetention
+from io_throttle import create_io_throttle
+from disk_guard import DiskSpaceGuard, same_disk
+from media_probe import get_subtitle_duration, probe_media_duration, estimate_duration_from_size
+from lane_scheduler import LaneScheduler, LANE_CPU, LANE_GPU
+from process_info import get_process_start_time, is_same_process, ReattachedProcess
+from process_table import create_process_table, find_translator_processes
+from hang_watchdog import HangWatchdog
+from gpu_inventory import get_gpu_inventory, plan_concurrency, describe_device, cuda_devices
+from runtime_config import ConfigWatcher, RUNTIME_CONFIG_FILE
+from log_pipeline import setup_logging
+from metrics import MonitorMetrics, MetricsServer, timed_stage
+from job_trace import (JobTracer, PHASE_DISCOVERED, PHASE_STABLE, PHASE_QUEUED, PHASE_LAUNCHED,
+                       PHASE_FIRST_CUE, PHASE_SUBTITLE_COMPLETE, PHASE_VALIDATED, PHASE_CLEANED)
+from job_state import DISCOVERED, STABLE, QUEUED, VALIDATING, FAILED, QUARANTINED
 
 # Windows API常量 - 用于文件删除到回收站
 FO_DELETE = 0x0003      # 删除操作
@@ -30,19 +51,41 @@ FOF_ALLOWUNDO = 0x0040  # 允许撤销（即删除到回收站）
 FOF_SILENT = 0x0004     # 静默操作
 FOF_NOCONFIRMATION = 0x0010  # 不需要确认
 
-# SHFileOperation结构体定义
-class SHFILEOPSTRUCT(ctypes.Structure):
-    """Windows API文件操作结构体"""
-    _fields_ = [
-        ("hwnd", wintypes.HWND),
-        ("wFunc", wintypes.UINT),
-        ("pFrom", wintypes.LPCWSTR),
-        ("pTo", wintypes.LPCWSTR),
-        ("fFlags", wintypes.UINT),
-        ("fAnyOperationsAborted", wintypes.BOOL),
-        ("hNameMappings", wintypes.LPVOID),
-        ("lpszProgressTitle", wintypes.LPCWSTR)
-    ]
+# 在新控制台窗口中启动翻译工具（仅Windows有效，其他平台为0）
+CREATE_NEW_CONSOLE = getattr(subprocess, "CREATE_NEW_CONSOLE", 0)
+
+# 两遍模式的处理阶段
+PASS_PREVIEW = "preview"  # 快速预览：小模型/贪心解码，字幕直接发布
+PASS_REFINE = "refine"    # 后台精修：完整模型，完成后原子替换预览字幕
+
+_shfileopstruct = None
+
+
+def _get_shfileopstruct():
+    """
+    SHFileOperation结构体定义（Windows API文件操作结构体）
+
+    说明:
+        ctypes.wintypes 只在Windows上删除到回收站时用到，首次调用时才导入并定义结构体
+    """
+    global _shfileopstruct
+    if _shfileopstruct is None:
+        from ctypes import wintypes
+
+        class SHFILEOPSTRUCT(ctypes.Structure):
+            """Windows API文件操作结构体"""
+            _fields_ = [
+                ("hwnd", wintypes.HWND),
+                ("wFunc", wintypes.UINT),
+                ("pFrom", wintypes.LPCWSTR),
+                ("pTo", wintypes.LPCWSTR),
+                ("fFlags", wintypes.UINT),
+                ("fAnyOperationsAborted", wintypes.BOOL),
+                ("hNameMappings", wintypes.LPVOID),
+                ("lpszProgressTitle", wintypes.LPCWSTR)
+            ]
+        _shfileopstruct = SHFILEOPSTRUCT
+    return _shfileopstruct
 
 
 def delete_to_recycle_bin(file_path: str) -> bool:
@@ -67,7 +110,7 @@ def delete_to_recycle_bin(file_path: str) -> bool:
         from_path = file_path + '\0\0'
         
         # 配置文件操作参数
-        shf = SHFILEOPSTRUCT()
+        shf = _get_shfileopstruct()()
         shf.wFunc = FO_DELETE
         shf.pFrom = from_path
         shf.pTo = None
@@ -84,110 +127,48 @@ def delete_to_recycle_bin(file_path: str) -> bool:
         logging.error(f"删除到回收站失败: {file_path}, 错误: {e}")
         return False
 
-def detect_gpu_type():
-    """
-    检测显卡类型
-    如果自动检测失败，将提示用户手动输入显卡类型
-    """
-    try:
-        import wmi
-        c = wmi.WMI()
-        
-        # 获取显卡信息
-        gpus = c.Win32_VideoController()
-        if not gpus:
-            logging.warning("未检测到显卡设备，使用默认配置")
-            return "集成显卡"
-        
-        # 判断显卡类型
-        for gpu in gpus:
-            name = (gpu.Name or "").lower()
-            adapter_ram = getattr(gpu, 'AdapterRAM', 0) or 0
-            
-            # 集成显卡判断
-            if any(keyword in name for keyword in ['intel', 'intel(r)', 'hd graphics', 'uhd graphics', 'iris']):
-                logging.info(f"检测到集成显卡: {gpu.Name}")
-                return "集成显卡"
-            
-            # NVIDIA显卡
-            if 'nvidia' in name or 'geforce' in name:
-                if 'rtx' in name:
-                    if '4090' in name or '4080' in name or '3090' in name:
-                        logging.info(f"检测到高端独显: {gpu.Name}")
-                        return "高端独显"
-                    elif '4070' in name or '4060' in name or '3070' in name or '3060' in name:
-                        logging.info(f"检测到中端独显: {gpu.Name}")
-                        return "中端独显"
-                    else:
-                        logging.info(f"检测到入门独显: {gpu.Name}")
-                        return "入门独显"
-                elif 'gtx' in name:
-                    if '1660' in name or '1650' in name:
-                        logging.info(f"检测到入门独显: {gpu.Name}")
-                        return "入门独显"
-                    else:
-                        logging.info(f"检测到中端独显: {gpu.Name}")
-                        return "中端独显"
-            
-            # AMD显卡
-            if 'amd' in name or 'radeon' in name:
-                if 'rx' in name:
-                    if '7900' in name or '7800' in name:
-                        logging.info(f"检测到高端独显: {gpu.Name}")
-                        return "高端独显"
-                    elif '7700' in name or '7600' in name:
-                        logging.info(f"检测到中端独显: {gpu.Name}")
-                        return "中端独显"
-                    else:
-                        logging.info(f"检测到入门独显: {gpu.Name}")
-                        return "入门独显"
-        
-        # 默认返回集成显卡
-        logging.warning(f"无法确定显卡类型，使用默认配置。检测到的显卡: {gpus[0].Name if gpus else '未知'}")
-        return "集成显卡"
-        
-    except ImportError:
-        logging.warning("未安装wmi库，无法自动检测显卡类型")
-        return manual_gpu_selection()
-    except Exception as e:
-        logging.warning(f"显卡检测失败: {e}")
-        return manual_gpu_selection()
+# 全局变量：文件处理锁和已处理文件集合，用于避免并发冲突
+_file_processing_lock = threading.Lock()
+_processed_files = set()
+
+# 影响并发上限的配置项
+TASK_LIMIT_CONFIG_KEYS = ("GPU_TYPE", "GPU_ADMISSION.MAX_TASKS", "AUTO_TUNE.MIN_TASKS", "AUTO_TUNE.MAX_TASKS")
+
+# 运行中修改后立即生效的配置项（以 . 结尾的表示其下所有子项）
+LIVE_CONFIG_KEYS = ("CHECK_INTERVAL", "ASYNC_ENGINE.DISCOVERY_INTERVAL_SECONDS", "VIDEO_EXTENSIONS",
+                    "DELETE_MODE", "RETRY.", "GPU_DETECTION.MAX_TASKS_BY_GPU_TYPE.",
+                    "GPU_DEVICES.MAX_TASKS_PER_DEVICE.", "RUNTIME_CONFIG.INTERVAL_SECONDS") + TASK_LIMIT_CONFIG_KEYS
 
-def manual_gpu_selection():
+
+def is_live_config_key(key):
+    """配置项修改后是否不需要重启即可生效"""
+    return any(key == live or (live.endswith(".") and key.startswith(live)) for live in LIVE_CONFIG_KEYS)
+
+
+def release_quarantined_file(status_manager, filename, download_dir):
     """
-    手动选择显卡类型
-    当自动检测失败时，提示用户手动选择
+    解除文件隔离，文件在隔离目录中时移回原位置（没有记录原位置时移回监控目录）
+
+    参数:
+        status_manager: StatusManager实例
+        filename: 视频文件名
+        download_dir: 监控目录
+
+    返回:
+        bool: 是否成功解除
+
+    说明:
+        只操作状态文件和文件本身，命令行管理隔离文件时不需要启动监控器
     """
-    print("\n=== 显卡类型选择 ===")
-    print("自动检测显卡失败，请手动选择您的显卡类型：")
-    print("1. 集成显卡 (Intel HD Graphics, Iris Xe等)")
-    print("2. 入门级独显 (GTX 1650/1660, RTX 3050等)")
-    print("3. 中端独显 (RTX 3060/3070/4060/4070等)")
-    print("4. 高端独显 (RTX 3080/3090/4080/4090等)")
-    print("5. 专业级显卡 (A100, H100, RTX A系列等)")
-    
-    while True:
-        try:
-            choice = input("请选择(1-5): ").strip()
-            if choice == '1':
-                return "集成显卡"
-            elif choice == '2':
-                return "入门独显"
-            elif choice == '3':
-                return "中端独显"
-            elif choice == '4':
-                return "高端独显"
-            elif choice == '5':
-                return "专业级显卡"
-            else:
-                print("无效选择，请输入1-5之间的数字")
-        except KeyboardInterrupt:
-            print("\n用户中断选择，使用默认配置")
-            return "集成显卡"
+    info = status_manager.release_from_quarantine(filename)
+    if info is None:
+        return False
+    quarantine_path = info.get("quarantine_path")
+    if quarantine_path and os.path.exists(quarantine_path):
+        target_path = info.get("file_path") or os.path.join(download_dir, filename)
+        shutil.move(quarantine_path, target_path)
+    return True
 
-# 全局变量：文件处理锁和已处理文件集合，用于避免并发冲突
-_file_processing_lock = threading.Lock()
-_processed_files = set()
 
 class FileMonitor:
     """
@@ -208,9 +189,12 @@ class FileMonitor:
         参数:
             config: 配置字典，如果为None则使用默认配置
         """
-        # 使用传入的配置，如果没有传入则使用默认配置
+        # 使用传入的配置，如果没有传入则使用默认配置（已合并 config.json 中的修改）
+        watch_base = config
         if config is None:
             config = CONFIG
+            watch_base = DEFAULT_CONFIG
+        self.config = config
         
         # 基础配置参数
         self.download_dir = config["DOWNLOAD_DIR"]
@@ -219,52 +203,275 @@ class FileMonitor:
         self.video_extensions = config["VIDEO_EXTENSIONS"]
         self.delete_mode = config["DELETE_MODE"]
         
+        # 备份模式：备份目录、跨文件系统复制分块大小
+        backup_config = config.get("BACKUP", {})
+        self.backup_dir = backup_config.get("DIR", "")
+        self.backup_chunk_size = int(backup_config.get("CHUNK_MB", 64) * 1024 * 1024)
+        self.backup_progress_interval = backup_config.get("PROGRESS_INTERVAL_SECONDS", 5)
+        self.backup_throttle = create_io_throttle(config.get("BACKUP_THROTTLE", {}), self._translator_inputs)
+        
+        # 备份目录保留配额：超出总大小或保留天数时从最旧的备份开始删除
+        retention_config = config.get("BACKUP_RETENTION", {})
+        max_bytes = int(retention_config.get("MAX_GB", 0) * 1024 * 1024 * 1024)
+        max_age_seconds = retention_config.get("MAX_AGE_DAYS", 0) * 86400
+        self.backup_retention = None
+        if self.delete_mode == "backup" and (max_bytes or max_age_seconds):
+            self.backup_retention = BackupRetention(
+                self.backup_dir or os.path.join(self.download_dir, "已处理视频备份"),
+                max_bytes=max_bytes,
+                max_age_seconds=max_age_seconds,
+                max_evictions_per_pass=retention_config.get("MAX_EVICTIONS_PER_PASS", 20),
+                check_interval=retention_config.get("CHECK_INTERVAL_SECONDS", 300))
+            self.backup_retention.start()
+        # 可选：直接指定翻译程序（默认使用bat文件同目录下的infer.exe）
+        self.translator_exe = config.get("TRANSLATOR_EXE", "")
+        
         # 初始化日志记录
+        self.log_config = dict(config.get("LOGGING", {}), LOG_FILE=config.get("LOG_FILE", CONFIG["LOG_FILE"]))
         self.setup_logging()
         
-        # 显卡检测和任务限制配置
-        # 优先使用用户选择的显卡类型
+        # 运行指标：更新只做一次加法，可选通过本地HTTP服务以 Prometheus 格式输出
+        self.metrics = MonitorMetrics()
+        metrics_config = config.get("METRICS", {})
+        self.metrics_enabled = metrics_config.get("ENABLED", False)
+        self.metrics_host = metrics_config.get("HOST", "127.0.0.1")
+        self.metrics_port = metrics_config.get("PORT", 9108)
+        self.metrics_server = None
+        
+        # 任务时间线追踪：记录各阶段时间，按需导出为 Chrome trace 格式（main.py --trace）
+        trace_config = config.get("TRACE", {})
+        self.tracer = JobTracer(max_events=trace_config.get("MAX_EVENTS", 20000),
+                                enabled=trace_config.get("ENABLED", False))
+        
+        # 显卡检测和任务限制配置：按显卡清单中的显存规划并发任务数，
+        # 无法获取显存信息（或关闭 PLAN_BY_VRAM）时使用用户选择的显卡类型
+        detection_config = config["GPU_DETECTION"]
+        admission_config = config.get("GPU_ADMISSION", {})
         user_gpu_type = config.get("GPU_TYPE", "中端独显")
-        user_gpu_max_tasks = config["GPU_DETECTION"]["MAX_TASKS_BY_GPU_TYPE"].get(user_gpu_type, 1)
-        
-        # 智能显卡检测逻辑：平衡用户选择和自动检测结果
-        if config["GPU_DETECTION"]["ENABLED"]:
-            detected_gpu = detect_gpu_type()
-            detected_gpu_max_tasks = config["GPU_DETECTION"]["MAX_TASKS_BY_GPU_TYPE"].get(detected_gpu, 1)
-            
-            if user_gpu_type != detected_gpu:
-                # 用户选择与检测结果不同，尊重用户选择
-                self.max_concurrent_tasks = user_gpu_max_tasks
-                self.logger.info(f"用户选择显卡类型: {user_gpu_type}, 检测到显卡类型: {detected_gpu}")
-                self.logger.info(f"使用用户选择的设置，最大并发任务数: {self.max_concurrent_tasks}")
-            else:
-                # 用户选择与检测结果一致，使用检测到的最大值
-                self.max_concurrent_tasks = detected_gpu_max_tasks
-                self.logger.info(f"检测到显卡类型: {detected_gpu}, 最大并发任务数: {self.max_concurrent_tasks}")
+        user_gpu_max_tasks = detection_config["MAX_TASKS_BY_GPU_TYPE"].get(user_gpu_type, 1)
+        self.gpu_inventory = []
+        self.gpu_plan = None
+        if detection_config["ENABLED"]:
+            self.gpu_inventory = get_gpu_inventory(detection_config) or []
+            for device in self.gpu_inventory:
+                self.logger.info(f"检测到显卡: {describe_device(device)}")
+            if not self.gpu_inventory:
+                self.logger.warning("未检测到显卡信息")
+            if detection_config.get("PLAN_BY_VRAM", True):
+                self.gpu_plan = plan_concurrency(self.gpu_inventory,
+                                                 job_memory_mb=admission_config.get("JOB_MEMORY_MB", 3000),
+                                                 headroom_mb=admission_config.get("MEMORY_HEADROOM_MB", 512))
+        
+        if self.gpu_plan:
+            self.max_concurrent_tasks = min(sum(self.gpu_plan.values()), admission_config.get("MAX_TASKS", 16))
+            plan_text = ", ".join(f"GPU{index} {tasks}" for index, tasks in self.gpu_plan.items())
+            self.logger.info(f"按显存规划最大并发任务数: {self.max_concurrent_tasks}（{plan_text}），"
+                             f"显卡类型设置（{user_gpu_type}）不生效")
         else:
-            # 显卡检测未启用，直接使用用户选择
             self.max_concurrent_tasks = user_gpu_max_tasks
             self.logger.info(f"使用用户选择的显卡类型: {user_gpu_type}, 最大并发任务数: {self.max_concurrent_tasks}")
+        static_limit = self.max_concurrent_tasks
+        
+        # 基于显卡遥测的准入控制：按实测显存决定是否启动新任务
+        # 有显存规划时并发上限仍为规划的任务数，遥测在此范围内按实测显存约束；
+        # 没有显存规划时静态档位表不再生效，并发上限放宽到MAX_TASKS
+        self.admission = None
+        if admission_config.get("ENABLED", False):
+            admission = AdmissionController(
+                create_telemetry_source(admission_config),
+                job_memory_mb=admission_config.get("JOB_MEMORY_MB", 3000),
+                headroom_mb=admission_config.get("MEMORY_HEADROOM_MB", 512),
+                max_utilization=admission_config.get("MAX_UTILIZATION", 98),
+                ramp_seconds=admission_config.get("RAMP_SECONDS", 60),
+                oom_exit_codes=admission_config.get("OOM_EXIT_CODES", []),
+                backoff_seconds=admission_config.get("OOM_BACKOFF_SECONDS", 300),
+                max_job_memory_mb=admission_config.get("MAX_JOB_MEMORY_MB", 0),
+                estimate_decay=admission_config.get("ESTIMATE_DECAY", 0.8),
+                idle_retry_seconds=admission_config.get("IDLE_RETRY_SECONDS", 30)
+            )
+            if admission.is_available():
+                self.admission = admission
+                if not self.gpu_plan:
+                    self.max_concurrent_tasks = admission_config.get("MAX_TASKS", 16)
+                self.logger.info(f"已启用显卡遥测准入控制，并发上限: {self.max_concurrent_tasks}")
+            else:
+                self.logger.info("显卡遥测不可用，使用静态并发上限")
+        
+        # 吞吐量自动调优：以实测吞吐量爬山调整最大并发任务数
+        # 从显存规划或显卡类型对应的并发数开始向上试探（遥测放宽的上限不作为起点）；
+        # 有显存规划时调优不超过规划的任务数
+        self.tuner = None
+        tune_config = config.get("AUTO_TUNE", {})
+        if tune_config.get("ENABLED", False):
+            self.tuner = ConcurrencyTuner(
+                static_limit,
+                min_tasks=tune_config.get("MIN_TASKS", 1),
+                max_tasks=self._tuner_max_tasks(config, self.max_concurrent_tasks),
+                window_seconds=tune_config.get("WINDOW_SECONDS", 1800),
+                hysteresis=tune_config.get("HYSTERESIS", 0.05),
+                hold_windows=tune_config.get("HOLD_WINDOWS", 3)
+            )
+            self.max_concurrent_tasks = self.tuner.current
+            self.logger.info(f"已启用并发自动调优，初始并发数: {self.max_concurrent_tasks}"
+                             f"（范围 {self.tuner.min_tasks}-{self.tuner.max_tasks}）")
+        
+        # 多显卡设备分配：按显卡统计槽位，新任务分配到负载最低的显卡
+        device_config = config.get("GPU_DEVICES", {})
+        self.device_arg_mode = device_config.get("DEVICE_ARG_MODE", "env")
+        devices = device_config.get("DEVICES") or self._detect_devices()
+        self.device_pool = None
+        if devices:
+            # 未单独设置每块显卡的上限时，使用按显存规划的任务数
+            self.device_pool = DevicePool(devices, device_config.get("MAX_TASKS_PER_DEVICE") or self._placement_plan())
+            self.logger.info(f"多显卡任务分配: {self.device_pool.describe([])}")
+        
+        # CPU备用通道：显卡槽位占满时，短视频可以用CPU翻译
+        self.lanes = None
+        cpu_lane_config = config.get("CPU_LANE", {})
+        self.cpu_lane_args = cpu_lane_config.get("EXTRA_ARGS", [])
+        self.assumed_bitrate_kbps = cpu_lane_config.get("ASSUMED_BITRATE_KBPS", 2000)
+        if cpu_lane_config.get("ENABLED", False):
+            self.lanes = LaneScheduler(
+                cpu_max_tasks=cpu_lane_config.get("MAX_TASKS", 2),
+                max_duration=cpu_lane_config.get("MAX_DURATION_SECONDS", 600),
+                gpu_speed=cpu_lane_config.get("INITIAL_GPU_SPEED", 10.0),
+                cpu_speed=cpu_lane_config.get("INITIAL_CPU_SPEED", 1.0)
+            )
+            self.logger.info(f"已启用CPU备用通道，最大并发任务数: {self.lanes.cpu_max_tasks}，"
+                             f"视频时长上限: {self.lanes.max_duration} 秒")
+        self._duration_cache = {}
+        # ffprobe 可能需要数秒，在后台线程中探测时长，不阻塞调度；结果按文件名、大小和修改时间记录在状态文件中
+        self.duration_prober = None
+        if self.lanes:
+            self.duration_prober = CleanupWorker(self._probe_duration, max_pending=256, workers=1)
+            self.duration_prober.start()
+        
+        # 两遍模式：先用快速参数生成预览字幕，再在后台用完整模型精修
+        two_pass_config = config.get("TWO_PASS", {})
+        self.two_pass = two_pass_config.get("ENABLED", False)
+        self.preview_args = two_pass_config.get("PREVIEW_ARGS", [])
+        self.refine_args = two_pass_config.get("REFINE_ARGS", [])
+        self.refine_staging_dir = (two_pass_config.get("STAGING_DIR")
+                                   or os.path.join(self.subtitle_dir, ".refine"))
+        if self.two_pass:
+            self.logger.info(f"已启用两遍模式，精修字幕暂存目录: {self.refine_staging_dir}")
+        
+        # 失败重试：指数退避，失败次数达到上限后隔离
+        retry_config = config.get("RETRY", {})
+        self.retry_base_delay = retry_config.get("BASE_DELAY_SECONDS", 60)
+        self.retry_max_delay = retry_config.get("MAX_DELAY_SECONDS", 3600)
+        self.max_failures = retry_config.get("MAX_FAILURES", 5)
+        self.quarantine_dir = retry_config.get("QUARANTINE_DIR", "")
+        
+        # 磁盘空间准入：字幕、备份、暂存目录所在磁盘扣除进行中任务预留后低于余量时暂停
+        disk_config = config.get("DISK_SPACE", {})
+        self.disk_guard = None
+        self.disk_pause_reason = None
+        if disk_config.get("ENABLED", True):
+            self.disk_guard = DiskSpaceGuard(disk_config.get("MIN_FREE_MB", 1024))
+            self.disk_guard.add_volume("字幕目录", self.subtitle_dir,
+                                       per_job_bytes=disk_config.get("SUBTITLE_RESERVE_MB", 5) * 1024 * 1024)
+            self._add_backup_volume()
+            if self.two_pass:
+                self.disk_guard.add_volume("精修暂存目录", self.refine_staging_dir,
+                                           per_job_bytes=disk_config.get("SUBTITLE_RESERVE_MB", 5) * 1024 * 1024)
+            for staging_dir in disk_config.get("STAGING_DIRS", []):
+                # 翻译工具提取音频等临时文件所在目录
+                self.disk_guard.add_volume("暂存目录", staging_dir,
+                                           per_job_bytes=disk_config.get("STAGING_RESERVE_MB", 500) * 1024 * 1024)
+        
+        # 翻译进程句柄（文件名 -> Popen），用于获取退出码
+        self.processes = {}
+        # 字幕写入完成检测：翻译进程已退出的任务，以及上次检查时的字幕大小（文件名 -> 字节数）
+        self._exited_jobs = set()
+        self._subtitle_sizes = {}
+        # 自定义进程启动函数（异步引擎使用），为None时使用subprocess.Popen
+        self.process_launcher = None
+        
+        # 异步监控引擎：发现、准入、进程监督、完成检测、清理由独立协程按事件驱动
+        engine_config = config.get("ASYNC_ENGINE", {})
+        self.async_engine_enabled = engine_config.get("ENABLED", True)
+        self.check_interval = config.get("CHECK_INTERVAL", 10)
+        self.discovery_interval = engine_config.get("DISCOVERY_INTERVAL_SECONDS") or self.check_interval
+        self.async_engine = None
+        
+        # 配置热更新：运行中定期检查 config.json，校验通过后应用可以安全修改的配置项
+        runtime_config = config.get("RUNTIME_CONFIG", {})
+        self.config_watcher = None
+        if runtime_config.get("WATCH", True):
+            self.config_watcher = ConfigWatcher(watch_base, RUNTIME_CONFIG_FILE,
+                                                interval_seconds=runtime_config.get("INTERVAL_SECONDS", 2),
+                                                current=config)
         
         # 初始化状态管理器
         self.status_manager = StatusManager()
-        self.setup_logging()
+        
+        # 后台清理：原视频的移动/删除不阻塞监控循环
+        cleanup_config = config.get("CLEANUP_WORKER", {})
+        self.cleanup_retry_delay = cleanup_config.get("RETRY_DELAY_SECONDS", 60)
+        workers = cleanup_config.get("WORKERS", 1) if cleanup_config.get("ENABLED", True) else 0
+        self.cleanup_worker = CleanupWorker(self._run_cleanup_job,
+                                            max_pending=cleanup_config.get("MAX_PENDING", 32),
+                                            workers=workers)
+        self.cleanup_worker.start()
+        
+        # 崩溃恢复：按记录的进程号和启动时间重新接管上次启动的翻译进程
+        recovery_config = config.get("RECOVERY", {})
+        self.keep_children_on_exit = recovery_config.get("KEEP_CHILDREN_ON_EXIT", True)
+        self.recover_processing_jobs()
+        
+        # 遗留翻译进程扫描：不由本程序管理的翻译进程占用任务槽位，处理已知视频的进程被接管
+        orphan_config = config.get("ORPHAN_SCAN", {})
+        self.orphan_scan_interval = orphan_config.get("INTERVAL_SECONDS", 30)
+        self.process_table = None
+        if orphan_config.get("ENABLED", True):
+            self.process_table = create_process_table([os.path.basename(self._get_translator_exe())])
+        self.orphan_translators = []
+        self._last_orphan_scan = 0
+        self._scan_orphan_translators(force=True)
+        
+        # 卡死检测：CPU时间、读写字节数、字幕大小在时间窗口内都没有变化时终止并重新排队
+        watchdog_config = config.get("HANG_WATCHDOG", {})
+        self.hang_watchdog = None
+        if watchdog_config.get("ENABLED", True):
+            self.hang_watchdog = HangWatchdog(window_seconds=watchdog_config.get("WINDOW_SECONDS", 600))
+    
+    def _detect_devices(self):
+        """
+        通过显卡遥测（不可用时使用显卡清单）获取显卡编号列表
+        
+        返回:
+            list: 检测到多块显卡时返回编号列表，否则返回空列表（不做设备分配）
+            
+        说明:
+            只使用 nvidia-smi 给出的编号（即 CUDA 设备编号）；WMI、/proc 的编号不是 CUDA 编号，不做设备分配
+        """
+        if self.admission:
+            devices = self.admission.list_devices()
+        else:
+            devices = [device.index for device in cuda_devices(self.gpu_inventory)]
+        return devices if len(devices) > 1 else []
+    
+    def _placement_plan(self):
+        """按显存规划的每块显卡任务数中，编号为 CUDA 设备编号的部分（作为设备槽位的默认上限）"""
+        indices = {device.index for device in cuda_devices(self.gpu_inventory)}
+        plan = {index: tasks for index, tasks in (self.gpu_plan or {}).items() if index in indices}
+        return plan or None
     
     def setup_logging(self):
         """
         设置日志记录系统
         
-        配置日志记录器，同时输出到文件和控制台
+        配置异步日志管道，同时输出到文件和控制台（由后台线程写入，不阻塞监控线程）
         日志格式：时间戳 - 日志级别 - 日志消息
+        日志文件按大小轮转并压缩旧文件，短时间内重复的相同消息只记录一次
         """
-        logging.basicConfig(
-            level=logging.INFO,
-            format='%(asctime)s - %(levelname)s - %(message)s',
-            handlers=[
-                logging.FileHandler(CONFIG["LOG_FILE"], encoding='utf-8'),
-                logging.StreamHandler()
-            ]
-        )
+        log_config = self.log_config
+        setup_logging(log_config["LOG_FILE"],
+                      max_bytes=int(log_config.get("MAX_MB", 10) * 1024 * 1024),
+                      backup_count=log_config.get("BACKUP_COUNT", 5),
+                      compress=log_config.get("COMPRESS", True),
+                      repeat_window=log_config.get("REPEAT_WINDOW_SECONDS", 300))
         self.logger = logging.getLogger(__name__)
     
     def get_video_files(self):
@@ -284,12 +491,12 @@ class FileMonitor:
         
         video_files = []
         try:
-            for filename in os.listdir(self.download_dir):
-                file_path = os.path.join(self.download_dir, filename)
-                if os.path.isfile(file_path):
-                    _, ext = os.path.splitext(filename)
-                    if ext.lower() in self.video_extensions:
-                        video_files.append(file_path)
+            # scandir 的目录项自带文件类型，不需要逐个 stat
+            with os.scandir(self.download_dir) as entries:
+                for entry in entries:
+                    _, ext = os.path.splitext(entry.name)
+                    if ext.lower() in self.video_extensions and entry.is_file():
+                        video_files.append(entry.path)
         except Exception as e:
             self.logger.error(f"读取下载目录失败: {e}")
         
@@ -313,11 +520,128 @@ class FileMonitor:
         
         return os.path.exists(subtitle_path)
     
-    def execute_translation(self, video_path):
-        """执行字幕翻译 - 直接调用infer.exe，保持窗口可见"""
+    def _get_translator_exe(self):
+        """
+        获取翻译程序路径
+        
+        返回:
+            str: 配置了TRANSLATOR_EXE时使用该路径，否则为bat文件同目录下的infer.exe
+        """
+        if self.translator_exe:
+            return self.translator_exe
+        return os.path.join(os.path.dirname(self.translate_bat), "infer.exe")
+    
+    @staticmethod
+    def _cuda_env(device=None):
+        """
+        生成子进程的环境变量
+
+        参数:
+            device: 显卡编号，不为None时通过CUDA_VISIBLE_DEVICES只保留这块显卡
+
+        说明:
+            CUDA默认按算力排序显卡，nvidia-smi按PCI总线排序，多块不同型号的显卡时两者编号不一致；
+            设置CUDA_DEVICE_ORDER=PCI_BUS_ID使子进程中的编号与分配时使用的nvidia-smi编号一致
+        """
+        env = dict(os.environ, CUDA_DEVICE_ORDER="PCI_BUS_ID")
+        if device is not None:
+            env["CUDA_VISIBLE_DEVICES"] = str(device)
+        return env
+
+    def _build_translation_command(self, video_path, device=None, pass_name=None):
+        """
+        构建翻译命令和子进程环境变量
+        
+        参数:
+            video_path: 视频文件路径
+            device: 显卡编号，为None时不指定（由翻译工具默认使用第一块显卡），
+                    为"cpu"时使用CPU通道
+            pass_name: 两遍模式的处理阶段（PASS_PREVIEW/PASS_REFINE），为None时为普通任务
+            
+        返回:
+            tuple: (命令列表, 环境变量字典或None)
+            
+        说明:
+            DEVICE_ARG_MODE为"env"时通过CUDA_VISIBLE_DEVICES限定可见显卡，
+            为"arg"时传递 --device=cuda:<编号>；两种方式都设置CUDA_DEVICE_ORDER=PCI_BUS_ID，
+            使CUDA的显卡编号与nvidia-smi一致
+            CPU通道传递 --device=cpu 以及CPU_LANE.EXTRA_ARGS中的附加参数
+            精修阶段输出到暂存目录，完成后再替换预览字幕
+        """
+        infer_exe = self._get_translator_exe()
+        device_arg = "--device=cuda"
+        env = None
+        extra_args = []
+        if device == LANE_CPU:
+            device_arg = "--device=cpu"
+            extra_args = list(self.cpu_lane_args)
+        elif device is not None:
+            if self.device_arg_mode == "arg":
+                device_arg = f"--device=cuda:{device}"
+                env = self._cuda_env()
+            else:
+                env = self._cuda_env(device)
+        
+        output_dir = self.subtitle_dir
+        if pass_name == PASS_PREVIEW:
+            extra_args += self.preview_args
+        elif pass_name == PASS_REFINE:
+            extra_args += self.refine_args
+            output_dir = self.refine_staging_dir
+        
+        cmd = [
+            infer_exe,
+            "--audio_suffixes=mp3,wav,flac,m4a,aac,ogg,wma,mp4,mkv,avi,mov,webm,flv,wmv",
+            "--sub_formats=srt",
+            f"--output_dir={output_dir}",
+            device_arg
+        ] + extra_args + [video_path]
+        if infer_exe.lower().endswith(".py"):
+            # Python脚本形式的翻译工具（如fake_translator.py）
+            cmd.insert(0, sys.executable)
+        return cmd, env
+    
+    def _spawn_process(self, args, shell, cwd, env):
+        """
+        在新窗口中启动翻译进程
+        
+        参数:
+            args: 命令行参数列表
+            shell: 是否通过shell启动（BAT文件方式）
+            cwd: 工作目录
+            env: 环境变量，为None时继承当前环境
+            
+        返回:
+            进程句柄（提供 pid、poll()、kill()、wait()）
+            
+        说明:
+            设置了 process_launcher 时（异步引擎）由其负责启动，以便异步等待进程退出
+        """
+        if self.process_launcher:
+            return self.process_launcher(args, shell, cwd, env)
+        # 非Windows平台使用新会话，终端的Ctrl+C不会传给翻译进程（Windows的新控制台窗口本身即独立）
+        return subprocess.Popen(args,
+                                shell=shell,
+                                creationflags=CREATE_NEW_CONSOLE,
+                                start_new_session=os.name != "nt",
+                                cwd=cwd,
+                                env=env)
+    
+    def execute_translation(self, video_path, device=None, pass_name=None):
+        """
+        执行字幕翻译 - 直接调用infer.exe，保持窗口可见
+        
+        参数:
+            video_path: 视频文件路径
+            device: 显卡编号，为None时不指定
+            pass_name: 两遍模式的处理阶段，为None时为普通任务
+            
+        返回:
+            bool: 翻译工具是否成功启动
+        """
         try:
-            # 检查bat文件是否存在
-            if not os.path.exists(self.translate_bat):
+            # 检查翻译工具是否存在
+            if not self.translator_exe and not os.path.exists(self.translate_bat):
                 self.logger.error(f"字幕翻译工具不存在: {self.translate_bat}")
                 return False
             
@@ -328,52 +652,57 @@ class FileMonitor:
             
             # 尝试直接调用infer.exe（避免BAT文件窗口快速关闭）
             bat_dir = os.path.dirname(self.translate_bat)
-            infer_exe = os.path.join(bat_dir, "infer.exe")
+            infer_exe = self._get_translator_exe()
+            device_label = self._device_label(device)
             
             if os.path.exists(infer_exe):
                 # 直接调用infer.exe，保持窗口可见
-                cmd = [
-                    infer_exe,
-                    "--audio_suffixes=mp3,wav,flac,m4a,aac,ogg,wma,mp4,mkv,avi,mov,webm,flv,wmv",
-                    "--sub_formats=srt",
-                    f"--output_dir={self.subtitle_dir}",
-                    "--device=cuda",
-                    video_path
-                ]
+                cmd, env = self._build_translation_command(video_path, device, pass_name)
+                if pass_name == PASS_REFINE:
+                    os.makedirs(self.refine_staging_dir, exist_ok=True)
                 
-                self.logger.info(f"启动字幕翻译工具 (直接调用infer.exe): {os.path.basename(video_path)}")
-                process = subprocess.Popen(cmd, 
-                                         shell=False,
-                                         creationflags=subprocess.CREATE_NEW_CONSOLE,
-                                         cwd=bat_dir)
+                self.logger.info(f"启动字幕翻译工具 (直接调用infer.exe){device_label}: {os.path.basename(video_path)}")
+                process = self._spawn_process(cmd, shell=False,
+                                              cwd=os.path.dirname(infer_exe) or None, env=env)
                 
                 # 检查进程是否成功启动
                 if process.poll() is not None:  # 如果进程已经结束
                     self.logger.error(f"字幕翻译工具启动失败: {os.path.basename(video_path)}")
                     return False
                 
+                self.processes[os.path.basename(video_path)] = process
                 self.logger.info(f"已启动字幕翻译工具（新窗口）: {os.path.basename(video_path)}")
                 return True
+            elif self.translator_exe:
+                self.logger.error(f"字幕翻译工具不存在: {infer_exe}")
+                return False
+            elif pass_name:
+                self.logger.error(f"两遍模式需要直接调用infer.exe，未找到: {infer_exe}")
+                return False
             else:
-                # 如果infer.exe不存在，使用原来的BAT文件方式
+                # 如果infer.exe不存在，使用原来的BAT文件方式（仅能通过环境变量指定显卡）
                 self.logger.warning(f"未找到infer.exe，使用BAT文件方式: {infer_exe}")
-                process = subprocess.Popen([self.translate_bat, video_path], 
-                                         shell=True,
-                                         creationflags=subprocess.CREATE_NEW_CONSOLE,
-                                         cwd=bat_dir)
+                env = None
+                if device == LANE_CPU:
+                    env = dict(os.environ, CUDA_VISIBLE_DEVICES="")
+                elif device is not None:
+                    env = self._cuda_env(device)
+                process = self._spawn_process([self.translate_bat, video_path], shell=True,
+                                              cwd=bat_dir, env=env)
                 
                 # 检查进程是否成功启动
                 if process.poll() is not None:  # 如果进程已经结束
                     self.logger.error(f"BAT文件启动失败: {os.path.basename(video_path)}")
                     return False
                 
+                self.processes[os.path.basename(video_path)] = process
                 self.logger.info(f"已启动字幕翻译工具（新窗口）: {os.path.basename(video_path)}")
                 return True
                 
         except Exception as e:
             self.logger.error(f"执行字幕翻译时出错: {e}")
             return False
-    
+
     def check_subtitle_completion(self, video_path):
         """检查字幕文件是否生成完成"""
         video_name = os.path.splitext(os.path.basename(video_path))[0]
@@ -425,7 +754,7 @@ class FileMonitor:
                     
                 else:  # backup模式（默认）
                     # 创建备份目录
-                    backup_dir = os.path.join(os.path.dirname(video_path), "已处理视频备份")
+                    backup_dir = self.backup_dir or os.path.join(os.path.dirname(video_path), "已处理视频备份")
                     os.makedirs(backup_dir, exist_ok=True)
                     
                     # 生成唯一的备份文件名（避免重复）
@@ -434,10 +763,29 @@ class FileMonitor:
                     backup_name = f"{name}_{timestamp}{ext}"
                     backup_path = os.path.join(backup_dir, backup_name)
                     
-                    # 尝试移动文件
-                    shutil.move(video_path, backup_path)
+                    # 同文件系统原子重命名，跨文件系统分块复制（可续传）并校验大小
+                    def report_progress(copied, total):
+                        self.logger.info(f"正在复制到备份目录: {video_name} "
+                                         f"{copied / 1024 / 1024:.0f}/{total / 1024 / 1024:.0f}MB")
+                    
+                    video_size = os.path.getsize(video_path)
+                    if (self.disk_guard and not same_disk(video_path, backup_dir)
+                            and not self.disk_guard.has_room(backup_dir, video_size)):
+                        self.logger.error(f"备份目录所在磁盘空间不足，暂不移动: {video_name} "
+                                          f"({video_size / 1024 / 1024:.0f}MB)")
+                        return False
+                    
+                    method = move_file(video_path, backup_path,
+                                       chunk_size=self.backup_chunk_size,
+                                       progress_callback=report_progress,
+                                       progress_interval=self.backup_progress_interval,
+                                       throttle=self.backup_throttle)
                     
-                    self.logger.info(f"已移动视频文件到备份目录: {backup_name}")
+                    self.metrics.cleanup_bytes_moved.inc(video_size, method=method)
+                    self.logger.info(f"已移动视频文件到备份目录({method}): {backup_name}")
+                    if self.backup_retention and (os.path.normcase(os.path.abspath(backup_dir)) ==
+                                                  os.path.normcase(os.path.abspath(self.backup_retention.backup_dir))):
+                        self.backup_retention.record(backup_path)
                     return True
                     
             except Exception as e:
@@ -449,8 +797,24 @@ class FileMonitor:
                     return False
         return False
     
-    def process_video(self, video_path):
-        """处理单个视频文件"""
+    def _device_label(self, device):
+        """生成日志中的设备标签，如 " [GPU1]"、" [CPU]" """
+        if device == LANE_CPU:
+            return " [CPU]"
+        if device is not None:
+            return f" [GPU{device}]"
+        return ""
+    
+    def process_video(self, video_path, device=None, media_seconds=None, pass_name=None):
+        """
+        处理单个视频文件
+        
+        参数:
+            video_path: 视频文件路径
+            device: 分配的显卡编号，为None时不指定，为"cpu"时走CPU通道
+            media_seconds: 预估的视频时长（秒），用于通道调度
+            pass_name: 两遍模式的处理阶段，为None时启用两遍模式则按预览阶段处理
+        """
         video_name = os.path.basename(video_path)
         
         # 检查文件状态
@@ -462,16 +826,44 @@ class FileMonitor:
             self.logger.info(f"视频正在处理中，跳过: {video_name}")
             return False
         
-        # 标记为处理中
-        self.status_manager.mark_as_processing(video_path)
+        # 标记为处理中（记录分配的显卡，用于统计各显卡槽位占用）
+        if pass_name is None and self.two_pass:
+            pass_name = PASS_PREVIEW
+        
+        extra = {}
+        if pass_name:
+            extra["pass"] = pass_name
+        if device is not None:
+            extra["device"] = device
+        if media_seconds:
+            extra["media_seconds"] = media_seconds
+        self.status_manager.set_job_state(video_path, QUEUED)
+        self.tracer.mark(video_name, PHASE_QUEUED)
+        self.status_manager.mark_as_processing(video_path, extra)
         self.logger.info(f"开始处理视频: {video_name}")
         
         try:
             # 执行字幕翻译
-            if not self.execute_translation(video_path):
+            if not self.execute_translation(video_path, device, pass_name):
                 self.status_manager.remove_from_processing(video_path)
+                if pass_name != PASS_REFINE:
+                    self._record_failure(video_path, "字幕翻译启动失败")
                 return False
             
+            if self.admission and device != LANE_CPU:
+                self.admission.record_launch(device)
+            
+            self.metrics.job_started(video_name)
+            self.tracer.mark(video_name, PHASE_LAUNCHED)
+            
+            # 记录进程号和启动时间，监控程序重启后据此重新接管
+            process = self.processes.get(video_name)
+            if process is not None:
+                self.status_manager.update_processing_entry(video_path, {
+                    "pid": process.pid,
+                    "pid_start_time": get_process_start_time(process.pid)
+                })
+            
             # 立即返回True，让字幕检测在后台进行
             # 字幕检测将在后续的监控循环中完成
             return True
@@ -479,64 +871,397 @@ class FileMonitor:
         except Exception as e:
             self.logger.error(f"处理视频时发生错误: {video_name}, 错误: {e}")
             self.status_manager.remove_from_processing(video_path)
+            if pass_name != PASS_REFINE:
+                self._record_failure(video_path, f"处理视频时发生错误: {e}")
+            return False
+    
+    def _reap_finished_processes(self):
+        """回收已退出的翻译进程，记录退出码并通知准入控制器"""
+        entries = self.status_manager.get_processing_entries()
+        for filename, process in list(self.processes.items()):
+            returncode = process.poll()
+            if returncode is None:
+                continue
+            del self.processes[filename]
+            self._exited_jobs.add(filename)
+            self.metrics.translator_exits.inc(code=returncode)
+            if getattr(process, "reattached", False):
+                # 重新接管的进程拿不到退出码：已生成有效字幕时正常完成，否则按失败处理
+                self.logger.info(f"重新接管的翻译进程已退出: {filename}")
+                self._handle_failed_exit(filename, returncode)
+                continue
+            # CPU通道的任务不占显存，退出码不参与显存准入判断
+            if self.admission and entries.get(filename, {}).get("device") != LANE_CPU:
+                self.admission.record_exit(returncode)
+            if returncode != 0:
+                self.logger.warning(f"翻译进程异常退出（退出码 {returncode}）: {filename}")
+                self._handle_failed_exit(filename, returncode)
+    
+    def _subtitle_path(self, filename, entry):
+        """
+        获取任务对应的字幕文件路径
+        
+        参数:
+            filename: 视频文件名
+            entry: 该任务在状态文件中的处理信息
+            
+        返回:
+            str: 字幕文件路径（精修阶段位于暂存目录）
+        """
+        video_name = os.path.splitext(filename)[0]
+        output_dir = self.refine_staging_dir if entry.get("pass") == PASS_REFINE else self.subtitle_dir
+        return os.path.join(output_dir, f"{video_name}.srt")
+    
+    def _handle_failed_exit(self, filename, returncode):
+        """
+        处理翻译进程异常退出：未生成有效字幕时立即结束任务并记录失败
+        
+        参数:
+            filename: 视频文件名
+            returncode: 进程退出码
+            
+        说明:
+            已生成有效字幕的任务交给正常的完成检测处理；
+            精修阶段失败时放回精修队列，预览字幕保持可用
+        """
+        entry = self.status_manager.get_processing_entries().get(filename)
+        if entry is None:
+            return
+        subtitle_path = self._subtitle_path(filename, entry)
+        if os.path.exists(subtitle_path) and os.path.getsize(subtitle_path) > 100:
+            return
+        video_path = entry.get("file_path") or os.path.join(self.download_dir, filename)
+        self.status_manager.remove_from_processing(video_path)
+        if entry.get("pass") == PASS_REFINE:
+            self.status_manager.add_to_refine_queue(video_path)
+            self.tracer.mark(filename, PHASE_QUEUED)
+        else:
+            self._record_failure(video_path, f"翻译进程异常退出（退出码 {returncode}）")
+    
+    def _file_signature(self, file_path):
+        """
+        获取文件特征（大小和修改时间），用于判断文件是否已变化
+        
+        返回:
+            dict: {"size", "mtime"}，文件不存在时返回None
+        """
+        try:
+            stat = os.stat(file_path)
+        except OSError:
+            return None
+        return {"size": stat.st_size, "mtime": stat.st_mtime}
+    
+    def _record_failure(self, video_path, reason):
+        """
+        记录任务失败，按指数退避安排重试，失败次数达到上限时隔离文件
+        
+        参数:
+            video_path: 视频文件路径
+            reason: 失败原因
+        """
+        video_name = os.path.basename(video_path)
+        failure = self.status_manager.get_failure(video_path)
+        count = (failure["count"] if failure else 0) + 1
+        delay = min(self.retry_base_delay * (2 ** (count - 1)), self.retry_max_delay)
+        signature = self._file_signature(video_path)
+        count = self.status_manager.record_failure(video_path, reason, delay, signature)
+        self.metrics.jobs_failed.inc()
+        self.tracer.finish(video_name, "失败")
+        
+        if count >= self.max_failures:
+            self._quarantine(video_path, reason, signature)
+        else:
+            self.logger.warning(f"任务失败（第{count}次）: {video_name}，原因: {reason}，{int(delay)} 秒后重试")
+    
+    def _quarantine(self, video_path, reason, signature):
+        """
+        隔离多次失败的文件，配置了隔离目录时同时移动文件
+        
+        参数:
+            video_path: 视频文件路径
+            reason: 最后一次失败原因
+            signature: 文件特征
+        """
+        video_name = os.path.basename(video_path)
+        quarantine_path = ""
+        if self.quarantine_dir and os.path.exists(video_path):
+            try:
+                os.makedirs(self.quarantine_dir, exist_ok=True)
+                quarantine_path = os.path.join(self.quarantine_dir, video_name)
+                shutil.move(video_path, quarantine_path)
+            except Exception as e:
+                self.logger.error(f"移动文件到隔离目录失败: {video_name}, 错误: {e}")
+                quarantine_path = ""
+        self.status_manager.quarantine_file(video_path, reason, signature, quarantine_path)
+        self.logger.error(f"文件失败次数达到上限({self.max_failures})，已隔离: {video_name}，原因: {reason}"
+                          + (f"，已移动到: {quarantine_path}" if quarantine_path else ""))
+    
+    def release_from_quarantine(self, filename):
+        """
+        手动解除文件隔离，文件在隔离目录中时移回监控目录
+        
+        参数:
+            filename: 视频文件名
+            
+        返回:
+            bool: 是否成功解除
+        """
+        if not release_quarantined_file(self.status_manager, filename, self.download_dir):
+            self.logger.warning(f"文件不在隔离列表中: {filename}")
+            return False
+        self.logger.info(f"已解除隔离: {filename}")
+        return True
+    
+    def _is_retry_blocked(self, video_path):
+        """
+        检查文件是否处于隔离或退避等待中
+        
+        参数:
+            video_path: 视频文件路径
+            
+        返回:
+            bool: 本轮应跳过该文件时返回True
+            
+        说明:
+            文件大小或修改时间变化后（如重新下载），自动解除隔离并清除失败记录
+        """
+        video_name = os.path.basename(video_path)
+        quarantine_info = self.status_manager.get_quarantine_info(video_path)
+        failure = self.status_manager.get_failure(video_path)
+        if not quarantine_info and not failure:
             return False
+        
+        signature = self._file_signature(video_path)
+        if quarantine_info:
+            if quarantine_info.get("signature") and signature and quarantine_info["signature"] != signature:
+                self.status_manager.release_from_quarantine(video_name)
+                self.logger.info(f"隔离文件已变化，自动解除隔离: {video_name}")
+                return False
+            return True
+        
+        if failure.get("signature") and signature and failure["signature"] != signature:
+            self.status_manager.clear_failure(video_path)
+            self.logger.info(f"失败文件已变化，清除失败记录: {video_name}")
+            return False
+        return time.time() < failure.get("next_retry", 0)
+    
+    def _device_assignments(self):
+        """获取所有处理中任务分配的设备编号列表"""
+        entries = self.status_manager.get_processing_entries()
+        return [info.get("device") for info in entries.values()]
+    
+    def _cpu_lane_count(self):
+        """获取CPU通道正在处理的任务数"""
+        return self._device_assignments().count(LANE_CPU)
+    
+    def _cpu_lane_available(self):
+        """CPU通道是否启用且仍有空闲槽位"""
+        return bool(self.lanes) and self._cpu_lane_count() < self.lanes.cpu_max_tasks
+    
+    def _elapsed_seconds(self, entry):
+        """
+        计算处理中任务已运行的秒数
+        
+        参数:
+            entry: 状态文件中的处理信息字典
+            
+        返回:
+            float: 已运行秒数，无法解析开始时间时返回0
+        """
+        from datetime import datetime
+        try:
+            start_time = datetime.strptime(entry["start_time"], "%Y-%m-%d %H:%M:%S")
+        except (KeyError, ValueError):
+            return 0.0
+        return (datetime.now() - start_time).total_seconds()
+    
+    def _media_duration(self, video_path):
+        """
+        获取视频时长（不等待 ffprobe）
+        
+        参数:
+            video_path: 视频文件路径
+            
+        返回:
+            float: 已探测的时长（内存缓存或状态文件中的记录，按文件大小和修改时间判断是否有效）；
+                   尚未探测时提交后台探测，本次先按文件大小估算
+        """
+        try:
+            stat = os.stat(video_path)
+        except OSError:
+            return 0.0
+        key = (video_path, stat.st_size, stat.st_mtime)
+        if key in self._duration_cache:
+            return self._duration_cache[key]
+        seconds = self.status_manager.get_media_duration(video_path, stat.st_size, stat.st_mtime)
+        if seconds is not None:
+            self._duration_cache[key] = seconds
+            return seconds
+        if self.duration_prober:
+            self.duration_prober.submit(key)
+        return estimate_duration_from_size(stat.st_size, self.assumed_bitrate_kbps)
+    
+    def _probe_duration(self, key):
+        """后台线程：用 ffprobe 探测视频时长，key 为 (路径, 大小, 修改时间)，失败时返回None"""
+        return probe_media_duration(key[0])
+    
+    def _collect_probed_durations(self):
+        """取出后台探测的时长，写入缓存和状态文件；ffprobe 不可用时缓存按大小估算的时长，不再重复探测"""
+        if not self.duration_prober:
+            return
+        for (video_path, size, mtime), seconds in self.duration_prober.drain_results():
+            if seconds:
+                self.status_manager.set_media_duration(video_path, size, mtime, seconds)
+            else:
+                seconds = estimate_duration_from_size(size, self.assumed_bitrate_kbps)
+            self._duration_cache[(video_path, size, mtime)] = seconds
+    
+    def _choose_lane(self, video_path, gpu_slot_free):
+        """
+        为新视频选择GPU或CPU通道
+        
+        参数:
+            video_path: 视频文件路径
+            gpu_slot_free: 当前是否还有空闲显卡槽位
+            
+        返回:
+            tuple: (通道名称, 视频时长或None)
+        """
+        if not self.lanes:
+            return LANE_GPU, None
+        media_seconds = self._media_duration(video_path)
+        entries = self.status_manager.get_processing_entries().values()
+        running_gpu_jobs = [(info.get("media_seconds", 0), self._elapsed_seconds(info))
+                            for info in entries if info.get("device") != LANE_CPU]
+        cpu_running = sum(1 for info in entries if info.get("device") == LANE_CPU)
+        lane = self.lanes.choose(media_seconds, gpu_slot_free, cpu_running, running_gpu_jobs)
+        return lane, media_seconds
+    
+    def _disk_space_ok(self, video_path):
+        """
+        检查启动新任务后磁盘空间是否充足，状态变化时记录日志
+        
+        参数:
+            video_path: 准备启动的视频路径
+            
+        返回:
+            bool: 空间充足返回True
+        """
+        if not self.disk_guard:
+            return True
+        running_videos = [entry.get("file_path") or os.path.join(self.download_dir, filename)
+                          for filename, entry in self.status_manager.get_processing_entries().items()]
+        running_videos += [info["file_path"] for info in self.status_manager.get_cleaning_entries().values()]
+        ok, reason = self.disk_guard.check(running_videos, video_path)
+        if not ok:
+            if reason != self.disk_pause_reason:
+                self.logger.warning(f"磁盘空间不足，暂停启动新任务: {reason}")
+            self.disk_pause_reason = reason
+        elif self.disk_pause_reason:
+            self.logger.info("磁盘空间已恢复，继续启动新任务")
+            self.disk_pause_reason = None
+        return ok
+    
+    def _place_new_task(self):
+        """
+        为新任务选择显卡并做准入检查
+        
+        返回:
+            tuple: (是否允许启动, 显卡编号或None)
+        """
+        assignments = [device for device in self._device_assignments() if device != LANE_CPU]
+        device = None
+        if self.device_pool:
+            device = self.device_pool.choose(assignments)
+            if device is None:
+                self.logger.info(f"所有显卡的任务槽位已满: {self.device_pool.describe(assignments)}")
+                return False, None
+        
+        if self.admission:
+            if device is not None:
+                running_count = assignments.count(device)
+            else:
+                running_count = len(assignments)
+            admitted, reason = self.admission.can_admit(running_count, device)
+            if not admitted:
+                self.logger.info(f"暂缓启动新任务: {reason}")
+                return False, None
+        
+        return True, device
     
     def check_all_processing_files(self):
-        """检查所有正在处理文件的完成状态"""
+        """
+        检查所有正在处理文件的完成状态
+        
+        说明:
+            翻译进程已退出时字幕即为最终结果，立即完成；进程仍在运行（或没有进程句柄）时，
+            字幕大小与上一次检查相同才视为写入完成，不在检查中等待
+        """
         processing_files = self.status_manager.get_processing_files()
         completed_files = []
         failed_files = []
         
+        processing_entries = self.status_manager.get_processing_entries()
+        # 已不在处理中的任务不再需要写入检测记录
+        self._exited_jobs.intersection_update(processing_files)
+        for filename in set(self._subtitle_sizes) - set(processing_files):
+            del self._subtitle_sizes[filename]
+        
         for filename in processing_files:
+            entry = processing_entries.get(filename, {})
             # 重建文件路径
             video_path = os.path.join(self.download_dir, filename)
-            video_name = os.path.splitext(filename)[0]
-            subtitle_path = os.path.join(self.subtitle_dir, f"{video_name}.srt")
+            subtitle_path = self._subtitle_path(filename, entry)
             
             # 检查字幕文件是否存在
             if os.path.exists(subtitle_path):
                 try:
                     # 检查文件大小
                     size = os.path.getsize(subtitle_path)
+                    if size > 0:
+                        self.tracer.mark(filename, PHASE_FIRST_CUE)
                     
                     # 智能字幕文件检测逻辑
                     if size > 100:  # 正常大小的字幕文件
                         # 检查文件是否可以读取且内容有效
                         with open(subtitle_path, 'r', encoding='utf-8') as f:
                             content = f.read(500)  # 读取前500个字符
-                            
-                            # 等待一段时间确保文件写入完成
-                            time.sleep(2)
-                            
-                            # 再次检查文件大小是否稳定
-                            new_size = os.path.getsize(subtitle_path)
-                            
-                            if new_size > 100:
-                                # 字幕文件已稳定生成，完成处理
-                                self.logger.info(f"检测到有效字幕文件（{new_size}字节）: {filename}")
-                                
-                                # 验证字幕内容
-                                if self._is_basic_subtitle_content(content):
-                                    if self.cleanup_video_file(video_path):
-                                        self.status_manager.mark_as_completed(video_path)
-                                        self.logger.info(f"已成功完成处理: {filename}")
-                                        completed_files.append(filename)
-                                    else:
-                                        self.logger.error(f"处理视频文件失败: {filename}")
-                                else:
-                                    self.logger.warning(f"字幕文件内容格式不标准，但文件存在: {filename}")
-                                    if self.cleanup_video_file(video_path):
-                                        self.status_manager.mark_as_completed(video_path)
-                                        self.logger.info(f"已成功完成处理（内容格式不标准）: {filename}")
-                                        completed_files.append(filename)
-                            else:
-                                self.logger.warning(f"字幕文件大小不稳定: {filename}")
-                    
-                    elif size == 0:  # 空字幕文件（视频可能没有声音）
+                        
+                        # 翻译进程仍在运行时，字幕大小与上次检查相同才视为写入完成；
+                        # 否则记录大小，留到下一次检查（进程退出事件或兜底检查）确认
+                        previous_size = self._subtitle_sizes.get(filename)
+                        self._subtitle_sizes[filename] = size
+                        if filename not in self._exited_jobs and previous_size != size:
+                            self.logger.debug(f"字幕文件正在写入（{size}字节），下次检查时确认: {filename}")
+                            continue
+                        
+                        # 字幕文件已稳定生成，完成处理
+                        self.logger.info(f"检测到有效字幕文件（{size}字节）: {filename}")
+                        self.status_manager.set_job_state(video_path, VALIDATING)
+                        self.tracer.mark(filename, PHASE_SUBTITLE_COMPLETE)
+                        
+                        if entry.get("pass") == PASS_PREVIEW:
+                            # 两遍模式：预览字幕已直接写入字幕目录，转入精修队列
+                            self._on_preview_completed(video_path, filename)
+                            continue
+                        if entry.get("pass") == PASS_REFINE:
+                            # 精修字幕原子替换预览字幕
+                            subtitle_path = self._publish_refined_subtitle(subtitle_path)
+                        
+                        # 验证字幕内容，然后交给后台清理原视频
+                        if self._is_basic_subtitle_content(content):
+                            self._dispatch_cleanup(filename, video_path, subtitle_path, entry)
+                        else:
+                            self.logger.warning(f"字幕文件内容格式不标准，但文件存在: {filename}")
+                            self._dispatch_cleanup(filename, video_path, subtitle_path, entry,
+                                                   note="（内容格式不标准）")
+                    
+                    elif size == 0:  # 空字幕文件（视频可能没有声音）
                         # 检查任务处理时间是否超过超时阈值
                         if self._should_mark_as_failed(filename):
                             self.logger.warning(f"检测到空字幕文件（0字节），任务超时，标记为失败: {filename}")
                             self.status_manager.remove_from_processing(video_path)
+                            self._record_failure(video_path, "字幕文件为空（0字节），任务超时")
                             failed_files.append(filename)
                         else:
                             self.logger.warning(f"检测到空字幕文件（0字节），等待翻译完成: {filename}")
@@ -546,6 +1271,7 @@ class FileMonitor:
                         if self._should_mark_as_failed(filename):
                             self.logger.warning(f"字幕文件太小（{size}字节），任务超时，标记为失败: {filename}")
                             self.status_manager.remove_from_processing(video_path)
+                            self._record_failure(video_path, f"字幕文件太小（{size}字节），任务超时")
                             failed_files.append(filename)
                         else:
                             self.logger.warning(f"字幕文件太小（{size}字节），等待翻译完成: {filename}")
@@ -562,8 +1288,460 @@ class FileMonitor:
         if failed_files:
             self.logger.warning(f"标记为失败的任务: {failed_files}")
         
+        # 收集后台清理结果，重新提交失败或未排上队的清理任务
+        completed_files.extend(self._collect_cleanup_results())
+        self._resubmit_pending_cleanups()
+        
+        return completed_files
+    
+    def _dispatch_cleanup(self, filename, video_path, subtitle_path, entry, note=""):
+        """
+        字幕已完成：释放任务槽位，把原视频清理交给后台线程
+        
+        参数:
+            filename: 视频文件名
+            video_path: 视频文件路径
+            subtitle_path: 字幕文件路径
+            entry: 该任务在状态文件中的处理信息
+            note: 完成日志的附加说明
+            
+        说明:
+            待清理状态持久化在状态文件中，程序重启后会继续清理；
+            任务在清理成功后才标记为已完成
+        """
+        self.tracer.mark(filename, PHASE_VALIDATED)
+        self.status_manager.mark_as_cleaning(video_path, {
+            "subtitle_path": subtitle_path,
+            "entry": entry,
+            "note": note
+        })
+        self._submit_cleanup(filename)
+    
+    def _submit_cleanup(self, filename):
+        """提交清理任务，队列已满时留在状态文件中等待下次提交"""
+        if not self.cleanup_worker.submit(filename):
+            self.logger.info(f"清理队列已满，稍后再清理: {filename}")
+    
+    def _run_cleanup_job(self, filename):
+        """
+        执行一个清理任务（在后台线程中运行）
+        
+        参数:
+            filename: 视频文件名
+            
+        返回:
+            tuple: (是否成功, 待清理信息)
+        """
+        info = self.status_manager.get_cleaning_entries().get(filename)
+        if info is None:
+            return False, {}
+        video_path = info["file_path"]
+        
+        if not os.path.exists(video_path):
+            # 上次清理已移走原视频但程序在记录前退出，视为已完成
+            self.logger.info(f"视频文件已不存在，视为清理完成: {filename}")
+            self.status_manager.mark_as_completed(video_path)
+            return True, info
+        
+        if self.cleanup_video_file(video_path):
+            self.status_manager.mark_as_completed(video_path)
+            return True, info
+        self.status_manager.record_cleanup_failure(video_path, self.cleanup_retry_delay)
+        return False, info
+    
+    def _collect_cleanup_results(self):
+        """
+        处理后台清理结果（在监控线程中运行）
+        
+        返回:
+            list: 本轮完成处理的文件名列表
+        """
+        completed_files = []
+        for filename, result in self.cleanup_worker.drain_results():
+            ok, info = result or (False, {})
+            if ok:
+                self.metrics.job_done(filename)
+                self.tracer.mark(filename, PHASE_CLEANED)
+                self.logger.info(f"已成功完成处理{info.get('note', '')}: {filename}")
+                self._on_job_completed(filename, info.get("subtitle_path", ""), info.get("entry", {}))
+                completed_files.append(filename)
+            else:
+                self.logger.error(f"处理视频文件失败: {filename}，{self.cleanup_retry_delay} 秒后重试")
         return completed_files
     
+    def _resubmit_pending_cleanups(self):
+        """重新提交未在队列中的待清理任务（清理失败重试、队列已满、程序重启）"""
+        now = time.time()
+        for filename, info in self.status_manager.get_cleaning_entries().items():
+            if self.cleanup_worker.is_pending(filename):
+                continue
+            if now < info.get("next_attempt", 0):
+                continue
+            self._submit_cleanup(filename)
+    
+    def wait_for_cleanup(self, timeout=None):
+        """
+        等待后台清理全部完成（单次检查模式退出前调用）
+        
+        参数:
+            timeout: 最长等待秒数，为None时一直等待
+        """
+        if self.cleanup_worker.pending_count():
+            self.logger.info(f"等待 {self.cleanup_worker.pending_count()} 个后台清理任务完成...")
+        self.cleanup_worker.wait(timeout)
+        completed_files = self._collect_cleanup_results()
+        if completed_files:
+            self.logger.info(f"完成了 {len(completed_files)} 个文件: {completed_files}")
+    
+    def _on_preview_completed(self, video_path, filename):
+        """
+        预览阶段完成：预览字幕已发布，视频转入精修队列
+        
+        参数:
+            video_path: 视频文件路径
+            filename: 视频文件名
+        """
+        self.status_manager.remove_from_processing(video_path)
+        self.status_manager.add_to_refine_queue(video_path)
+        self.tracer.mark(filename, PHASE_QUEUED)
+        self.logger.info(f"预览字幕已发布，加入精修队列: {filename}")
+    
+    def _publish_refined_subtitle(self, staging_path):
+        """
+        用精修字幕原子替换预览字幕
+        
+        参数:
+            staging_path: 暂存目录中的精修字幕路径
+            
+        返回:
+            str: 替换后的字幕路径
+            
+        说明:
+            暂存目录默认位于字幕目录内（同一磁盘），os.replace 为原子操作，
+            播放器不会读到写了一半的字幕文件
+        """
+        final_path = os.path.join(self.subtitle_dir, os.path.basename(staging_path))
+        os.replace(staging_path, final_path)
+        self.logger.info(f"精修字幕已替换预览字幕: {os.path.basename(final_path)}")
+        return final_path
+    
+    def _running_refine_jobs(self):
+        """
+        获取正在运行的精修任务
+        
+        返回:
+            list: [(文件名, 处理信息)]
+        """
+        entries = self.status_manager.get_processing_entries()
+        return [(filename, info) for filename, info in entries.items()
+                if info.get("pass") == PASS_REFINE]
+    
+    def _terminate_process(self, process):
+        """
+        终止翻译进程及其子进程
+        
+        参数:
+            process: 翻译进程的Popen对象
+        """
+        try:
+            if os.name == "nt":
+                subprocess.run(["taskkill", "/F", "/T", "/PID", str(process.pid)],
+                               capture_output=True)
+            elif self._is_group_leader(process.pid):
+                # 翻译进程在新会话中启动，终止整个进程组（含BAT方式下的子进程）
+                os.killpg(process.pid, signal.SIGKILL)
+            else:
+                process.kill()
+            process.wait(timeout=10)
+        except Exception as e:
+            self.logger.warning(f"终止翻译进程失败（PID {process.pid}）: {e}")
+    
+    @staticmethod
+    def _is_group_leader(pid):
+        """进程是否为进程组组长（非Windows平台）"""
+        try:
+            return os.getpgid(pid) == pid
+        except OSError:
+            return False
+    
+    def _check_hung_translators(self):
+        """
+        终止卡死的翻译进程并重新排队
+        
+        返回:
+            list: 被判定为卡死的文件名列表
+            
+        说明:
+            每轮检查采样一次翻译进程（及其进程组）的CPU时间、读写字节数和字幕文件大小，
+            HANG_WATCHDOG.WINDOW_SECONDS 内都没有变化时终止整个进程组；
+            普通任务按失败记录，等待退避后重试，精修任务放回精修队列
+        """
+        if self.hang_watchdog is None:
+            return []
+        self.hang_watchdog.prune(self.processes)
+        processing_entries = self.status_manager.get_processing_entries()
+        hung_files = []
+        for filename, process in list(self.processes.items()):
+            entry = processing_entries.get(filename)
+            if entry is None:
+                continue
+            subtitle_path = self._subtitle_path(filename, entry)
+            try:
+                subtitle_size = os.path.getsize(subtitle_path)
+            except OSError:
+                subtitle_size = 0
+            if not self.hang_watchdog.observe(filename, process.pid, subtitle_size):
+                continue
+            
+            stalled = self.hang_watchdog.stalled_seconds(filename)
+            self.logger.warning(f"翻译进程 {stalled:.0f} 秒无任何进展，判定为卡死并终止（PID {process.pid}）: {filename}")
+            self._terminate_process(process)
+            del self.processes[filename]
+            self.hang_watchdog.forget(filename)
+            video_path = entry.get("file_path") or os.path.join(self.download_dir, filename)
+            self.status_manager.remove_from_processing(video_path)
+            if entry.get("pass") == PASS_REFINE:
+                self.status_manager.add_to_refine_queue(video_path)
+                self.tracer.mark(filename, PHASE_QUEUED)
+            else:
+                self._record_failure(video_path, f"翻译进程 {stalled:.0f} 秒无进展（疑似卡死）")
+            hung_files.append(filename)
+        return hung_files
+    
+    def _preempt_refine_jobs(self, count):
+        """
+        抢占精修任务，为等待中的预览任务腾出显卡槽位
+        
+        参数:
+            count: 最多抢占的任务数
+            
+        返回:
+            int: 实际抢占的任务数
+            
+        说明:
+            优先抢占最近启动的精修任务（已完成的工作最少），
+            被抢占的视频重新放回精修队列，暂存的半成品字幕会被删除
+        """
+        jobs = sorted(self._running_refine_jobs(),
+                      key=lambda item: item[1].get("start_time", ""), reverse=True)
+        preempted = 0
+        for filename, info in jobs:
+            if preempted >= count:
+                break
+            process = self.processes.pop(filename, None)
+            if process is None:
+                # 没有进程句柄（如监控程序重启前启动的任务），无法抢占
+                continue
+            self._terminate_process(process)
+            video_path = info.get("file_path") or os.path.join(self.download_dir, filename)
+            self.status_manager.remove_from_processing(video_path)
+            self.status_manager.add_to_refine_queue(video_path)
+            self.tracer.mark(filename, PHASE_QUEUED)
+            staging_path = os.path.join(self.refine_staging_dir, f"{os.path.splitext(filename)[0]}.srt")
+            if os.path.exists(staging_path):
+                os.remove(staging_path)
+            self.logger.info(f"预览任务等待中，已抢占精修任务: {filename}")
+            preempted += 1
+        return preempted
+    
+    def _start_refine_jobs(self):
+        """
+        用空闲显卡槽位启动精修任务
+        
+        返回:
+            int: 启动的精修任务数
+        """
+        started = 0
+        for video_path in self.status_manager.get_refine_queue():
+            current_count = (self.status_manager.get_processing_count() - self._cpu_lane_count()
+                             + len(self.orphan_translators))
+            if current_count >= self.max_concurrent_tasks:
+                break
+            if not os.path.exists(video_path):
+                self.logger.warning(f"视频文件不存在，移出精修队列: {os.path.basename(video_path)}")
+                self.status_manager.remove_from_refine_queue(video_path)
+                continue
+            if not self._disk_space_ok(video_path):
+                break
+            admitted, device = self._place_new_task()
+            if not admitted:
+                break
+            self.status_manager.remove_from_refine_queue(video_path)
+            if self.process_video(video_path, device, pass_name=PASS_REFINE):
+                started += 1
+            else:
+                self.status_manager.add_to_refine_queue(video_path)
+        if started:
+            self.logger.info(f"启动了 {started} 个精修任务")
+        return started
+    
+    def _on_job_completed(self, filename, subtitle_path, entry):
+        """
+        任务完成后的统计处理
+        
+        参数:
+            filename: 视频文件名
+            subtitle_path: 生成的字幕文件路径
+            entry: 该任务在状态文件中的处理信息
+        """
+        media_seconds = get_subtitle_duration(subtitle_path) or entry.get("media_seconds", 0)
+        lane = LANE_CPU if entry.get("device") == LANE_CPU else LANE_GPU
+        if self.lanes:
+            self.lanes.record_completion(lane, media_seconds, self._elapsed_seconds(entry))
+        if self.tuner and lane == LANE_GPU:
+            self.tuner.record_completion(media_seconds)
+    
+    def _update_concurrency(self, has_pending_work):
+        """
+        根据吞吐量调优结果更新最大并发任务数
+        
+        参数:
+            has_pending_work: 本轮任务槽位是否被占满（有足够的待处理任务）
+        """
+        if not self.tuner:
+            return
+        if not has_pending_work:
+            # 没有排队任务时吞吐量受视频到达速度限制，不参与调优
+            self.tuner.note_idle()
+            return
+        new_limit = self.tuner.maybe_adjust()
+        if new_limit is not None:
+            self.max_concurrent_tasks = new_limit
+    
+    def _translator_inputs(self):
+        """翻译工具正在读取的视频路径列表（备份复制自适应限速从中探测源盘读取延迟）"""
+        return [entry.get("file_path") or os.path.join(self.download_dir, filename)
+                for filename, entry in self.status_manager.get_processing_entries().items()]
+    
+    def _add_backup_volume(self):
+        """备份模式下把备份目录登记到磁盘空间检查"""
+        if self.delete_mode != "backup":
+            return
+        backup_dir = self.backup_dir or os.path.join(self.download_dir, "已处理视频备份")
+        # 同一磁盘上的备份只是重命名，不占用额外空间；跨磁盘时需要预留视频大小
+        self.disk_guard.add_volume("备份目录", backup_dir,
+                                   reserve_video_size=not same_disk(self.download_dir, backup_dir))
+    
+    def _static_task_limit(self, config):
+        """
+        按配置计算静态并发数（显存规划，没有规划时为显卡类型对应的档位），也是自动调优的起点
+        
+        参数:
+            config: 完整配置
+            
+        返回:
+            int: 并发任务数
+        """
+        if self.gpu_plan:
+            return min(sum(self.gpu_plan.values()), config.get("GPU_ADMISSION", {}).get("MAX_TASKS", 16))
+        tiers = config["GPU_DETECTION"]["MAX_TASKS_BY_GPU_TYPE"]
+        return tiers.get(config.get("GPU_TYPE", "中端独显"), 1)
+    
+    def _configured_task_limit(self, config):
+        """
+        按配置计算并发上限（与初始化时的优先级相同：显存规划 > 遥测准入 > 显卡类型）
+        
+        参数:
+            config: 完整配置
+            
+        返回:
+            int: 最大并发任务数
+        """
+        if self.admission and not self.gpu_plan:
+            return config.get("GPU_ADMISSION", {}).get("MAX_TASKS", 16)
+        return self._static_task_limit(config)
+    
+    def _tuner_max_tasks(self, config, limit):
+        """自动调优的上限：AUTO_TUNE.MAX_TASKS，有显存规划时不超过规划的并发上限"""
+        max_tasks = config.get("AUTO_TUNE", {}).get("MAX_TASKS", 8)
+        return min(max_tasks, limit) if self.gpu_plan else max_tasks
+    
+    def reload_config(self):
+        """
+        检查配置文件，有修改且校验通过时应用
+        
+        返回:
+            bool: 是否应用了新配置
+        """
+        if not self.config_watcher:
+            return False
+        result = self.config_watcher.poll()
+        if result is None:
+            return False
+        config, changed = result
+        self.apply_config(config, changed)
+        return True
+    
+    def apply_config(self, config, changed):
+        """
+        应用修改后的配置
+        
+        参数:
+            config: 修改后的完整配置（已校验）
+            changed: 变化的配置项列表（如 ["CHECK_INTERVAL", "AUTO_TUNE.MAX_TASKS"]）
+            
+        说明:
+            检查间隔、视频扩展名、清理方式、失败重试、并发上限和每块显卡的任务上限立即生效；
+            并发上限降低时不终止运行中的任务，只是在任务数降到上限以下之前不再启动新任务；
+            其他配置项（目录、翻译程序、显卡检测等）记录警告，重启监控后生效
+        """
+        old_config, self.config = self.config, config
+        self.logger.info(f"配置文件已修改: {', '.join(changed)}")
+        
+        if "CHECK_INTERVAL" in changed or "ASYNC_ENGINE.DISCOVERY_INTERVAL_SECONDS" in changed:
+            self.check_interval = config.get("CHECK_INTERVAL", 10)
+            self.discovery_interval = (config.get("ASYNC_ENGINE", {}).get("DISCOVERY_INTERVAL_SECONDS")
+                                       or self.check_interval)
+            if self.async_engine:
+                self.async_engine.check_interval = self.check_interval
+                self.async_engine.discovery_interval = self.discovery_interval
+            self.logger.info(f"检查间隔: {self.check_interval}秒，扫描间隔: {self.discovery_interval}秒")
+        
+        if "VIDEO_EXTENSIONS" in changed:
+            self.video_extensions = config["VIDEO_EXTENSIONS"]
+            self.logger.info(f"监控的视频扩展名: {', '.join(self.video_extensions)}")
+        
+        if "DELETE_MODE" in changed:
+            self.delete_mode = config["DELETE_MODE"]
+            if self.disk_guard:
+                self.disk_guard.volumes = [volume for volume in self.disk_guard.volumes if volume[0] != "备份目录"]
+                self._add_backup_volume()
+            self.logger.info(f"处理完成后的视频清理方式: {self.delete_mode}")
+        
+        if any(key.startswith("RETRY.") for key in changed):
+            retry_config = config.get("RETRY", {})
+            self.retry_base_delay = retry_config.get("BASE_DELAY_SECONDS", 60)
+            self.retry_max_delay = retry_config.get("MAX_DELAY_SECONDS", 3600)
+            self.max_failures = retry_config.get("MAX_FAILURES", 5)
+            self.quarantine_dir = retry_config.get("QUARANTINE_DIR", "")
+        
+        if any(key in TASK_LIMIT_CONFIG_KEYS or key.startswith("GPU_DETECTION.MAX_TASKS_BY_GPU_TYPE.")
+               for key in changed):
+            old_limit = self.max_concurrent_tasks
+            limit = self._configured_task_limit(config)
+            if self.tuner:
+                # 静态并发数未变化时保留调优得到的并发数，只调整到新的范围内
+                seed = self._static_task_limit(config)
+                current = seed if seed != self._static_task_limit(old_config) else None
+                limit = self.tuner.reconfigure(config.get("AUTO_TUNE", {}).get("MIN_TASKS", 1),
+                                               self._tuner_max_tasks(config, limit), current)
+            self.max_concurrent_tasks = limit
+            if limit != old_limit:
+                self.logger.info(f"最大并发任务数: {old_limit} -> {limit}（运行中的任务不受影响）")
+        
+        if self.device_pool and any(key.startswith("GPU_DEVICES.MAX_TASKS_PER_DEVICE.") for key in changed):
+            self.device_pool = DevicePool(self.device_pool.devices,
+                                          config["GPU_DEVICES"]["MAX_TASKS_PER_DEVICE"] or self._placement_plan())
+            assignments = [device for device in self._device_assignments() if device != LANE_CPU]
+            self.logger.info(f"多显卡任务分配: {self.device_pool.describe(assignments)}")
+        
+        if "RUNTIME_CONFIG.INTERVAL_SECONDS" in changed:
+            self.config_watcher.interval_seconds = config["RUNTIME_CONFIG"]["INTERVAL_SECONDS"]
+        
+        restart_keys = [key for key in changed if not is_live_config_key(key)]
+        if restart_keys:
+            self.logger.warning(f"以下配置需要重启监控后生效: {', '.join(restart_keys)}")
+    
     def _is_valid_subtitle_content(self, content):
         """检查字幕内容是否有效"""
         # 检查是否包含常见的字幕格式标识
@@ -641,76 +1819,247 @@ class FileMonitor:
                     # 从处理中移除，但不标记为已完成
                     video_path = os.path.join(self.download_dir, filename)
                     self.status_manager.remove_from_processing(video_path)
+                    self._record_failure(video_path, "任务超过2小时未生成字幕")
                     self.logger.info(f"已清理卡住的任务: {filename}")
             except:
                 pass
     
     def check_new_video_files(self):
-        """检查新视频文件"""
-        all_video_files = self.get_video_files()
-        new_video_files = []
+        """
+        检查新视频文件
         
-        for video_path in all_video_files:
-            # 检查是否已经处理过或正在处理
-            if (not self.status_manager.is_file_processed(video_path) and 
-                not self.status_manager.is_file_processing(video_path)):
-                # 额外的安全检查：确保文件实际存在且未被占用
-                if os.path.exists(video_path):
-                    try:
-                        # 尝试打开文件以确保未被其他进程占用
-                        with open(video_path, 'rb') as f:
-                            f.read(1)  # 读取一个字节测试
-                        new_video_files.append(video_path)
-                    except (IOError, PermissionError):
-                        self.logger.warning(f"文件被占用，跳过处理: {os.path.basename(video_path)}")
-                else:
-                    self.logger.warning(f"文件不存在，跳过处理: {os.path.basename(video_path)}")
+        返回:
+            list: 可以调度的视频路径列表（任务状态为 stable，按目录顺序）
+            
+        说明:
+            调度的任务取自状态为 stable/queued 的任务记录，不再逐个文件查询状态；
+            只有从未记录过的文件名才做发现检查（读取测试后记为 discovered/stable），
+            读取失败（discovered）、等待重试（failed）和隔离中（quarantined）的文件每轮重新检查
+        """
+        listed = {os.path.basename(video_path): video_path for video_path in self.get_video_files()}
+        # 源文件已删除或被移走的任务不再保留记录（下载目录不可用时不清理）
+        if os.path.isdir(self.download_dir):
+            pruned = self.status_manager.prune_missing_jobs(listed)
+            if pruned:
+                self.logger.info(f"源文件已不存在，删除任务记录: {pruned}")
+        if not listed:
+            return []
+        jobs = self.status_manager.get_jobs_in_state(STABLE, QUEUED, DISCOVERED, FAILED, QUARANTINED)
+        unseen = set(self.status_manager.get_unseen_files([filename for filename in listed
+                                                           if filename not in jobs]))
+        retry_tracked = self.status_manager.get_retry_tracked_files()
         
+        new_video_files = []
+        for filename, video_path in listed.items():
+            job = jobs.get(filename)
+            if job is None and filename not in unseen:
+                # 已完成或正在处理
+                continue
+            state = job["state"] if job else None
+            if state == QUEUED and (self.status_manager.is_file_refine_pending(video_path)
+                                    or self.status_manager.is_file_processing(video_path)):
+                # 两遍模式等待精修的任务由精修队列调度
+                continue
+            if filename in retry_tracked and self._is_retry_blocked(video_path):
+                continue
+            if state in (STABLE, QUEUED):
+                new_video_files.append(video_path)
+            elif self._discover(video_path, state):
+                new_video_files.append(video_path)
+        if self.duration_prober:
+            # 发现时就提交时长探测，调度时通常已经有结果
+            self._collect_probed_durations()
+            for video_path in new_video_files:
+                self._media_duration(video_path)
         return new_video_files
     
+    def _discover(self, video_path, state):
+        """
+        发现检查：记为 discovered，文件能正常读取（下载已完成）后记为 stable
+        
+        参数:
+            video_path: 视频文件路径
+            state: 当前任务状态，没有任务记录时为None
+            
+        返回:
+            bool: 文件可以调度时返回True
+        """
+        video_name = os.path.basename(video_path)
+        if state != DISCOVERED:
+            self.metrics.job_discovered(video_name)
+        self.status_manager.set_job_state(video_path, DISCOVERED)
+        self.tracer.mark(video_name, PHASE_DISCOVERED)
+        # 额外的安全检查：确保文件实际存在且未被占用
+        if not os.path.exists(video_path):
+            self.logger.warning(f"文件不存在，跳过处理: {video_name}")
+            return False
+        try:
+            # 尝试打开文件以确保未被其他进程占用
+            with open(video_path, 'rb') as f:
+                f.read(1)  # 读取一个字节测试
+        except (IOError, PermissionError):
+            self.logger.warning(f"文件被占用，跳过处理: {video_name}")
+            return False
+        self.status_manager.set_job_state(video_path, STABLE)
+        self.tracer.mark(video_name, PHASE_STABLE)
+        return True
+    
     def monitor_once(self):
-        """执行单次检查"""
+        """
+        执行单次检查
+        
+        说明:
+            依次检查已完成的任务和启动新任务；持续监控由异步引擎驱动，
+            单次检查模式（--once）和界面仍使用本方法
+        """
         self.logger.info("执行单次检查...")
+        self._check_completions()
+        self._admit_new_jobs()
+    
+    @timed_stage("completion")
+    def _check_completions(self):
+        """
+        清理过期状态，回收已退出的翻译进程并检查任务完成情况
+        
+        返回:
+            list: 本次完成处理的文件名列表
+        """
+        # 0. 应用配置文件的修改
+        self.reload_config()
         
-        # 1. 清理过期的处理状态
-        stale_files = self.status_manager.cleanup_stale_processing()
+        # 1. 清理过期的处理状态（本进程管理的任务不清理）
+        stale_files = self.status_manager.cleanup_stale_processing(running=self.processes)
         if stale_files:
             self.logger.info(f"清理了过期的处理状态: {stale_files}")
         
-        # 2. 检查所有正在处理文件的完成状态
+        # 2. 回收已退出的翻译进程，终止卡死的翻译进程，检查所有正在处理文件的完成状态
+        self._reap_finished_processes()
+        self._check_hung_translators()
         completed_files = self.check_all_processing_files()
         if completed_files:
             self.logger.info(f"完成了 {len(completed_files)} 个文件: {completed_files}")
+        return completed_files
+    
+    @timed_stage("admission")
+    def _admit_new_jobs(self, new_video_files=None):
+        """
+        按可用槽位启动新任务
         
-        # 3. 获取当前正在处理的任务数量
-        current_processing_count = self.status_manager.get_processing_count()
+        参数:
+            new_video_files: 已发现的新视频列表，为None时重新扫描
+        """
+        # 3. 获取当前正在处理的任务数量（CPU通道任务不占用显卡槽位，遗留的翻译进程占用槽位）
+        current_processing_count = (self.status_manager.get_processing_count() - self._cpu_lane_count()
+                                    + self._scan_orphan_translators())
         self.logger.info(f"当前正在处理的任务数: {current_processing_count}/{self.max_concurrent_tasks}")
+        self._update_slot_metrics(current_processing_count)
         
-        # 4. 如果已达到最大任务数，跳过新任务启动
-        if current_processing_count >= self.max_concurrent_tasks:
+        # 4. 如果已达到最大任务数（且CPU通道不可用、没有可抢占的精修任务），跳过新任务启动
+        if (current_processing_count >= self.max_concurrent_tasks and not self._cpu_lane_available()
+                and not (self.two_pass and self._running_refine_jobs())):
             self.logger.info(f"已达到最大并发任务数({self.max_concurrent_tasks})，等待任务完成")
+            # 不扫描目录，按状态文件中等待调度的任务判断是否还有排队的视频
+            backlog = self.status_manager.count_jobs_in_state(STABLE, QUEUED)
+            self.metrics.jobs_pending.set(backlog)
+            self._update_concurrency(has_pending_work=backlog > 0)
             return
         
-        # 5. 检查新视频文件
-        new_video_files = self.check_new_video_files()
+        # 5. 检查新视频文件（异步引擎传入的列表可能已过时，过滤掉已开始处理的）
+        if new_video_files is None:
+            new_video_files = self.check_new_video_files()
+        else:
+            new_video_files = [video_path for video_path in new_video_files
+                               if os.path.exists(video_path)
+                               and not self.status_manager.is_file_processing(video_path)
+                               and not self.status_manager.is_file_processed(video_path)
+                               and not self.status_manager.is_file_cleaning(video_path)]
+        if self.two_pass and new_video_files:
+            # 预览任务优先：槽位不足时抢占精修任务
+            waiting = len(new_video_files) - max(self.max_concurrent_tasks - current_processing_count, 0)
+            if waiting > 0:
+                current_processing_count -= self._preempt_refine_jobs(waiting)
+        self._update_concurrency(has_pending_work=len(new_video_files) >= self.max_concurrent_tasks - current_processing_count)
         
         if new_video_files:
             self.logger.info(f"发现 {len(new_video_files)} 个新视频文件")
             
             # 计算可启动的新任务数量
             available_slots = self.max_concurrent_tasks - current_processing_count
-            tasks_to_start = min(len(new_video_files), available_slots)
+            tasks_to_start = max(min(len(new_video_files), available_slots), 0)
             
-            if tasks_to_start > 0:
-                self.logger.info(f"可启动 {tasks_to_start} 个新任务")
+            if tasks_to_start > 0 or self._cpu_lane_available():
+                if tasks_to_start > 0:
+                    self.logger.info(f"可启动 {tasks_to_start} 个新任务")
                 
-                # 启动新任务
-                for video_path in new_video_files[:tasks_to_start]:
-                    self.process_video(video_path)
+                # 启动新任务：按预计完成时间选择GPU或CPU通道
+                self._collect_probed_durations()
+                gpu_started = 0
+                for video_path in new_video_files:
+                    if gpu_started >= tasks_to_start and not self._cpu_lane_available():
+                        # 两个通道都没有空闲槽位，剩余视频等待下一轮
+                        break
+                    if not self._disk_space_ok(video_path):
+                        break
+                    gpu_slot_free = gpu_started < tasks_to_start
+                    lane, media_seconds = self._choose_lane(video_path, gpu_slot_free)
+                    if lane == LANE_CPU:
+                        self.process_video(video_path, LANE_CPU, media_seconds)
+                        continue
+                    if not gpu_slot_free:
+                        if not self._cpu_lane_available():
+                            break
+                        continue
+                    admitted, device = self._place_new_task()
+                    if not admitted:
+                        # 显卡暂不可用，剩余视频只考虑CPU通道
+                        tasks_to_start = gpu_started
+                        continue
+                    self.process_video(video_path, device, media_seconds)
+                    gpu_started += 1
             else:
                 self.logger.info("无可用任务槽位，等待任务完成")
         else:
             self.logger.info("未发现新的视频文件")
+        
+        # 6. 两遍模式：没有预览任务等待时，用空闲槽位启动精修任务
+        previews_waiting = [video_path for video_path in new_video_files
+                            if not self.status_manager.is_file_processing(video_path)]
+        if self.two_pass and not previews_waiting:
+            self._start_refine_jobs()
+        
+        self.metrics.jobs_pending.set(len(previews_waiting))
+        self._update_slot_metrics(self.status_manager.get_processing_count() - self._cpu_lane_count()
+                                  + len(self.orphan_translators))
+    
+    def _update_slot_metrics(self, used_slots):
+        """更新运行中任务数和槽位占用指标"""
+        self.metrics.jobs_running.set(len(self.status_manager.get_processing_files()))
+        self.metrics.slots_total.set(self.max_concurrent_tasks)
+        self.metrics.slots_used.set(used_slots)
+    
+    def start_metrics_server(self):
+        """
+        启动指标服务（METRICS.ENABLED 为True时）
+        
+        返回:
+            MetricsServer: 已启动的服务，未启用或启动失败时返回None
+        """
+        if not self.metrics_enabled or self.metrics_server is not None:
+            return self.metrics_server
+        server = MetricsServer(self.metrics.render, self.metrics_host, self.metrics_port)
+        try:
+            server.start()
+        except OSError as e:
+            self.logger.error(f"指标服务启动失败（{self.metrics_host}:{self.metrics_port}）: {e}")
+            return None
+        self.metrics_server = server
+        return server
+    
+    def stop_metrics_server(self):
+        """停止指标服务"""
+        if self.metrics_server is not None:
+            self.metrics_server.stop()
+            self.metrics_server = None
     
     def monitor_loop(self):
         """监控循环"""
@@ -719,10 +2068,15 @@ class FileMonitor:
         self.logger.info(f"字幕输出目录: {self.subtitle_dir}")
         
         # 清理过期的处理状态
-        stale_files = self.status_manager.cleanup_stale_processing()
+        stale_files = self.status_manager.cleanup_stale_processing(running=self.processes)
         if stale_files:
             self.logger.info(f"清理了过期的处理状态: {stale_files}")
         
+        self.start_metrics_server()
+        if self.async_engine_enabled:
+            self._run_async_engine()
+            return
+        
         try:
             while True:
                 try:
@@ -730,25 +2084,230 @@ class FileMonitor:
                     self.monitor_once()
                     
                     # 等待下次检查
-                    time.sleep(CONFIG["CHECK_INTERVAL"])
+                    time.sleep(self.check_interval)
                     
                 except KeyboardInterrupt:
                     # 重新抛出KeyboardInterrupt，让外层的异常处理捕获
                     raise
                 except Exception as e:
                     self.logger.error(f"监控循环发生错误: {e}")
-                    time.sleep(CONFIG["CHECK_INTERVAL"])  # 出错后等待下次检查
+                    time.sleep(self.check_interval)  # 出错后等待下次检查
         
         except KeyboardInterrupt:
             self.logger.info("用户中断监控，正在清理处理中的任务状态...")
+            self.stop_background_workers()
             self._cleanup_processing_on_exit()
             self.logger.info("程序退出")
             # 重新抛出KeyboardInterrupt，让main.py中的异常处理捕获
             raise
     
+    def stop_background_workers(self):
+        """
+        停止监控器启动的后台线程：清理线程、备份保留线程、时长探测线程和指标服务，并停止检查配置文件
+
+        说明:
+            监控结束后调用（命令行中断、GUI 停止监控）；正在执行的清理会完成，
+            未开始的清理任务保留在状态文件中，下次启动时继续
+        """
+        self.cleanup_worker.stop(timeout=30)
+        if self.backup_retention:
+            self.backup_retention.stop(timeout=5)
+        if self.duration_prober:
+            self.duration_prober.stop(timeout=5)
+        self.stop_metrics_server()
+        self.config_watcher = None
+    
+    def create_async_engine(self):
+        """
+        创建驱动本监控器的异步引擎
+        
+        返回:
+            AsyncMonitorEngine: 调用 run_forever() 运行，stop() 停止
+        """
+        # asyncio 导入较慢，轮询模式和单次检查用不到，使用时才导入
+        from async_engine import AsyncMonitorEngine
+        self.async_engine = AsyncMonitorEngine(self, discovery_interval=self.discovery_interval,
+                                               check_interval=self.check_interval)
+        return self.async_engine
+    
+    def _run_async_engine(self):
+        """使用异步引擎持续监控，直到用户中断"""
+        engine = self.create_async_engine()
+        try:
+            engine.run_forever()
+        except KeyboardInterrupt:
+            self.logger.info("用户中断监控，正在清理处理中的任务状态...")
+            self.stop_background_workers()
+            self._cleanup_processing_on_exit()
+            self.logger.info("程序退出")
+            raise
+    
+    def recover_processing_jobs(self):
+        """
+        启动时核对上次运行遗留的处理中任务
+        
+        返回:
+            dict: {"reattached": [...], "completed": [...], "requeued": [...]} 各类文件名列表
+            
+        说明:
+            - 记录的翻译进程仍在运行（进程号和启动时间一致）：重新接管，不重复启动
+            - 进程已退出但字幕已完成：保留处理中状态，由下一轮完成检测正常收尾
+            - 进程已退出且没有有效字幕：移出处理中，立即重新排队（精修任务放回精修队列）
+            - 没有进程记录的旧任务保持原样，按原有超时规则处理
+        """
+        result = {"reattached": [], "completed": [], "requeued": []}
+        for filename, entry in self.status_manager.get_processing_entries().items():
+            pid = entry.get("pid")
+            if not pid or filename in self.processes:
+                continue
+            video_path = entry.get("file_path") or os.path.join(self.download_dir, filename)
+            
+            if is_same_process(pid, entry.get("pid_start_time")):
+                self.processes[filename] = ReattachedProcess(pid, entry.get("pid_start_time"))
+                self.logger.info(f"重新接管运行中的翻译进程（PID {pid}）: {filename}")
+                result["reattached"].append(filename)
+                continue
+            
+            subtitle_path = self._subtitle_path(filename, entry)
+            if os.path.exists(subtitle_path) and os.path.getsize(subtitle_path) > 100:
+                self.logger.info(f"翻译进程已结束且字幕已生成，等待完成检测: {filename}")
+                result["completed"].append(filename)
+                continue
+            
+            self.status_manager.remove_from_processing(video_path)
+            if entry.get("pass") == PASS_REFINE:
+                self.status_manager.add_to_refine_queue(video_path)
+            self.logger.info(f"翻译进程已不存在（PID {pid}），重新排队: {filename}")
+            result["requeued"].append(filename)
+        return result
+    
+    def _orphan_input_path(self, argv):
+        """
+        从翻译进程的命令行参数中找出下载目录中的输入视频
+        
+        返回:
+            str: 视频文件路径，不是下载目录中的视频时返回None
+        """
+        download_dir = os.path.normcase(os.path.abspath(self.download_dir))
+        for arg in reversed(argv[1:]):
+            if arg.startswith("-"):
+                continue
+            if (os.path.normcase(os.path.abspath(os.path.dirname(arg))) == download_dir
+                    and os.path.splitext(arg)[1].lower() in self.video_extensions):
+                return os.path.join(self.download_dir, os.path.basename(arg))
+        return None
+    
+    def _orphan_job_info(self, argv):
+        """
+        从翻译进程的命令行参数还原任务信息（处理阶段、显卡编号）
+        
+        说明:
+            通过环境变量指定的显卡无法从命令行得知，不记录显卡编号
+        """
+        extra = {}
+        for arg in argv:
+            if arg.startswith("--output_dir="):
+                output_dir = os.path.normcase(os.path.abspath(arg.split("=", 1)[1]))
+                if self.two_pass:
+                    staging_dir = os.path.normcase(os.path.abspath(self.refine_staging_dir))
+                    extra["pass"] = PASS_REFINE if output_dir == staging_dir else PASS_PREVIEW
+            elif arg == "--device=cpu":
+                extra["device"] = LANE_CPU
+            elif arg.startswith("--device=cuda:"):
+                try:
+                    extra["device"] = int(arg.split(":", 1)[1])
+                except ValueError:
+                    pass
+        return extra
+    
+    def _adopt_orphan(self, process_entry, video_path):
+        """
+        接管处理已知视频的遗留翻译进程
+        
+        参数:
+            process_entry: 进程表中的 ProcessEntry
+            video_path: 进程正在处理的视频路径
+            
+        返回:
+            bool: 接管成功返回True；视频已有其他进程处理、已完成或已隔离时返回False
+        """
+        filename = os.path.basename(video_path)
+        if (filename in self.processes or not os.path.exists(video_path)
+                or self.status_manager.is_file_processed(video_path)
+                or self.status_manager.is_file_cleaning(video_path)
+                or self.status_manager.get_job_state(video_path) == QUARANTINED):
+            return False
+        
+        info = {"pid": process_entry.pid, "pid_start_time": process_entry.start_time, "adopted": True}
+        if self.status_manager.is_file_processing(video_path):
+            self.status_manager.update_processing_entry(video_path, info)
+        else:
+            extra = self._orphan_job_info(process_entry.argv)
+            extra.update(info)
+            if extra.get("pass") == PASS_REFINE:
+                self.status_manager.remove_from_refine_queue(video_path)
+            self.status_manager.set_job_state(video_path, QUEUED, "接管遗留翻译进程")
+            self.status_manager.mark_as_processing(video_path, extra)
+        self.processes[filename] = ReattachedProcess(process_entry.pid, process_entry.start_time)
+        self.logger.info(f"接管遗留的翻译进程（PID {process_entry.pid}）: {filename}")
+        return True
+    
+    def _scan_orphan_translators(self, force=False):
+        """
+        扫描不由本程序管理的翻译进程
+        
+        参数:
+            force: 为True时忽略扫描间隔立即扫描
+            
+        返回:
+            int: 未能接管、需要占用任务槽位的遗留翻译进程数
+            
+        说明:
+            按可执行文件和命令行参数识别翻译进程；输入视频属于下载目录中待处理的视频时接管该进程，
+            由完成检测正常收尾；其余进程（如处理其他目录的视频）只计入并发数，避免显卡超载
+        """
+        if self.process_table is None:
+            return 0
+        now = time.time()
+        if not force and now - self._last_orphan_scan < self.orphan_scan_interval:
+            return len(self.orphan_translators)
+        self._last_orphan_scan = now
+        
+        managed_pids = [process.pid for process in self.processes.values()]
+        try:
+            entries = find_translator_processes(self.process_table, self._get_translator_exe(), managed_pids)
+        except Exception as e:
+            self.logger.warning(f"扫描遗留翻译进程失败: {e}")
+            return len(self.orphan_translators)
+        
+        orphans = []
+        for process_entry in entries:
+            video_path = self._orphan_input_path(process_entry.argv)
+            if video_path is None or not self._adopt_orphan(process_entry, video_path):
+                orphans.append(process_entry.pid)
+        if sorted(orphans) != sorted(self.orphan_translators):
+            if orphans:
+                self.logger.info(f"发现 {len(orphans)} 个不由本程序管理的翻译进程，计入并发数: {orphans}")
+            else:
+                self.logger.info("遗留的翻译进程已全部结束")
+        self.orphan_translators = orphans
+        return len(orphans)
+    
     def _cleanup_processing_on_exit(self):
-        """在程序退出时清理所有处理中的任务状态"""
+        """
+        在程序退出时处理所有处理中的任务状态
+        
+        说明:
+            KEEP_CHILDREN_ON_EXIT 为True时保留翻译进程和处理中状态，下次启动时重新接管；
+            否则终止翻译进程并清理处理中状态，下次启动时重新处理
+        """
         processing_files = self.status_manager.get_processing_files()
+        if processing_files and self.keep_children_on_exit:
+            self.logger.info(f"保留 {len(processing_files)} 个运行中的翻译任务，下次启动时重新接管")
+            return
+        for filename, process in list(self.processes.items()):
+            if process.poll() is None:
+                self._terminate_process(process)
         if processing_files:
             self.logger.info(f"清理 {len(processing_files)} 个处理中的任务状态...")
             for filename in processing_files:
@@ -0,0 +1,229 @@
+"""
+文件移动模块
+作者：ChiangShenhung
+开发工具：腾讯 Code Buddy CN
+版本：2.0
+设计思路和调试：ChiangShenhung
+
+功能说明：
+- 备份目录与视频在同一文件系统时使用 os.rename 原子移动
+- 跨文件系统时分块复制（优先 os.copy_file_range，其次 os.sendfile，最后普通读写）
+- 复制过程定期报告进度，中断后可从临时文件（.part）续传
+- 复制完成后校验文件大小，一致后才删除原文件
+- 可选限速和自适应降速（见 io_throttle）：需要限速时使用复用的对齐缓冲区逐块读写，否则仍走零拷贝路径
+"""
+
+import errno
+import logging
+import os
+import shutil
+import time
+
+# 续传临时文件后缀
+PARTIAL_SUFFIX = ".part"
+
+# 默认分块大小：64MB
+DEFAULT_CHUNK_SIZE = 64 * 1024 * 1024
+
+
+def is_same_filesystem(src, dst_dir):
+    """
+    判断源文件与目标目录是否在同一文件系统
+
+    参数:
+        src: 源文件路径
+        dst_dir: 目标目录（必须已存在）
+
+    返回:
+        bool: 同一文件系统返回True，无法判断时返回False
+    """
+    try:
+        return os.stat(src).st_dev == os.stat(dst_dir).st_dev
+    except OSError:
+        return False
+
+
+def partial_path_for(src, dst_dir):
+    """
+    获取续传临时文件路径
+
+    参数:
+        src: 源文件路径
+        dst_dir: 目标目录
+
+    返回:
+        str: 目标目录下以源文件名命名的 .part 文件路径（同一源文件中断后再次移动时路径不变）
+    """
+    return os.path.join(dst_dir, os.path.basename(src) + PARTIAL_SUFFIX)
+
+
+def _copy_range(src_fd, dst_fd, offset, count):
+    """
+    复制一块数据，按平台能力选择最快的方式
+
+    返回:
+        int: 实际复制的字节数（0表示已到文件末尾）
+    """
+    if hasattr(os, "copy_file_range"):
+        try:
+            return os.copy_file_range(src_fd, dst_fd, count, offset, offset)
+        except OSError as e:
+            # 部分文件系统/内核不支持跨设备copy_file_range，退回sendfile
+            if e.errno not in (errno.EXDEV, errno.ENOSYS, errno.EOPNOTSUPP, errno.EINVAL):
+                raise
+    if hasattr(os, "sendfile"):
+        try:
+            os.lseek(dst_fd, offset, os.SEEK_SET)
+            return os.sendfile(dst_fd, src_fd, offset, count)
+        except OSError as e:
+            if e.errno not in (errno.ENOSYS, errno.EINVAL, errno.ENOTSOCK, errno.EOPNOTSUPP):
+                raise
+    os.lseek(src_fd, offset, os.SEEK_SET)
+    os.lseek(dst_fd, offset, os.SEEK_SET)
+    data = os.read(src_fd, count)
+    if data:
+        os.write(dst_fd, data)
+    return len(data)
+
+
+def _copy_throttled(src, partial_path, offset, total, throttle, progress_callback, progress_interval):
+    """
+    限速复制：用限速器的复用缓冲区逐块读写
+
+    返回:
+        int: 复制结束时的偏移量
+    """
+    buffer = throttle.get_buffer()
+    view = memoryview(buffer)
+    try:
+        with open(src, 'rb', buffering=0) as src_file, open(partial_path, 'r+b', buffering=0) as dst_file:
+            src_file.seek(offset)
+            dst_file.seek(offset)
+            last_report = 0.0
+            while offset < total:
+                count = min(len(view), total - offset)
+                throttle.acquire(count)
+                copied = src_file.readinto(view[:count])
+                if not copied:
+                    break
+                dst_file.write(view[:copied])
+                offset += copied
+                now = time.time()
+                if progress_callback and (now - last_report >= progress_interval or offset >= total):
+                    progress_callback(offset, total)
+                    last_report = now
+            os.fsync(dst_file.fileno())
+    finally:
+        view.release()
+        throttle.release_buffer(buffer)
+    return offset
+
+
+def copy_file_chunked(src, partial_path, chunk_size=DEFAULT_CHUNK_SIZE,
+                      progress_callback=None, progress_interval=5.0, throttle=None):
+    """
+    分块复制文件到临时文件，支持断点续传
+
+    参数:
+        src: 源文件路径
+        partial_path: 临时文件路径（已存在时从其末尾继续复制）
+        chunk_size: 每块字节数
+        progress_callback: 进度回调，参数为 (已复制字节数, 总字节数)
+        progress_interval: 两次进度回调的最小间隔（秒）
+        throttle: IOThrottle 限速器，为None时不限速
+
+    返回:
+        int: 复制完成后临时文件的大小
+
+    说明:
+        临时文件比源文件大（源文件已变化）时从头复制；
+        限速器当前不需要限速时走零拷贝路径，复制中途开始限速时剩余部分改为限速复制
+    """
+    total = os.path.getsize(src)
+    offset = 0
+    if os.path.exists(partial_path):
+        offset = os.path.getsize(partial_path)
+        if offset > total:
+            offset = 0
+
+    flags = os.O_WRONLY | os.O_CREAT | getattr(os, "O_BINARY", 0)
+    if throttle is not None and throttle.is_active():
+        fd = os.open(partial_path, flags, 0o644)
+        try:
+            os.ftruncate(fd, offset)
+        finally:
+            os.close(fd)
+        _copy_throttled(src, partial_path, offset, total, throttle, progress_callback, progress_interval)
+        return os.path.getsize(partial_path)
+
+    switch_to_throttled = False
+    src_fd = os.open(src, os.O_RDONLY | getattr(os, "O_BINARY", 0))
+    try:
+        dst_fd = os.open(partial_path, flags, 0o644)
+        try:
+            os.ftruncate(dst_fd, offset)
+            last_report = 0.0
+            while offset < total:
+                started = time.perf_counter()
+                copied = _copy_range(src_fd, dst_fd, offset, min(chunk_size, total - offset))
+                if copied <= 0:
+                    break
+                offset += copied
+                if throttle is not None:
+                    throttle.note_copied(copied, time.perf_counter() - started)
+                    if throttle.is_active() and offset < total:
+                        switch_to_throttled = True
+                        break
+                now = time.time()
+                if progress_callback and (now - last_report >= progress_interval or offset >= total):
+                    progress_callback(offset, total)
+                    last_report = now
+            os.fsync(dst_fd)
+        finally:
+            os.close(dst_fd)
+    finally:
+        os.close(src_fd)
+    if switch_to_throttled:
+        _copy_throttled(src, partial_path, offset, total, throttle, progress_callback, progress_interval)
+    return os.path.getsize(partial_path)
+
+
+def move_file(src, dst, chunk_size=DEFAULT_CHUNK_SIZE,
+              progress_callback=None, progress_interval=5.0, throttle=None):
+    """
+    移动文件：同一文件系统直接重命名，跨文件系统分块复制并校验
+
+    参数:
+        src: 源文件路径
+        dst: 目标文件路径（所在目录必须已存在）
+        chunk_size: 跨文件系统复制时的分块大小
+        progress_callback: 跨文件系统复制的进度回调，参数为 (已复制字节数, 总字节数)
+        progress_interval: 两次进度回调的最小间隔（秒）
+        throttle: 跨文件系统复制时使用的 IOThrottle 限速器
+
+    返回:
+        str: 实际使用的方式："rename" 或 "copy"
+
+    异常:
+        OSError: 移动失败或复制后大小校验不一致（此时原文件保留）
+    """
+    logger = logging.getLogger(__name__)
+    dst_dir = os.path.dirname(os.path.abspath(dst))
+
+    if is_same_filesystem(src, dst_dir):
+        # 重命名是原子操作，任何时刻文件都只在一个位置且内容完整
+        os.rename(src, dst)
+        return "rename"
+
+    partial_path = partial_path_for(src, dst_dir)
+    if os.path.exists(partial_path):
+        logger.info(f"发现未完成的复制，从 {os.path.getsize(partial_path) / 1024 / 1024:.1f}MB 处续传: "
+                    f"{os.path.basename(src)}")
+    copied = copy_file_chunked(src, partial_path, chunk_size, progress_callback, progress_interval, throttle)
+    expected = os.path.getsize(src)
+    if copied != expected:
+        raise OSError(f"复制后大小不一致: {copied} != {expected} 字节，保留原文件")
+    shutil.copystat(src, partial_path)
+    os.replace(partial_path, dst)
+    os.unlink(src)
+    return "copy"
@@ -0,0 +1,435 @@
+"""
+显卡清单模块
+作者：ChiangShenhung
+开发工具：腾讯 Code Buddy CN
+版本：2.0
+设计思路和调试：ChiangShenhung
+
+功能说明：
+- 通过可插拔的检测来源获取结构化的显卡清单：编号、名称、总显存、可用显存、计算能力、驱动版本
+- 支持 nvidia-smi CSV 输出、/proc/driver/nvidia（Linux）、WMI（Windows），以及用于测试的JSON清单文件
+- 按显存计算每块显卡可同时运行的任务数，不再按型号名称判断档位
+- 检测过程不会等待用户输入，所有来源都失败时返回None，由调用方使用配置中的显卡类型
+"""
+
+import glob
+import json
+import logging
+import os
+import subprocess
+from collections import namedtuple
+
+from gpu_probe_cache import GpuProbeCache
+from gpu_telemetry import _parse_number
+from process_table import wmi_connection
+
+# 结构化的显卡信息；显存单位为MB，无法获取的字段为None
+GpuDevice = namedtuple("GpuDevice", ["index", "name", "memory_total_mb", "memory_free_mb",
+                                     "compute_capability", "driver_version", "source"])
+
+# nvidia-smi 清单查询字段（compute_cap 需要 510 及以上版本的驱动，旧驱动不带该字段重试）
+NVIDIA_SMI_INVENTORY_FIELDS = ["index", "name", "memory.total", "memory.free", "driver_version", "compute_cap"]
+
+DEFAULT_SOURCES = ["nvidia-smi", "proc", "wmi"]
+
+# 编号就是 CUDA 设备编号的来源（nvidia-smi 按 PCI 总线顺序编号）；
+# WMI 按枚举顺序编号且包含核显，/proc 使用 Device Minor，都不能用于设置 CUDA_VISIBLE_DEVICES
+CUDA_ORDINAL_SOURCES = ("nvidia-smi",)
+
+
+def _optional(value):
+    """把 nvidia-smi 中的 [N/A]、空字符串等转为None"""
+    value = (value or "").strip()
+    if not value or value.startswith("[") or value.upper() == "N/A":
+        return None
+    return value
+
+
+def parse_nvidia_smi_inventory(text, fields=NVIDIA_SMI_INVENTORY_FIELDS):
+    """
+    解析 nvidia-smi --query-gpu 的清单CSV输出
+
+    参数:
+        text: nvidia-smi 输出文本（--format=csv,noheader,nounits，带单位或表头也可解析）
+        fields: 查询字段列表，顺序与CSV列顺序一致
+
+    返回:
+        list: GpuDevice 列表，无法解析的行会被跳过
+    """
+    devices = []
+    for line in text.splitlines():
+        line = line.strip()
+        if not line or line.startswith("index"):
+            continue
+        parts = [part.strip() for part in line.split(",")]
+        if len(parts) < len(fields):
+            continue
+        row = dict(zip(fields, parts))
+        index = _parse_number(row["index"])
+        if index is None:
+            continue
+        devices.append(GpuDevice(
+            index=int(index),
+            name=row["name"],
+            memory_total_mb=_parse_number(row.get("memory.total", "")),
+            memory_free_mb=_parse_number(row.get("memory.free", "")),
+            compute_capability=_optional(row.get("compute_cap")),
+            driver_version=_optional(row.get("driver_version")),
+            source="nvidia-smi",
+        ))
+    return devices
+
+
+class NvidiaSmiInventory:
+    """基于 nvidia-smi 命令的显卡清单来源"""
+
+    name = "nvidia-smi"
+
+    def __init__(self, executable="nvidia-smi", timeout=5):
+        self.executable = executable
+        self.timeout = timeout
+
+    def _query(self, fields):
+        cmd = [self.executable, "--query-gpu=" + ",".join(fields), "--format=csv,noheader,nounits"]
+        return subprocess.run(cmd, capture_output=True, text=True, timeout=self.timeout,
+                              stdin=subprocess.DEVNULL, check=True).stdout
+
+    def probe(self):
+        """
+        查询显卡清单
+
+        返回:
+            list: GpuDevice 列表；命令不存在或执行失败时返回None
+        """
+        fields = NVIDIA_SMI_INVENTORY_FIELDS
+        try:
+            try:
+                output = self._query(fields)
+            except subprocess.CalledProcessError:
+                # 旧驱动不支持 compute_cap 字段
+                fields = [field for field in fields if field != "compute_cap"]
+                output = self._query(fields)
+        except (OSError, subprocess.SubprocessError) as e:
+            logging.debug(f"nvidia-smi 查询显卡清单失败: {e}")
+            return None
+        return parse_nvidia_smi_inventory(output, fields)
+
+
+def _parse_key_values(text):
+    """解析 "键: 值" 格式的文本"""
+    values = {}
+    for line in text.splitlines():
+        key, sep, value = line.partition(":")
+        if sep:
+            values[key.strip()] = value.strip()
+    return values
+
+
+class ProcNvidiaInventory:
+    """
+    基于 /proc/driver/nvidia 的显卡清单来源（Linux，不需要 nvidia-smi）
+
+    说明:
+        只能获取型号、编号和驱动版本，没有显存信息
+    """
+
+    name = "proc"
+
+    def __init__(self, root="/proc/driver/nvidia"):
+        self.root = root
+
+    def probe(self):
+        """
+        读取显卡清单
+
+        返回:
+            list: GpuDevice 列表；目录不存在时返回None
+        """
+        if not os.path.isdir(self.root):
+            return None
+        driver_version = None
+        try:
+            with open(os.path.join(self.root, "version"), 'r', encoding='utf-8', errors='replace') as f:
+                first_line = f.readline()
+            # NVRM version: NVIDIA UNIX x86_64 Kernel Module  535.104.05  Sat Aug 19 01:15:15 UTC 2023
+            tokens = first_line.split("Kernel Module", 1)[-1].split()
+            driver_version = tokens[0] if tokens else None
+        except OSError:
+            pass
+
+        devices = []
+        for info_file in sorted(glob.glob(os.path.join(self.root, "gpus", "*", "information"))):
+            try:
+                with open(info_file, 'r', encoding='utf-8', errors='replace') as f:
+                    info = _parse_key_values(f.read())
+            except OSError:
+                continue
+            minor = _parse_number(info.get("Device Minor", ""))
+            devices.append(GpuDevice(
+                index=int(minor) if minor is not None else len(devices),
+                name=info.get("Model", "未知"),
+                memory_total_mb=None,
+                memory_free_mb=None,
+                compute_capability=None,
+                driver_version=driver_version,
+                source="proc",
+            ))
+        return sorted(devices, key=lambda device: device.index)
+
+
+class WmiInventory:
+    """
+    基于 WMI 的显卡清单来源（Windows，需要 wmi 库）
+
+    说明:
+        Win32_VideoController.AdapterRAM 是32位数值，4GB以上的显存只能显示为约4GB，
+        有 nvidia-smi 时应优先使用 nvidia-smi
+    """
+
+    name = "wmi"
+
+    def probe(self):
+        """
+        查询显卡清单
+
+        返回:
+            list: GpuDevice 列表；wmi 库不可用或查询失败时返回None
+        """
+        # 在线程中调用（GUI检测线程、探测缓存后台刷新），连接必须在当前线程建立
+        devices = []
+        try:
+            with wmi_connection() as connection:
+                for index, gpu in enumerate(connection.Win32_VideoController()):
+                    adapter_ram = getattr(gpu, 'AdapterRAM', 0) or 0
+                    devices.append(GpuDevice(
+                        index=index,
+                        name=getattr(gpu, 'Name', None) or '未知',
+                        memory_total_mb=adapter_ram / (1024 * 1024) if adapter_ram > 0 else None,
+                        memory_free_mb=None,
+                        compute_capability=None,
+                        driver_version=getattr(gpu, 'DriverVersion', None),
+                        source="wmi",
+                    ))
+        except ImportError:
+            logging.debug("未安装wmi库，跳过WMI显卡检测")
+            return None
+        except Exception as e:
+            logging.warning(f"WMI显卡检测失败: {e}")
+            return None
+        return devices
+
+
+class FixtureInventory:
+    """
+    基于JSON文件的显卡清单来源（用于测试）
+
+    文件内容为显卡列表，或 {"gpus": [...]}；每块显卡的字段与 GpuDevice 相同，缺少的字段为None，
+    source 默认为 "fixture"，模拟 nvidia-smi 的检测结果时设为 "nvidia-smi"
+    """
+
+    name = "fixture"
+
+    def __init__(self, path):
+        self.path = path
+
+    def probe(self):
+        """
+        读取显卡清单
+
+        返回:
+            list: GpuDevice 列表；文件不存在或格式错误时返回None
+        """
+        try:
+            with open(self.path, 'r', encoding='utf-8') as f:
+                data = json.load(f)
+        except (OSError, ValueError) as e:
+            logging.warning(f"读取显卡清单文件失败: {self.path}, 错误: {e}")
+            return None
+        if isinstance(data, dict):
+            data = data.get("gpus", [])
+        return [device_from_dict(dict(item, source=item.get("source", "fixture")), index)
+                for index, item in enumerate(data)]
+
+
+def device_from_dict(data, default_index=0):
+    """
+    由字典创建 GpuDevice（读取缓存和清单文件时使用）
+
+    参数:
+        data: 显卡信息字典
+        default_index: 字典中没有编号时使用的编号
+
+    返回:
+        GpuDevice: 缺少的字段为None
+    """
+    values = {field: data.get(field) for field in GpuDevice._fields}
+    if values["index"] is None:
+        values["index"] = default_index
+    values["index"] = int(values["index"])
+    if values["compute_capability"] is not None:
+        values["compute_capability"] = str(values["compute_capability"])
+    return GpuDevice(**values)
+
+
+def create_inventory_sources(settings):
+    """
+    根据配置创建显卡清单来源
+
+    参数:
+        settings: GPU_DETECTION 配置字典（SOURCES、FIXTURE_FILE、NVIDIA_SMI）
+
+    返回:
+        list: 按顺序尝试的来源对象列表（提供 probe() 方法）
+    """
+    if settings.get("FIXTURE_FILE"):
+        return [FixtureInventory(settings["FIXTURE_FILE"])]
+    sources = []
+    for name in settings.get("SOURCES") or DEFAULT_SOURCES:
+        if name == "nvidia-smi":
+            sources.append(NvidiaSmiInventory(settings.get("NVIDIA_SMI", "nvidia-smi")))
+        elif name == "proc":
+            sources.append(ProcNvidiaInventory())
+        elif name == "wmi":
+            sources.append(WmiInventory())
+        else:
+            logging.warning(f"未知的显卡检测来源: {name}")
+    return sources
+
+
+def probe_inventory(sources):
+    """
+    依次尝试各来源，返回第一个检测到显卡的来源的结果
+
+    参数:
+        sources: 来源对象列表
+
+    返回:
+        list: GpuDevice 列表；有来源可用但没有显卡时返回空列表，所有来源都不可用时返回None
+    """
+    result = None
+    for source in sources:
+        devices = source.probe()
+        if devices:
+            return devices
+        if devices is not None:
+            result = []
+    return result
+
+
+_inventory_caches = {}
+
+
+def get_gpu_inventory(settings):
+    """
+    获取显卡清单（优先读取磁盘缓存）
+
+    参数:
+        settings: GPU_DETECTION 配置字典（CACHE_FILE、CACHE_TTL_HOURS 及检测来源配置）
+
+    返回:
+        list: GpuDevice 列表；检测失败返回None
+
+    说明:
+        驱动或设备变化时立即重新检测，缓存过期时先返回旧结果并在后台重新检测
+    """
+    cache_file = settings.get("CACHE_FILE", "gpu_inventory_cache.json")
+    # 检测来源配置不同时（如界面中切换了清单文件）不能复用之前的来源对象
+    key = (cache_file, settings.get("FIXTURE_FILE", ""), tuple(settings.get("SOURCES") or DEFAULT_SOURCES),
+           settings.get("NVIDIA_SMI", "nvidia-smi"))
+    cache = _inventory_caches.get(key)
+    if cache is None:
+        sources = create_inventory_sources(settings)
+
+        def probe():
+            devices = probe_inventory(sources)
+            return None if devices is None else [device._asdict() for device in devices]
+
+        cache = GpuProbeCache(cache_file, settings.get("CACHE_TTL_HOURS", 24) * 3600, probe)
+        _inventory_caches[key] = cache
+    result = cache.get()
+    if result is None:
+        return None
+    return [device_from_dict(item, index) for index, item in enumerate(result)]
+
+
+def cuda_devices(devices):
+    """
+    筛选编号可以作为 CUDA 设备编号使用的显卡（用于多显卡任务分配）
+
+    参数:
+        devices: GpuDevice 列表
+
+    返回:
+        list: 来源为 nvidia-smi 的显卡
+    """
+    return [device for device in devices if device.source in CUDA_ORDINAL_SOURCES]
+
+
+def is_nvidia_device(device):
+    """是否为 NVIDIA 显卡（WMI 清单中还会列出核显等其他显示适配器）"""
+    return device.source in CUDA_ORDINAL_SOURCES or "nvidia" in (device.name or "").lower()
+
+
+def plan_concurrency(devices, job_memory_mb=3000, headroom_mb=512):
+    """
+    按显存计算每块显卡可同时运行的任务数
+
+    参数:
+        devices: GpuDevice 列表
+        job_memory_mb: 单个翻译任务的显存预估（MB）
+        headroom_mb: 每块显卡保留的安全显存余量（MB）
+
+    返回:
+        dict: 显卡编号 -> 任务数（每块显卡至少1个）；没有任何显卡的显存信息时返回None
+
+    说明:
+        按总显存规划静态上限，运行期间其他程序占用的显存由显存准入控制（GPU_ADMISSION）按实测约束；
+        没有显存信息的显卡和非 NVIDIA 显卡（如 WMI 列出的核显）不参与规划
+    """
+    plan = {}
+    for device in devices:
+        if not device.memory_total_mb or not is_nvidia_device(device):
+            continue
+        plan[device.index] = max(int((device.memory_total_mb - headroom_mb) // job_memory_mb), 1)
+    return plan or None
+
+
+def suggest_gpu_type(task_count, max_tasks_by_gpu_type):
+    """
+    按规划的任务数选择对应的显卡类型（界面中的建议选项）
+
+    参数:
+        task_count: 按显存规划的并发任务数
+        max_tasks_by_gpu_type: 显卡类型 -> 并发任务数 的档位表
+
+    返回:
+        str: 任务数不超过规划值的最高档位；规划值低于所有档位时返回最低档位
+    """
+    tiers = sorted(max_tasks_by_gpu_type.items(), key=lambda item: item[1])
+    if not tiers:
+        return None
+    suggested = tiers[0][0]
+    for gpu_type, tasks in tiers:
+        if tasks <= task_count:
+            suggested = gpu_type
+    return suggested
+
+
+def describe_device(device):
+    """
+    生成显卡描述（用于日志和界面）
+
+    返回:
+        str: 如 "GPU0 NVIDIA GeForce RTX 3060, 显存 12.0GB（可用 11.2GB）, 计算能力 8.6"
+    """
+    parts = [f"GPU{device.index} {device.name}"]
+    if device.memory_total_mb:
+        memory = f"显存 {device.memory_total_mb / 1024:.1f}GB"
+        if device.memory_free_mb is not None:
+            memory += f"（可用 {device.memory_free_mb / 1024:.1f}GB）"
+        parts.append(memory)
+    if device.compute_capability:
+        parts.append(f"计算能力 {device.compute_capability}")
+    if device.driver_version:
+        parts.append(f"驱动 {device.driver_version}")
+    return ", ".join(parts)
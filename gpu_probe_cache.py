@@ -0,0 +1,191 @@
+"""
+显卡检测缓存模块
+作者：ChiangShenhung
+开发工具：腾讯 Code Buddy CN
+版本：2.0
+设计思路和调试：ChiangShenhung
+
+功能说明：
+- 显卡检测（WMI查询）耗时较长，结果缓存到磁盘，启动时直接读取
+- 缓存按驱动/设备标识区分：更换显卡或升级驱动后标识变化，立即重新检测
+- 缓存超过有效期时先返回旧结果，同时在后台线程重新检测并更新缓存，不阻塞启动
+"""
+
+import glob
+import json
+import logging
+import os
+import threading
+import time
+
+# Windows 注册表中显示适配器设备类
+DISPLAY_CLASS_KEY = r"SYSTEM\CurrentControlSet\Control\Class\{4d36e968-e325-11ce-bfc1-08002be10318}"
+
+
+def _read_text(path):
+    """读取小文本文件，失败返回空字符串"""
+    try:
+        with open(path, 'r', encoding='utf-8', errors='replace') as f:
+            return f.read().strip()
+    except OSError:
+        return ""
+
+
+def _windows_display_devices():
+    """从注册表读取显示适配器的设备名称、驱动版本和设备ID（比WMI查询快得多）"""
+    import winreg
+    parts = []
+    with winreg.OpenKey(winreg.HKEY_LOCAL_MACHINE, DISPLAY_CLASS_KEY) as class_key:
+        index = 0
+        while True:
+            try:
+                subkey_name = winreg.EnumKey(class_key, index)
+            except OSError:
+                break
+            index += 1
+            try:
+                with winreg.OpenKey(class_key, subkey_name) as device_key:
+                    values = []
+                    for value_name in ("DriverDesc", "DriverVersion", "MatchingDeviceId"):
+                        try:
+                            values.append(str(winreg.QueryValueEx(device_key, value_name)[0]))
+                        except OSError:
+                            values.append("")
+            except OSError:
+                continue
+            if any(values):
+                parts.append("/".join(values))
+    return parts
+
+
+def hardware_identity():
+    """
+    获取显卡驱动/设备标识
+
+    返回:
+        str: 标识的哈希值；无法获取时返回None（此时只按有效期判断缓存）
+
+    说明:
+        Windows 读取注册表中显示适配器的名称、驱动版本和设备ID；
+        Linux 读取 /proc/driver/nvidia/version 和 /sys/class/drm 下各显卡的厂商/设备ID
+    """
+    parts = []
+    try:
+        if os.name == "nt":
+            parts = _windows_display_devices()
+        else:
+            driver = _read_text("/proc/driver/nvidia/version")
+            if driver:
+                parts.append(driver.splitlines()[0])
+            for device_dir in sorted(glob.glob("/sys/class/drm/card[0-9]*/device")):
+                ids = [_read_text(os.path.join(device_dir, name)) for name in ("vendor", "device")]
+                if any(ids):
+                    parts.append(":".join(ids))
+    except Exception as e:
+        logging.getLogger(__name__).debug(f"读取显卡标识失败: {e}")
+    if not parts:
+        return None
+    import hashlib
+    return hashlib.sha1("|".join(parts).encode("utf-8")).hexdigest()
+
+
+class GpuProbeCache:
+    """
+    显卡检测结果的磁盘缓存
+
+    说明:
+        get() 在缓存有效时直接返回缓存结果；缓存过期但标识未变时返回旧结果并在后台重新检测；
+        没有缓存或标识变化时同步检测。检测失败（probe 返回None）时不写入缓存
+    """
+
+    def __init__(self, cache_file, ttl_seconds, probe, identity_func=hardware_identity, clock=time.time):
+        """
+        初始化显卡检测缓存
+
+        参数:
+            cache_file: 缓存文件路径
+            ttl_seconds: 缓存有效期（秒），为0时不使用缓存
+            probe: 检测函数，返回可JSON序列化的结果，失败返回None
+            identity_func: 返回驱动/设备标识的函数
+            clock: 时间函数（便于测试）
+        """
+        self.cache_file = cache_file
+        self.ttl_seconds = ttl_seconds
+        self.probe = probe
+        self.identity_func = identity_func
+        self.clock = clock
+        self.logger = logging.getLogger(__name__)
+        self._lock = threading.Lock()
+        self._refresh_thread = None
+
+    def _read(self):
+        """读取缓存文件，不存在或损坏时返回None"""
+        try:
+            with open(self.cache_file, 'r', encoding='utf-8') as f:
+                entry = json.load(f)
+        except (OSError, ValueError):
+            return None
+        if not isinstance(entry, dict) or "result" not in entry:
+            return None
+        return entry
+
+    def _write(self, identity, result):
+        """先写临时文件再替换，避免读到写了一半的缓存"""
+        temp_file = f"{self.cache_file}.tmp"
+        try:
+            with open(temp_file, 'w', encoding='utf-8') as f:
+                json.dump({"identity": identity, "probed_at": self.clock(), "result": result},
+                          f, ensure_ascii=False, indent=2)
+            os.replace(temp_file, self.cache_file)
+        except OSError as e:
+            self.logger.warning(f"写入显卡检测缓存失败: {e}")
+
+    def _probe_and_store(self, identity):
+        """执行检测，成功时写入缓存"""
+        result = self.probe()
+        if result is not None and self.ttl_seconds > 0:
+            with self._lock:
+                self._write(identity, result)
+        return result
+
+    def get(self):
+        """
+        获取显卡检测结果
+
+        返回:
+            检测结果；检测失败时返回None
+        """
+        if self.ttl_seconds <= 0:
+            return self.probe()
+        identity = self.identity_func()
+        entry = self._read()
+        if entry is None or entry.get("identity") != identity:
+            if entry is not None:
+                self.logger.info("显卡驱动或设备已变化，重新检测显卡")
+            return self._probe_and_store(identity)
+        if self.clock() - entry.get("probed_at", 0) >= self.ttl_seconds:
+            self.refresh_async(identity)
+        return entry["result"]
+
+    def refresh_async(self, identity=None):
+        """
+        在后台线程重新检测并更新缓存（已有后台检测在运行时不重复启动）
+
+        参数:
+            identity: 驱动/设备标识，为None时重新读取
+        """
+        with self._lock:
+            if self._refresh_thread is not None and self._refresh_thread.is_alive():
+                return
+            if identity is None:
+                identity = self.identity_func()
+            self._refresh_thread = threading.Thread(target=self._probe_and_store, args=(identity,),
+                                                    name="gpu-probe-refresh", daemon=True)
+            self._refresh_thread.start()
+        self.logger.info("显卡检测缓存已过期，后台重新检测")
+
+    def wait_for_refresh(self, timeout=None):
+        """等待后台检测结束（测试和基准测试使用）"""
+        thread = self._refresh_thread
+        if thread is not None:
+            thread.join(timeout)
@@ -0,0 +1,357 @@
+"""
+显卡遥测与准入控制模块
+作者：ChiangShenhung
+开发工具：腾讯 Code Buddy CN
+版本：2.0
+设计思路和调试：ChiangShenhung
+
+功能说明：
+- 通过可插拔的遥测源采集显卡利用率和显存占用
+- 支持解析 nvidia-smi --query-gpu 的CSV输出
+- 提供基于文件的模拟遥测源，便于在无显卡环境下测试
+- 根据预计显存占用决定是否允许启动新任务，显存不足(OOM)退出时自动退避
+"""
+
+import logging
+import subprocess
+import time
+
+# nvidia-smi 查询字段（顺序与CSV列顺序一致）
+NVIDIA_SMI_QUERY_FIELDS = [
+    "index",
+    "name",
+    "utilization.gpu",
+    "memory.total",
+    "memory.used",
+    "memory.free",
+]
+
+
+def _parse_number(value):
+    """
+    解析nvidia-smi输出中的数值字段
+
+    参数:
+        value: 字段字符串，可能带有单位（如 "1024 MiB"、"35 %"）或为 "[N/A]"
+
+    返回:
+        float: 解析后的数值，无法解析时返回None
+    """
+    value = value.strip()
+    for suffix in ("MiB", "%", "W"):
+        if value.endswith(suffix):
+            value = value[:-len(suffix)].strip()
+    try:
+        return float(value)
+    except ValueError:
+        return None
+
+
+def parse_nvidia_smi_csv(text):
+    """
+    解析 nvidia-smi --query-gpu 的CSV输出
+
+    参数:
+        text: nvidia-smi 输出文本，字段顺序见 NVIDIA_SMI_QUERY_FIELDS
+              支持带表头/不带表头、带单位/不带单位两种格式
+
+    返回:
+        list: 每块显卡一个字典：
+              {"index", "name", "utilization", "memory_total_mb",
+               "memory_used_mb", "memory_free_mb"}
+
+    说明:
+        无法解析的行会被跳过，不会抛出异常
+    """
+    gpus = []
+    for line in text.splitlines():
+        line = line.strip()
+        if not line or line.startswith("index"):
+            # 空行或表头行
+            continue
+        parts = [part.strip() for part in line.split(",")]
+        if len(parts) < len(NVIDIA_SMI_QUERY_FIELDS):
+            continue
+        index = _parse_number(parts[0])
+        if index is None:
+            continue
+        gpus.append({
+            "index": int(index),
+            "name": parts[1],
+            "utilization": _parse_number(parts[2]),
+            "memory_total_mb": _parse_number(parts[3]),
+            "memory_used_mb": _parse_number(parts[4]),
+            "memory_free_mb": _parse_number(parts[5]),
+        })
+    return gpus
+
+
+class NvidiaSmiTelemetry:
+    """
+    基于 nvidia-smi 命令的遥测源
+
+    每次采样调用一次 nvidia-smi，命令不存在或执行失败时返回None
+    """
+
+    def __init__(self, executable="nvidia-smi", timeout=5):
+        self.executable = executable
+        self.timeout = timeout
+
+    def sample(self):
+        """
+        采集一次显卡状态
+
+        返回:
+            list: 显卡状态列表（格式见 parse_nvidia_smi_csv），失败时返回None
+        """
+        cmd = [
+            self.executable,
+            "--query-gpu=" + ",".join(NVIDIA_SMI_QUERY_FIELDS),
+            "--format=csv,noheader,nounits",
+        ]
+        try:
+            output = subprocess.run(cmd, capture_output=True, text=True,
+                                    timeout=self.timeout, check=True).stdout
+        except (OSError, subprocess.SubprocessError) as e:
+            logging.debug(f"nvidia-smi 采样失败: {e}")
+            return None
+        return parse_nvidia_smi_csv(output)
+
+
+class FileTelemetry:
+    """
+    基于文件的遥测源（用于测试）
+
+    文件内容与 nvidia-smi CSV 输出格式相同，每次采样都会重新读取，
+    测试时只需改写文件即可模拟显存变化
+    """
+
+    def __init__(self, path):
+        self.path = path
+
+    def sample(self):
+        """
+        读取文件中的显卡状态
+
+        返回:
+            list: 显卡状态列表，文件不存在或读取失败时返回None
+        """
+        try:
+            with open(self.path, 'r', encoding='utf-8') as f:
+                return parse_nvidia_smi_csv(f.read())
+        except OSError as e:
+            logging.debug(f"读取遥测文件失败: {self.path}, 错误: {e}")
+            return None
+
+
+def create_telemetry_source(settings):
+    """
+    根据配置创建遥测源
+
+    参数:
+        settings: GPU_ADMISSION 配置字典
+
+    返回:
+        遥测源对象（提供 sample() 方法）
+    """
+    source = settings.get("TELEMETRY_SOURCE", "nvidia-smi")
+    if source == "file":
+        return FileTelemetry(settings.get("TELEMETRY_FILE", ""))
+    return NvidiaSmiTelemetry(settings.get("NVIDIA_SMI", "nvidia-smi"))
+
+
+class AdmissionController:
+    """
+    基于显卡遥测的准入控制器
+
+    主要功能：
+    - 启动新任务前采样显存，仅在预计显存足够时允许启动
+    - 刚启动的任务可能还没有分配显存，在爬升期内按预估值预留
+    - 任务以显存不足(OOM)退出时，按指数退避暂停新任务，并调大单任务显存预估（有上限，任务成功后逐步回落）
+
+    判断规则：
+        可用显存 - 爬升期任务预留 - 单任务预估 - 安全余量 >= 0
+    """
+
+    def __init__(self, source, job_memory_mb=3000, headroom_mb=512,
+                 max_utilization=98, ramp_seconds=60, oom_exit_codes=None,
+                 backoff_seconds=300, max_backoff_seconds=3600, max_job_memory_mb=None,
+                 estimate_decay=0.8, idle_retry_seconds=30, clock=time.time):
+        """
+        初始化准入控制器
+
+        参数:
+            source: 遥测源对象
+            job_memory_mb: 单个翻译任务的初始显存预估（MB）
+            headroom_mb: 保留的安全显存余量（MB）
+            max_utilization: 显卡利用率上限（%），超过时不再启动新任务
+            ramp_seconds: 新任务显存爬升期（秒）
+            oom_exit_codes: 视为显存不足的退出码列表
+            backoff_seconds: 首次OOM后的退避时间（秒）
+            max_backoff_seconds: 最长退避时间（秒）
+            max_job_memory_mb: OOM后调大的单任务显存预估上限（MB），为None或0时为初始预估的2倍
+            estimate_decay: 任务成功退出后，调大的预估超出初始值的部分保留的比例（0-1）
+            idle_retry_seconds: 没有任务运行但显存不足时，再次采样前等待的秒数
+            clock: 时间函数（便于测试）
+        """
+        self.source = source
+        self.initial_job_memory_mb = float(job_memory_mb)
+        self.job_memory_mb = float(job_memory_mb)
+        self.max_job_memory_mb = max(float(max_job_memory_mb or job_memory_mb * 2), self.job_memory_mb)
+        self.estimate_decay = estimate_decay
+        self.idle_retry_seconds = idle_retry_seconds
+        self.headroom_mb = float(headroom_mb)
+        self.max_utilization = max_utilization
+        self.ramp_seconds = ramp_seconds
+        self.oom_exit_codes = set(oom_exit_codes or [])
+        self.backoff_seconds = backoff_seconds
+        self.max_backoff_seconds = max_backoff_seconds
+        self.clock = clock
+        self.logger = logging.getLogger(__name__)
+
+        self._launch_times = []
+        self._backoff_until = 0
+        self._consecutive_ooms = 0
+        self._idle_retry_at = {}
+        self._last_sample = None
+
+    def is_available(self):
+        """
+        检查遥测源是否可用
+
+        返回:
+            bool: 能否成功采样到至少一块显卡
+        """
+        return bool(self._sample())
+
+    def list_devices(self):
+        """
+        获取最近一次采样到的显卡编号列表
+
+        返回:
+            list: 显卡编号列表，未采样成功时返回空列表
+        """
+        samples = self._last_sample or self._sample() or []
+        return [gpu["index"] for gpu in samples]
+
+    def _sample(self):
+        """采样并缓存最近一次结果"""
+        samples = self.source.sample()
+        if samples:
+            self._last_sample = samples
+        return samples
+
+    def _pending_reserve_mb(self, device=None):
+        """计算仍处于显存爬升期的任务需要预留的显存（指定显卡时只统计该显卡）"""
+        now = self.clock()
+        self._launch_times = [(t, d) for t, d in self._launch_times if now - t < self.ramp_seconds]
+        pending = [d for t, d in self._launch_times if device is None or d == device]
+        return len(pending) * self.job_memory_mb
+
+    def can_admit(self, running_count, device=None):
+        """
+        判断是否可以启动一个新任务
+
+        参数:
+            running_count: 当前正在运行的任务数（指定显卡时为该显卡上的任务数）
+            device: 目标显卡编号，为None时使用可用显存最多的显卡
+
+        返回:
+            tuple: (是否允许, 原因说明)
+
+        说明:
+            遥测不可用时不做限制，交由静态并发上限控制
+            没有任务运行时不受OOM退避限制，但仍检查显存（显存可能被其他程序占用）；
+            此时显存不足则该显卡等待 idle_retry_seconds 秒后再重新采样，期间直接拒绝，不反复调用 nvidia-smi
+        """
+        now = self.clock()
+        if now < self._backoff_until and running_count > 0:
+            remaining = int(self._backoff_until - now)
+            return False, f"显存不足退避中，剩余 {remaining} 秒"
+        if running_count == 0 and now < self._idle_retry_at.get(device, 0):
+            remaining = int(self._idle_retry_at[device] - now)
+            return False, f"显卡资源被其他程序占用，{remaining} 秒后重新检查"
+
+        samples = self._sample()
+        if not samples:
+            return True, "显卡遥测不可用，使用静态并发上限"
+
+        allowed, reason = self._check_sample(samples, device)
+        if not allowed and running_count == 0:
+            self._idle_retry_at[device] = now + self.idle_retry_seconds
+            reason += f"（当前无运行任务，{self.idle_retry_seconds} 秒后重新检查）"
+        return allowed, reason
+
+    def _check_sample(self, samples, device):
+        """按采样结果检查显存和利用率，返回 (是否允许, 原因说明)"""
+        candidates = [g for g in samples if device is None or g["index"] == device] or samples
+        best = max(candidates, key=lambda g: g["memory_free_mb"] or 0)
+        free_mb = best["memory_free_mb"] or 0
+        projected_mb = free_mb - self._pending_reserve_mb(device) - self.job_memory_mb - self.headroom_mb
+        if projected_mb < 0:
+            return False, (f"显存不足: 可用 {free_mb:.0f}MB, "
+                           f"预计需要 {self.job_memory_mb:.0f}MB + 余量 {self.headroom_mb:.0f}MB")
+
+        utilization = best["utilization"]
+        if utilization is not None and utilization >= self.max_utilization:
+            return False, f"显卡利用率过高: {utilization:.0f}%"
+
+        return True, f"显存充足: 可用 {free_mb:.0f}MB"
+
+    def record_launch(self, device=None):
+        """
+        记录一个新任务已启动（进入显存爬升期）
+
+        参数:
+            device: 任务所在显卡编号
+        """
+        self._launch_times.append((self.clock(), device))
+
+    def is_oom_exit(self, returncode):
+        """
+        判断任务退出是否由显存不足导致
+
+        参数:
+            returncode: 进程退出码
+
+        返回:
+            bool: 退出码在OOM列表中，或非零退出且退出时重新采样的显存已低于安全余量
+        """
+        if returncode in self.oom_exit_codes:
+            return True
+        if not returncode:
+            return False
+        # 上次采样可能是很久以前准入时的结果，按退出时的显存判断
+        samples = self._sample()
+        if not samples:
+            return False
+        min_free = min(g["memory_free_mb"] or 0 for g in samples)
+        return min_free < self.headroom_mb
+
+    def record_exit(self, returncode):
+        """
+        记录任务退出，OOM时进入退避
+
+        参数:
+            returncode: 进程退出码
+
+        返回:
+            bool: 是否判定为OOM退出
+        """
+        if not self.is_oom_exit(returncode):
+            if returncode == 0:
+                self._consecutive_ooms = 0
+                # 任务正常完成，调大的预估逐步回落到初始值
+                self.job_memory_mb = (self.initial_job_memory_mb
+                                      + (self.job_memory_mb - self.initial_job_memory_mb) * self.estimate_decay)
+            return False
+
+        self._consecutive_ooms += 1
+        backoff = min(self.backoff_seconds * (2 ** (self._consecutive_ooms - 1)),
+                      self.max_backoff_seconds)
+        self._backoff_until = self.clock() + backoff
+        # 实际显存需求比预估大，调大单任务预估（不超过上限）
+        self.job_memory_mb = min(self.job_memory_mb * 1.25, self.max_job_memory_mb)
+        self.logger.warning(f"翻译任务疑似显存不足退出(退出码 {returncode})，"
+                            f"暂停启动新任务 {backoff} 秒，单任务显存预估调整为 {self.job_memory_mb:.0f}MB")
+        return True
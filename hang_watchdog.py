@@ -0,0 +1,181 @@
+"""
+翻译进程卡死检测模块
+作者：ChiangShenhung
+开发工具：腾讯 Code Buddy CN
+版本：2.0
+设计思路和调试：ChiangShenhung
+
+功能说明：
+- 定期采样翻译进程的CPU时间和读写字节数（Linux 读取 /proc/<pid>/stat 和 io，Windows 调用 GetProcessTimes 和 GetProcessIoCounters）
+- 结合字幕文件的增长判断任务是否仍在推进
+- 在设定的时间窗口内各项指标都没有变化时判定为卡死（如显卡驱动挂起），不必等到2小时超时
+"""
+
+import os
+import time
+
+# Windows 进程访问权限
+PROCESS_QUERY_LIMITED_INFORMATION = 0x1000
+
+
+def _linux_stat_fields(pid):
+    """读取 /proc/<pid>/stat 中进程名之后的字段"""
+    with open(f"/proc/{pid}/stat", 'r') as f:
+        stat = f.read()
+    # 第2个字段（进程名）可能包含空格，从最后一个右括号之后开始解析
+    return stat[stat.rindex(")") + 2:].split()
+
+
+def _linux_io_bytes(pid):
+    """读取 /proc/<pid>/io 中的读写字节数（含管道和设备读写），无权限时返回(0, 0)"""
+    counters = {}
+    try:
+        with open(f"/proc/{pid}/io", 'r') as f:
+            for line in f:
+                key, _, value = line.partition(":")
+                counters[key.strip()] = int(value)
+    except (OSError, ValueError):
+        return 0, 0
+    return counters.get("rchar", 0), counters.get("wchar", 0)
+
+
+def _linux_progress(pid):
+    """
+    采样进程及其进程组/会话中所有进程的累计CPU时间和读写字节数
+
+    说明:
+        非Windows平台的翻译进程在新会话中启动，会话中的子进程（如BAT方式下真正干活的进程）一并计入
+    """
+    cpu_ticks = read_bytes = write_bytes = 0
+    found = False
+    for name in os.listdir("/proc"):
+        if not name.isdigit():
+            continue
+        try:
+            fields = _linux_stat_fields(name)
+            member = int(name) == pid or int(fields[2]) == pid or int(fields[3]) == pid
+            if not member or fields[0] == "Z":
+                continue
+            # utime、stime（时钟滴答数）
+            cpu_ticks += int(fields[11]) + int(fields[12])
+        except (OSError, ValueError, IndexError):
+            continue
+        found = True
+        rchar, wchar = _linux_io_bytes(name)
+        read_bytes += rchar
+        write_bytes += wchar
+    if not found:
+        return None
+    return cpu_ticks, read_bytes, write_bytes
+
+
+def _windows_progress(pid):
+    """调用 GetProcessTimes 和 GetProcessIoCounters 采样进程的CPU时间和读写字节数"""
+    import ctypes
+    from ctypes import wintypes
+
+    class IO_COUNTERS(ctypes.Structure):
+        _fields_ = [(name, ctypes.c_ulonglong) for name in (
+            "ReadOperationCount", "WriteOperationCount", "OtherOperationCount",
+            "ReadTransferCount", "WriteTransferCount", "OtherTransferCount")]
+
+    kernel32 = ctypes.windll.kernel32
+    handle = kernel32.OpenProcess(PROCESS_QUERY_LIMITED_INFORMATION, False, pid)
+    if not handle:
+        return None
+    try:
+        creation, exit_time, kernel, user = (wintypes.FILETIME() for _ in range(4))
+        if not kernel32.GetProcessTimes(handle, ctypes.byref(creation), ctypes.byref(exit_time),
+                                        ctypes.byref(kernel), ctypes.byref(user)):
+            return None
+        io = IO_COUNTERS()
+        if not kernel32.GetProcessIoCounters(handle, ctypes.byref(io)):
+            return None
+        cpu_ticks = sum((t.dwHighDateTime << 32) | t.dwLowDateTime for t in (kernel, user))
+        return cpu_ticks, io.ReadTransferCount, io.WriteTransferCount
+    finally:
+        kernel32.CloseHandle(handle)
+
+
+def sample_progress(pid):
+    """
+    采样进程的进展指标
+
+    参数:
+        pid: 进程号
+
+    返回:
+        tuple: (累计CPU时间, 累计读取字节数, 累计写入字节数)，单位随平台不同，只用于前后比较；
+               进程不存在或平台不支持时返回None
+    """
+    try:
+        if os.name == "nt":
+            return _windows_progress(pid)
+        if os.path.exists("/proc/self/stat"):
+            return _linux_progress(pid)
+    except (OSError, ValueError, AttributeError):
+        return None
+    return None
+
+
+class HangWatchdog:
+    """
+    翻译进程卡死检测器
+
+    每个任务记录最近一次的进展指标（CPU时间、读写字节数、字幕大小）和最后一次变化的时间，
+    超过 window_seconds 没有任何变化时判定为卡死；无法采样的进程不做判定
+    """
+
+    def __init__(self, window_seconds=600, sampler=sample_progress, clock=time.time):
+        """
+        初始化卡死检测器
+
+        参数:
+            window_seconds: 无进展判定为卡死的时间窗口（秒）
+            sampler: 进程采样函数（便于测试）
+            clock: 时间函数（便于测试）
+        """
+        self.window_seconds = window_seconds
+        self.sampler = sampler
+        self.clock = clock
+        self._jobs = {}
+
+    def observe(self, key, pid, subtitle_size=0):
+        """
+        记录一次采样并判断任务是否卡死
+
+        参数:
+            key: 任务标识（视频文件名）
+            pid: 翻译进程号
+            subtitle_size: 当前字幕文件大小（不存在时为0）
+
+        返回:
+            bool: 超过时间窗口没有任何进展时返回True
+        """
+        sample = self.sampler(pid)
+        if sample is None:
+            return False
+        now = self.clock()
+        marker = (pid, sample, subtitle_size)
+        job = self._jobs.get(key)
+        if job is None or job["marker"] != marker:
+            self._jobs[key] = {"marker": marker, "last_progress": now}
+            return False
+        return now - job["last_progress"] >= self.window_seconds
+
+    def stalled_seconds(self, key):
+        """获取任务已连续无进展的秒数"""
+        job = self._jobs.get(key)
+        if job is None:
+            return 0
+        return self.clock() - job["last_progress"]
+
+    def forget(self, key):
+        """移除任务的采样记录"""
+        self._jobs.pop(key, None)
+
+    def prune(self, active_keys):
+        """移除已不在运行的任务的采样记录"""
+        for key in list(self._jobs):
+            if key not in active_keys:
+                del self._jobs[key]
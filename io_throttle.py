@@ -0,0 +1,336 @@
+"""
+备份复制限速模块
+作者：ChiangShenhung
+开发工具：腾讯 Code Buddy CN
+版本：2.0
+设计思路和调试：ChiangShenhung
+
+功能说明：
+- 令牌桶限速，限制跨分区备份复制占用的磁盘带宽（MB/s）
+- 支持按时间段设置不同的限速（如白天限速、夜间不限速）
+- 自适应：定期从翻译工具正在读取的视频中随机读取一小块，读取延迟明显升高时自动降速，恢复后逐步提速；
+  未设置限速时以实测的复制速度为上限降速，探测到的延迟正常时不限速（复制使用零拷贝路径）
+- 复制缓冲区使用按页对齐的 mmap 内存，在多个文件之间复用，避免每个文件重新分配
+"""
+
+import logging
+import mmap
+import os
+import random
+import threading
+import time
+
+
+def _parse_clock(value):
+    """将 "HH:MM" 转换为当天的分钟数"""
+    hours, minutes = value.split(":")
+    return int(hours) * 60 + int(minutes)
+
+
+class ThrottleSchedule:
+    """
+    按时间段的限速表
+
+    规则格式：[{"START": "09:00", "END": "18:00", "MB_PER_SEC": 20}, ...]
+    结束时间早于开始时间表示跨午夜；多条规则重叠时以先出现的为准；
+    不在任何时间段内时使用默认限速。限速为0表示不限速
+    """
+
+    def __init__(self, default_mb_per_sec=0, rules=None):
+        """
+        初始化限速表
+
+        参数:
+            default_mb_per_sec: 默认限速（MB/s）
+            rules: 时间段规则列表
+        """
+        self.default_mb_per_sec = default_mb_per_sec
+        self.rules = []
+        for rule in rules or []:
+            try:
+                self.rules.append((_parse_clock(rule["START"]), _parse_clock(rule["END"]),
+                                   rule.get("MB_PER_SEC", 0)))
+            except (KeyError, ValueError, AttributeError):
+                logging.warning(f"限速时间段配置无效，已忽略: {rule}")
+
+    def is_limited(self):
+        """是否在某个时间段内需要限速"""
+        return bool(self.default_mb_per_sec) or any(limit for _, _, limit in self.rules)
+
+    def limit_at(self, now=None):
+        """
+        获取指定时间的限速
+
+        参数:
+            now: 时间戳，为None时使用当前时间
+
+        返回:
+            float: 限速（字节/秒），0表示不限速
+        """
+        local = time.localtime(now)
+        minute = local.tm_hour * 60 + local.tm_min
+        for start, end, limit in self.rules:
+            if start <= end:
+                active = start <= minute < end
+            else:
+                active = minute >= start or minute < end
+            if active:
+                return limit * 1024 * 1024
+        return self.default_mb_per_sec * 1024 * 1024
+
+
+class ReadLatencyProbe:
+    """
+    源盘读取延迟探测
+
+    从翻译工具正在读取的视频中随机选一个位置读取一小块，以耗时作为源盘繁忙程度的指标：
+    同一块盘上排队的读请求越多，这次读取等待的时间越长。只读不写，不创建任何文件；
+    支持 posix_fadvise 的系统上读取前丢弃该位置的页缓存，保证读到磁盘
+    """
+
+    def __init__(self, paths, block_size=4096):
+        """
+        初始化探测器
+
+        参数:
+            paths: 返回当前正在翻译的视频路径列表的函数
+            block_size: 每次读取的字节数
+        """
+        self.paths = paths
+        self.block_size = block_size
+        self._random = random.Random()
+
+    def sample(self):
+        """
+        探测一次
+
+        返回:
+            float: 本次读取耗时（秒）；没有正在翻译的视频或读取失败时返回None
+        """
+        paths = [path for path in self.paths() if path]
+        if not paths:
+            return None
+        path = self._random.choice(paths)
+        try:
+            fd = os.open(path, os.O_RDONLY | getattr(os, "O_BINARY", 0))
+        except OSError:
+            return None
+        try:
+            blocks = os.fstat(fd).st_size // self.block_size
+            if blocks < 1:
+                return None
+            offset = self._random.randrange(blocks) * self.block_size
+            if hasattr(os, "posix_fadvise"):
+                os.posix_fadvise(fd, offset, self.block_size, os.POSIX_FADV_DONTNEED)
+            started = time.perf_counter()
+            os.lseek(fd, offset, os.SEEK_SET)
+            os.read(fd, self.block_size)
+            return time.perf_counter() - started
+        except OSError:
+            return None
+        finally:
+            os.close(fd)
+
+
+class IOThrottle:
+    """
+    备份复制限速器
+
+    主要功能：
+    - is_active() 当前是否需要限速；不需要时复制走零拷贝路径，只调用 note_copied() 记录速度并探测延迟
+    - acquire() 按当前限速从令牌桶取令牌，不足时等待；自适应时每隔 probe_interval 秒探测一次源盘延迟
+    - get_buffer()/release_buffer() 借出和归还复用的对齐缓冲区
+
+    自适应规则（加性增、乘性减）：
+        源盘探测延迟的移动平均超过基线的 latency_factor 倍时，限速系数乘以 0.7（不低于 min_factor）；
+        否则每次增加 0.05，直到恢复到配置的限速。未设置限速时，降速以未降速时实测的复制速度为上限
+    """
+
+    def __init__(self, schedule, buffer_size=4 * 1024 * 1024, adaptive=True, probe=None, probe_interval=1.0,
+                 latency_factor=2.0, min_factor=0.1, clock=time.time, sleep=time.sleep):
+        """
+        初始化限速器
+
+        参数:
+            schedule: ThrottleSchedule 限速表
+            buffer_size: 复制缓冲区大小（字节），同时也是每次读写的块大小
+            adaptive: 是否根据源盘延迟自动降速
+            probe: 源盘延迟探测函数（返回秒数或None），为None时不自动降速
+            probe_interval: 两次探测的最小间隔（秒）
+            latency_factor: 读取延迟超过基线多少倍时降速
+            min_factor: 自适应降速的最低系数
+            clock: 时间函数（便于测试）
+            sleep: 等待函数（便于测试）
+        """
+        self.schedule = schedule
+        self.buffer_size = buffer_size
+        self.adaptive = adaptive and probe is not None
+        self.probe = probe
+        self.probe_interval = probe_interval
+        self.latency_factor = latency_factor
+        self.min_factor = min_factor
+        self.clock = clock
+        self.sleep = sleep
+        self.logger = logging.getLogger(__name__)
+
+        self.factor = 1.0
+        self._tokens = 0.0
+        self._last_refill = clock()
+        self._latency_avg = None
+        self._latency_baseline = None
+        self._last_probe = 0.0
+        self._throughput = None
+        self._lock = threading.Lock()
+        self._probe_lock = threading.Lock()
+        self._free_buffers = []
+
+    def current_limit(self):
+        """
+        获取当前生效的限速
+
+        返回:
+            float: 字节/秒，0表示不限速
+        """
+        limit = self.schedule.limit_at(self.clock())
+        if not limit and self.factor < 1.0 and self._throughput:
+            # 未设置限速但源盘繁忙：以实测的复制速度为上限降速
+            limit = self._throughput
+        return limit * self.factor
+
+    def is_active(self):
+        """
+        当前是否需要限速
+
+        返回:
+            bool: 设置了限速（当前时间段不为0），或源盘繁忙已自动降速
+        """
+        return bool(self.current_limit())
+
+    def note_copied(self, nbytes, seconds):
+        """
+        记录一块不限速复制的耗时（用于降速时的速度上限），并按间隔探测源盘延迟
+
+        参数:
+            nbytes: 复制的字节数
+            seconds: 复制耗时（秒）
+        """
+        if nbytes > 0 and seconds > 0:
+            speed = nbytes / seconds
+            with self._lock:
+                if self._throughput is None:
+                    self._throughput = speed
+                else:
+                    self._throughput += 0.3 * (speed - self._throughput)
+        self._maybe_probe()
+
+    def acquire(self, nbytes):
+        """
+        取得读写 nbytes 字节的令牌，不足时等待
+
+        参数:
+            nbytes: 本次要复制的字节数
+
+        说明:
+            令牌桶容量为1秒的限速量，空闲后不会积攒出长时间的突发
+        """
+        self._maybe_probe()
+        while True:
+            with self._lock:
+                rate = self.current_limit()
+                now = self.clock()
+                if not rate:
+                    self._last_refill = now
+                    return
+                capacity = max(rate, nbytes)
+                self._tokens = min(capacity, self._tokens + (now - self._last_refill) * rate)
+                self._last_refill = now
+                if self._tokens >= nbytes:
+                    self._tokens -= nbytes
+                    return
+                wait = (nbytes - self._tokens) / rate
+            self.sleep(min(wait, 1.0))
+
+    def _maybe_probe(self):
+        """距上次探测超过 probe_interval 秒时探测一次源盘延迟并调整限速系数"""
+        if not self.adaptive or self.clock() - self._last_probe < self.probe_interval:
+            return
+        # 探测需要读盘，不持有令牌桶的锁；同一时间只有一个线程探测
+        if not self._probe_lock.acquire(blocking=False):
+            return
+        try:
+            self._last_probe = self.clock()
+            latency = self.probe()
+            if latency is not None:
+                self.record_latency(latency)
+        finally:
+            self._probe_lock.release()
+
+    def record_latency(self, seconds):
+        """
+        记录一次源盘探测延迟，调整限速系数
+
+        参数:
+            seconds: 探测耗时（秒）
+        """
+        with self._lock:
+            if self._latency_avg is None:
+                self._latency_avg = self._latency_baseline = seconds
+                return
+            self._latency_avg += 0.3 * (seconds - self._latency_avg)
+            # 基线取观测到的较低延迟，并缓慢上浮以适应磁盘本身的变化
+            self._latency_baseline = min(self._latency_baseline * 1.01, self._latency_avg)
+
+            old = self.factor
+            if self._latency_avg > self._latency_baseline * self.latency_factor:
+                self.factor = max(self.min_factor, self.factor * 0.7)
+            else:
+                self.factor = min(1.0, self.factor + 0.05)
+            if self.factor < old:
+                limit = self.current_limit()
+                target = f"{limit / 1024 / 1024:.1f}MB/s" if limit else f"{self.factor:.0%}"
+                self.logger.info(f"源盘延迟升高（{self._latency_avg * 1000:.1f}ms，"
+                                 f"基线 {self._latency_baseline * 1000:.1f}ms），备份复制限速降至 {target}")
+
+    def get_buffer(self):
+        """
+        借出一个复制缓冲区
+
+        返回:
+            mmap.mmap: 按页对齐的匿名内存，使用后需调用 release_buffer() 归还
+        """
+        with self._lock:
+            if self._free_buffers:
+                return self._free_buffers.pop()
+        return mmap.mmap(-1, self.buffer_size)
+
+    def release_buffer(self, buffer):
+        """归还复制缓冲区，供下一个文件复用"""
+        with self._lock:
+            self._free_buffers.append(buffer)
+
+
+def create_io_throttle(settings, source_paths=None):
+    """
+    根据配置创建限速器
+
+    参数:
+        settings: BACKUP_THROTTLE 配置字典
+        source_paths: 返回翻译工具正在读取的视频路径列表的函数，自适应时从中探测源盘读取延迟
+
+    返回:
+        IOThrottle: 既未配置限速也未启用自适应时返回None
+
+    说明:
+        只启用自适应时，限速器在探测到源盘繁忙之前不限速（is_active() 为False），复制仍走零拷贝路径
+    """
+    schedule = ThrottleSchedule(settings.get("MB_PER_SEC", 0), settings.get("SCHEDULE", []))
+    adaptive = settings.get("ADAPTIVE", True) and source_paths is not None
+    if not schedule.is_limited() and not adaptive:
+        return None
+    return IOThrottle(schedule,
+                      buffer_size=int(settings.get("BUFFER_MB", 4) * 1024 * 1024),
+                      adaptive=adaptive,
+                      probe=ReadLatencyProbe(source_paths).sample if adaptive else None,
+                      probe_interval=settings.get("PROBE_INTERVAL_SECONDS", 1.0),
+                      latency_factor=settings.get("LATENCY_FACTOR", 2.0),
+                      min_factor=settings.get("MIN_FACTOR", 0.1))
@@ -0,0 +1,59 @@
+"""
+任务状态机模块
+作者：ChiangShenhung
+开发工具：腾讯 Code Buddy CN
+版本：2.0
+设计思路和调试：ChiangShenhung
+
+功能说明：
+- 定义视频任务的显式状态：发现、稳定、排队、运行、验证、清理、完成、失败、隔离
+- 定义允许的状态转换，非法转换会被拒绝并记录日志
+- 状态及带时间戳的转换历史由 StatusManager 持久化在状态文件的 jobs 中
+"""
+
+# 任务状态
+DISCOVERED = "discovered"      # 下载目录中发现的新视频
+STABLE = "stable"              # 文件可读（下载已完成），等待调度
+QUEUED = "queued"              # 已选中等待启动（含两遍模式等待精修）
+RUNNING = "running"            # 翻译进程运行中，占用任务槽位
+VALIDATING = "validating"      # 字幕已生成，正在验证
+CLEANING = "cleaning"          # 字幕已完成，原视频等待后台清理
+DONE = "done"                  # 处理完成
+FAILED = "failed"              # 失败，等待退避后重试
+QUARANTINED = "quarantined"    # 失败次数过多，已隔离
+
+ALL_STATES = (DISCOVERED, STABLE, QUEUED, RUNNING, VALIDATING, CLEANING, DONE, FAILED, QUARANTINED)
+
+# 占用任务槽位或已交给后续流程、不应再次调度的状态
+ACTIVE_STATES = (QUEUED, RUNNING, VALIDATING, CLEANING)
+
+# 允许的状态转换（当前状态 -> 可转换到的状态）
+TRANSITIONS = {
+    DISCOVERED: {STABLE, QUEUED, FAILED, QUARANTINED},
+    STABLE: {DISCOVERED, QUEUED, RUNNING, FAILED, QUARANTINED},
+    QUEUED: {RUNNING, STABLE, FAILED, QUARANTINED},
+    RUNNING: {VALIDATING, CLEANING, QUEUED, STABLE, FAILED},
+    VALIDATING: {RUNNING, CLEANING, QUEUED, STABLE, FAILED},
+    CLEANING: {DONE, FAILED},
+    DONE: set(),
+    FAILED: {DISCOVERED, STABLE, QUEUED, RUNNING, QUARANTINED},
+    QUARANTINED: {DISCOVERED},
+}
+
+
+def is_valid_transition(current, target):
+    """
+    判断状态转换是否合法
+
+    参数:
+        current: 当前状态，为None时表示尚无任务记录（旧版状态文件中的任务）
+        target: 目标状态
+
+    返回:
+        bool: 合法返回True；转换到相同状态视为合法（不产生新的历史记录）
+    """
+    if target not in ALL_STATES:
+        return False
+    if current is None or current == target:
+        return True
+    return target in TRANSITIONS.get(current, set())
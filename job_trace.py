@@ -0,0 +1,193 @@
+"""
+任务时间线追踪模块
+作者：ChiangShenhung
+开发工具：腾讯 Code Buddy CN
+版本：2.0
+设计思路和调试：ChiangShenhung
+
+功能说明：
+- 记录每个任务经过的阶段：发现、可读、排队、启动、写出首条字幕、字幕完成、验证、清理完成
+- 相邻两个阶段之间生成一个时间段，翻译进程运行期间的时间段放在所占槽位的轨道上，
+  等待下载/排队/后台清理等不占槽位的时间段放在任务自己的异步轨道上
+- 事件保存在有界的内存缓冲区中，按需导出为 Chrome/Perfetto 可打开的 trace-event JSON
+"""
+
+import json
+import os
+import threading
+import time
+from collections import deque
+
+# 任务阶段
+PHASE_DISCOVERED = "discovered"
+PHASE_STABLE = "stable"
+PHASE_QUEUED = "queued"
+PHASE_LAUNCHED = "launched"
+PHASE_FIRST_CUE = "first_cue"
+PHASE_SUBTITLE_COMPLETE = "subtitle_complete"
+PHASE_VALIDATED = "validated"
+PHASE_CLEANED = "cleaned"
+
+# 以某阶段开始的时间段名称
+SPAN_NAMES = {
+    PHASE_DISCOVERED: "等待下载完成",
+    PHASE_STABLE: "等待调度",
+    PHASE_QUEUED: "启动翻译进程",
+    PHASE_LAUNCHED: "加载模型/首条字幕",
+    PHASE_FIRST_CUE: "翻译",
+    PHASE_SUBTITLE_COMPLETE: "验证字幕",
+    PHASE_VALIDATED: "清理原视频",
+}
+
+# 这些阶段开始的时间段占用槽位（放在槽位轨道上）
+SLOT_PHASES = (PHASE_LAUNCHED, PHASE_FIRST_CUE, PHASE_SUBTITLE_COMPLETE)
+
+_SLOT_PID = 1
+_JOB_PID = 2
+
+
+class JobTracer:
+    """
+    任务时间线记录器
+
+    说明:
+        enabled 为False时 mark() 直接返回，不产生任何开销；
+        缓冲区满时丢弃最早的事件
+    """
+
+    def __init__(self, max_events=20000, enabled=False, clock=time.time):
+        """
+        初始化任务时间线记录器
+
+        参数:
+            max_events: 缓冲区最多保存的事件数
+            enabled: 是否记录
+            clock: 时间函数（便于测试）
+        """
+        self.enabled = enabled
+        self.clock = clock
+        self._events = deque(maxlen=max_events)
+        self._jobs = {}
+        self._slots = {}
+        self._lock = threading.Lock()
+
+    def _acquire_slot(self, job):
+        """为任务分配编号最小的空闲槽位轨道"""
+        used = set(self._slots.values())
+        slot = 0
+        while slot in used:
+            slot += 1
+        self._slots[job] = slot
+        return slot
+
+    def _emit_span(self, job, state, end_ts):
+        """生成上一阶段到当前时刻的时间段事件"""
+        name = SPAN_NAMES.get(state["phase"])
+        if name is None:
+            return
+        start_us = state["ts"] * 1e6
+        duration_us = max((end_ts - state["ts"]) * 1e6, 0)
+        args = {"job": job}
+        slot = self._slots.get(job)
+        if state["phase"] in SLOT_PHASES and slot is not None:
+            self._events.append({"name": name, "cat": "slot", "ph": "X", "pid": _SLOT_PID, "tid": slot,
+                                 "ts": start_us, "dur": duration_us, "args": args})
+        else:
+            self._events.append({"name": name, "cat": "job", "ph": "b", "pid": _JOB_PID, "tid": 0,
+                                 "id2": {"local": job}, "ts": start_us, "args": args})
+            self._events.append({"name": name, "cat": "job", "ph": "e", "pid": _JOB_PID, "tid": 0,
+                                 "id2": {"local": job}, "ts": start_us + duration_us})
+
+    def mark(self, job, phase):
+        """
+        记录任务进入某阶段
+
+        参数:
+            job: 任务标识（视频文件名）
+            phase: 阶段（PHASE_*），与当前阶段相同时忽略
+        """
+        if not self.enabled:
+            return
+        now = self.clock()
+        with self._lock:
+            state = self._jobs.get(job)
+            if state is not None:
+                if state["phase"] == phase:
+                    return
+                self._emit_span(job, state, now)
+            if phase == PHASE_LAUNCHED:
+                # 两遍模式的精修任务重新启动时换到新的空闲槽位
+                self._slots.pop(job, None)
+                self._acquire_slot(job)
+            elif phase not in SLOT_PHASES:
+                self._slots.pop(job, None)
+            if phase == PHASE_CLEANED:
+                self._jobs.pop(job, None)
+                self._events.append({"name": "完成", "cat": "job", "ph": "i", "s": "p",
+                                     "pid": _JOB_PID, "tid": 0, "ts": now * 1e6, "args": {"job": job}})
+                return
+            self._jobs[job] = {"phase": phase, "ts": now}
+
+    def finish(self, job, outcome):
+        """
+        任务未完成就结束（失败、被抢占、卡死等），结束当前时间段并释放槽位
+
+        参数:
+            job: 任务标识
+            outcome: 结束原因（写入事件参数）
+        """
+        if not self.enabled:
+            return
+        now = self.clock()
+        with self._lock:
+            state = self._jobs.pop(job, None)
+            if state is not None:
+                self._emit_span(job, state, now)
+            self._slots.pop(job, None)
+            self._events.append({"name": outcome, "cat": "job", "ph": "i", "s": "p",
+                                 "pid": _JOB_PID, "tid": 0, "ts": now * 1e6, "args": {"job": job}})
+
+    def export(self):
+        """
+        导出 Chrome trace-event 格式的追踪数据
+
+        返回:
+            dict: 包含 traceEvents 的字典（进行中的阶段按当前时刻截止）
+        """
+        now = self.clock()
+        with self._lock:
+            events = list(self._events)
+            # 进行中的阶段临时补一个截至当前时刻的时间段
+            saved = self._events
+            self._events = deque()
+            for job, state in self._jobs.items():
+                self._emit_span(job, state, now)
+            events.extend(self._events)
+            self._events = saved
+            slot_count = max(list(self._slots.values()) + [e["tid"] for e in events if e["pid"] == _SLOT_PID] + [-1]) + 1
+
+        metadata = [
+            {"name": "process_name", "ph": "M", "pid": _SLOT_PID, "args": {"name": "任务槽位"}},
+            {"name": "process_name", "ph": "M", "pid": _JOB_PID, "args": {"name": "排队与清理"}},
+        ]
+        for slot in range(slot_count):
+            metadata.append({"name": "thread_name", "ph": "M", "pid": _SLOT_PID, "tid": slot,
+                             "args": {"name": f"槽位 {slot + 1}"}})
+        return {"traceEvents": metadata + events, "displayTimeUnit": "ms"}
+
+    def dump(self, path):
+        """
+        把追踪数据写入JSON文件（先写临时文件再替换，避免导出一半的文件）
+
+        参数:
+            path: 输出文件路径
+
+        返回:
+            int: 写出的事件数
+        """
+        trace = self.export()
+        temp_path = path + ".tmp"
+        with open(temp_path, 'w', encoding='utf-8') as f:
+            json.dump(trace, f, ensure_ascii=False)
+        os.replace(temp_path, path)
+        return len(trace["traceEvents"])
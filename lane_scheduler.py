@@ -0,0 +1,121 @@
+"""
+GPU/CPU双通道调度模块
+作者：ChiangShenhung
+开发工具：腾讯 Code Buddy CN
+版本：2.0
+设计思路和调试：ChiangShenhung
+
+功能说明：
+- 显卡槽位全部占满时，短视频可以走CPU通道（--device=cpu）翻译
+- 分别学习GPU通道和CPU通道的处理速度（媒体秒数/墙钟秒数）
+- 按预计完成时间选择通道：哪个通道能更早完成就交给哪个通道
+"""
+
+import logging
+
+# 通道名称
+LANE_GPU = "gpu"
+LANE_CPU = "cpu"
+
+
+class LaneScheduler:
+    """
+    通道调度器
+
+    预计完成时间：
+    - GPU通道：有空闲槽位时为 时长/GPU速度；
+      槽位已满时还要加上最早结束的运行中任务的剩余时间
+    - CPU通道：仅当视频时长不超过阈值且CPU通道有空闲槽位时可用，为 时长/CPU速度
+
+    速度学习：
+        每个任务完成后用指数加权移动平均更新所在通道的速度
+    """
+
+    def __init__(self, cpu_max_tasks=2, max_duration=600, gpu_speed=10.0,
+                 cpu_speed=1.0, smoothing=0.3):
+        """
+        初始化通道调度器
+
+        参数:
+            cpu_max_tasks: CPU通道最大并发任务数
+            max_duration: 可以走CPU通道的最长视频时长（秒）
+            gpu_speed: GPU通道初始速度（媒体秒数/墙钟秒数）
+            cpu_speed: CPU通道初始速度
+            smoothing: 速度更新的平滑系数（0-1，越大越偏重最新样本）
+        """
+        self.cpu_max_tasks = cpu_max_tasks
+        self.max_duration = max_duration
+        self.speeds = {LANE_GPU: float(gpu_speed), LANE_CPU: float(cpu_speed)}
+        self.smoothing = smoothing
+        self.logger = logging.getLogger(__name__)
+
+    def record_completion(self, lane, media_seconds, wall_seconds):
+        """
+        记录一个完成的任务，更新通道速度
+
+        参数:
+            lane: 通道名称（LANE_GPU 或 LANE_CPU）
+            media_seconds: 媒体时长（秒）
+            wall_seconds: 实际处理耗时（秒）
+        """
+        if lane not in self.speeds or media_seconds <= 0 or wall_seconds <= 0:
+            return
+        sample = media_seconds / wall_seconds
+        old = self.speeds[lane]
+        self.speeds[lane] = old + self.smoothing * (sample - old)
+        self.logger.info(f"{lane.upper()}通道速度: {old:.2f} -> {self.speeds[lane]:.2f} 倍实时")
+
+    def predict_gpu_finish(self, media_seconds, gpu_slot_free, running_gpu_jobs):
+        """
+        预计GPU通道完成时间
+
+        参数:
+            media_seconds: 视频时长（秒）
+            gpu_slot_free: 当前是否有空闲显卡槽位
+            running_gpu_jobs: 运行中GPU任务列表 [(媒体时长, 已运行秒数)]
+
+        返回:
+            float: 预计完成所需秒数
+        """
+        run_time = media_seconds / self.speeds[LANE_GPU]
+        if gpu_slot_free or not running_gpu_jobs:
+            return run_time
+        wait = min(max(0.0, duration / self.speeds[LANE_GPU] - elapsed)
+                   for duration, elapsed in running_gpu_jobs)
+        return wait + run_time
+
+    def predict_cpu_finish(self, media_seconds, cpu_running):
+        """
+        预计CPU通道完成时间
+
+        参数:
+            media_seconds: 视频时长（秒）
+            cpu_running: CPU通道正在运行的任务数
+
+        返回:
+            float: 预计完成所需秒数；不满足CPU通道条件时返回None
+        """
+        if media_seconds <= 0 or media_seconds > self.max_duration:
+            return None
+        if cpu_running >= self.cpu_max_tasks:
+            return None
+        return media_seconds / self.speeds[LANE_CPU]
+
+    def choose(self, media_seconds, gpu_slot_free, cpu_running, running_gpu_jobs):
+        """
+        为视频选择通道
+
+        参数:
+            media_seconds: 视频时长（秒）
+            gpu_slot_free: 当前是否有空闲显卡槽位
+            cpu_running: CPU通道正在运行的任务数
+            running_gpu_jobs: 运行中GPU任务列表 [(媒体时长, 已运行秒数)]
+
+        返回:
+            str: LANE_GPU 或 LANE_CPU
+        """
+        cpu_finish = self.predict_cpu_finish(media_seconds, cpu_running)
+        if cpu_finish is None:
+            return LANE_GPU
+        gpu_finish = self.predict_gpu_finish(media_seconds, gpu_slot_free, running_gpu_jobs)
+        return LANE_CPU if cpu_finish < gpu_finish else LANE_GPU
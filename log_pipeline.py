@@ -0,0 +1,183 @@
+"""
+日志管道模块
+作者：ChiangShenhung
+开发工具：腾讯 Code Buddy CN
+版本：2.0
+设计思路和调试：ChiangShenhung
+
+功能说明：
+- 日志记录通过 QueueHandler 放入内存队列，由后台 QueueListener 线程写入文件和控制台，监控线程不等待磁盘
+- 日志文件按大小轮转，旧日志压缩为 .gz 文件，只保留指定数量
+- 时间窗口内重复出现的相同消息只记录一次，窗口结束后下一次出现时附带"重复 N 次"
+"""
+
+import atexit
+import gzip
+import logging
+import logging.handlers
+import os
+import queue
+import shutil
+import threading
+import time
+from collections import OrderedDict
+
+LOG_FORMAT = '%(asctime)s - %(levelname)s - %(message)s'
+
+_listener = None
+_queue_handler = None
+_setup_lock = threading.Lock()
+
+
+class RepeatFilter(logging.Filter):
+    """
+    重复消息抑制过滤器
+
+    同一日志器、同一级别、内容相同的消息在 window_seconds 内只放行第一条，其余只计数；
+    窗口结束后再次出现时放行，并在消息末尾附带窗口内被抑制的次数
+    """
+
+    def __init__(self, window_seconds=300, max_keys=1000, clock=time.time):
+        """
+        初始化重复消息抑制过滤器
+
+        参数:
+            window_seconds: 抑制窗口（秒），为0时不抑制
+            max_keys: 最多跟踪的不同消息数，超出时淘汰最久未出现的消息
+            clock: 时间函数（便于测试）
+        """
+        super().__init__()
+        self.window_seconds = window_seconds
+        self.max_keys = max_keys
+        self.clock = clock
+        self._seen = OrderedDict()
+        self._lock = threading.Lock()
+
+    def filter(self, record):
+        """放行返回True，抑制返回False"""
+        if self.window_seconds <= 0:
+            return True
+        key = (record.name, record.levelno, record.getMessage())
+        now = self.clock()
+        with self._lock:
+            seen = self._seen.get(key)
+            if seen is not None and now - seen["since"] < self.window_seconds:
+                seen["repeated"] += 1
+                self._seen.move_to_end(key)
+                return False
+            repeated = seen["repeated"] if seen else 0
+            self._seen[key] = {"since": now, "repeated": 0}
+            self._seen.move_to_end(key)
+            while len(self._seen) > self.max_keys:
+                self._seen.popitem(last=False)
+        if repeated:
+            record.msg = f"{record.getMessage()}（前 {self.window_seconds} 秒内重复 {repeated} 次）"
+            record.args = None
+        return True
+
+    def pending_summaries(self):
+        """
+        取出尚未报告的重复次数（程序退出前调用）
+
+        返回:
+            list: [(日志器名称, 级别, 消息, 重复次数), ...]
+        """
+        with self._lock:
+            summaries = [(name, levelno, message, seen["repeated"])
+                         for (name, levelno, message), seen in self._seen.items() if seen["repeated"]]
+            for seen in self._seen.values():
+                seen["repeated"] = 0
+        return summaries
+
+
+def _gzip_namer(name):
+    """轮转后的旧日志文件名加上 .gz 后缀"""
+    return name + ".gz"
+
+
+def _gzip_rotator(source, dest):
+    """把轮转出的旧日志压缩为 .gz 文件并删除原文件"""
+    with open(source, 'rb') as src, gzip.open(dest, 'wb') as dst:
+        shutil.copyfileobj(src, dst)
+    os.remove(source)
+
+
+def create_file_handler(log_file, max_bytes=10 * 1024 * 1024, backup_count=5, compress=True):
+    """
+    创建按大小轮转的日志文件处理器
+
+    参数:
+        log_file: 日志文件路径
+        max_bytes: 单个日志文件的最大字节数，为0时不轮转
+        backup_count: 保留的旧日志文件数
+        compress: 是否把旧日志压缩为 .gz 文件
+
+    返回:
+        logging.handlers.RotatingFileHandler: 日志文件处理器
+    """
+    handler = logging.handlers.RotatingFileHandler(log_file, maxBytes=max_bytes, backupCount=backup_count,
+                                                   encoding='utf-8', delay=True)
+    if compress:
+        handler.namer = _gzip_namer
+        handler.rotator = _gzip_rotator
+    return handler
+
+
+def setup_logging(log_file, max_bytes=10 * 1024 * 1024, backup_count=5, compress=True,
+                  repeat_window=300, level=logging.INFO, console=True):
+    """
+    配置异步日志管道（重复调用时不会重复添加处理器）
+
+    参数:
+        log_file: 日志文件路径
+        max_bytes: 单个日志文件的最大字节数，为0时不轮转
+        backup_count: 保留的旧日志文件数
+        compress: 是否把旧日志压缩为 .gz 文件
+        repeat_window: 重复消息抑制窗口（秒），为0时不抑制
+        level: 根日志器级别
+        console: 是否同时输出到控制台（基准测试等无界面运行时可关闭）
+
+    说明:
+        根日志器只挂一个 QueueHandler，文件和控制台输出由后台线程完成；
+        程序退出时自动停止后台线程并写完队列中剩余的日志
+    """
+    global _listener, _queue_handler
+    with _setup_lock:
+        if _listener is not None:
+            return
+        formatter = logging.Formatter(LOG_FORMAT)
+        handlers = [create_file_handler(log_file, max_bytes, backup_count, compress)]
+        if console:
+            handlers.append(logging.StreamHandler())
+        for handler in handlers:
+            handler.setFormatter(formatter)
+
+        log_queue = queue.SimpleQueue()
+        _queue_handler = logging.handlers.QueueHandler(log_queue)
+        _queue_handler.addFilter(RepeatFilter(repeat_window))
+        _listener = logging.handlers.QueueListener(log_queue, *handlers, respect_handler_level=True)
+        _listener.start()
+
+        root = logging.getLogger()
+        root.setLevel(level)
+        root.addHandler(_queue_handler)
+        atexit.register(shutdown_logging)
+
+
+def shutdown_logging():
+    """报告尚未输出的重复次数，停止后台线程并关闭日志文件"""
+    global _listener, _queue_handler
+    with _setup_lock:
+        if _listener is None:
+            return
+        for log_filter in _queue_handler.filters:
+            if isinstance(log_filter, RepeatFilter):
+                for name, levelno, message, repeated in log_filter.pending_summaries():
+                    _queue_handler.enqueue(logging.LogRecord(
+                        name, levelno, __file__, 0, f"{message}（重复 {repeated} 次）", None, None))
+        logging.getLogger().removeHandler(_queue_handler)
+        _listener.stop()
+        for handler in _listener.handlers:
+            handler.close()
+        _listener = None
+        _queue_handler = None
@@ -11,8 +11,11 @@
 import sys
 import argparse
 import os
+import signal
+import config
 from config_wizard import ConfigWizard
-from file_monitor import FileMonitor
+from file_monitor import FileMonitor, release_quarantined_file
+from status_manager import StatusManager
 
 def check_configuration():
     """
@@ -58,6 +61,90 @@ def check_configuration():
     
     return False
 
+def manage_quarantine(args):
+    """
+    列出或解除隔离的文件
+    
+    参数:
+        args: 命令行参数（list_quarantine / release）
+    
+    说明:
+        只读写状态文件并移回隔离目录中的文件，不创建 FileMonitor
+        （不做崩溃恢复、显卡检测，也不启动清理、备份保留和配置监视线程）
+    """
+    status_manager = StatusManager()
+    quarantined = status_manager.get_quarantined_files()
+    
+    if args.release:
+        names = list(quarantined) if "all" in args.release else args.release
+        for filename in names:
+            if release_quarantined_file(status_manager, filename, config.CONFIG["DOWNLOAD_DIR"]):
+                print(f"已解除隔离: {filename}")
+            else:
+                print(f"文件不在隔离列表中: {filename}")
+        return
+    
+    if not quarantined:
+        print("没有被隔离的文件")
+        return
+    print(f"共 {len(quarantined)} 个隔离文件:")
+    for filename, info in quarantined.items():
+        print(f"  - {filename}")
+        print(f"    隔离时间: {info.get('quarantined_at')}  失败次数: {info.get('count')}")
+        print(f"    原因: {info.get('reason')}")
+        if info.get("quarantine_path"):
+            print(f"    隔离目录中的位置: {info['quarantine_path']}")
+
+def enable_trace(monitor, trace_path):
+    """
+    开启任务时间线追踪
+    
+    参数:
+        monitor: FileMonitor实例
+        trace_path: 追踪文件输出路径
+        
+    说明:
+        程序退出时写出追踪文件；支持 SIGUSR1 的平台上可随时执行 kill -USR1 <进程号> 导出当前时间线
+    """
+    monitor.tracer.enabled = True
+    if hasattr(signal, "SIGUSR1"):
+        signal.signal(signal.SIGUSR1, lambda signum, frame: dump_trace(monitor, trace_path))
+
+def dump_trace(monitor, trace_path):
+    """把任务时间线写入追踪文件（可用 chrome://tracing 或 ui.perfetto.dev 打开）"""
+    try:
+        count = monitor.tracer.dump(trace_path)
+        print(f"任务时间线已导出（{count} 个事件）: {trace_path}")
+    except OSError as e:
+        print(f"导出任务时间线失败: {e}")
+
+def enable_profiling(monitor, args):
+    """
+    开启性能分析（--profile / --profile-memory）
+    
+    参数:
+        monitor: FileMonitor实例
+        args: 命令行参数
+        
+    返回:
+        TickProfiler: 性能分析器，退出前调用 stop() 导出最后一次统计
+        
+    说明:
+        输出目录、导出间隔、慢检查阈值等读取配置中的 PROFILING
+    """
+    import config
+    from profiling import TickProfiler, attach_profiler
+    profiling_config = config.CONFIG.get("PROFILING", {})
+    profiler = TickProfiler(output_dir=profiling_config.get("OUTPUT_DIR", "profile"),
+                            every_ticks=profiling_config.get("EVERY_TICKS", 10),
+                            cpu=args.profile,
+                            memory=args.profile_memory,
+                            slow_tick_seconds=profiling_config.get("SLOW_TICK_SECONDS", 5),
+                            top=profiling_config.get("TOP", 30))
+    attach_profiler(monitor, profiler)
+    print(f"性能分析已开启，结果输出到: {os.path.abspath(profiler.output_dir)}")
+    return profiler
+
 def main():
     """
     程序主函数 - 视频字幕翻译自动监控程序入口点
@@ -72,6 +159,9 @@ def main():
     - 守护进程模式 (--daemon)
     - 单次检查模式 (--once)
     - 配置向导模式 (--config-only)
+    - 隔离文件管理 (--list-quarantine / --release)
+    - 任务时间线追踪 (--trace)
+    - 性能分析 (--profile / --profile-memory)
     - 标准监控模式（默认）
     
     异常处理：
@@ -83,6 +173,13 @@ def main():
     parser.add_argument('--once', action='store_true', help='只执行一次检查后退出')
     parser.add_argument('--interval', type=int, default=60, help='检查间隔（秒）')
     parser.add_argument('--config-only', action='store_true', help='只运行配置向导后退出')
+    parser.add_argument('--list-quarantine', action='store_true', help='列出因多次失败被隔离的文件后退出')
+    parser.add_argument('--release', metavar='文件名', action='append',
+                        help='解除指定文件的隔离后退出（可重复指定，"all"表示全部）')
+    parser.add_argument('--trace', metavar='文件',
+                        help='记录任务时间线，退出时（或收到SIGUSR1时）导出为Chrome trace JSON文件')
+    parser.add_argument('--profile', action='store_true', help='用cProfile统计每轮检查的函数耗时')
+    parser.add_argument('--profile-memory', action='store_true', help='用tracemalloc统计每轮检查的内存分配变化')
     
     args = parser.parse_args()
     
@@ -105,6 +202,11 @@ def main():
     print("视频字幕翻译自动监控程序")
     print("=" * 50)
     
+    # 隔离文件管理（不启动监控器）
+    if args.list_quarantine or args.release:
+        manage_quarantine(args)
+        return
+    
     # 创建FileMonitor实例来获取配置信息
     monitor = FileMonitor()
     
@@ -116,10 +218,17 @@ def main():
     print("按 Ctrl+C 停止监控")
     print("=" * 50)
     
+    if args.trace:
+        enable_trace(monitor, args.trace)
+    profiler = None
+    if args.profile or args.profile_memory:
+        profiler = enable_profiling(monitor, args)
+    
     try:
         if args.once:
             # 单次检查模式
             monitor.monitor_once()
+            monitor.wait_for_cleanup()
         else:
             # 持续监控模式
             monitor.monitor_loop()
@@ -129,6 +238,11 @@ def main():
     except Exception as e:
         print(f"程序运行出错: {e}")
         sys.exit(1)
+    finally:
+        if args.trace:
+            dump_trace(monitor, args.trace)
+        if profiler:
+            profiler.stop()
 
 if __name__ == "__main__":
     main()
\ No newline at end of file
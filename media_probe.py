@@ -0,0 +1,111 @@
+"""
+媒体时长探测模块
+作者：ChiangShenhung
+开发工具：腾讯 Code Buddy CN
+版本：2.0
+设计思路和调试：ChiangShenhung
+
+功能说明：
+- 从SRT字幕文件的最后一个时间轴推算媒体时长
+- 用于统计吞吐量（每秒墙钟时间完成的媒体秒数）
+- 启动翻译前通过ffprobe获取（或按文件大小估算）视频时长；ffprobe 最长需要数秒，调度线程中只按大小估算
+"""
+
+import os
+import re
+import subprocess
+
+# SRT时间轴格式：00:01:02,345 --> 00:01:04,567
+_SRT_TIMESTAMP = re.compile(r"(\d+):(\d{2}):(\d{2})[,.](\d{1,3})\s*-->\s*(\d+):(\d{2}):(\d{2})[,.](\d{1,3})")
+
+
+def _to_seconds(hours, minutes, seconds, millis):
+    """将时间轴各字段转换为秒数"""
+    return int(hours) * 3600 + int(minutes) * 60 + int(seconds) + int(millis.ljust(3, "0")) / 1000.0
+
+
+def get_subtitle_duration(subtitle_path, tail_bytes=4096):
+    """
+    读取字幕文件最后一条时间轴的结束时间
+
+    参数:
+        subtitle_path: .srt字幕文件路径
+        tail_bytes: 从文件末尾读取的字节数，避免读取整个大文件
+
+    返回:
+        float: 最后一条字幕的结束时间（秒），无法解析时返回0.0
+
+    说明:
+        字幕结束时间略小于视频实际时长，但足以作为吞吐量统计的媒体时长
+    """
+    try:
+        with open(subtitle_path, 'rb') as f:
+            f.seek(0, 2)
+            size = f.tell()
+            f.seek(max(0, size - tail_bytes))
+            tail = f.read().decode('utf-8', errors='ignore')
+    except OSError:
+        return 0.0
+
+    matches = _SRT_TIMESTAMP.findall(tail)
+    if not matches:
+        return 0.0
+    return _to_seconds(*matches[-1][4:])
+
+
+def probe_media_duration(video_path, ffprobe="ffprobe", timeout=10):
+    """
+    使用ffprobe获取视频时长
+
+    参数:
+        video_path: 视频文件路径
+        ffprobe: ffprobe可执行文件路径
+        timeout: 超时时间（秒）
+
+    返回:
+        float: 视频时长（秒），ffprobe不可用或解析失败时返回None
+    """
+    cmd = [ffprobe, "-v", "error", "-show_entries", "format=duration",
+           "-of", "default=noprint_wrappers=1:nokey=1", video_path]
+    try:
+        output = subprocess.run(cmd, capture_output=True, text=True,
+                                timeout=timeout, check=True).stdout
+        return float(output.strip())
+    except (OSError, subprocess.SubprocessError, ValueError):
+        return None
+
+
+def estimate_media_duration(video_path, assumed_bitrate_kbps=2000, ffprobe="ffprobe"):
+    """
+    估算视频时长
+
+    参数:
+        video_path: 视频文件路径
+        assumed_bitrate_kbps: ffprobe不可用时假定的平均码率（kbps）
+        ffprobe: ffprobe可执行文件路径
+
+    返回:
+        float: 视频时长（秒），优先使用ffprobe结果，否则按文件大小和假定码率估算
+    """
+    duration = probe_media_duration(video_path, ffprobe)
+    if duration:
+        return duration
+    try:
+        size = os.path.getsize(video_path)
+    except OSError:
+        return 0.0
+    return estimate_duration_from_size(size, assumed_bitrate_kbps)
+
+
+def estimate_duration_from_size(size, assumed_bitrate_kbps=2000):
+    """
+    按文件大小和假定码率估算视频时长（不读取文件）
+
+    参数:
+        size: 文件大小（字节）
+        assumed_bitrate_kbps: 假定的平均码率（kbps）
+
+    返回:
+        float: 估算的视频时长（秒）
+    """
+    return size * 8 / 1000.0 / assumed_bitrate_kbps
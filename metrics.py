@@ -0,0 +1,330 @@
+"""
+运行指标模块
+作者：ChiangShenhung
+开发工具：腾讯 Code Buddy CN
+版本：2.0
+设计思路和调试：ChiangShenhung
+
+功能说明：
+- 提供计数器、仪表、直方图三种指标，每个指标一把锁，更新时只做一次加法或赋值，不阻塞监控线程
+- 可选的本地HTTP服务，在 /metrics 以 Prometheus 文本格式输出所有指标
+- MonitorMetrics 定义监控程序的指标：待处理/运行中/完成/失败数、槽位占用、每轮耗时、
+  发现到启动和启动到完成的耗时分布、翻译进程退出码、清理移动的字节数
+"""
+
+import functools
+import logging
+import threading
+import time
+from collections import OrderedDict
+
+# 默认的耗时直方图分桶（秒）
+DEFAULT_BUCKETS = (0.005, 0.01, 0.05, 0.1, 0.5, 1, 2.5, 5, 10, 30)
+LATENCY_BUCKETS = (1, 5, 10, 30, 60, 300, 600, 1800, 3600, 7200, 14400)
+
+
+def _format_labels(labelnames, values, extra=None):
+    """把标签名和值格式化为 {a="1",b="2"}"""
+    pairs = list(zip(labelnames, values)) + (list(extra) if extra else [])
+    if not pairs:
+        return ""
+    escaped = [(name, str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n"))
+               for name, value in pairs]
+    return "{" + ",".join(f'{name}="{value}"' for name, value in escaped) + "}"
+
+
+def _format_value(value):
+    """按 Prometheus 文本格式输出数值"""
+    if value == float("inf"):
+        return "+Inf"
+    if float(value).is_integer():
+        return str(int(value))
+    return repr(float(value))
+
+
+class _Metric:
+    """指标基类"""
+
+    type_name = ""
+
+    def __init__(self, name, help_text, labelnames=()):
+        self.name = name
+        self.help_text = help_text
+        self.labelnames = tuple(labelnames)
+        self._values = {}
+        self._lock = threading.Lock()
+
+    def _key(self, labels):
+        """按标签名顺序取出标签值"""
+        return tuple(str(labels.get(name, "")) for name in self.labelnames)
+
+    def _samples(self):
+        """返回 [(后缀, 标签值, 附加标签, 值), ...]"""
+        with self._lock:
+            return [("", key, None, value) for key, value in sorted(self._values.items())]
+
+    def render(self):
+        """输出该指标的 Prometheus 文本"""
+        lines = [f"# HELP {self.name} {self.help_text}", f"# TYPE {self.name} {self.type_name}"]
+        for suffix, key, extra, value in self._samples():
+            lines.append(f"{self.name}{suffix}{_format_labels(self.labelnames, key, extra)} {_format_value(value)}")
+        return lines
+
+
+class Counter(_Metric):
+    """只增不减的计数器"""
+
+    type_name = "counter"
+
+    def inc(self, amount=1, **labels):
+        """增加计数"""
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+    def value(self, **labels):
+        """获取当前计数"""
+        return self._values.get(self._key(labels), 0)
+
+
+class Gauge(_Metric):
+    """可任意设置的仪表"""
+
+    type_name = "gauge"
+
+    def set(self, value, **labels):
+        """设置当前值"""
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = value
+
+    def value(self, **labels):
+        """获取当前值"""
+        return self._values.get(self._key(labels), 0)
+
+
+class Histogram(_Metric):
+    """分桶直方图"""
+
+    type_name = "histogram"
+
+    def __init__(self, name, help_text, labelnames=(), buckets=DEFAULT_BUCKETS):
+        super().__init__(name, help_text, labelnames)
+        self.buckets = tuple(sorted(buckets))
+
+    def observe(self, value, **labels):
+        """记录一次观测值"""
+        key = self._key(labels)
+        with self._lock:
+            state = self._values.get(key)
+            if state is None:
+                state = self._values[key] = {"counts": [0] * len(self.buckets), "sum": 0.0, "count": 0}
+            for i, bound in enumerate(self.buckets):
+                if value <= bound:
+                    state["counts"][i] += 1
+                    break
+            state["sum"] += value
+            state["count"] += 1
+
+    def _samples(self):
+        with self._lock:
+            snapshot = [(key, list(state["counts"]), state["sum"], state["count"])
+                        for key, state in sorted(self._values.items())]
+        samples = []
+        for key, counts, total, count in snapshot:
+            cumulative = 0
+            for bound, bucket_count in zip(self.buckets, counts):
+                cumulative += bucket_count
+                samples.append(("_bucket", key, [("le", _format_value(bound))], cumulative))
+            samples.append(("_bucket", key, [("le", "+Inf")], count))
+            samples.append(("_sum", key, None, total))
+            samples.append(("_count", key, None, count))
+        return samples
+
+
+class MetricsRegistry:
+    """指标注册表"""
+
+    def __init__(self):
+        self._metrics = []
+
+    def counter(self, name, help_text, labelnames=()):
+        """创建并注册计数器"""
+        return self._register(Counter(name, help_text, labelnames))
+
+    def gauge(self, name, help_text, labelnames=()):
+        """创建并注册仪表"""
+        return self._register(Gauge(name, help_text, labelnames))
+
+    def histogram(self, name, help_text, labelnames=(), buckets=DEFAULT_BUCKETS):
+        """创建并注册直方图"""
+        return self._register(Histogram(name, help_text, labelnames, buckets))
+
+    def _register(self, metric):
+        self._metrics.append(metric)
+        return metric
+
+    def render(self):
+        """
+        输出所有指标
+
+        返回:
+            str: Prometheus 文本格式
+        """
+        lines = []
+        for metric in self._metrics:
+            lines.extend(metric.render())
+        return "\n".join(lines) + "\n"
+
+
+class MonitorMetrics:
+    """
+    监控程序的运行指标
+
+    说明:
+        任务耗时按文件名记录发现和启动时间（只保存在内存中，程序重启后重新计时）
+    """
+
+    def __init__(self, max_tracked_jobs=10000):
+        """
+        初始化监控指标
+
+        参数:
+            max_tracked_jobs: 最多记录的未完成任务数，超出时淘汰最早的记录
+        """
+        self.registry = MetricsRegistry()
+        registry = self.registry
+        self.jobs_pending = registry.gauge("subtitle_monitor_jobs_pending", "等待启动的视频数")
+        self.jobs_running = registry.gauge("subtitle_monitor_jobs_running", "运行中的翻译任务数")
+        self.jobs_completed = registry.counter("subtitle_monitor_jobs_completed_total", "完成处理的视频数")
+        self.jobs_failed = registry.counter("subtitle_monitor_jobs_failed_total", "失败的任务次数")
+        self.slots_total = registry.gauge("subtitle_monitor_slots_total", "显卡任务槽位总数")
+        self.slots_used = registry.gauge("subtitle_monitor_slots_used", "已占用的显卡任务槽位数（含遗留进程）")
+        self.tick_duration = registry.histogram("subtitle_monitor_tick_duration_seconds",
+                                                "每轮检查的耗时", ("stage",))
+        self.discovery_to_start = registry.histogram("subtitle_monitor_discovery_to_start_seconds",
+                                                     "从发现视频到启动翻译的耗时", buckets=LATENCY_BUCKETS)
+        self.start_to_done = registry.histogram("subtitle_monitor_start_to_done_seconds",
+                                                "从启动翻译到处理完成的耗时", buckets=LATENCY_BUCKETS)
+        self.translator_exits = registry.counter("subtitle_monitor_translator_exits_total",
+                                                 "翻译进程退出次数（按退出码）", ("code",))
+        self.cleanup_bytes_moved = registry.counter("subtitle_monitor_cleanup_bytes_moved_total",
+                                                    "清理时移动到备份目录的字节数", ("method",))
+
+        self.max_tracked_jobs = max_tracked_jobs
+        self._discovered_at = OrderedDict()
+        self._started_at = OrderedDict()
+        self._jobs_lock = threading.Lock()
+
+    def _remember(self, table, key, now):
+        """记录时间戳（已有记录时保留最早的时间）"""
+        with self._jobs_lock:
+            if key in table:
+                return
+            table[key] = now
+            while len(table) > self.max_tracked_jobs:
+                table.popitem(last=False)
+
+    def job_discovered(self, key):
+        """下载目录中发现新视频"""
+        self._remember(self._discovered_at, key, time.time())
+
+    def job_started(self, key):
+        """翻译进程已启动（两遍模式只记录第一次启动）"""
+        now = time.time()
+        with self._jobs_lock:
+            discovered_at = self._discovered_at.pop(key, None)
+        if discovered_at is not None:
+            self.discovery_to_start.observe(now - discovered_at)
+        self._remember(self._started_at, key, now)
+
+    def job_done(self, key):
+        """视频处理完成"""
+        self.jobs_completed.inc()
+        with self._jobs_lock:
+            started_at = self._started_at.pop(key, None)
+            self._discovered_at.pop(key, None)
+        if started_at is not None:
+            self.start_to_done.observe(time.time() - started_at)
+
+    def render(self):
+        """输出 Prometheus 文本格式的指标"""
+        return self.registry.render()
+
+
+def timed_stage(stage):
+    """
+    方法装饰器：把方法耗时记录到 self.metrics.tick_duration（标签 stage）
+
+    参数:
+        stage: 阶段名称（如 "completion"、"admission"）
+    """
+    def decorator(func):
+        @functools.wraps(func)
+        def wrapper(self, *args, **kwargs):
+            start = time.perf_counter()
+            try:
+                return func(self, *args, **kwargs)
+            finally:
+                self.metrics.tick_duration.observe(time.perf_counter() - start, stage=stage)
+        return wrapper
+    return decorator
+
+
+class MetricsServer:
+    """在后台线程中提供 /metrics 的本地HTTP服务"""
+
+    def __init__(self, render_func, host="127.0.0.1", port=9108):
+        """
+        初始化指标服务
+
+        参数:
+            render_func: 返回指标文本的函数
+            host: 监听地址（默认只监听本机）
+            port: 监听端口，为0时由系统分配
+        """
+        self.render_func = render_func
+        self.host = host
+        self.port = port
+        self.logger = logging.getLogger(__name__)
+        self._server = None
+        self._thread = None
+
+    def start(self):
+        """启动HTTP服务（守护线程）"""
+        # http.server 导入较慢，只在开启指标服务时才导入
+        import http.server
+        render_func = self.render_func
+
+        class Handler(http.server.BaseHTTPRequestHandler):
+            def do_GET(self):
+                if self.path.split("?")[0] != "/metrics":
+                    self.send_error(404)
+                    return
+                body = render_func().encode("utf-8")
+                self.send_response(200)
+                self.send_header("Content-Type", "text/plain; version=0.0.4; charset=utf-8")
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, format, *args):
+                # 抓取请求很频繁，不写入日志
+                pass
+
+        self._server = http.server.ThreadingHTTPServer((self.host, self.port), Handler)
+        self._server.daemon_threads = True
+        self.port = self._server.server_address[1]
+        self._thread = threading.Thread(target=self._server.serve_forever, name="metrics-server", daemon=True)
+        self._thread.start()
+        self.logger.info(f"指标服务已启动: http://{self.host}:{self.port}/metrics")
+
+    def stop(self):
+        """停止HTTP服务"""
+        if self._server is None:
+            return
+        self._server.shutdown()
+        self._server.server_close()
+        self._thread.join(timeout=5)
+        self._server = None
+        self._thread = None
@@ -0,0 +1,167 @@
+"""
+进程信息模块
+作者：ChiangShenhung
+开发工具：腾讯 Code Buddy CN
+版本：2.0
+设计思路和调试：ChiangShenhung
+
+功能说明：
+- 获取进程的启动时间（Linux 读取 /proc，Windows 调用 GetProcessTimes）
+- 通过"进程号 + 启动时间"判断记录的翻译进程是否仍在运行，避免进程号被复用后误判
+- 提供重新接管进程的句柄，监控程序重启后继续跟踪上次启动的翻译进程
+"""
+
+import os
+import signal
+import time
+
+# Windows 进程访问权限
+PROCESS_QUERY_LIMITED_INFORMATION = 0x1000
+# Windows FILETIME 起点（1601-01-01）与 Unix 时间戳起点的差值（秒）
+_FILETIME_EPOCH_OFFSET = 11644473600
+
+
+def _linux_start_time(pid):
+    """读取 /proc/<pid>/stat 中的启动时间（开机后的时钟滴答数）并换算为时间戳"""
+    with open(f"/proc/{pid}/stat", 'r') as f:
+        stat = f.read()
+    # 第2个字段（进程名）可能包含空格，从最后一个右括号之后开始解析
+    fields = stat[stat.rindex(")") + 2:].split()
+    if fields[0] == "Z":
+        # 僵尸进程已退出，只是尚未被父进程回收
+        return None
+    start_ticks = int(fields[19])
+    with open("/proc/stat", 'r') as f:
+        for line in f:
+            if line.startswith("btime "):
+                boot_time = int(line.split()[1])
+                break
+        else:
+            return None
+    return boot_time + start_ticks / os.sysconf("SC_CLK_TCK")
+
+
+def _windows_start_time(pid):
+    """调用 GetProcessTimes 获取进程创建时间并换算为时间戳"""
+    import ctypes
+    from ctypes import wintypes
+
+    kernel32 = ctypes.windll.kernel32
+    handle = kernel32.OpenProcess(PROCESS_QUERY_LIMITED_INFORMATION, False, pid)
+    if not handle:
+        return None
+    try:
+        creation, exit_time, kernel, user = (wintypes.FILETIME() for _ in range(4))
+        if not kernel32.GetProcessTimes(handle, ctypes.byref(creation), ctypes.byref(exit_time),
+                                        ctypes.byref(kernel), ctypes.byref(user)):
+            return None
+        # 已退出但句柄尚未释放的进程退出时间不为0
+        if exit_time.dwHighDateTime or exit_time.dwLowDateTime:
+            return None
+        ticks = (creation.dwHighDateTime << 32) | creation.dwLowDateTime
+        return ticks / 10 ** 7 - _FILETIME_EPOCH_OFFSET
+    finally:
+        kernel32.CloseHandle(handle)
+
+
+def get_process_start_time(pid):
+    """
+    获取进程启动时间
+
+    参数:
+        pid: 进程号
+
+    返回:
+        float: 启动时间戳；进程不存在或平台不支持时返回None
+    """
+    try:
+        if os.name == "nt":
+            return _windows_start_time(pid)
+        if os.path.exists("/proc/self/stat"):
+            return _linux_start_time(pid)
+    except (OSError, ValueError, IndexError, AttributeError):
+        return None
+    return None
+
+
+def _pid_exists(pid):
+    """进程号是否存在（不校验启动时间）"""
+    if os.name == "nt":
+        return get_process_start_time(pid) is not None
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        return True
+    return True
+
+
+def is_same_process(pid, start_time, tolerance=2.0):
+    """
+    判断记录的进程是否仍在运行
+
+    参数:
+        pid: 记录的进程号
+        start_time: 记录的进程启动时间戳，为None时只检查进程号是否存在
+        tolerance: 启动时间允许的误差（秒）
+
+    返回:
+        bool: 进程号存在且启动时间一致时返回True
+    """
+    if not pid:
+        return False
+    if start_time is None:
+        return _pid_exists(pid)
+    current = get_process_start_time(pid)
+    if current is None:
+        # 平台不支持读取启动时间时退回只检查进程号
+        return os.name != "nt" and not os.path.exists("/proc/self/stat") and _pid_exists(pid)
+    return abs(current - start_time) <= tolerance
+
+
+class ReattachedProcess:
+    """
+    重新接管的翻译进程句柄
+
+    监控程序重启后，上次启动的翻译进程已不是当前进程的子进程，无法获取退出码；
+    本句柄提供与 subprocess.Popen 相同的 pid、poll()、kill()、wait() 接口，
+    进程退出后 poll() 返回 EXIT_UNKNOWN
+    """
+
+    EXIT_UNKNOWN = "未知"
+    reattached = True
+
+    def __init__(self, pid, start_time):
+        self.pid = pid
+        self.start_time = start_time
+        self.returncode = None
+
+    def poll(self):
+        """进程仍在运行时返回None，已退出时返回 EXIT_UNKNOWN"""
+        if self.returncode is None and not is_same_process(self.pid, self.start_time):
+            self.returncode = self.EXIT_UNKNOWN
+        return self.returncode
+
+    def kill(self):
+        """终止进程"""
+        if self.poll() is not None:
+            return
+        try:
+            os.kill(self.pid, getattr(signal, "SIGKILL", signal.SIGTERM))
+        except OSError:
+            pass
+
+    def wait(self, timeout=None):
+        """
+        等待进程退出
+
+        异常:
+            TimeoutError: 超时仍未退出
+        """
+        deadline = None if timeout is None else time.time() + timeout
+        while self.poll() is None:
+            if deadline is not None and time.time() >= deadline:
+                raise TimeoutError(f"进程 {self.pid} 未在 {timeout} 秒内退出")
+            time.sleep(0.2)
+        return self.returncode
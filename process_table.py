@@ -0,0 +1,197 @@
+"""
+进程表扫描模块
+作者：ChiangShenhung
+开发工具：腾讯 Code Buddy CN
+版本：2.0
+设计思路和调试：ChiangShenhung
+
+功能说明：
+- 列出系统中的进程（进程号、可执行文件、命令行参数、启动时间）
+- Linux 读取 /proc，Windows 通过 wmi 库查询（未安装时不扫描），也可传入自定义进程表
+- 按可执行文件和命令行参数识别翻译工具进程，找出不由本监控程序管理的"孤儿"翻译进程
+"""
+
+import logging
+import os
+from collections import namedtuple
+from contextlib import contextmanager
+
+from process_info import get_process_start_time
+
+# 进程信息：进程号、父进程号、可执行文件路径、命令行参数列表、启动时间戳
+ProcessEntry = namedtuple("ProcessEntry", ["pid", "ppid", "exe", "argv", "start_time"])
+
+
+class ProcProcessTable:
+    """基于 /proc 的进程表（Linux）"""
+
+    def __init__(self, proc_root="/proc"):
+        self.proc_root = proc_root
+
+    def list_processes(self):
+        """
+        列出所有可读取的进程
+
+        返回:
+            list: ProcessEntry 列表（无权限读取或已退出的进程会被跳过）
+        """
+        entries = []
+        try:
+            names = os.listdir(self.proc_root)
+        except OSError:
+            return entries
+        for name in names:
+            if not name.isdigit():
+                continue
+            pid = int(name)
+            try:
+                with open(os.path.join(self.proc_root, name, "cmdline"), 'rb') as f:
+                    raw = f.read()
+            except OSError:
+                continue
+            argv = [arg.decode('utf-8', errors='replace') for arg in raw.split(b"\0") if arg]
+            if not argv:
+                # 内核线程没有命令行
+                continue
+            try:
+                with open(os.path.join(self.proc_root, name, "stat"), 'r') as f:
+                    stat = f.read()
+                # 第2个字段（进程名）可能包含空格，从最后一个右括号之后开始解析
+                ppid = int(stat[stat.rindex(")") + 2:].split()[1])
+            except (OSError, ValueError, IndexError):
+                continue
+            try:
+                exe = os.readlink(os.path.join(self.proc_root, name, "exe"))
+            except OSError:
+                exe = argv[0]
+            entries.append(ProcessEntry(pid, ppid, exe, argv, get_process_start_time(pid)))
+        return entries
+
+
+class WmiProcessTable:
+    """基于 wmi 库的进程表（Windows）"""
+
+    def __init__(self, process_names=None):
+        """
+        参数:
+            process_names: 只查询这些进程名（如 ["infer.exe"]），为None时查询全部进程
+        """
+        # 只检查库是否可用；连接在调用 list_processes() 的线程中建立
+        import pythoncom  # noqa: F401
+        import wmi  # noqa: F401
+        self.process_names = process_names
+
+    def list_processes(self):
+        """
+        列出进程
+
+        返回:
+            list: ProcessEntry 列表
+        """
+        entries = []
+        with wmi_connection() as connection:
+            if self.process_names:
+                processes = []
+                for name in self.process_names:
+                    processes.extend(connection.Win32_Process(Name=name))
+            else:
+                processes = connection.Win32_Process()
+            for process in processes:
+                command_line = process.CommandLine or ""
+                try:
+                    # Windows没有结构化的argv，按命令行规则拆分
+                    argv = _split_windows_command_line(command_line) if command_line else []
+                except ValueError:
+                    argv = command_line.split()
+                entries.append(ProcessEntry(process.ProcessId, process.ParentProcessId, process.ExecutablePath or "",
+                                            argv, get_process_start_time(process.ProcessId)))
+        return entries
+
+
+@contextmanager
+def wmi_connection():
+    """
+    在当前线程打开 WMI 连接
+
+    说明:
+        WMI 连接是 COM 对象，只能在初始化过 COM 的线程中创建和使用。
+        状态线程、GUI 工作线程都不是主线程，所以每次查询都在调用线程上 CoInitialize 并新建连接，
+        用完后释放连接再 CoUninitialize；调用方不要把连接保存到 with 块之外
+    """
+    import pythoncom
+    import wmi
+    pythoncom.CoInitialize()
+    connection = None
+    try:
+        connection = wmi.WMI()
+        yield connection
+    finally:
+        del connection
+        pythoncom.CoUninitialize()
+
+
+def _split_windows_command_line(command_line):
+    """按 Windows 命令行规则拆分参数（调用 CommandLineToArgvW）"""
+    import ctypes
+    from ctypes import wintypes
+
+    shell32 = ctypes.windll.shell32
+    shell32.CommandLineToArgvW.restype = ctypes.POINTER(wintypes.LPWSTR)
+    count = ctypes.c_int()
+    argv_pointer = shell32.CommandLineToArgvW(command_line, ctypes.byref(count))
+    if not argv_pointer:
+        raise ValueError(f"无法解析命令行: {command_line}")
+    try:
+        return [argv_pointer[i] for i in range(count.value)]
+    finally:
+        ctypes.windll.kernel32.LocalFree(argv_pointer)
+
+
+def create_process_table(process_names=None):
+    """
+    创建当前平台可用的进程表
+
+    参数:
+        process_names: Windows下只查询的进程名列表
+
+    返回:
+        进程表对象（提供 list_processes() 方法），平台不支持时返回None
+    """
+    if os.path.isdir("/proc") and os.path.exists("/proc/self/cmdline"):
+        return ProcProcessTable()
+    if os.name == "nt":
+        try:
+            return WmiProcessTable(process_names)
+        except ImportError:
+            logging.warning("未安装wmi库，无法扫描遗留的翻译进程")
+        except Exception as e:
+            logging.warning(f"初始化进程表失败: {e}")
+    return None
+
+
+def find_translator_processes(table, translator_path, exclude_pids=()):
+    """
+    查找翻译工具进程
+
+    参数:
+        table: 进程表对象
+        translator_path: 翻译工具路径（infer.exe 或测试用的脚本）
+        exclude_pids: 需要排除的进程号（本程序自己管理的进程）
+
+    返回:
+        list: 匹配的 ProcessEntry 列表
+
+    说明:
+        可执行文件名与翻译工具相同，或命令行中包含翻译工具路径（如用Python运行的脚本）时视为匹配；
+        父进程在排除列表中的进程（如BAT方式启动的infer.exe）同样排除
+    """
+    target = os.path.normcase(os.path.basename(translator_path))
+    excluded = set(exclude_pids) | {os.getpid()}
+    matches = []
+    for entry in table.list_processes():
+        if entry.pid in excluded or entry.ppid in excluded:
+            continue
+        names = [entry.exe] + list(entry.argv[:2])
+        if any(os.path.normcase(os.path.basename(name)) == target for name in names if name):
+            matches.append(entry)
+    return matches
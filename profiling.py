@@ -0,0 +1,176 @@
+"""
+性能分析模块
+作者：ChiangShenhung
+开发工具：腾讯 Code Buddy CN
+版本：2.0
+设计思路和调试：ChiangShenhung
+
+功能说明：
+- 用 cProfile 统计每轮检查（完成检测、启动新任务）的函数耗时，每 N 轮导出一次统计
+- 用 tracemalloc 每 N 轮拍一次内存快照，输出与上一次快照相比增长最多的分配位置
+- 单轮耗时超过阈值时自动抓取该轮所在线程的调用栈，便于定位偶发的慢检查
+- 不需要外部分析工具，main.py --profile / --profile-memory 开启
+"""
+
+import cProfile
+import functools
+import io
+import logging
+import os
+import pstats
+import sys
+import threading
+import time
+import traceback
+import tracemalloc
+
+
+class TickProfiler:
+    """
+    按检查轮次分析性能
+
+    说明:
+        wrap() 包装的函数每调用一次算一轮；cProfile 只在被包装的函数执行期间开启
+    """
+
+    def __init__(self, output_dir="profile", every_ticks=10, cpu=True, memory=False,
+                 slow_tick_seconds=5.0, top=30):
+        """
+        初始化性能分析器
+
+        参数:
+            output_dir: 统计结果输出目录
+            every_ticks: 每隔多少轮导出一次统计
+            cpu: 是否用 cProfile 统计函数耗时
+            memory: 是否用 tracemalloc 统计内存分配
+            slow_tick_seconds: 单轮耗时超过该值时抓取调用栈，为0时不抓取
+            top: 文本统计中列出的条目数
+        """
+        self.output_dir = output_dir
+        self.every_ticks = max(1, every_ticks)
+        self.slow_tick_seconds = slow_tick_seconds
+        self.top = top
+        self.logger = logging.getLogger(__name__)
+
+        self.profile = cProfile.Profile() if cpu else None
+        self.memory = memory
+        self._snapshot = None
+        self.ticks = 0
+        self._lock = threading.Lock()
+        os.makedirs(output_dir, exist_ok=True)
+        if memory and not tracemalloc.is_tracing():
+            tracemalloc.start(10)
+
+    def wrap(self, func, stage):
+        """
+        包装一个每轮调用的函数
+
+        参数:
+            func: 被包装的函数
+            stage: 阶段名称（用于慢检查日志）
+
+        返回:
+            包装后的函数
+        """
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            timer = None
+            if self.slow_tick_seconds > 0:
+                timer = threading.Timer(self.slow_tick_seconds, self._sample_stack,
+                                        args=(threading.get_ident(), stage))
+                timer.daemon = True
+                timer.start()
+            start = time.perf_counter()
+            if self.profile is not None:
+                self.profile.enable()
+            try:
+                return func(*args, **kwargs)
+            finally:
+                if self.profile is not None:
+                    self.profile.disable()
+                if timer is not None:
+                    timer.cancel()
+                self._on_tick(stage, time.perf_counter() - start)
+        return wrapper
+
+    def _on_tick(self, stage, elapsed):
+        """记录一轮结束，每 every_ticks 轮导出一次统计"""
+        if self.slow_tick_seconds > 0 and elapsed >= self.slow_tick_seconds:
+            self.logger.warning(f"检查耗时过长: {stage} 用时 {elapsed:.2f} 秒")
+        with self._lock:
+            self.ticks += 1
+            due = self.ticks % self.every_ticks == 0
+        if due:
+            self.dump()
+
+    def _sample_stack(self, thread_id, stage):
+        """单轮超时：抓取该轮所在线程的调用栈并追加到 slow_ticks.txt"""
+        frame = sys._current_frames().get(thread_id)
+        if frame is None:
+            return
+        stack = "".join(traceback.format_stack(frame))
+        path = os.path.join(self.output_dir, "slow_ticks.txt")
+        with self._lock:
+            with open(path, 'a', encoding='utf-8') as f:
+                f.write(f"===== {time.strftime('%Y-%m-%d %H:%M:%S')} {stage} 已运行超过 "
+                        f"{self.slow_tick_seconds} 秒（第 {self.ticks + 1} 轮）=====\n{stack}\n")
+        self.logger.warning(f"检查超过 {self.slow_tick_seconds} 秒，已记录调用栈: {path}")
+
+    def dump(self):
+        """
+        导出当前统计
+
+        说明:
+            cpu_tick<N>.prof 可用 pstats/snakeviz 查看，cpu_tick<N>.txt 为按累计耗时排序的文本；
+            memory_tick<N>.txt 为与上一次快照相比增长最多的分配位置
+        """
+        tick = self.ticks
+        if self.profile is not None:
+            prof_path = os.path.join(self.output_dir, f"cpu_tick{tick}.prof")
+            self.profile.dump_stats(prof_path)
+            text = io.StringIO()
+            pstats.Stats(self.profile, stream=text).sort_stats("cumulative").print_stats(self.top)
+            with open(os.path.join(self.output_dir, f"cpu_tick{tick}.txt"), 'w', encoding='utf-8') as f:
+                f.write(text.getvalue())
+        if self.memory and tracemalloc.is_tracing():
+            snapshot = tracemalloc.take_snapshot().filter_traces((
+                tracemalloc.Filter(False, tracemalloc.__file__),
+                tracemalloc.Filter(False, cProfile.__file__),
+                tracemalloc.Filter(False, pstats.__file__),
+                tracemalloc.Filter(False, "<frozen importlib._bootstrap>"),
+            ))
+            current, peak = tracemalloc.get_traced_memory()
+            lines = [f"当前 {current / 1024:.1f}KB，峰值 {peak / 1024:.1f}KB"]
+            if self._snapshot is None:
+                lines.append("首次快照，按分配大小排序：")
+                stats = snapshot.statistics("lineno")
+            else:
+                lines.append("与上一次快照相比增长最多的分配位置：")
+                stats = snapshot.compare_to(self._snapshot, "lineno")
+            lines.extend(str(stat) for stat in stats[:self.top])
+            with open(os.path.join(self.output_dir, f"memory_tick{tick}.txt"), 'w', encoding='utf-8') as f:
+                f.write("\n".join(lines) + "\n")
+            self._snapshot = snapshot
+        self.logger.info(f"已导出第 {tick} 轮的性能统计: {self.output_dir}")
+
+    def stop(self):
+        """导出最后一次统计并停止内存跟踪"""
+        if self.ticks % self.every_ticks:
+            self.dump()
+        if self.memory and tracemalloc.is_tracing():
+            tracemalloc.stop()
+
+
+def attach_profiler(monitor, profiler):
+    """
+    为 FileMonitor 的每轮检查挂上性能分析
+
+    参数:
+        monitor: FileMonitor实例
+        profiler: TickProfiler实例
+
+    说明:
+        包装实例上的 _check_completions 和 _admit_new_jobs，轮询循环、单次检查和异步引擎都会经过这两个方法
+    """
+    monitor._check_completions = profiler.wrap(monitor._check_completions, "completion")
+    monitor._admit_new_jobs = profiler.wrap(monitor._admit_new_jobs, "admission")
@@ -0,0 +1,365 @@
+"""
+运行时配置模块
+作者：ChiangShenhung
+开发工具：腾讯 Code Buddy CN
+版本：2.0
+设计思路和调试：ChiangShenhung
+
+功能说明：
+- config.py 中的 CONFIG 为默认值，用户修改的配置项保存在 JSON 配置文件（config.json）中，启动时覆盖默认值
+- 界面和配置向导只改写 JSON 文件，不再改写 config.py 源代码
+- 监控程序运行中定期检查配置文件，文件变化时整体校验，校验通过才应用；有错误时整份修改被拒绝，继续使用原配置
+"""
+
+import copy
+import json
+import logging
+import os
+import time
+
+# 运行时配置文件（相对路径时位于程序运行目录，与状态文件相同）
+RUNTIME_CONFIG_FILE = "config.json"
+
+# 删除模式的可选值
+DELETE_MODES = ("backup", "recycle_bin", "delete")
+
+# 内容由用户自定义的配置项（其下的键不要求出现在默认配置中，由专门的规则校验）
+FREE_FORM_KEYS = ("GPU_DETECTION.MAX_TASKS_BY_GPU_TYPE", "GPU_DEVICES.MAX_TASKS_PER_DEVICE")
+
+# 已移除的配置项：旧的 config.json 中仍可能存在，忽略而不是当作未知配置项拒绝整个文件
+RETIRED_KEYS = ("BACKUP.HARDLINK",)
+
+# 必须大于0的数值配置项（用作除数、间隔或倍数）
+POSITIVE_KEYS = (
+    "CHECK_INTERVAL", "JOBS.MAX_HISTORY", "GPU_ADMISSION.JOB_MEMORY_MB", "GPU_ADMISSION.MAX_UTILIZATION",
+    "AUTO_TUNE.WINDOW_SECONDS", "AUTO_TUNE.HOLD_WINDOWS", "CPU_LANE.INITIAL_GPU_SPEED",
+    "CPU_LANE.INITIAL_CPU_SPEED", "CPU_LANE.ASSUMED_BITRATE_KBPS", "BACKUP.CHUNK_MB",
+    "BACKUP_THROTTLE.LATENCY_FACTOR", "BACKUP_THROTTLE.MIN_FACTOR", "BACKUP_THROTTLE.BUFFER_MB",
+    "BACKUP_THROTTLE.PROBE_INTERVAL_SECONDS",
+    "BACKUP_RETENTION.CHECK_INTERVAL_SECONDS", "CLEANUP_WORKER.MAX_PENDING", "ORPHAN_SCAN.INTERVAL_SECONDS",
+    "HANG_WATCHDOG.WINDOW_SECONDS", "TRACE.MAX_EVENTS", "PROFILING.EVERY_TICKS",
+)
+
+# 不能为负数的数值配置项
+NON_NEGATIVE_KEYS = (
+    "JOBS.MAX_DONE_JOBS", "LOGGING.MAX_MB", "LOGGING.BACKUP_COUNT", "LOGGING.REPEAT_WINDOW_SECONDS",
+    "GPU_DETECTION.CACHE_TTL_HOURS", "GPU_ADMISSION.MEMORY_HEADROOM_MB", "GPU_ADMISSION.RAMP_SECONDS",
+    "GPU_ADMISSION.OOM_BACKOFF_SECONDS", "GPU_ADMISSION.MAX_JOB_MEMORY_MB", "GPU_ADMISSION.ESTIMATE_DECAY",
+    "GPU_ADMISSION.IDLE_RETRY_SECONDS", "AUTO_TUNE.HYSTERESIS", "CPU_LANE.MAX_TASKS",
+    "CPU_LANE.MAX_DURATION_SECONDS", "RETRY.BASE_DELAY_SECONDS", "RETRY.MAX_DELAY_SECONDS",
+    "RETRY.MAX_FAILURES", "BACKUP.PROGRESS_INTERVAL_SECONDS", "BACKUP_THROTTLE.MB_PER_SEC",
+    "BACKUP_RETENTION.MAX_GB", "BACKUP_RETENTION.MAX_AGE_DAYS", "BACKUP_RETENTION.MAX_EVICTIONS_PER_PASS",
+    "DISK_SPACE.MIN_FREE_MB", "DISK_SPACE.SUBTITLE_RESERVE_MB", "DISK_SPACE.STAGING_RESERVE_MB",
+    "CLEANUP_WORKER.WORKERS", "CLEANUP_WORKER.RETRY_DELAY_SECONDS", "METRICS.PORT",
+    "PROFILING.SLOW_TICK_SECONDS", "PROFILING.TOP", "RUNTIME_CONFIG.INTERVAL_SECONDS",
+    "ASYNC_ENGINE.DISCOVERY_INTERVAL_SECONDS",
+)
+
+
+class ConfigError(ValueError):
+    """配置文件无效（JSON格式错误或配置项校验失败）"""
+
+    def __init__(self, errors):
+        if isinstance(errors, str):
+            errors = [errors]
+        self.errors = list(errors)
+        super().__init__("; ".join(self.errors))
+
+
+def merge_config(base, overrides):
+    """
+    把覆盖配置合并到基础配置上（嵌套字典逐层合并，其他类型直接替换）
+
+    参数:
+        base: 基础配置字典（不会被修改）
+        overrides: 覆盖配置字典
+
+    返回:
+        dict: 合并后的新配置字典
+    """
+    merged = copy.deepcopy(base)
+    for key, value in overrides.items():
+        if isinstance(value, dict) and isinstance(merged.get(key), dict):
+            merged[key] = merge_config(merged[key], value)
+        else:
+            merged[key] = copy.deepcopy(value)
+    return merged
+
+
+def diff_config(old, new, prefix=""):
+    """
+    比较两份配置
+
+    返回:
+        list: 发生变化的配置项（嵌套项用 . 连接，如 "GPU_DETECTION.MAX_TASKS_BY_GPU_TYPE.中端独显"）
+    """
+    changed = []
+    for key in sorted(set(old) | set(new), key=str):
+        old_value, new_value = old.get(key), new.get(key)
+        name = f"{prefix}{key}"
+        if isinstance(old_value, dict) and isinstance(new_value, dict):
+            changed.extend(diff_config(old_value, new_value, f"{name}."))
+        elif old_value != new_value:
+            changed.append(name)
+    return changed
+
+
+def _is_number(value):
+    return isinstance(value, (int, float)) and not isinstance(value, bool)
+
+
+def _lookup(config, name):
+    """按 . 分隔的名称读取嵌套配置项，不存在时返回None"""
+    value = config
+    for key in name.split("."):
+        if not isinstance(value, dict):
+            return None
+        value = value.get(key)
+    return value
+
+
+def _check_types(defaults, config, prefix, errors):
+    """配置项必须出现在默认配置中（拼写错误的配置项不会被静默忽略），类型必须与默认值一致（整数和小数可以互换）"""
+    for key in config:
+        if key not in defaults and f"{prefix}{key}" not in RETIRED_KEYS:
+            errors.append(f"未知的配置项 {prefix}{key}")
+    for key, default in defaults.items():
+        if key not in config:
+            continue
+        value = config[key]
+        name = f"{prefix}{key}"
+        if isinstance(default, dict):
+            if not isinstance(value, dict):
+                errors.append(f"{name} 应为对象")
+            elif name not in FREE_FORM_KEYS:
+                _check_types(default, value, f"{name}.", errors)
+        elif isinstance(default, bool):
+            if not isinstance(value, bool):
+                errors.append(f"{name} 应为 true 或 false")
+        elif _is_number(default):
+            if not _is_number(value):
+                errors.append(f"{name} 应为数字")
+        elif isinstance(default, str):
+            if not isinstance(value, str):
+                errors.append(f"{name} 应为字符串")
+        elif isinstance(default, list):
+            if not isinstance(value, list):
+                errors.append(f"{name} 应为列表")
+
+
+def validate_config(config, defaults):
+    """
+    校验完整配置
+
+    参数:
+        config: 合并后的完整配置
+        defaults: 默认配置（用于检查类型）
+
+    异常:
+        ConfigError: 有任一配置项无效时抛出，包含全部错误
+    """
+    errors = []
+    _check_types(defaults, config, "", errors)
+
+    for name in POSITIVE_KEYS:
+        value = _lookup(config, name)
+        if _is_number(value) and value <= 0:
+            errors.append(f"{name} 必须大于0")
+    for name in NON_NEGATIVE_KEYS:
+        value = _lookup(config, name)
+        if _is_number(value) and value < 0:
+            errors.append(f"{name} 不能为负数")
+    utilization = _lookup(config, "GPU_ADMISSION.MAX_UTILIZATION")
+    if _is_number(utilization) and utilization > 100:
+        errors.append("GPU_ADMISSION.MAX_UTILIZATION 不能大于100")
+    for name in ("BACKUP_THROTTLE.MIN_FACTOR", "GPU_ADMISSION.ESTIMATE_DECAY"):
+        value = _lookup(config, name)
+        if _is_number(value) and value > 1:
+            errors.append(f"{name} 不能大于1")
+    if config.get("DELETE_MODE") not in DELETE_MODES:
+        errors.append(f"DELETE_MODE 必须是 {', '.join(DELETE_MODES)} 之一")
+    for extension in config.get("VIDEO_EXTENSIONS") or []:
+        if not isinstance(extension, str) or not extension.startswith("."):
+            errors.append(f"VIDEO_EXTENSIONS 中的 {extension!r} 应为以 . 开头的扩展名")
+
+    tiers = config.get("GPU_DETECTION", {}).get("MAX_TASKS_BY_GPU_TYPE", {})
+    if isinstance(tiers, dict):
+        for gpu_type, tasks in tiers.items():
+            if not isinstance(tasks, int) or isinstance(tasks, bool) or tasks < 1:
+                errors.append(f"GPU_DETECTION.MAX_TASKS_BY_GPU_TYPE.{gpu_type} 必须是不小于1的整数")
+        if isinstance(config.get("GPU_TYPE"), str) and config["GPU_TYPE"] not in tiers:
+            errors.append(f"GPU_TYPE {config['GPU_TYPE']} 不在 MAX_TASKS_BY_GPU_TYPE 中")
+    per_device = config.get("GPU_DEVICES", {}).get("MAX_TASKS_PER_DEVICE", {})
+    if isinstance(per_device, dict):
+        for device, tasks in per_device.items():
+            if not isinstance(tasks, int) or isinstance(tasks, bool) or tasks < 0:
+                errors.append(f"GPU_DEVICES.MAX_TASKS_PER_DEVICE.{device} 必须是非负整数")
+
+    auto_tune = config.get("AUTO_TUNE", {})
+    if _is_number(auto_tune.get("MIN_TASKS")) and auto_tune["MIN_TASKS"] < 1:
+        errors.append("AUTO_TUNE.MIN_TASKS 必须不小于1")
+    if _is_number(config.get("GPU_ADMISSION", {}).get("MAX_TASKS")) and config["GPU_ADMISSION"]["MAX_TASKS"] < 1:
+        errors.append("GPU_ADMISSION.MAX_TASKS 必须不小于1")
+
+    if errors:
+        raise ConfigError(errors)
+
+
+def load_config_overrides(path=RUNTIME_CONFIG_FILE):
+    """
+    读取配置文件中的覆盖配置
+
+    参数:
+        path: 配置文件路径
+
+    返回:
+        dict: 覆盖配置，文件不存在时返回空字典
+
+    异常:
+        ConfigError: 文件无法读取、不是合法JSON或顶层不是对象时抛出
+    """
+    if not os.path.exists(path):
+        return {}
+    try:
+        with open(path, 'r', encoding='utf-8') as f:
+            overrides = json.load(f)
+    except ValueError as e:
+        raise ConfigError(f"{path} 不是有效的JSON: {e}")
+    except OSError as e:
+        raise ConfigError(f"无法读取 {path}: {e}")
+    if not isinstance(overrides, dict):
+        raise ConfigError(f"{path} 顶层必须是对象")
+    return overrides
+
+
+def load_runtime_config(defaults, path=RUNTIME_CONFIG_FILE):
+    """
+    读取配置文件并合并到默认配置上（程序启动时使用）
+
+    参数:
+        defaults: 默认配置
+        path: 配置文件路径
+
+    返回:
+        dict: 合并后的配置；配置文件无效时记录警告并返回默认配置
+    """
+    try:
+        config = merge_config(defaults, load_config_overrides(path))
+        validate_config(config, defaults)
+        return config
+    except ConfigError as e:
+        logging.warning(f"配置文件无效，使用默认配置: {e}")
+        return copy.deepcopy(defaults)
+
+
+def update_runtime_config(updates, defaults, path=RUNTIME_CONFIG_FILE):
+    """
+    修改配置文件中的配置项（界面和配置向导保存配置时使用）
+
+    参数:
+        updates: 要修改的配置项字典（嵌套字典逐层合并）
+        defaults: 默认配置
+        path: 配置文件路径
+
+    返回:
+        dict: 修改后的完整配置
+
+    异常:
+        ConfigError: 修改后的配置无效时抛出，配置文件保持不变
+
+    说明:
+        先写临时文件再替换，运行中的监控程序不会读到写了一半的文件
+    """
+    try:
+        overrides = load_config_overrides(path)
+    except ConfigError as e:
+        # 原文件已损坏：以本次修改为准重新生成
+        logging.warning(f"{e}，将重新生成配置文件")
+        overrides = {}
+    overrides = merge_config(overrides, updates)
+    config = merge_config(defaults, overrides)
+    validate_config(config, defaults)
+
+    temp_path = f"{path}.tmp"
+    with open(temp_path, 'w', encoding='utf-8') as f:
+        json.dump(overrides, f, ensure_ascii=False, indent=4)
+        f.write("\n")
+    os.replace(temp_path, path)
+    return config
+
+
+class ConfigWatcher:
+    """
+    配置文件监视器
+
+    说明:
+        poll() 每隔 interval_seconds 检查一次文件的修改时间和大小（只做一次 stat），
+        变化时重新读取并整体校验：通过时返回新配置和变化的配置项，失败时记录错误并继续使用原配置；
+        同一份无效内容只报告一次
+    """
+
+    def __init__(self, defaults, path=RUNTIME_CONFIG_FILE, interval_seconds=2, validator=None,
+                 current=None, clock=time.monotonic):
+        """
+        初始化配置文件监视器
+
+        参数:
+            defaults: 基础配置（配置文件中的配置项覆盖在它上面）
+            path: 配置文件路径
+            interval_seconds: 检查间隔（秒）
+            validator: 额外的校验函数 validator(new_config, old_config)，返回错误信息列表
+            current: 当前正在使用的配置，为None时按配置文件读取
+            clock: 时间函数（便于测试）
+        """
+        self.defaults = defaults
+        self.path = path
+        self.interval_seconds = interval_seconds
+        self.validator = validator
+        self.clock = clock
+        self.logger = logging.getLogger(__name__)
+        self._last_check = clock()
+        self._signature = self._stat()
+        self.current = current if current is not None else load_runtime_config(defaults, path)
+
+    def _stat(self):
+        """文件签名（修改时间, 大小），文件不存在时为None"""
+        try:
+            stat = os.stat(self.path)
+        except OSError:
+            return None
+        return (stat.st_mtime_ns, stat.st_size)
+
+    def poll(self, force=False):
+        """
+        检查配置文件是否变化
+
+        参数:
+            force: 忽略检查间隔立即检查
+
+        返回:
+            tuple: (新配置, 变化的配置项列表)；没有变化或新配置无效时返回None
+        """
+        now = self.clock()
+        if not force and now - self._last_check < self.interval_seconds:
+            return None
+        self._last_check = now
+        signature = self._stat()
+        if signature == self._signature:
+            return None
+        self._signature = signature
+
+        try:
+            config = merge_config(self.defaults, load_config_overrides(self.path))
+            validate_config(config, self.defaults)
+            errors = self.validator(config, self.current) if self.validator else []
+            if errors:
+                raise ConfigError(errors)
+        except ConfigError as e:
+            self.logger.error(f"配置文件修改无效，继续使用原配置: {e}")
+            return None
+
+        changed = diff_config(self.current, config)
+        if not changed:
+            return None
+        self.current = config
+        return config, changed
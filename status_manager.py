@@ -11,9 +11,31 @@
 - 支持JSON格式的状态持久化存储
 """
 
+import functools
 import json
+import logging
 import os
+import threading
+import time
 from config import CONFIG
+from process_info import is_same_process
+from job_state import (DISCOVERED, STABLE, QUEUED, RUNNING, CLEANING, DONE, FAILED, QUARANTINED,
+                       is_valid_transition)
+
+
+def _synchronized(method):
+    """
+    方法级加锁装饰器
+    
+    说明:
+        后台清理线程与监控线程会同时读写状态数据，
+        所有读写状态的方法都在同一把可重入锁下执行
+    """
+    @functools.wraps(method)
+    def wrapper(self, *args, **kwargs):
+        with self._lock:
+            return method(self, *args, **kwargs)
+    return wrapper
 
 class StatusManager:
     """
@@ -33,6 +55,40 @@ class StatusManager:
                 "start_time": "2024-01-01 10:00:00",
                 "file_path": "/path/to/file3.mp4"
             }
+        },
+        "refine_queue": ["/path/to/file4.mp4"],    # 两遍模式：预览完成、等待精修的文件
+        "failures": {                              # 失败记录（指数退避重试）
+            "file5.mp4": {
+                "count": 2,
+                "next_retry": 1700000000.0,
+                "signature": {"size": 1024, "mtime": 1700000000.0},
+                "history": [{"time": "2024-01-01 10:00:00", "reason": "字幕翻译启动失败"}]
+            }
+        },
+        "pending_cleanup": {                       # 字幕已完成、等待后台清理原视频的文件
+            "file7.mp4": {
+                "file_path": "/path/to/file7.mp4",
+                "queued_at": "2024-01-01 10:30:00",
+                "subtitle_path": "/path/to/file7.srt",
+                "attempts": 0
+            }
+        },
+        "quarantine": {                            # 隔离的文件（失败次数过多，不再自动处理）
+            "file6.mp4": {
+                "quarantined_at": "2024-01-01 12:00:00",
+                "reason": "字幕翻译启动失败",
+                "count": 5,
+                "signature": {"size": 1024, "mtime": 1700000000.0},
+                "quarantine_path": ""
+            }
+        },
+        "jobs": {                                  # 任务状态机（状态定义见 job_state）
+            "file3.mp4": {
+                "state": "running",
+                "file_path": "/path/to/file3.mp4",
+                "updated_at": "2024-01-01 10:00:00",
+                "history": [{"state": "discovered", "time": "2024-01-01 09:59:50", "reason": ""}]
+            }
         }
     }
     """
@@ -44,8 +100,17 @@ class StatusManager:
         加载状态文件，如果文件不存在则创建初始状态结构
         """
         self.status_file = CONFIG["STATUS_FILE"]
+        # 已完成的任务只保留最近的记录（完成与否由 processed 列表判断），每个任务只保留最近的状态转换历史
+        jobs_config = CONFIG.get("JOBS", {})
+        self.max_done_jobs = jobs_config.get("MAX_DONE_JOBS", 1000)
+        self.max_history = jobs_config.get("MAX_HISTORY", 20)
+        self._lock = threading.RLock()
+        self.logger = logging.getLogger(__name__)
         self._load_status()
+        if self._prune_done_jobs() | self._trim_histories():
+            self._save_status()
     
+    @_synchronized
     def _load_status(self):
         """
         加载状态文件数据
@@ -66,7 +131,10 @@ class StatusManager:
         else:
             # 文件不存在，创建新的状态结构
             self.status_data = {"processed": [], "processing": {}}
+        # 已处理文件名集合，避免在长列表中逐个比较
+        self._processed_names = set(self.status_data["processed"])
     
+    @_synchronized
     def _save_status(self):
         """
         保存状态数据到文件
@@ -77,6 +145,7 @@ class StatusManager:
         with open(self.status_file, 'w', encoding='utf-8') as f:
             json.dump(self.status_data, f, ensure_ascii=False, indent=2)
     
+    @_synchronized
     def is_file_processed(self, file_path):
         """
         检查文件是否已经处理完成
@@ -91,8 +160,9 @@ class StatusManager:
             仅通过文件名判断，不考虑路径差异，避免重复处理同名文件
         """
         filename = os.path.basename(file_path)
-        return filename in self.status_data["processed"]
+        return filename in self._processed_names
     
+    @_synchronized
     def is_file_processing(self, file_path):
         """
         检查文件是否正在处理中
@@ -109,28 +179,49 @@ class StatusManager:
         """
         filename = os.path.basename(file_path)
         # 如果文件已经被标记为已处理，则不应该再被认为是处理中
-        if filename in self.status_data["processed"]:
+        if filename in self._processed_names:
             return False
         return filename in self.status_data["processing"]
     
-    def mark_as_processing(self, file_path):
+    @_synchronized
+    def mark_as_processing(self, file_path, extra=None):
         """
         标记文件为处理中状态
         
         参数:
             file_path: 视频文件完整路径
+            extra: 需要一并记录的附加信息字典（如分配的显卡编号）
             
         说明:
             记录文件开始处理的时间戳和完整路径
             立即保存状态到文件，确保数据持久化
         """
         filename = os.path.basename(file_path)
-        self.status_data["processing"][filename] = {
+        entry = {
             "start_time": self._get_current_time(),
             "file_path": file_path
         }
+        if extra:
+            entry.update(extra)
+        self.status_data["processing"][filename] = entry
+        self._set_job_state(file_path, RUNNING)
         self._save_status()
     
+    @_synchronized
+    def update_processing_entry(self, file_path, info):
+        """
+        更新处理中文件的记录信息
+        
+        参数:
+            file_path: 视频文件完整路径
+            info: 需要合并到处理信息中的字典（如翻译进程号和启动时间）
+        """
+        entry = self.status_data["processing"].get(os.path.basename(file_path))
+        if entry is not None:
+            entry.update(info)
+            self._save_status()
+    
+    @_synchronized
     def mark_as_completed(self, file_path):
         """
         标记文件为已完成状态
@@ -150,11 +241,19 @@ class StatusManager:
             del self.status_data["processing"][filename]
         
         # 添加到已处理列表
-        if filename not in self.status_data["processed"]:
+        if filename not in self._processed_names:
             self.status_data["processed"].append(filename)
+            self._processed_names.add(filename)
+        
+        # 处理成功后清除失败记录和待清理记录
+        self.status_data.get("failures", {}).pop(filename, None)
+        self.status_data.get("pending_cleanup", {}).pop(filename, None)
+        self._set_job_state(file_path, DONE)
+        self._prune_done_jobs()
         
         self._save_status()
     
+    @_synchronized
     def remove_from_processing(self, file_path):
         """
         从处理中状态移除文件（用于异常情况）
@@ -169,8 +268,253 @@ class StatusManager:
         filename = os.path.basename(file_path)
         if filename in self.status_data["processing"]:
             del self.status_data["processing"][filename]
+            self._set_job_state(file_path, STABLE, "移出处理中")
+            self._save_status()
+    
+    @_synchronized
+    def mark_as_cleaning(self, file_path, info=None):
+        """
+        标记文件为等待清理状态
+        
+        参数:
+            file_path: 视频文件完整路径
+            info: 需要一并记录的信息（字幕路径、处理信息等）
+            
+        说明:
+            字幕已生成、原视频等待后台清理的文件从处理中移出（释放任务槽位），
+            记录到pending_cleanup；清理成功后由mark_as_completed标记为已完成
+        """
+        filename = os.path.basename(file_path)
+        self.status_data["processing"].pop(filename, None)
+        entry = {
+            "file_path": file_path,
+            "queued_at": self._get_current_time(),
+            "attempts": 0
+        }
+        if info:
+            entry.update(info)
+        self.status_data.setdefault("pending_cleanup", {})[filename] = entry
+        self._set_job_state(file_path, CLEANING)
+        self._save_status()
+    
+    @_synchronized
+    def record_cleanup_failure(self, file_path, retry_delay):
+        """
+        记录一次清理失败
+        
+        参数:
+            file_path: 视频文件完整路径
+            retry_delay: 距离下次重试清理的秒数
+        """
+        entry = self.status_data.get("pending_cleanup", {}).get(os.path.basename(file_path))
+        if entry is not None:
+            entry["attempts"] = entry.get("attempts", 0) + 1
+            entry["next_attempt"] = time.time() + retry_delay
+            self._save_status()
+    
+    @_synchronized
+    def get_cleaning_entries(self):
+        """
+        获取所有等待清理的文件
+        
+        返回:
+            dict: 文件名 -> 待清理信息
+        """
+        return dict(self.status_data.get("pending_cleanup", {}))
+    
+    @_synchronized
+    def is_file_cleaning(self, file_path):
+        """
+        检查文件是否在等待清理
+        
+        参数:
+            file_path: 视频文件完整路径
+            
+        返回:
+            bool: 文件字幕已完成、原视频等待清理时返回True
+        """
+        return os.path.basename(file_path) in self.status_data.get("pending_cleanup", {})
+    
+    @_synchronized
+    def add_to_refine_queue(self, file_path):
+        """
+        将文件加入精修队列（两遍模式）
+        
+        参数:
+            file_path: 视频文件完整路径
+            
+        说明:
+            预览字幕已发布、等待完整模型精修的文件保存在此队列中，
+            队列按加入顺序排列，重复加入会被忽略
+        """
+        queue = self.status_data.setdefault("refine_queue", [])
+        if file_path not in queue:
+            queue.append(file_path)
+            self._set_job_state(file_path, QUEUED, "等待精修")
+            self._save_status()
+    
+    @_synchronized
+    def remove_from_refine_queue(self, file_path):
+        """
+        从精修队列移除文件
+        
+        参数:
+            file_path: 视频文件完整路径
+        """
+        queue = self.status_data.get("refine_queue", [])
+        if file_path in queue:
+            queue.remove(file_path)
             self._save_status()
     
+    @_synchronized
+    def get_refine_queue(self):
+        """
+        获取精修队列
+        
+        返回:
+            list: 等待精修的视频文件路径列表（按加入顺序）
+        """
+        return list(self.status_data.get("refine_queue", []))
+    
+    @_synchronized
+    def is_file_refine_pending(self, file_path):
+        """
+        检查文件是否在精修队列中
+        
+        参数:
+            file_path: 视频文件完整路径
+            
+        返回:
+            bool: 文件在精修队列中返回True
+            
+        说明:
+            与其他状态检查一致，仅通过文件名判断
+        """
+        filename = os.path.basename(file_path)
+        return any(os.path.basename(path) == filename
+                   for path in self.status_data.get("refine_queue", []))
+    
+    @_synchronized
+    def record_failure(self, file_path, reason, retry_delay, signature=None):
+        """
+        记录一次处理失败
+        
+        参数:
+            file_path: 视频文件完整路径
+            reason: 失败原因
+            retry_delay: 距离下次允许重试的秒数
+            signature: 文件特征（大小、修改时间），用于判断文件是否已变化
+            
+        返回:
+            int: 该文件累计失败次数
+            
+        说明:
+            失败原因按时间顺序保存在history中（最多保留最近10条）
+        """
+        filename = os.path.basename(file_path)
+        failures = self.status_data.setdefault("failures", {})
+        record = failures.setdefault(filename, {"count": 0, "history": []})
+        record["count"] += 1
+        record["next_retry"] = time.time() + retry_delay
+        record["signature"] = signature
+        record["history"] = (record["history"] + [
+            {"time": self._get_current_time(), "reason": reason}
+        ])[-10:]
+        self._set_job_state(file_path, FAILED, reason)
+        self._save_status()
+        return record["count"]
+    
+    @_synchronized
+    def get_failure(self, file_path):
+        """
+        获取文件的失败记录
+        
+        参数:
+            file_path: 视频文件完整路径
+            
+        返回:
+            dict: 失败记录，没有失败过时返回None
+        """
+        return self.status_data.get("failures", {}).get(os.path.basename(file_path))
+    
+    @_synchronized
+    def clear_failure(self, file_path):
+        """
+        清除文件的失败记录
+        
+        参数:
+            file_path: 视频文件完整路径
+        """
+        filename = os.path.basename(file_path)
+        if self.status_data.get("failures", {}).pop(filename, None) is not None:
+            self._save_status()
+    
+    @_synchronized
+    def quarantine_file(self, file_path, reason, signature=None, quarantine_path=""):
+        """
+        将文件加入隔离列表
+        
+        参数:
+            file_path: 视频文件完整路径
+            reason: 隔离原因（最后一次失败原因）
+            signature: 文件特征，文件变化后自动解除隔离
+            quarantine_path: 文件被移动到隔离目录后的路径（未移动时为空）
+        """
+        filename = os.path.basename(file_path)
+        failure = self.status_data.get("failures", {}).pop(filename, {})
+        self.status_data.setdefault("quarantine", {})[filename] = {
+            "quarantined_at": self._get_current_time(),
+            "reason": reason,
+            "count": failure.get("count", 0),
+            "history": failure.get("history", []),
+            "signature": signature,
+            "file_path": file_path,
+            "quarantine_path": quarantine_path
+        }
+        self._set_job_state(file_path, QUARANTINED, reason)
+        self._save_status()
+    
+    @_synchronized
+    def get_quarantine_info(self, file_path):
+        """
+        获取文件的隔离信息
+        
+        参数:
+            file_path: 视频文件完整路径
+            
+        返回:
+            dict: 隔离信息，未被隔离时返回None
+        """
+        return self.status_data.get("quarantine", {}).get(os.path.basename(file_path))
+    
+    @_synchronized
+    def get_quarantined_files(self):
+        """
+        获取所有隔离的文件
+        
+        返回:
+            dict: 文件名 -> 隔离信息
+        """
+        return dict(self.status_data.get("quarantine", {}))
+    
+    @_synchronized
+    def release_from_quarantine(self, filename):
+        """
+        解除文件隔离
+        
+        参数:
+            filename: 视频文件名
+            
+        返回:
+            dict: 被解除的隔离信息，文件不在隔离列表中时返回None
+        """
+        info = self.status_data.get("quarantine", {}).pop(filename, None)
+        if info is not None:
+            self._set_job_state(info.get("file_path") or filename, DISCOVERED, "解除隔离")
+            self._save_status()
+        return info
+    
+    @_synchronized
     def get_processing_files(self):
         """
         获取正在处理中的文件列表
@@ -183,6 +527,17 @@ class StatusManager:
         """
         return list(self.status_data["processing"].keys())
     
+    @_synchronized
+    def get_processing_entries(self):
+        """
+        获取正在处理中的文件及其记录信息
+        
+        返回:
+            dict: 文件名 -> 处理信息字典（开始时间、文件路径、分配的设备等）
+        """
+        return dict(self.status_data["processing"])
+    
+    @_synchronized
     def get_processing_count(self):
         """
         获取当前正在处理的任务数量
@@ -198,6 +553,242 @@ class StatusManager:
         self._load_status()
         return len(self.status_data["processing"])
     
+    def _set_job_state(self, file_path, state, reason=""):
+        """
+        转换任务状态（不保存文件，由调用方统一保存）
+        
+        参数:
+            file_path: 视频文件完整路径或文件名
+            state: 目标状态（见 job_state）
+            reason: 转换原因
+            
+        返回:
+            bool: 转换成功返回True，非法转换返回False且状态不变
+        """
+        filename = os.path.basename(file_path)
+        jobs = self.status_data.setdefault("jobs", {})
+        job = jobs.get(filename)
+        current = job["state"] if job else None
+        if not is_valid_transition(current, state):
+            self.logger.warning(f"非法的任务状态转换: {filename} {current} -> {state}")
+            return False
+        if current == state:
+            return True
+        
+        now = self._get_current_time()
+        if job is None:
+            job = jobs[filename] = {"history": []}
+        elif state == DONE:
+            # 移到末尾，使已完成的任务按完成顺序排列，清理时先删除最早完成的
+            jobs[filename] = jobs.pop(filename)
+        job["state"] = state
+        job["updated_at"] = now
+        if os.path.dirname(file_path):
+            job["file_path"] = file_path
+        job["history"] = (job["history"] + [{"state": state, "time": now, "reason": reason}])[-self.max_history:]
+        return True
+    
+    @_synchronized
+    def set_job_state(self, file_path, state, reason=""):
+        """
+        转换任务状态并保存
+        
+        参数:
+            file_path: 视频文件完整路径
+            state: 目标状态（见 job_state）
+            reason: 转换原因
+            
+        返回:
+            bool: 转换成功返回True，非法转换返回False
+        """
+        if not self._set_job_state(file_path, state, reason):
+            return False
+        self._save_status()
+        return True
+    
+    @_synchronized
+    def get_job_state(self, file_path):
+        """
+        获取任务当前状态
+        
+        参数:
+            file_path: 视频文件完整路径
+            
+        返回:
+            str: 任务状态，没有任务记录时返回None
+        """
+        job = self.status_data.get("jobs", {}).get(os.path.basename(file_path))
+        return job["state"] if job else None
+    
+    @_synchronized
+    def get_jobs_in_state(self, *states):
+        """
+        按状态查询任务
+        
+        参数:
+            states: 一个或多个任务状态
+            
+        返回:
+            dict: 文件名 -> 任务记录
+        """
+        return {filename: dict(job) for filename, job in self.status_data.get("jobs", {}).items()
+                if job["state"] in states}
+    
+    @_synchronized
+    def count_jobs_in_state(self, *states):
+        """
+        按状态统计任务数（只读，不复制任务记录）
+        
+        参数:
+            states: 一个或多个任务状态
+            
+        返回:
+            int: 处于这些状态的任务数
+        """
+        return sum(1 for job in self.status_data.get("jobs", {}).values() if job["state"] in states)
+    
+    @_synchronized
+    def get_unseen_files(self, filenames):
+        """
+        筛选出从未记录过的文件
+        
+        参数:
+            filenames: 文件名列表
+            
+        返回:
+            list: 没有任务记录，也不在已处理、处理中、待清理和精修队列中的文件名（保持原顺序）
+            
+        说明:
+            每个文件只做几次集合查询；已完成任务的记录被清理后仍按 processed 判断为已处理
+        """
+        known = [self.status_data.get("jobs", {}), self._processed_names, self.status_data["processing"],
+                 self.status_data.get("pending_cleanup", {}),
+                 {os.path.basename(path) for path in self.status_data.get("refine_queue", [])}]
+        return [filename for filename in filenames if not any(filename in names for names in known)]
+    
+    @_synchronized
+    def get_media_duration(self, file_path, size, mtime):
+        """
+        读取任务记录中缓存的视频时长
+        
+        参数:
+            file_path: 视频文件完整路径
+            size: 当前文件大小
+            mtime: 当前文件修改时间
+            
+        返回:
+            float: 记录的时长；没有记录或文件大小、修改时间与记录时不同时返回None
+        """
+        job = self.status_data.get("jobs", {}).get(os.path.basename(file_path))
+        media = job.get("media") if job else None
+        if media and media.get("size") == size and media.get("mtime") == mtime:
+            return media.get("seconds")
+        return None
+    
+    @_synchronized
+    def set_media_duration(self, file_path, size, mtime, seconds):
+        """
+        在任务记录中缓存视频时长（重启后不必再次调用 ffprobe）
+        
+        参数:
+            file_path: 视频文件完整路径
+            size: 探测时的文件大小
+            mtime: 探测时的文件修改时间
+            seconds: 视频时长（秒）
+            
+        返回:
+            bool: 是否已记录（没有任务记录时不记录）
+        """
+        job = self.status_data.get("jobs", {}).get(os.path.basename(file_path))
+        if not job:
+            return False
+        job["media"] = {"size": size, "mtime": mtime, "seconds": seconds}
+        self._save_status()
+        return True
+    
+    @_synchronized
+    def get_retry_tracked_files(self):
+        """
+        获取有失败记录或被隔离的文件名
+        
+        返回:
+            set: 文件名集合（调度前只需对这些文件检查退避和隔离）
+        """
+        return set(self.status_data.get("failures", {})) | set(self.status_data.get("quarantine", {}))
+    
+    def _prune_done_jobs(self):
+        """
+        清理已完成任务的记录，只保留最近 max_done_jobs 条（不保存文件，由调用方统一保存）
+        
+        返回:
+            bool: 是否删除了记录
+        """
+        jobs = self.status_data.get("jobs", {})
+        done = [filename for filename, job in jobs.items() if job["state"] == DONE]
+        excess = len(done) - self.max_done_jobs
+        if excess <= 0:
+            return False
+        for filename in done[:excess]:
+            del jobs[filename]
+        return True
+    
+    def _trim_histories(self):
+        """
+        截断超过 max_history 条的转换历史（旧版本或调小配置后留下的长历史，不保存文件）
+        
+        返回:
+            bool: 是否截断了记录
+        """
+        trimmed = False
+        for job in self.status_data.get("jobs", {}).values():
+            history = job.get("history", [])
+            if len(history) > self.max_history:
+                job["history"] = history[-self.max_history:]
+                trimmed = True
+        return trimmed
+    
+    @_synchronized
+    def prune_missing_jobs(self, present_filenames):
+        """
+        删除源文件已不存在的未完成任务记录
+        
+        参数:
+            present_filenames: 监控目录中当前列出的视频文件名集合（其中的文件不再检查是否存在）
+            
+        返回:
+            list: 被删除记录的文件名
+            
+        说明:
+            - 只处理等待调度的任务（discovered/stable/queued/failed/quarantined），
+              处理中、待清理和等待精修的任务不受影响
+            - 不在列表中的文件再按记录的路径确认确实不存在（目录读取中途失败时不会误删），没有记录路径的任务保留
+            - 隔离的文件已移到隔离目录且仍存在时保留；否则同时删除隔离和失败记录
+            - 文件重新出现时会作为新文件重新发现
+        """
+        jobs = self.status_data.get("jobs", {})
+        quarantine = self.status_data.get("quarantine", {})
+        failures = self.status_data.get("failures", {})
+        busy = [self.status_data["processing"], self.status_data.get("pending_cleanup", {}),
+                {os.path.basename(path) for path in self.status_data.get("refine_queue", [])}]
+        pruned = []
+        for filename, job in list(jobs.items()):
+            if job["state"] not in (DISCOVERED, STABLE, QUEUED, FAILED, QUARANTINED):
+                continue
+            if filename in present_filenames or any(filename in names for names in busy):
+                continue
+            if not job.get("file_path") or os.path.exists(job["file_path"]):
+                continue
+            quarantine_path = quarantine.get(filename, {}).get("quarantine_path")
+            if quarantine_path and os.path.exists(quarantine_path):
+                continue
+            del jobs[filename]
+            quarantine.pop(filename, None)
+            failures.pop(filename, None)
+            pruned.append(filename)
+        if pruned:
+            self._save_status()
+        return pruned
+    
     def _get_current_time(self):
         """
         获取当前时间字符串
@@ -211,7 +802,8 @@ class StatusManager:
         from datetime import datetime
         return datetime.now().strftime("%Y-%m-%d %H:%M:%S")
     
-    def cleanup_stale_processing(self):
+    @_synchronized
+    def cleanup_stale_processing(self, running=()):
         """
         清理异常的处理状态
         
@@ -219,12 +811,16 @@ class StatusManager:
         - 文件不存在（可能已被删除）
         - 处理时间超过2小时（可能卡死或异常退出）
         
+        参数:
+            running: 监控程序正在管理的任务文件名（有进程句柄，不清理）
+        
         返回:
             list: 被清理的文件名列表
             
         说明:
             定期调用此方法可防止状态文件异常累积
             确保系统能够正确恢复异常中断的任务
+            记录的翻译进程仍在运行时不清理（重新排队会重复翻译），真正卡死的任务由卡死检测处理
         """
         from datetime import datetime, timedelta
         import os
@@ -251,10 +847,18 @@ class StatusManager:
                 # 解析时间戳失败或其他异常，标记为过期
                 stale_files.append(filename)
         
+        # 翻译进程仍在运行的任务不清理
+        processing = self.status_data["processing"]
+        stale_files = [filename for filename in stale_files
+                       if filename not in running
+                       and not is_same_process(processing[filename].get("pid"),
+                                               processing[filename].get("pid_start_time"))]
+        
         # 清理过期状态
         for filename in stale_files:
             if filename in self.status_data["processing"]:
                 del self.status_data["processing"][filename]
+                self._set_job_state(filename, STABLE, "清理过期的处理状态")
         
         # 如果有清理操作，保存状态
         if stale_files:
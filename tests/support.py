@@ -0,0 +1,131 @@
+"""
+测试公共工具
+作者：ChiangShenhung
+开发工具：腾讯 Code Buddy CN
+版本：2.0
+设计思路和调试：ChiangShenhung
+
+功能说明：
+- 把仓库根目录加入导入路径，测试可以直接导入各模块
+- FakeClock：可手动推进的时间函数
+- TempDirTestCase：每个测试使用独立的临时目录
+- MonitorTestCase：在临时目录中创建 FileMonitor（关闭显卡检测、显存准入、自动调优、遗留进程扫描、配置热更新），
+  测试结束时终止翻译进程并停止后台线程
+"""
+
+import copy
+import os
+import shutil
+import sys
+import tempfile
+import unittest
+
+REPO_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if REPO_DIR not in sys.path:
+    sys.path.insert(0, REPO_DIR)
+
+from config import CONFIG  # noqa: E402
+from log_pipeline import shutdown_logging  # noqa: E402
+
+FAKE_TRANSLATOR = os.path.join(REPO_DIR, "fake_translator.py")
+
+
+class FakeClock:
+    """可手动推进的时间函数"""
+
+    def __init__(self, now=1000.0):
+        self.now = now
+
+    def __call__(self):
+        return self.now
+
+
+class TempDirTestCase(unittest.TestCase):
+    """每个测试在 self.workdir 临时目录中运行，结束后删除"""
+
+    def setUp(self):
+        self.workdir = tempfile.mkdtemp(prefix="subtitle_test_")
+        self.addCleanup(shutil.rmtree, self.workdir, ignore_errors=True)
+
+    def enter_workdir(self):
+        """切换到临时目录（状态文件、config.json 使用相对路径），测试结束后切换回来"""
+        original_cwd = os.getcwd()
+        os.chdir(self.workdir)
+        self.addCleanup(os.chdir, original_cwd)
+
+    def write_file(self, name, size=1000):
+        """在临时目录中创建指定大小的文件，返回路径"""
+        path = os.path.join(self.workdir, name)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        with open(path, 'wb') as f:
+            f.write(b"x" * size)
+        return path
+
+
+def make_monitor_config(workdir, **overrides):
+    """
+    生成测试用的监控配置
+
+    参数:
+        workdir: 临时目录（下载目录、字幕目录、日志都放在其中）
+        overrides: 覆盖的配置项，值为字典的配置项逐项合并
+
+    返回:
+        dict: 完整配置
+    """
+    config = copy.deepcopy(CONFIG)
+    config.update(DOWNLOAD_DIR=os.path.join(workdir, "downloads"), SUBTITLE_DIR=os.path.join(workdir, "subtitles"),
+                  TRANSLATE_BAT=os.path.join(workdir, "run.bat"), TRANSLATOR_EXE=FAKE_TRANSLATOR,
+                  LOG_FILE=os.path.join(workdir, "monitor.log"), GPU_TYPE="高端独显")
+    for section in ("GPU_DETECTION", "GPU_ADMISSION", "AUTO_TUNE", "ORPHAN_SCAN"):
+        config[section] = dict(config[section], ENABLED=False)
+    config["RUNTIME_CONFIG"] = dict(config["RUNTIME_CONFIG"], WATCH=False)
+    for key, value in overrides.items():
+        if isinstance(value, dict) and isinstance(config.get(key), dict):
+            config[key] = dict(config[key], **value)
+        else:
+            config[key] = value
+    return config
+
+
+class MonitorTestCase(TempDirTestCase):
+    """
+    在临时目录中运行 FileMonitor
+
+    状态文件和 config.json 使用相对路径，测试期间切换到临时目录，避免影响正式数据
+    """
+
+    def setUp(self):
+        super().setUp()
+        self.download_dir = os.path.join(self.workdir, "downloads")
+        os.makedirs(self.download_dir)
+        self.enter_workdir()
+        original_env = dict(os.environ)
+        self.addCleanup(self._restore_env, original_env)
+        self.monitors = []
+
+    def tearDown(self):
+        for monitor in self.monitors:
+            for process in monitor.processes.values():
+                if process.poll() is None:
+                    process.kill()
+                    process.wait()
+            monitor.stop_background_workers()
+        shutdown_logging()
+        super().tearDown()
+
+    @staticmethod
+    def _restore_env(original_env):
+        os.environ.clear()
+        os.environ.update(original_env)
+
+    def make_monitor(self, **overrides):
+        """创建 FileMonitor，测试结束时自动停止"""
+        from file_monitor import FileMonitor
+        monitor = FileMonitor(make_monitor_config(self.workdir, **overrides))
+        self.monitors.append(monitor)
+        return monitor
+
+    def add_videos(self, count, prefix="video_"):
+        """在下载目录中创建 count 个视频文件，返回路径列表"""
+        return [self.write_file(os.path.join("downloads", f"{prefix}{i}.mp4")) for i in range(count)]
@@ -0,0 +1,50 @@
+"""备份保留配额测试：删除顺序，以及删除失败的文件不计入已释放的空间"""
+
+import os
+import unittest
+
+from support import FakeClock, TempDirTestCase
+from backup_retention import BackupRetention
+
+
+class BackupRetentionTest(TempDirTestCase):
+
+    def setUp(self):
+        super().setUp()
+        self.backup_dir = self.workdir
+        self.clock = FakeClock()
+
+    def make_retention(self, **kwargs):
+        retention = BackupRetention(self.backup_dir, clock=self.clock, **kwargs)
+        for name in ("a.mp4", "b.mp4", "c.mp4"):
+            retention.record(self.write_file(name))
+            self.clock.now += 10
+        return retention
+
+    def test_evicts_oldest_until_under_quota(self):
+        retention = self.make_retention(max_bytes=1500)
+        self.assertEqual(retention.enforce(), ["a.mp4", "b.mp4"])
+        self.assertEqual(retention.total_bytes(), 1000)
+        self.assertTrue(os.path.exists(os.path.join(self.backup_dir, "c.mp4")))
+
+    def test_evicts_expired_backups(self):
+        retention = self.make_retention(max_age_seconds=15)
+        self.assertEqual(retention.enforce(), ["a.mp4", "b.mp4"])
+
+    def test_failed_removal_does_not_count_as_freed(self):
+        retention = self.make_retention(max_bytes=1500)
+        # 把最旧的备份换成同名目录，删除时失败
+        path = os.path.join(self.backup_dir, "a.mp4")
+        os.remove(path)
+        os.mkdir(path)
+        self.assertEqual(retention.enforce(), ["b.mp4", "c.mp4"])
+        self.assertEqual(retention.total_bytes(), 1000)
+
+    def test_limits_evictions_per_pass(self):
+        retention = self.make_retention(max_bytes=1, max_evictions_per_pass=2)
+        self.assertEqual(retention.enforce(), ["a.mp4", "b.mp4"])
+        self.assertEqual(retention.enforce(), ["c.mp4"])
+
+
+if __name__ == "__main__":
+    unittest.main()
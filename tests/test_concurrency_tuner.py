@@ -0,0 +1,50 @@
+"""并发自动调优测试：调优窗口中空闲时间的统计和作废规则"""
+
+import unittest
+
+from support import FakeClock
+from concurrency_tuner import ConcurrencyTuner
+
+
+class ConcurrencyTunerTest(unittest.TestCase):
+
+    def setUp(self):
+        self.clock = FakeClock()
+        self.tuner = ConcurrencyTuner(2, min_tasks=1, max_tasks=4, window_seconds=100, clock=self.clock)
+
+    def run_ticks(self, ticks, idle_every=0, tick_seconds=10):
+        """每轮检查推进 tick_seconds 秒并完成一个60秒的视频；idle_every 轮中有一轮槽位未占满"""
+        result = None
+        for i in range(1, ticks + 1):
+            self.clock.now += tick_seconds
+            self.tuner.record_completion(60)
+            if idle_every and i % idle_every == 0:
+                self.tuner.note_idle()
+            else:
+                result = self.tuner.maybe_adjust() or result
+        return result
+
+    def test_occasional_idle_ticks_keep_window(self):
+        self.assertEqual(self.run_ticks(10, idle_every=3), 3)
+
+    def test_mostly_idle_window_is_discarded(self):
+        for _ in range(9):
+            self.clock.now += 10
+            self.tuner.note_idle()
+        self.clock.now += 10
+        self.tuner.record_completion(60)
+        self.assertIsNone(self.tuner.maybe_adjust())
+        self.assertEqual(self.tuner.current, 2)
+        self.assertEqual(self.tuner._idle_seconds, 0)
+
+    def test_throughput_excludes_idle_time(self):
+        self.clock.now += 30
+        self.tuner.note_idle()
+        self.clock.now += 20
+        self.tuner.maybe_adjust()
+        self.tuner.record_completion(40)
+        self.assertAlmostEqual(self.tuner.throughput(), 2.0)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,76 @@
+"""CPU备用通道调度测试：视频时长在后台探测并记录在状态文件中，两个通道都没有空闲槽位时不再逐个检查视频"""
+
+import os
+import threading
+import time
+import unittest
+from unittest import mock
+
+from support import MonitorTestCase
+import file_monitor
+from lane_scheduler import LANE_CPU
+from status_manager import StatusManager
+
+
+class CpuLaneTest(MonitorTestCase):
+
+    def make_lane_monitor(self, **cpu_lane):
+        return self.make_monitor(CPU_LANE=dict({"ENABLED": True, "MAX_TASKS": 1, "INITIAL_CPU_SPEED": 100.0,
+                                                "ASSUMED_BITRATE_KBPS": 1}, **cpu_lane))
+
+    def wait_for_probes(self, monitor, timeout=5):
+        self.assertTrue(monitor.duration_prober.wait(timeout))
+        monitor._collect_probed_durations()
+
+    def test_probes_duration_off_the_calling_thread(self):
+        video = self.add_videos(1)[0]
+        monitor = self.make_lane_monitor()
+        release = threading.Event()
+        probed_on = []
+
+        def slow_probe(path):
+            probed_on.append(threading.get_ident())
+            release.wait(10)
+            return 42.0
+
+        with mock.patch.object(file_monitor, "probe_media_duration", slow_probe):
+            started = time.monotonic()
+            # ffprobe 尚未返回：按大小估算（1000字节、1kbps 约8秒），不等待
+            self.assertAlmostEqual(monitor._media_duration(video), 8.0)
+            self.assertLess(time.monotonic() - started, 1)
+            release.set()
+            self.wait_for_probes(monitor)
+        self.assertNotIn(threading.get_ident(), probed_on)
+        self.assertEqual(monitor._media_duration(video), 42.0)
+
+    def test_duration_is_cached_in_status_by_size_and_mtime(self):
+        video = self.add_videos(1)[0]
+        monitor = self.make_lane_monitor()
+        with mock.patch.object(file_monitor, "probe_media_duration", return_value=42.0) as probe:
+            # 发现新视频时即提交探测
+            self.assertEqual(monitor.check_new_video_files(), [video])
+            self.wait_for_probes(monitor)
+            stat = os.stat(video)
+            # 重启后从状态文件读取，不再调用 ffprobe
+            self.assertEqual(StatusManager().get_media_duration(video, stat.st_size, stat.st_mtime), 42.0)
+            monitor._duration_cache.clear()
+            self.assertEqual(monitor._media_duration(video), 42.0)
+            self.assertEqual(probe.call_count, 1)
+        # 文件变化后记录失效
+        self.assertIsNone(StatusManager().get_media_duration(video, stat.st_size + 1, stat.st_mtime))
+
+    def test_stops_walking_files_when_no_lane_has_a_slot(self):
+        self.add_videos(5)
+        monitor = self.make_lane_monitor()
+        monitor.max_concurrent_tasks = 0
+        new_video_files = monitor.check_new_video_files()
+        with mock.patch.object(monitor, "_choose_lane", wraps=monitor._choose_lane) as choose_lane:
+            monitor._admit_new_jobs(new_video_files)
+        # 第一个视频占满CPU通道后不再为其余视频选择通道
+        self.assertEqual(choose_lane.call_count, 1)
+        self.assertEqual([entry.get("device") for entry in monitor.status_manager.get_processing_entries().values()],
+                         [LANE_CPU])
+
+
+if __name__ == "__main__":
+    unittest.main()
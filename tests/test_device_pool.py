@@ -0,0 +1,73 @@
+"""多显卡任务分配测试：DevicePool 按负载选择显卡，并按模拟翻译工具的记录文件检查实际分配到的显卡"""
+
+import collections
+import json
+import os
+import time
+import unittest
+
+from support import MonitorTestCase
+from device_pool import DevicePool
+
+
+class DevicePoolTest(unittest.TestCase):
+
+    def test_chooses_least_loaded_device_by_ratio(self):
+        pool = DevicePool([0, 1], {"0": 2, "1": 1})
+        self.assertEqual(pool.choose([]), 0)
+        self.assertEqual(pool.choose([0]), 1)
+        self.assertEqual(pool.choose([0, 1]), 0)
+        self.assertIsNone(pool.choose([0, 1, 0]))
+
+    def test_unlimited_devices_compare_by_count(self):
+        pool = DevicePool([0, 1])
+        self.assertEqual(pool.choose([0, 0, 1]), 1)
+        self.assertEqual(pool.choose([0, 1]), 0)
+
+    def test_ignores_other_assignments(self):
+        pool = DevicePool([0, 1], {0: 1, 1: 1})
+        self.assertEqual(pool.choose([None, "cpu", 0]), 1)
+        self.assertEqual(pool.describe([None, 0]), "GPU0 1/1, GPU1 0/1")
+
+
+class DevicePlacementTest(MonitorTestCase):
+    """启动监控并检查模拟翻译工具记录的 CUDA_VISIBLE_DEVICES"""
+
+    def setUp(self):
+        super().setUp()
+        self.record_file = os.path.join(self.workdir, "record.jsonl")
+        os.environ.update(FAKE_TRANSLATOR_DELAY="3", FAKE_TRANSLATOR_RECORD=self.record_file)
+
+    def read_records(self, count, timeout=15):
+        """等待模拟翻译工具写入 count 条记录"""
+        deadline = time.time() + timeout
+        records = []
+        while time.time() < deadline:
+            if os.path.exists(self.record_file):
+                with open(self.record_file, 'r', encoding='utf-8') as f:
+                    records = [json.loads(line) for line in f if line.strip()]
+                if len(records) >= count:
+                    break
+            time.sleep(0.1)
+        return records
+
+    def test_jobs_are_spread_by_least_load(self):
+        self.add_videos(4)
+        monitor = self.make_monitor(GPU_DEVICES={"DEVICES": [0, 1], "DEVICE_ARG_MODE": "env",
+                                                 "MAX_TASKS_PER_DEVICE": {"0": 2, "1": 1}})
+        monitor.monitor_once()
+
+        records = self.read_records(3)
+        self.assertEqual(len(records), 3)
+        placements = collections.Counter(record["cuda_visible_devices"] for record in records)
+        self.assertEqual(placements, {"0": 2, "1": 1})
+        self.assertTrue(all(record["cuda_device_order"] == "PCI_BUS_ID" for record in records))
+
+        # 两块显卡的槽位都已占满，第4个视频等待
+        entries = monitor.status_manager.get_processing_entries()
+        self.assertEqual(len(entries), 3)
+        self.assertEqual(sorted(entry["device"] for entry in entries.values()), [0, 0, 1])
+
+
+if __name__ == "__main__":
+    unittest.main()
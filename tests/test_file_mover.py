@@ -0,0 +1,117 @@
+"""文件移动测试：跨文件系统分块复制、中断后从 .part 续传，以及大小校验失败时保留原文件"""
+
+import os
+import shutil
+import tempfile
+import unittest
+from unittest import mock
+
+from support import TempDirTestCase
+import file_mover
+from file_mover import move_file, partial_path_for
+
+CHUNK = 64 * 1024
+real_is_same_filesystem = file_mover.is_same_filesystem
+
+
+class MoveFileTest(TempDirTestCase):
+
+    def setUp(self):
+        super().setUp()
+        self.data = os.urandom(5 * CHUNK + 123)
+        self.src = os.path.join(self.workdir, "video.mp4")
+        with open(self.src, 'wb') as f:
+            f.write(self.data)
+        os.utime(self.src, (1000000000, 1000000000))
+        self.backup_dir = os.path.join(self.workdir, "backup")
+        os.makedirs(self.backup_dir)
+        self.dst = os.path.join(self.backup_dir, "video.mp4")
+        self.partial = partial_path_for(self.src, self.backup_dir)
+        # 临时目录在同一文件系统，按跨文件系统处理以走复制路径
+        patcher = mock.patch.object(file_mover, "is_same_filesystem", return_value=False)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        self.offsets = []
+        self.real_copy_range = file_mover._copy_range
+
+    def recording_copy_range(self, fail_after=None):
+        """记录每块复制的起始偏移，复制 fail_after 块后模拟中断"""
+        def copy_range(src_fd, dst_fd, offset, count):
+            if fail_after is not None and len(self.offsets) >= fail_after:
+                raise OSError("模拟复制中断")
+            self.offsets.append(offset)
+            return self.real_copy_range(src_fd, dst_fd, offset, count)
+        return mock.patch.object(file_mover, "_copy_range", copy_range)
+
+    def read(self, path):
+        with open(path, 'rb') as f:
+            return f.read()
+
+    def test_cross_device_copy(self):
+        progress = []
+        with self.recording_copy_range():
+            method = move_file(self.src, self.dst, chunk_size=CHUNK,
+                               progress_callback=lambda copied, total: progress.append(copied),
+                               progress_interval=0)
+        self.assertEqual(method, "copy")
+        self.assertEqual(self.read(self.dst), self.data)
+        self.assertFalse(os.path.exists(self.src))
+        self.assertFalse(os.path.exists(self.partial))
+        self.assertEqual(os.path.getmtime(self.dst), 1000000000)
+        self.assertEqual(len(self.offsets), 6)
+        self.assertEqual(progress[-1], len(self.data))
+
+    @unittest.skipUnless(os.path.isdir("/dev/shm"), "需要 /dev/shm")
+    def test_real_cross_device_copy(self):
+        shm_dir = tempfile.mkdtemp(dir="/dev/shm")
+        self.addCleanup(shutil.rmtree, shm_dir, ignore_errors=True)
+        if os.stat(shm_dir).st_dev == os.stat(self.workdir).st_dev:
+            self.skipTest("/dev/shm 与临时目录在同一文件系统")
+        dst = os.path.join(shm_dir, "video.mp4")
+        with mock.patch.object(file_mover, "is_same_filesystem", real_is_same_filesystem):
+            self.assertEqual(move_file(self.src, dst, chunk_size=CHUNK), "copy")
+        self.assertEqual(self.read(dst), self.data)
+        self.assertFalse(os.path.exists(self.src))
+
+    def test_resumes_interrupted_copy_from_partial_file(self):
+        with self.recording_copy_range(fail_after=2), self.assertRaises(OSError):
+            move_file(self.src, self.dst, chunk_size=CHUNK)
+        # 中断后原文件保留，已复制的部分留在 .part 中
+        self.assertEqual(self.read(self.src), self.data)
+        self.assertFalse(os.path.exists(self.dst))
+        self.assertEqual(os.path.getsize(self.partial), 2 * CHUNK)
+
+        self.offsets = []
+        with self.recording_copy_range():
+            self.assertEqual(move_file(self.src, self.dst, chunk_size=CHUNK), "copy")
+        self.assertEqual(self.offsets[0], 2 * CHUNK, "应从 .part 末尾续传")
+        self.assertEqual(self.read(self.dst), self.data)
+        self.assertFalse(os.path.exists(self.src))
+        self.assertFalse(os.path.exists(self.partial))
+
+    def test_restarts_when_partial_is_larger_than_source(self):
+        with open(self.partial, 'wb') as f:
+            f.write(b"y" * (len(self.data) + 10))
+        with self.recording_copy_range():
+            move_file(self.src, self.dst, chunk_size=CHUNK)
+        self.assertEqual(self.offsets[0], 0)
+        self.assertEqual(self.read(self.dst), self.data)
+
+    def test_size_mismatch_keeps_source(self):
+        def grow_source(src_fd, dst_fd, offset, count):
+            # 复制过程中源文件被追加写入，复制结果与最新大小不一致
+            copied = self.real_copy_range(src_fd, dst_fd, offset, count)
+            if offset == 0:
+                with open(self.src, 'ab') as f:
+                    f.write(b"z" * 100)
+            return copied
+
+        with mock.patch.object(file_mover, "_copy_range", grow_source):
+            with self.assertRaisesRegex(OSError, "大小不一致"):
+                move_file(self.src, self.dst, chunk_size=CHUNK)
+        self.assertEqual(os.path.getsize(self.src), len(self.data) + 100)
+        self.assertFalse(os.path.exists(self.dst))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,147 @@
+"""显卡清单与并发规划测试：nvidia-smi 清单解析，以及通过 FixtureInventory 按显存规划并发"""
+
+import json
+import os
+import sys
+import threading
+import types
+import unittest
+from unittest import mock
+
+from support import TempDirTestCase
+from gpu_inventory import (FixtureInventory, WmiInventory, cuda_devices, parse_nvidia_smi_inventory,
+                           plan_concurrency, suggest_gpu_type)
+from process_table import WmiProcessTable
+
+
+class ParseNvidiaSmiInventoryTest(unittest.TestCase):
+
+    def test_parses_noheader_nounits_output(self):
+        text = ("0, NVIDIA GeForce RTX 4090, 24564, 23000, 551.86, 8.9\n"
+                "1, Tesla T4, 15360, 15000, 551.86, 7.5\n")
+        devices = parse_nvidia_smi_inventory(text)
+        self.assertEqual([device.index for device in devices], [0, 1])
+        self.assertEqual(devices[0].name, "NVIDIA GeForce RTX 4090")
+        self.assertEqual(devices[0].memory_total_mb, 24564)
+        self.assertEqual(devices[1].memory_free_mb, 15000)
+        self.assertEqual(devices[1].compute_capability, "7.5")
+        self.assertEqual(devices[0].driver_version, "551.86")
+        self.assertTrue(all(device.source == "nvidia-smi" for device in devices))
+
+    def test_parses_header_and_units(self):
+        text = ("index, name, memory.total [MiB], memory.free [MiB], driver_version, compute_cap\n"
+                "0, NVIDIA GeForce RTX 3060, 12288 MiB, 11500 MiB, 537.13, 8.6\n")
+        devices = parse_nvidia_smi_inventory(text)
+        self.assertEqual(len(devices), 1)
+        self.assertEqual(devices[0].memory_total_mb, 12288)
+        self.assertEqual(devices[0].memory_free_mb, 11500)
+
+    def test_missing_values_become_none(self):
+        text = "0, NVIDIA GeForce GTX 1060, [N/A], [N/A], 472.12, [N/A]\n"
+        device = parse_nvidia_smi_inventory(text)[0]
+        self.assertIsNone(device.memory_total_mb)
+        self.assertIsNone(device.compute_capability)
+
+    def test_skips_unparsable_lines(self):
+        text = "\nNVIDIA-SMI has failed\nx, bad, 1, 2, 3, 4\n0, GPU, 8192, 8000, 1.0\n"
+        self.assertEqual(parse_nvidia_smi_inventory(text), [])
+
+    def test_legacy_driver_without_compute_cap(self):
+        fields = ["index", "name", "memory.total", "memory.free", "driver_version"]
+        device = parse_nvidia_smi_inventory("0, Quadro P2000, 5120, 5000, 460.89\n", fields)[0]
+        self.assertEqual(device.memory_total_mb, 5120)
+        self.assertIsNone(device.compute_capability)
+
+
+class PlanConcurrencyTest(TempDirTestCase):
+
+    def load_fixture(self, gpus):
+        """写入JSON清单并通过 FixtureInventory 读取"""
+        path = os.path.join(self.workdir, "gpus.json")
+        with open(path, 'w', encoding='utf-8') as f:
+            json.dump({"gpus": gpus}, f)
+        return FixtureInventory(path).probe()
+
+    def test_plans_by_total_memory(self):
+        devices = self.load_fixture([
+            {"index": 0, "name": "NVIDIA GeForce RTX 4090", "memory_total_mb": 24564, "source": "nvidia-smi"},
+            {"index": 1, "name": "Tesla T4", "memory_total_mb": 15360, "source": "nvidia-smi"},
+        ])
+        self.assertEqual(plan_concurrency(devices, job_memory_mb=3000, headroom_mb=512), {0: 8, 1: 4})
+        self.assertEqual(plan_concurrency(devices, job_memory_mb=6000, headroom_mb=0), {0: 4, 1: 2})
+
+    def test_small_card_still_gets_one_task(self):
+        devices = self.load_fixture([{"name": "NVIDIA GeForce GTX 1050", "memory_total_mb": 2048}])
+        self.assertEqual(plan_concurrency(devices, job_memory_mb=3000, headroom_mb=512), {0: 1})
+
+    def test_skips_non_nvidia_and_unknown_memory(self):
+        devices = self.load_fixture([
+            {"index": 0, "name": "Intel(R) UHD Graphics 770", "memory_total_mb": 1024, "source": "wmi"},
+            {"index": 1, "name": "NVIDIA GeForce RTX 3060", "memory_total_mb": 12288, "source": "wmi"},
+            {"index": 2, "name": "NVIDIA GeForce GTX 1060", "source": "nvidia-smi"},
+        ])
+        self.assertEqual(plan_concurrency(devices, job_memory_mb=3000, headroom_mb=512), {1: 3})
+
+    def test_returns_none_without_memory_figures(self):
+        devices = self.load_fixture([{"name": "NVIDIA GeForce GTX 1060"}])
+        self.assertIsNone(plan_concurrency(devices))
+
+    def test_fixture_source_defaults_to_fixture(self):
+        devices = self.load_fixture([{"name": "NVIDIA GeForce RTX 3060", "memory_total_mb": 12288},
+                                     {"index": 1, "name": "Tesla T4", "memory_total_mb": 15360,
+                                      "source": "nvidia-smi"}])
+        self.assertEqual(devices[0].source, "fixture")
+        # 只有 nvidia-smi 的编号可以用作 CUDA 设备编号
+        self.assertEqual([device.index for device in cuda_devices(devices)], [1])
+
+    def test_suggests_highest_tier_within_plan(self):
+        tiers = {"集成显卡": 1, "入门独显": 2, "中端独显": 4, "高端独显": 6, "专业级显卡": 8}
+        self.assertEqual(suggest_gpu_type(5, tiers), "中端独显")
+        self.assertEqual(suggest_gpu_type(12, tiers), "专业级显卡")
+        self.assertEqual(suggest_gpu_type(0, tiers), "集成显卡")
+
+
+if __name__ == "__main__":
+    unittest.main()
+
+
+class WmiThreadingTest(unittest.TestCase):
+    """WMI 连接必须在使用它的线程中建立，且该线程先初始化 COM"""
+
+    def setUp(self):
+        self.events = []
+        pythoncom = types.ModuleType("pythoncom")
+        pythoncom.CoInitialize = lambda: self.events.append(("init", threading.get_ident()))
+        pythoncom.CoUninitialize = lambda: self.events.append(("uninit", threading.get_ident()))
+        wmi = types.ModuleType("wmi")
+        wmi.WMI = self._connect
+        patcher = mock.patch.dict(sys.modules, {"pythoncom": pythoncom, "wmi": wmi})
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def _connect(self):
+        self.events.append(("connect", threading.get_ident()))
+        gpu = types.SimpleNamespace(Name="Intel UHD", AdapterRAM=1024 * 1024 * 1024, DriverVersion="1.0")
+        process = types.SimpleNamespace(ProcessId=os.getpid(), ParentProcessId=1, ExecutablePath="infer.exe",
+                                        CommandLine="")
+        return types.SimpleNamespace(Win32_VideoController=lambda: [gpu],
+                                     Win32_Process=lambda **kwargs: [process])
+
+    def _run_in_thread(self, func):
+        result = []
+        thread = threading.Thread(target=lambda: result.append(func()))
+        thread.start()
+        thread.join()
+        return result[0], thread.ident
+
+    def test_inventory_connects_on_probing_thread(self):
+        devices, ident = self._run_in_thread(WmiInventory().probe)
+        self.assertEqual(devices[0].memory_total_mb, 1024)
+        self.assertEqual(self.events, [("init", ident), ("connect", ident), ("uninit", ident)])
+
+    def test_process_table_connects_on_scanning_thread(self):
+        table = WmiProcessTable(["infer.exe"])
+        self.assertEqual(self.events, [])
+        entries, ident = self._run_in_thread(table.list_processes)
+        self.assertEqual(entries[0].exe, "infer.exe")
+        self.assertEqual(self.events, [("init", ident), ("connect", ident), ("uninit", ident)])
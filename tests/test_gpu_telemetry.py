@@ -0,0 +1,155 @@
+"""显存准入控制测试：通过 FileTelemetry 读取模拟的 nvidia-smi 输出，测试准入判断、OOM退避和显存预估的调整"""
+
+import os
+import unittest
+from unittest import mock
+
+from support import FakeClock, MonitorTestCase, TempDirTestCase
+from gpu_telemetry import AdmissionController, FileTelemetry
+from lane_scheduler import LANE_CPU
+
+
+class AdmissionControllerTest(TempDirTestCase):
+
+    def setUp(self):
+        super().setUp()
+        self.telemetry_file = os.path.join(self.workdir, "telemetry.csv")
+        self.clock = FakeClock()
+        self.write_telemetry(free_mb=10000)
+        self.controller = AdmissionController(FileTelemetry(self.telemetry_file), job_memory_mb=3000,
+                                              headroom_mb=500, max_utilization=95, ramp_seconds=60,
+                                              oom_exit_codes=[3], backoff_seconds=300,
+                                              max_backoff_seconds=900, max_job_memory_mb=4500,
+                                              estimate_decay=0.5, idle_retry_seconds=30, clock=self.clock)
+
+    def write_telemetry(self, free_mb, utilization=50, total_mb=24576):
+        """写入与 nvidia-smi --format=csv,noheader,nounits 相同格式的单卡遥测"""
+        with open(self.telemetry_file, 'w', encoding='utf-8') as f:
+            f.write(f"0, RTX 4090, {utilization}, {total_mb}, {total_mb - free_mb}, {free_mb}\n")
+
+    def test_admits_when_memory_is_sufficient(self):
+        allowed, reason = self.controller.can_admit(running_count=1)
+        self.assertTrue(allowed, reason)
+
+    def test_rejects_when_memory_is_insufficient(self):
+        self.write_telemetry(free_mb=3000)
+        allowed, reason = self.controller.can_admit(running_count=1)
+        self.assertFalse(allowed)
+        self.assertIn("显存不足", reason)
+
+    def test_checks_memory_with_no_running_jobs(self):
+        # 显存被其他程序占用时，即使没有任务运行也不启动
+        self.write_telemetry(free_mb=100)
+        allowed, reason = self.controller.can_admit(running_count=0)
+        self.assertFalse(allowed)
+        self.assertIn("30 秒后重新检查", reason)
+        # 等待期间不重新采样
+        self.write_telemetry(free_mb=10000)
+        self.assertFalse(self.controller.can_admit(running_count=0)[0])
+        self.clock.now += 31
+        self.assertTrue(self.controller.can_admit(running_count=0)[0])
+
+    def test_idle_retry_is_per_device(self):
+        with open(self.telemetry_file, 'w', encoding='utf-8') as f:
+            f.write("0, RTX 4090, 50, 24576, 24476, 100\n"
+                    "1, RTX 4090, 50, 24576, 4576, 20000\n")
+        self.assertFalse(self.controller.can_admit(running_count=0, device=0)[0])
+        self.assertTrue(self.controller.can_admit(running_count=0, device=1)[0])
+
+    def test_missing_telemetry_falls_back_to_static_limit(self):
+        os.remove(self.telemetry_file)
+        allowed, reason = self.controller.can_admit(running_count=5)
+        self.assertTrue(allowed)
+        self.assertIn("遥测不可用", reason)
+
+    def test_rejects_when_utilization_is_too_high(self):
+        self.write_telemetry(free_mb=20000, utilization=99)
+        allowed, reason = self.controller.can_admit(running_count=1)
+        self.assertFalse(allowed)
+        self.assertIn("利用率", reason)
+
+    def test_reserves_memory_for_ramping_jobs(self):
+        # 8000 - 3000（爬升期预留）- 3000 - 500 >= 0，再启动一个后预留不够
+        self.write_telemetry(free_mb=8000)
+        self.controller.record_launch()
+        self.assertTrue(self.controller.can_admit(running_count=1)[0])
+        self.controller.record_launch()
+        self.assertFalse(self.controller.can_admit(running_count=2)[0])
+        # 爬升期结束后显存占用以遥测为准
+        self.clock.now += 61
+        self.assertTrue(self.controller.can_admit(running_count=2)[0])
+
+    def test_oom_exit_backs_off_and_raises_estimate(self):
+        self.assertTrue(self.controller.record_exit(3))
+        self.assertEqual(self.controller.job_memory_mb, 3750)
+        allowed, reason = self.controller.can_admit(running_count=1)
+        self.assertFalse(allowed)
+        self.assertIn("退避", reason)
+        # 没有任务运行时不受退避限制（仍检查显存），避免完全停滞
+        self.assertTrue(self.controller.can_admit(running_count=0)[0])
+
+        self.clock.now += 301
+        self.assertTrue(self.controller.can_admit(running_count=1)[0])
+
+    def test_consecutive_ooms_double_backoff_up_to_limit(self):
+        self.controller.record_exit(3)
+        self.controller.record_exit(3)
+        self.clock.now += 301
+        self.assertFalse(self.controller.can_admit(running_count=1)[0])
+        self.clock.now += 300
+        self.assertTrue(self.controller.can_admit(running_count=1)[0])
+
+        self.controller.record_exit(3)
+        self.clock.now += 899
+        self.assertFalse(self.controller.can_admit(running_count=1)[0])
+        self.clock.now += 2
+        self.assertTrue(self.controller.can_admit(running_count=1)[0])
+
+    def test_successful_exit_resets_backoff_sequence(self):
+        self.controller.record_exit(3)
+        self.assertFalse(self.controller.record_exit(0))
+        self.controller.record_exit(3)
+        self.clock.now += 301
+        self.assertTrue(self.controller.can_admit(running_count=1)[0])
+
+    def test_estimate_is_capped_and_decays_after_success(self):
+        for _ in range(4):
+            self.controller.record_exit(3)
+        self.assertEqual(self.controller.job_memory_mb, 4500)
+        # 每次成功退出，超出初始预估的部分减半
+        self.controller.record_exit(0)
+        self.assertEqual(self.controller.job_memory_mb, 3750)
+        self.controller.record_exit(0)
+        self.assertEqual(self.controller.job_memory_mb, 3375)
+
+    def test_nonzero_exit_with_exhausted_memory_counts_as_oom(self):
+        self.write_telemetry(free_mb=200)
+        self.assertTrue(self.controller.record_exit(1))
+
+        # 按退出时重新采样的显存判断，不使用准入时的旧采样
+        self.controller.can_admit(running_count=1)
+        self.write_telemetry(free_mb=10000)
+        self.assertFalse(self.controller.record_exit(1))
+
+
+
+class ReapExitTest(MonitorTestCase):
+    """回收翻译进程时只把显卡任务的退出码交给准入控制器"""
+
+    def test_cpu_lane_exits_are_not_recorded(self):
+        cpu_video, gpu_video = self.add_videos(2)
+        monitor = self.make_monitor()
+        monitor.admission = mock.Mock()
+        monitor._handle_failed_exit = mock.Mock()
+        monitor.status_manager.mark_as_processing(cpu_video, {"device": LANE_CPU})
+        monitor.status_manager.mark_as_processing(gpu_video, {"device": 0})
+        for video in (cpu_video, gpu_video):
+            monitor.processes[os.path.basename(video)] = mock.Mock(pid=0, reattached=False, **{"poll.return_value": 1})
+
+        monitor._reap_finished_processes()
+        monitor.admission.record_exit.assert_called_once_with(1)
+        self.assertEqual(monitor._handle_failed_exit.call_count, 2)
+
+
+if __name__ == "__main__":
+    unittest.main()
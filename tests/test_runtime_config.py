@@ -0,0 +1,201 @@
+"""运行时配置测试：无效修改被拒绝并保留原配置，立即生效与需要重启的配置项，以及先写临时文件再替换的保存方式"""
+
+import json
+import os
+import unittest
+from unittest import mock
+
+from support import FakeClock, MonitorTestCase, TempDirTestCase
+from config import DEFAULT_CONFIG
+import runtime_config
+from runtime_config import (ConfigError, ConfigWatcher, diff_config, load_runtime_config, merge_config,
+                            update_runtime_config, validate_config)
+from file_monitor import is_live_config_key
+
+
+class RuntimeConfigTestCase(TempDirTestCase):
+
+    def setUp(self):
+        super().setUp()
+        self.path = os.path.join(self.workdir, "config.json")
+
+    def write_overrides(self, overrides):
+        with open(self.path, 'w', encoding='utf-8') as f:
+            if isinstance(overrides, str):
+                f.write(overrides)
+            else:
+                json.dump(overrides, f)
+
+    def read_overrides(self):
+        with open(self.path, 'r', encoding='utf-8') as f:
+            return json.load(f)
+
+
+class ValidateConfigTest(unittest.TestCase):
+
+    def assert_rejected(self, overrides, message):
+        with self.assertRaises(ConfigError) as context:
+            validate_config(merge_config(DEFAULT_CONFIG, overrides), DEFAULT_CONFIG)
+        self.assertTrue(any(message in error for error in context.exception.errors), context.exception.errors)
+
+    def test_defaults_are_valid(self):
+        validate_config(merge_config(DEFAULT_CONFIG, {}), DEFAULT_CONFIG)
+
+    def test_rejects_invalid_values(self):
+        self.assert_rejected({"CHECK_INTERVAL": 0}, "CHECK_INTERVAL 必须大于0")
+        self.assert_rejected({"GPU_ADMISSION": {"MEMORY_HEADROOM_MB": -1}}, "不能为负数")
+        self.assert_rejected({"GPU_ADMISSION": {"ESTIMATE_DECAY": 1.5}}, "不能大于1")
+        self.assert_rejected({"DELETE_MODE": "shred"}, "DELETE_MODE")
+        self.assert_rejected({"CHECK_INTERVAL": "10"}, "应为数字")
+        self.assert_rejected({"BACKUP": {"CHUNK_MBS": 64}}, "未知的配置项 BACKUP.CHUNK_MBS")
+
+    def test_ignores_retired_keys(self):
+        validate_config(merge_config(DEFAULT_CONFIG, {"BACKUP": {"HARDLINK": True}}), DEFAULT_CONFIG)
+
+
+class LoadRuntimeConfigTest(RuntimeConfigTestCase):
+
+    def test_merges_valid_overrides(self):
+        self.write_overrides({"CHECK_INTERVAL": 5, "RETRY": {"MAX_FAILURES": 2}})
+        config = load_runtime_config(DEFAULT_CONFIG, self.path)
+        self.assertEqual(config["CHECK_INTERVAL"], 5)
+        self.assertEqual(config["RETRY"]["MAX_FAILURES"], 2)
+        self.assertEqual(config["RETRY"]["BASE_DELAY_SECONDS"], DEFAULT_CONFIG["RETRY"]["BASE_DELAY_SECONDS"])
+
+    def test_invalid_file_falls_back_to_defaults(self):
+        for overrides in ({"CHECK_INTERVAL": 5, "RETRY": {"MAX_FAILURES": -1}}, "{not json", "[1, 2]"):
+            self.write_overrides(overrides)
+            with self.assertLogs(level="WARNING"):
+                config = load_runtime_config(DEFAULT_CONFIG, self.path)
+            # 整份修改被拒绝，合法的 CHECK_INTERVAL 也不生效
+            self.assertEqual(config, DEFAULT_CONFIG)
+            self.assertIsNot(config, DEFAULT_CONFIG)
+
+
+class ConfigWatcherTest(RuntimeConfigTestCase):
+
+    def make_watcher(self, **kwargs):
+        self.clock = FakeClock()
+        return ConfigWatcher(DEFAULT_CONFIG, self.path, interval_seconds=2, clock=self.clock, **kwargs)
+
+    def test_reports_changed_keys(self):
+        watcher = self.make_watcher()
+        self.write_overrides({"CHECK_INTERVAL": 5, "RETRY": {"MAX_FAILURES": 2}})
+        # 检查间隔内不读取文件
+        self.assertIsNone(watcher.poll())
+        self.clock.now += 2
+        config, changed = watcher.poll()
+        self.assertEqual(sorted(changed), ["CHECK_INTERVAL", "RETRY.MAX_FAILURES"])
+        self.assertIs(watcher.current, config)
+        self.clock.now += 2
+        self.assertIsNone(watcher.poll(), "文件没有变化时不重新读取")
+
+    def test_invalid_change_keeps_previous_config(self):
+        watcher = self.make_watcher()
+        self.write_overrides({"CHECK_INTERVAL": 5})
+        previous, _ = watcher.poll(force=True)
+
+        self.write_overrides({"CHECK_INTERVAL": 0, "DELETE_MODE": "delete"})
+        with self.assertLogs("runtime_config", level="ERROR"):
+            self.assertIsNone(watcher.poll(force=True))
+        self.assertIs(watcher.current, previous)
+        self.assertEqual(watcher.current["DELETE_MODE"], DEFAULT_CONFIG["DELETE_MODE"])
+
+        self.write_overrides({"CHECK_INTERVAL": 7})
+        config, changed = watcher.poll(force=True)
+        self.assertEqual(changed, ["CHECK_INTERVAL"])
+
+    def test_validator_can_reject_change(self):
+        watcher = self.make_watcher(validator=lambda new, old: ["不允许修改"] if new["CHECK_INTERVAL"] > 60 else [])
+        self.write_overrides({"CHECK_INTERVAL": 120})
+        with self.assertLogs("runtime_config", level="ERROR"):
+            self.assertIsNone(watcher.poll(force=True))
+        self.assertEqual(watcher.current["CHECK_INTERVAL"], DEFAULT_CONFIG["CHECK_INTERVAL"])
+
+
+class UpdateRuntimeConfigTest(RuntimeConfigTestCase):
+
+    def test_writes_only_overrides_and_merges_existing(self):
+        self.write_overrides({"CHECK_INTERVAL": 5})
+        config = update_runtime_config({"RETRY": {"MAX_FAILURES": 2}}, DEFAULT_CONFIG, self.path)
+        self.assertEqual(self.read_overrides(), {"CHECK_INTERVAL": 5, "RETRY": {"MAX_FAILURES": 2}})
+        self.assertEqual(config["CHECK_INTERVAL"], 5)
+        self.assertFalse(os.path.exists(self.path + ".tmp"))
+
+    def test_invalid_update_leaves_file_unchanged(self):
+        self.write_overrides({"CHECK_INTERVAL": 5})
+        with self.assertRaises(ConfigError):
+            update_runtime_config({"CHECK_INTERVAL": -1}, DEFAULT_CONFIG, self.path)
+        self.assertEqual(self.read_overrides(), {"CHECK_INTERVAL": 5})
+        self.assertFalse(os.path.exists(self.path + ".tmp"))
+
+    def test_replaces_file_only_after_temp_file_is_complete(self):
+        self.write_overrides({"CHECK_INTERVAL": 5})
+        real_replace = os.replace
+        seen = []
+
+        def checking_replace(src, dst):
+            # 替换前原文件保持原样，临时文件已是完整的新内容
+            with open(src, 'r', encoding='utf-8') as f:
+                seen.append((self.read_overrides(), json.load(f)))
+            real_replace(src, dst)
+
+        with mock.patch.object(runtime_config.os, "replace", checking_replace):
+            update_runtime_config({"CHECK_INTERVAL": 8}, DEFAULT_CONFIG, self.path)
+        self.assertEqual(seen, [({"CHECK_INTERVAL": 5}, {"CHECK_INTERVAL": 8})])
+        self.assertEqual(self.read_overrides(), {"CHECK_INTERVAL": 8})
+
+    def test_failed_replace_keeps_original(self):
+        self.write_overrides({"CHECK_INTERVAL": 5})
+        with mock.patch.object(runtime_config.os, "replace", side_effect=OSError("磁盘已满")):
+            with self.assertRaises(OSError):
+                update_runtime_config({"CHECK_INTERVAL": 8}, DEFAULT_CONFIG, self.path)
+        self.assertEqual(self.read_overrides(), {"CHECK_INTERVAL": 5})
+
+    def test_regenerates_corrupted_file(self):
+        self.write_overrides("{not json")
+        with self.assertLogs(level="WARNING"):
+            update_runtime_config({"CHECK_INTERVAL": 8}, DEFAULT_CONFIG, self.path)
+        self.assertEqual(self.read_overrides(), {"CHECK_INTERVAL": 8})
+
+
+class ApplyConfigTest(MonitorTestCase):
+
+    def test_live_and_restart_only_keys(self):
+        self.assertTrue(is_live_config_key("CHECK_INTERVAL"))
+        self.assertTrue(is_live_config_key("RETRY.MAX_FAILURES"))
+        self.assertFalse(is_live_config_key("DOWNLOAD_DIR"))
+        self.assertFalse(is_live_config_key("CPU_LANE.MAX_TASKS"))
+
+        monitor = self.make_monitor()
+        config = merge_config(monitor.config, {
+            "CHECK_INTERVAL": 3, "RETRY": {"MAX_FAILURES": 2}, "DELETE_MODE": "delete",
+            "DOWNLOAD_DIR": os.path.join(self.workdir, "elsewhere"), "CPU_LANE": {"MAX_TASKS": 4},
+        })
+        changed = diff_config(monitor.config, config)
+        with self.assertLogs("file_monitor", level="WARNING") as logs:
+            monitor.apply_config(config, changed)
+
+        # 立即生效
+        self.assertEqual(monitor.check_interval, 3)
+        self.assertEqual(monitor.max_failures, 2)
+        self.assertEqual(monitor.delete_mode, "delete")
+        # 需要重启：运行中的值不变，警告中列出
+        self.assertEqual(monitor.download_dir, self.download_dir)
+        warning = "\n".join(logs.output)
+        self.assertIn("DOWNLOAD_DIR", warning)
+        self.assertIn("CPU_LANE.MAX_TASKS", warning)
+        self.assertNotIn("CHECK_INTERVAL", warning)
+
+    def test_reload_applies_config_file_changes(self):
+        monitor = self.make_monitor(RUNTIME_CONFIG={"WATCH": True})
+        monitor.config_watcher.interval_seconds = 0
+        self.assertFalse(monitor.reload_config())
+        with open("config.json", 'w', encoding='utf-8') as f:
+            json.dump({"CHECK_INTERVAL": 4}, f)
+        self.assertTrue(monitor.reload_config())
+        self.assertEqual(monitor.check_interval, 4)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,143 @@
+"""状态管理测试：过期处理状态的清理不影响翻译进程仍在运行的任务；源文件不存在的任务记录清理和历史长度上限；命令行管理隔离文件不启动监控器"""
+
+import argparse
+import io
+import os
+import subprocess
+import sys
+import threading
+import time
+import unittest
+from contextlib import redirect_stdout
+from unittest import mock
+
+from support import TempDirTestCase
+from config import CONFIG
+from job_state import QUEUED, RUNNING, STABLE
+from process_info import get_process_start_time
+from status_manager import StatusManager
+import main
+
+
+class CleanupStaleProcessingTest(TempDirTestCase):
+
+    def setUp(self):
+        super().setUp()
+        self.enter_workdir()
+        self.manager = StatusManager()
+
+    def add_old_entry(self, name, **extra):
+        """登记一个3小时前开始的处理中任务"""
+        path = self.write_file(name)
+        self.manager.mark_as_processing(path, extra)
+        started = time.strftime("%Y-%m-%d %H:%M:%S", time.localtime(time.time() - 3 * 3600))
+        self.manager.status_data["processing"][name]["start_time"] = started
+        self.manager._save_status()
+        return path
+
+    def test_keeps_entries_whose_translator_is_alive(self):
+        pid = os.getpid()
+        self.add_old_entry("alive.mp4", pid=pid, pid_start_time=get_process_start_time(pid))
+        self.assertEqual(self.manager.cleanup_stale_processing(), [])
+        self.assertEqual(self.manager.get_job_state("alive.mp4"), RUNNING)
+
+    def test_keeps_entries_managed_by_the_monitor(self):
+        self.add_old_entry("managed.mp4")
+        self.assertEqual(self.manager.cleanup_stale_processing(running={"managed.mp4": None}), [])
+
+    def test_requeues_entries_whose_translator_exited(self):
+        process = subprocess.Popen([sys.executable, "-c", "pass"])
+        process.wait()
+        self.add_old_entry("dead.mp4", pid=process.pid, pid_start_time=time.time() - 3 * 3600)
+        self.add_old_entry("legacy.mp4")
+        self.assertEqual(sorted(self.manager.cleanup_stale_processing()), ["dead.mp4", "legacy.mp4"])
+        self.assertEqual(self.manager.get_job_state("dead.mp4"), STABLE)
+        self.assertFalse(self.manager.is_file_processing("dead.mp4"))
+
+
+
+class PruneJobsTest(TempDirTestCase):
+
+    def setUp(self):
+        super().setUp()
+        self.enter_workdir()
+        self.manager = StatusManager()
+
+    def add_job(self, name, state=STABLE):
+        path = self.write_file(name)
+        self.manager.set_job_state(path, state)
+        return path
+
+    def test_prunes_jobs_whose_source_is_gone(self):
+        deleted = self.add_job("deleted.mp4")
+        failed = self.add_job("failed.mp4")
+        self.manager.record_failure(failed, "翻译失败", retry_delay=60)
+        kept = self.add_job("unlisted_but_present.mp4")
+        running = self.add_job("running.mp4")
+        self.manager.mark_as_processing(running)
+        for path in (deleted, failed, running):
+            os.remove(path)
+
+        pruned = self.manager.prune_missing_jobs(set())
+        self.assertEqual(sorted(pruned), ["deleted.mp4", "failed.mp4"])
+        self.assertIsNone(self.manager.get_failure(failed))
+        self.assertEqual(self.manager.get_job_state(kept), STABLE)
+        self.assertIsNotNone(self.manager.get_job_state(running))
+        # 重新加载后记录仍然不存在
+        self.assertIsNone(StatusManager().get_job_state(deleted))
+
+    def test_keeps_quarantined_jobs_while_quarantined_copy_exists(self):
+        moved = os.path.join(self.workdir, "moved.mp4")
+        moved_copy = self.write_file(os.path.join("quarantine", "moved.mp4"))
+        self.manager.quarantine_file(moved, "翻译失败", "sig", moved_copy)
+        lost = os.path.join(self.workdir, "lost.mp4")
+        self.manager.quarantine_file(lost, "翻译失败", "sig", os.path.join(self.workdir, "quarantine", "lost.mp4"))
+
+        self.assertEqual(self.manager.prune_missing_jobs(set()), ["lost.mp4"])
+        self.assertEqual(list(self.manager.get_quarantined_files()), ["moved.mp4"])
+
+    def test_history_is_capped(self):
+        with mock.patch.dict(CONFIG["JOBS"], MAX_HISTORY=3):
+            manager = StatusManager()
+            path = self.write_file("video.mp4")
+            for state in (STABLE, QUEUED, STABLE, QUEUED, STABLE):
+                manager.set_job_state(path, state)
+            history = manager.status_data["jobs"]["video.mp4"]["history"]
+            self.assertEqual([entry["state"] for entry in history], [STABLE, QUEUED, STABLE])
+
+        manager.status_data["jobs"]["video.mp4"]["history"] *= 4
+        manager._save_status()
+        with mock.patch.dict(CONFIG["JOBS"], MAX_HISTORY=2):
+            # 旧状态文件中的长历史在加载时截断
+            self.assertEqual(len(StatusManager().status_data["jobs"]["video.mp4"]["history"]), 2)
+
+
+class ManageQuarantineTest(TempDirTestCase):
+
+    def setUp(self):
+        super().setUp()
+        self.enter_workdir()
+
+    def run_command(self, list_quarantine=False, release=None):
+        output = io.StringIO()
+        threads = threading.active_count()
+        with redirect_stdout(output):
+            main.manage_quarantine(argparse.Namespace(list_quarantine=list_quarantine, release=release))
+        self.assertEqual(threading.active_count(), threads, "不应启动任何后台线程")
+        return output.getvalue()
+
+    def test_lists_and_releases_without_monitor(self):
+        source = os.path.join(self.workdir, "a.mp4")
+        quarantine_path = self.write_file(os.path.join("quarantine", "a.mp4"))
+        StatusManager().quarantine_file(source, "翻译失败", "sig", quarantine_path)
+
+        self.assertIn("a.mp4", self.run_command(list_quarantine=True))
+        self.assertIn("已解除隔离: a.mp4", self.run_command(release=["a.mp4"]))
+        self.assertTrue(os.path.exists(source))
+        self.assertFalse(os.path.exists(quarantine_path))
+        self.assertEqual(StatusManager().get_quarantined_files(), {})
+        self.assertIn("文件不在隔离列表中", self.run_command(release=["a.mp4"]))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,55 @@
+"""图形界面监控控制测试：停止监控后结束本次监控器的全部后台线程，线程刚启动时点击停止也有效"""
+
+import threading
+import unittest
+from unittest import mock
+
+from support import MonitorTestCase, make_monitor_config
+from log_pipeline import setup_logging
+import video_monitor_gui
+from video_monitor_gui import VideoMonitorGUI
+
+
+class StartStopMonitoringTest(MonitorTestCase):
+
+    def make_gui(self, **overrides):
+        """不创建窗口的界面对象，按钮和提示框用 Mock 代替"""
+        gui = VideoMonitorGUI.__new__(VideoMonitorGUI)
+        gui.is_monitoring = False
+        gui.monitor_thread = None
+        gui.monitor_engine = None
+        gui.file_monitor = None
+        gui.config = make_monitor_config(self.workdir, **overrides)
+        gui.start_btn = gui.stop_btn = gui.status_label = mock.Mock()
+        gui.validate_config = lambda: []
+        gui.save_config = lambda: True
+        gui.log = lambda message: None
+        patcher = mock.patch.object(video_monitor_gui, "messagebox")
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        return gui
+
+    def start_and_stop(self, gui, times=3):
+        # 日志管道的后台线程全程只有一个，先启动，不计入监控器的线程
+        setup_logging(gui.config["LOG_FILE"], console=False)
+        threads = threading.active_count()
+        for _ in range(times):
+            gui.start_monitoring()
+            self.monitors.append(gui.file_monitor)
+            # 不等待监控线程进入循环，立即停止
+            gui.stop_monitoring()
+            gui.monitor_thread.join(timeout=15)
+            self.assertFalse(gui.monitor_thread.is_alive(), "停止后监控线程应退出")
+        self.assertEqual(threading.active_count(), threads, "停止后不应残留后台线程")
+        self.assertIsNone(gui.monitor_engine)
+
+    def test_async_engine_stops_workers(self):
+        self.add_videos(1)
+        self.start_and_stop(self.make_gui())
+
+    def test_polling_loop_stops_workers(self):
+        self.start_and_stop(self.make_gui(ASYNC_ENGINE={"ENABLED": False}, CHECK_INTERVAL=0.1), times=1)
+
+
+if __name__ == "__main__":
+    unittest.main()
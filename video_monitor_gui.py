@@ -18,9 +18,10 @@ import time
 from datetime import datetime
 
 # 导入现有模块
-from config import CONFIG
-from file_monitor import FileMonitor, detect_gpu_type
+from config import CONFIG, DEFAULT_CONFIG
+from runtime_config import update_runtime_config, ConfigError
 from status_manager import StatusManager
+from job_state import STABLE
 
 class VideoMonitorGUI:
     """
@@ -41,13 +42,14 @@ class VideoMonitorGUI:
         初始化流程：
         1. 创建主窗口和基本配置
         2. 加载当前配置
-        3. 显示显卡检测信息
-        4. 设置界面布局
+        3. 设置界面布局
+        4. 在后台检测显卡，窗口显示后再提示检测结果
         5. 启动GUI更新循环
         """
         # 监控状态变量
         self.is_monitoring = False
         self.monitor_thread = None
+        self.monitor_engine = None
         self.file_monitor = None
         
         # 创建主窗口
@@ -65,15 +67,15 @@ class VideoMonitorGUI:
         # 加载配置
         self.config = CONFIG.copy()
         
-        # 显示显卡检测提示（帮助用户选择合适的显卡类型）
-        self.show_gpu_detection_info()
-        
         # 设置界面布局
         self.setup_layout()
         
         # 加载当前配置到界面控件
         self.load_current_config()
         
+        # 后台检测显卡（帮助用户选择合适的显卡类型），不阻塞窗口显示
+        self.start_gpu_detection()
+        
         # 初始化状态管理器
         self.status_manager = StatusManager()
         
@@ -83,93 +85,97 @@ class VideoMonitorGUI:
         
     def get_detailed_gpu_info(self):
         """
-        获取详细的显卡硬件信息
+        获取结构化的显卡清单
         
-        使用WMI接口查询系统显卡信息，包括：
-        - 显卡型号名称
-        - 显存大小
-        - 驱动版本
-        - 视频处理器信息
+        显卡信息包括：
+        - 显卡编号和型号名称
+        - 总显存和可用显存
+        - 计算能力和驱动版本
         
         返回:
-            list: 显卡信息字典列表，如果获取失败返回None
+            list: GpuDevice 列表，如果获取失败返回None
             
-        异常处理:
-            - 如果WMI模块不可用，返回None
-            - 如果查询过程出错，返回None
+        说明:
+            与监控程序共用同一份检测结果，驱动和设备未变化时直接读取磁盘缓存
         """
+        from gpu_inventory import get_gpu_inventory
+        return get_gpu_inventory(self.config.get("GPU_DETECTION", {}))
+    
+    def start_gpu_detection(self):
+        """在后台线程检测显卡，窗口先显示出来，检测完成后再显示结果"""
+        self._gpu_detection_result = None
+        threading.Thread(target=self._run_gpu_detection, name="gpu-detection", daemon=True).start()
+        self.root.after(200, self._poll_gpu_detection)
+    
+    def _run_gpu_detection(self):
+        """后台线程：获取显卡清单并按显存给出建议的显卡类型（不直接操作界面控件）"""
         try:
-            import wmi
-            c = wmi.WMI()
-            
-            # 查询显卡控制器信息
-            gpus = c.Win32_VideoController()
-            if not gpus:
-                return None
-            
-            gpu_info = []
-            for gpu in gpus:
-                info = {
-                    'name': getattr(gpu, 'Name', '未知'),
-                    'adapter_ram': getattr(gpu, 'AdapterRAM', 0),
-                    'driver_version': getattr(gpu, 'DriverVersion', '未知'),
-                    'video_processor': getattr(gpu, 'VideoProcessor', '未知')
-                }
-                gpu_info.append(info)
-            
-            return gpu_info
-            
+            from gpu_inventory import plan_concurrency, suggest_gpu_type
+            gpu_info = self.get_detailed_gpu_info()
+            admission_config = self.config.get("GPU_ADMISSION", {})
+            plan = plan_concurrency(gpu_info or [],
+                                    job_memory_mb=admission_config.get("JOB_MEMORY_MB", 3000),
+                                    headroom_mb=admission_config.get("MEMORY_HEADROOM_MB", 512))
+            detected_type = None
+            if plan:
+                detected_type = suggest_gpu_type(sum(plan.values()),
+                                                 self.config["GPU_DETECTION"]["MAX_TASKS_BY_GPU_TYPE"])
+            self._gpu_detection_result = (gpu_info, detected_type, None)
         except Exception as e:
-            return None
+            self._gpu_detection_result = (None, None, e)
+    
+    def _poll_gpu_detection(self):
+        """主线程：等待后台检测完成后显示结果"""
+        if self._gpu_detection_result is None:
+            self.root.after(200, self._poll_gpu_detection)
+            return
+        self.show_gpu_detection_info(*self._gpu_detection_result)
     
-    def show_gpu_detection_info(self):
+    def show_gpu_detection_info(self, gpu_info, detected_type, error=None):
         """
-        显示显卡检测信息对话框
+        显示显卡检测信息
+        
+        参数:
+            gpu_info: GpuDevice 列表，检测失败时为None
+            detected_type: 按显存建议的显卡类型，没有显存信息时为None
+            error: 检测过程中的异常
         
         功能:
-        - 获取系统显卡详细信息
-        - 检测显卡性能等级
-        - 显示检测结果和建议
-        - 提供使用建议和警告
+        - 把显卡清单和建议的显卡类型写入日志区域
+        - 建议的显卡类型与当前选择不同时弹出提示，说明选择对性能的影响
         
         异常处理:
         - 如果检测失败，显示警告信息并提示手动选择
-        - 确保用户了解显卡选择对性能的影响
         """
-        try:
-            # 获取详细显卡信息
-            gpu_info = self.get_detailed_gpu_info()
-            if not gpu_info:
-                return
-            
-            # 检测显卡类型
-            detected_type = detect_gpu_type()
-            
-            # 构建提示信息
-            message = "显卡检测信息：\n\n"
-            for i, gpu in enumerate(gpu_info):
-                message += f"显卡 {i+1}:\n"
-                message += f"  型号: {gpu['name']}\n"
-                if gpu['adapter_ram']:
-                    ram_gb = gpu['adapter_ram'] / (1024**3)
-                    message += f"  显存: {ram_gb:.1f} GB\n"
-                if gpu['driver_version'] != '未知':
-                    message += f"  驱动版本: {gpu['driver_version']}\n"
-                message += "\n"
-            
-            message += f"检测到的显卡类型: {detected_type}\n"
-            message += f"建议选择: {detected_type}\n\n"
-            message += "您可以在\"显卡类型\"设置中选择其他选项，但请注意：\n"
-            message += "• 选择高于检测结果的类型可能导致性能问题\n"
-            message += "• 选择低于检测结果的类型会限制并发任务数量\n"
-            
-            # 显示提示框
-            messagebox.showinfo("显卡检测信息", message)
-            
-        except Exception as e:
-            # 如果检测失败，显示错误信息
-            messagebox.showwarning("显卡检测", f"无法检测显卡信息: {e}\n\n请手动选择合适的显卡类型。")
+        if error is not None:
+            messagebox.showwarning("显卡检测", f"无法检测显卡信息: {error}\n\n请手动选择合适的显卡类型。")
+            return
+        if not gpu_info:
+            self.log("未检测到显卡信息，请手动选择显卡类型")
+            return
         
+        from gpu_inventory import describe_device
+        for device in gpu_info:
+            self.log(f"检测到显卡: {describe_device(device)}")
+        if detected_type is None:
+            self.log("未获取到显存信息，按所选显卡类型控制并发任务数")
+            return
+        self.log(f"按显存建议的显卡类型: {detected_type}")
+        if detected_type == self.gpu_type_var.get():
+            return
+        
+        # 构建提示信息
+        message = "显卡检测信息：\n\n"
+        for device in gpu_info:
+            message += describe_device(device) + "\n"
+        message += f"\n按显存建议选择: {detected_type}\n\n"
+        message += "检测到显存信息时，监控程序按显存规划并发任务数，\"显卡类型\"设置只在无法获取显存时使用。\n"
+        message += "• 选择高于建议的类型可能导致显存不足\n"
+        message += "• 选择低于建议的类型会限制并发任务数量\n"
+        
+        # 显示提示框
+        messagebox.showinfo("显卡检测信息", message)
+    
     def setup_layout(self):
         """
         设置GUI界面布局
@@ -416,37 +422,38 @@ class VideoMonitorGUI:
         return errors
     
     def save_config(self):
-        """保存配置到文件"""
+        """
+        保存配置到 config.json（只写入界面上的配置项，其他配置项保持不变）
+        
+        返回:
+            bool: 是否保存成功
+            
+        说明:
+            监控运行中保存时，监控程序会自动应用可以立即生效的修改（并发数、清理方式等）
+        """
         errors = self.validate_config()
         if errors:
             messagebox.showerror("配置错误", "\n".join(errors))
-            return
+            return False
         
         try:
-            # 更新配置
-            self.config.update({
+            self.config = update_runtime_config({
                 "DOWNLOAD_DIR": self.download_dir_var.get().strip(),
                 "TRANSLATE_BAT": self.translate_bat_var.get().strip(),
                 "SUBTITLE_DIR": self.subtitle_dir_var.get().strip(),
                 "DELETE_MODE": self.delete_mode_var.get(),
                 "GPU_TYPE": self.gpu_type_var.get()
-            })
-            
-            # 保存到配置文件
-            with open('config.py', 'w', encoding='utf-8') as f:
-                f.write("# 配置文件\n")
-                import json
-                # 确保布尔值保持正确格式
-                config_str = json.dumps(self.config, ensure_ascii=False, indent=4)
-                # 将JSON中的布尔值转换为Python布尔值
-                config_str = config_str.replace(': true', ': True').replace(': false', ': False')
-                f.write("CONFIG = " + config_str) 
-            
-            messagebox.showinfo("成功", "配置已保存成功！")
-            self.log("配置已保存")
-            
+            }, DEFAULT_CONFIG)
+        except ConfigError as e:
+            messagebox.showerror("配置错误", "\n".join(e.errors))
+            return False
         except Exception as e:
             messagebox.showerror("错误", f"保存配置失败: {e}")
+            return False
+        
+        messagebox.showinfo("成功", "配置已保存成功！")
+        self.log("配置已保存")
+        return True
     
     def start_monitoring(self):
         """开始监控"""
@@ -458,18 +465,20 @@ class VideoMonitorGUI:
         if self.is_monitoring:
             messagebox.showwarning("警告", "监控已在运行中")
             return
+        if self.monitor_thread and self.monitor_thread.is_alive():
+            messagebox.showwarning("警告", "上次的监控仍在停止中，请稍后再试")
+            return
         
         try:
             # 保存配置
-            self.save_config()
-            
-            # 重新加载配置模块
-            import importlib
-            import config
-            importlib.reload(config)
+            if not self.save_config():
+                return
             
-            # 创建文件监控器，传入当前GUI配置
+            # 创建文件监控器，传入当前GUI配置（监控模块在首次启动监控时才导入）
+            from file_monitor import FileMonitor
             self.file_monitor = FileMonitor(self.config)
+            # 异步引擎在启动线程前创建，监控线程刚启动时点击停止也能停止引擎
+            self.monitor_engine = self.file_monitor.create_async_engine() if self.file_monitor.async_engine_enabled else None
             
             # 启动监控线程
             self.is_monitoring = True
@@ -493,6 +502,8 @@ class VideoMonitorGUI:
             return
         
         self.is_monitoring = False
+        if self.monitor_engine:
+            self.monitor_engine.stop()
         
         # 更新界面状态
         self.start_btn.config(state="normal")
@@ -502,18 +513,34 @@ class VideoMonitorGUI:
         self.log("监控已停止")
     
     def monitor_loop(self):
-        """监控循环（在单独线程中运行）"""
-        while self.is_monitoring:
-            try:
-                # 执行单次监控检查
-                self.file_monitor.monitor_once()
-                
-                # 等待下次检查
-                time.sleep(self.config.get("CHECK_INTERVAL", 10))
-                
-            except Exception as e:
-                self.log(f"监控循环错误: {e}")
-                time.sleep(10)  # 出错后等待10秒
+        """监控循环（在单独线程中运行），结束后停止本次监控器的后台线程"""
+        file_monitor = self.file_monitor
+        engine = self.monitor_engine
+        file_monitor.start_metrics_server()
+        try:
+            if engine:
+                # 异步引擎：事件驱动，停止监控时由 stop_monitoring() 结束
+                try:
+                    engine.run_forever()
+                except Exception as e:
+                    self.log(f"监控循环错误: {e}")
+                return
+            
+            while self.is_monitoring:
+                try:
+                    # 执行单次监控检查
+                    file_monitor.monitor_once()
+                    
+                    # 等待下次检查
+                    time.sleep(file_monitor.check_interval)
+                    
+                except Exception as e:
+                    self.log(f"监控循环错误: {e}")
+                    time.sleep(10)  # 出错后等待10秒
+        finally:
+            if self.monitor_engine is engine:
+                self.monitor_engine = None
+            file_monitor.stop_background_workers()
     
     def update_gui(self):
         """更新GUI状态"""
@@ -522,16 +549,17 @@ class VideoMonitorGUI:
                 # 获取任务统计
                 processing_count = self.status_manager.get_processing_count()
                 processed_count = len(self.status_manager.status_data.get("processed", []))
+                quarantined_count = len(self.status_manager.get_quarantined_files())
                 
-                # 获取待处理文件数
-                if self.file_monitor:
-                    new_files = self.file_monitor.check_new_video_files()
-                    pending_count = len(new_files)
-                else:
-                    pending_count = 0
+                # 获取待处理文件数：只读统计已确认可读、等待调度的任务，不在界面线程中扫描目录或改写任务状态
+                pending_count = self.status_manager.count_jobs_in_state(STABLE)
                 
                 # 更新统计显示
                 stats_text = f"待处理: {pending_count} | 进行中: {processing_count} | 已完成: {processed_count}"
+                if quarantined_count:
+                    stats_text += f" | 已隔离: {quarantined_count}"
+                if self.file_monitor and self.file_monitor.disk_pause_reason:
+                    stats_text += " | 磁盘空间不足，已暂停"
                 self.stats_label.config(text=stats_text)
                 
             except Exception as e: